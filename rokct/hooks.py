@@ -173,8 +173,15 @@ def get_safe_scheduler_events():
 
 	app_role = frappe.conf.get("app_role", "tenant")
 	events = {
-		"all": ["rokct.roadmap.tasks.process_pending_ai_sessions"],
-		"hourly": ["rokct.roadmap.tasks.jules_task_monitor"],
+		"all": [
+			"rokct.roadmap.tasks.process_pending_ai_sessions",
+			"rokct.swagger.api_logger.flush_api_error_buffer",
+			"rokct.rokct.flutter_builder.scheduler.recover_stale_builds",
+		],
+		"hourly": [
+			"rokct.roadmap.tasks.jules_task_monitor",
+			"rokct.rokct.weather.prewarm_weather_cache",
+		],
 		"daily": ["rokct.roadmap.tasks.populate_roadmap_with_ai_ideas"]
 	}
 	if app_role == "control_panel":
@@ -184,6 +191,7 @@ def get_safe_scheduler_events():
 			"rokct.rokct.tasks.manage_daily_tenders",
 			"rokct.rokct.control_panel.tasks.cleanup_failed_provisions",
 		])
+		events["hourly"].append("rokct.rokct.control_panel.site_pool.refill_warm_pool")
 		events["weekly"] = ["rokct.rokct.control_panel.tasks.run_weekly_maintenance"]
 		events["monthly"] = ["rokct.rokct.control_panel.tasks.generate_subscription_invoices"]
 	else:  # tenant
@@ -222,6 +230,10 @@ whitelisted_methods = {
     "rokct.rokct.control_panel.billing.charge_customer_for_addon": "rokct.rokct.control_panel.billing.charge_customer_for_addon",
     "rokct.rokct.control_panel.support.grant_support_access": "rokct.rokct.control_panel.support.grant_support_access",
     "rokct.rokct.control_panel.support.revoke_support_access": "rokct.rokct.control_panel.support.revoke_support_access",
+    "rokct.rokct.control_panel.site_pool.get_warm_pool_metrics": "rokct.rokct.control_panel.site_pool.get_warm_pool_metrics",
+    "rokct.rokct.control_panel.provisioning_state.retry_provisioning": "rokct.rokct.control_panel.provisioning_state.retry_provisioning",
+    "rokct.rokct.control_panel.provisioning_state.get_provisioning_step_latency": "rokct.rokct.control_panel.provisioning_state.get_provisioning_step_latency",
+    "rokct.rokct.tenders.sync.start_tender_backfill": "rokct.rokct.tenders.sync.start_tender_backfill",
 
     # Tenant APIs
     "rokct.rokct.tenant.api.initial_setup": "rokct.rokct.tenant.api.initial_setup",
@@ -233,6 +245,7 @@ whitelisted_methods = {
     "rokct.rokct.tenant.api.record_token_usage": "rokct.rokct.tenant.api.record_token_usage",
     "rokct.rokct.scripts.setup_control_panel.configure_control_panel": "rokct.rokct.scripts.setup_control_panel.configure_control_panel",
     "rokct.rokct.api.get_weather": "rokct.rokct.api.get_weather",
+    "rokct.rokct.tenders.search.search_tenders": "rokct.rokct.tenders.search.search_tenders",
 
     # Brain Module API
     "rokct.brain.api.query": "rokct.brain.api.query",
@@ -276,7 +289,8 @@ ignore_links_on_delete = ["Company Subscription"]
 # Request Events
 # ----------------
 # before_request = ["rokct.rokct.utils.handle_login_redirect"]
-# after_request = ["rokct.utils.after_request"]
+before_request = ["rokct.rokct.endpoint_metrics.before_request"]
+after_request = ["rokct.rokct.endpoint_metrics.after_request"]
 
 # Job Events
 # ----------
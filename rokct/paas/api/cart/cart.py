@@ -118,13 +118,14 @@ def calculate_cart_totals(cart_name: str):
     Helper function to recalculate the total price of a cart.
     """
     cart = frappe.get_doc("Cart", cart_name)
-    total_price = 0
 
-    user_carts = frappe.get_all("User Cart", filters={"cart": cart_name}, fields=["name"])
-    for uc in user_carts:
-        user_cart = frappe.get_doc("User Cart", uc.name)
-        for detail in user_cart.cart_details:
-            total_price += detail.price * detail.quantity
+    # One aggregate over every User Cart of the cart, instead of loading each one.
+    total_price = frappe.db.sql("""
+        SELECT COALESCE(SUM(detail.price * detail.quantity), 0)
+        FROM `tabCart Detail` detail
+        INNER JOIN `tabUser Cart` user_cart ON user_cart.name = detail.parent
+        WHERE detail.parenttype = 'User Cart' AND user_cart.cart = %s
+    """, cart_name)[0][0]
 
     cart.total_price = total_price
     cart.save(ignore_permissions=True)
\ No newline at end of file
@@ -297,10 +297,20 @@ def order_products_calculate(products: list):
     """
     Calculates the total price of a list of products.
     """
+    product_ids = list({product.get("product_id") for product in products})
+    rates = dict(frappe.get_all(
+        "Item",
+        filters={"name": ("in", product_ids)},
+        fields=["name", "standard_rate"],
+        as_list=True
+    )) if product_ids else {}
+
     total_price = 0
     for product in products:
-        item = frappe.get_doc("Item", product.get("product_id"))
-        total_price += item.standard_rate * product.get("quantity", 1)
+        product_id = product.get("product_id")
+        if product_id not in rates:
+            frappe.throw(f"Product {product_id} not found.", frappe.DoesNotExistError)
+        total_price += (rates[product_id] or 0) * product.get("quantity", 1)
     return {"total_price": total_price}
 
 
@@ -1,15 +1,139 @@
 # Copyright (c) 2025 ROKCT Holdings
 # For license information, please see license.txt
+# Seeds a tenant from the legacy Laravel database dumps in `db/`.
+#
+# The import is split into steps, one per entity type. Each step persists its id map and
+# the number of rows it has finished to a checkpoint file after every committed batch, so
+# a failed run can be resumed where it stopped. Steps whose dependencies are done run as
+# parallel background jobs; every finished step dispatches the steps that were waiting on it.
 import frappe
+import itertools
 import os
 import re
 import json
-from frappe.utils import get_site_path, get_bench_path
+import shutil
+import time
+import tracemalloc
+from frappe.utils import get_site_path, get_bench_path, now
+from rokct.paas.sql_dump import iter_file_rows
+
+BATCH_SIZE = 500
+ORDER_BATCH_SIZE = 100
+CHECKPOINT_DIR = ("private", "legacy_seed")
+SEED_STEP_TIMEOUT = 4 * 60 * 60
+# Steps in a valid serial order, with the steps whose id maps they read.
+SEED_STEPS = {
+    "users": [],
+    "shops": [],
+    "brands": [],
+    "categories": [],
+    "units": [],
+    "customers": ["users"],
+    "products": ["brands", "categories"],
+    "stocks": ["products"],
+    "addresses": ["users", "customers"],
+    "orders": ["users", "customers", "shops", "addresses", "stocks"],
+}
+# The seeder attribute holding each step's id map.
+STEP_MAPS = {
+    "users": "user_id_map",
+    "shops": "shop_id_map",
+    "brands": "brand_id_map",
+    "categories": "category_id_map",
+    "units": "unit_id_map",
+    "customers": "customer_map",
+    "products": "product_id_map",
+    "stocks": "stock_id_map",
+    "addresses": "user_address_map",
+    "orders": "sales_order_map",
+}
+# Dumps read by the seeder, as (file name, table).
+SEED_DUMPS = [
+    ("users.sql", "users"),
+    ("shops.sql", "shops"),
+    ("brands.sql", "brands"),
+    ("categories.sql", "categories"),
+    ("units.sql", "units"),
+    ("products.sql", "products"),
+    ("stocks.sql", "stocks"),
+    ("user_addresses.sql", "user_addresses"),
+    ("orders.sql", "orders"),
+    ("order_details.sql", "order_details"),
+]
+
+
+def _batched(rows, size=BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _get_existing(doctype, values, field="name"):
+    """The values of `field` among `values` that already exist, in one query."""
+    values = list({value for value in values if value})
+    if not values:
+        return set()
+    return set(frappe.get_all(doctype, filters={field: ("in", values)}, pluck=field))
+
+
+def _bulk_insert(doctype, name_field, names):
+    """
+    Inserts documents named by their only field in one statement. Only for doctypes without
+    controller logic on insert; names that exist already (in any letter case) are skipped.
+    """
+    if not names:
+        return
+    timestamp = now()
+    user = frappe.session.user
+    frappe.db.bulk_insert(
+        doctype,
+        ["name", name_field, "owner", "modified_by", "creation", "modified"],
+        [(name, name, user, user, timestamp, timestamp) for name in names],
+        ignore_duplicates=True
+    )
+
+
+class SeedCheckpoint:
+    """The state of every seed step, one JSON file per step, so parallel steps never share a file."""
+
+    def __init__(self, root=None):
+        self.root = root or get_site_path(*CHECKPOINT_DIR)
+
+    def _path(self, step):
+        return os.path.join(self.root, f"{step}.json")
+
+    def load(self, step):
+        try:
+            with open(self._path(step)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"status": "Pending", "progress": 0, "map": {}, "error": None}
+
+    def save(self, step, **values):
+        state = self.load(step)
+        state.update(values)
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self._path(step)}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self._path(step))
+        return state
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
 
 class LegacyDataSeeder:
-    def __init__(self, site_name, db_path):
+    def __init__(self, site_name, db_path, checkpoint=None):
         self.site_name = site_name
         self.db_path = db_path
+        self.checkpoint = checkpoint or SeedCheckpoint()
+        self.progress = {}
         self.user_id_map = {}
         self.shop_id_map = {}
         self.brand_id_map = {}
@@ -20,57 +144,36 @@ class LegacyDataSeeder:
         self.orders_map = {}
         self.addresses_to_insert = []
         self.user_address_map = {} # old_id -> new_name
-
-    def _safe_split(self, values_str):
-        # A simple way to handle commas inside quotes
-        values = []
-        in_quote = False
-        current_val = ''
-        i = 0
-        while i < len(values_str):
-            char = values_str[i]
-
-            if char == "'":
-                in_quote = not in_quote
-                current_val += char
-            elif char == ',' and not in_quote:
-                values.append(current_val)
-                current_val = ''
-            else:
-                current_val += char
-            i += 1
-        values.append(current_val)
-        return [self._clean_value(v) for v in values]
-
-
-    def _clean_value(self, value):
-        if value is None:
-            return None
-        value = value.strip()
-        if value == 'NULL':
-            return None
-        if value.startswith("'") and value.endswith("'"):
-            return value[1:-1]
-        return value
+        self.customer_map = {} # email -> customer name
+        self.sales_order_map = {} # old order id -> Sales Order name
+
+    def _checkpointed(self, step, rows, size=BATCH_SIZE):
+        """
+        Yields batches of `rows`, skipping the rows an earlier attempt of `step` finished. After
+        each batch is processed the transaction is committed and the progress and the step's
+        id map are saved.
+        """
+        done = self.progress.get(step, 0)
+        for batch in _batched(itertools.islice(rows, done, None), size):
+            yield batch
+            done += len(batch)
+            frappe.db.commit()
+            self.progress[step] = done
+            self.checkpoint.save(step, progress=done, map=getattr(self, STEP_MAPS[step]))
 
     def _map_user_data(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        insert_statements = re.findall(r"INSERT INTO `users` VALUES \((.*?)\);", content)
-        for statement in insert_statements:
-            values_list = re.findall(r"\((.*?)\)", statement)
-            for values_str in values_list:
+        for batch in self._checkpointed("users", iter_file_rows(file_path, "users")):
+            existing = _get_existing("User", [row[2] for row in batch] + [f"user_{row[0]}@example.com" for row in batch])
+            for parts in batch:
                 try:
-                    parts = self._safe_split(values_str)
                     old_id = parts[0]
-                    name = self._clean_value(parts[1])
-                    email = self._clean_value(parts[2])
-                    phone = self._clean_value(parts[4])
+                    name = parts[1]
+                    email = parts[2]
+                    phone = parts[4]
 
-                    if not email or frappe.db.exists("User", email):
+                    if not email or email in existing:
                         email = f"user_{old_id}@example.com"
-                        if frappe.db.exists("User", email):
+                        if email in existing:
                            self.user_id_map[old_id] = email
                            continue
 
@@ -88,29 +191,25 @@ class LegacyDataSeeder:
                     }
                     self.user_id_map[old_id] = email
                     frappe.get_doc(user_doc).insert(ignore_permissions=True)
+                    existing.add(email)
                     print(f"Inserted User: {email}")
 
                 except Exception as e:
-                    print(f"Error inserting user: {values_str} -> {e}")
+                    print(f"Error inserting user: {parts} -> {e}")
 
     def _map_shop_data(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        insert_statements = re.findall(r"INSERT INTO `shops` VALUES \((.*?)\);", content)
-        for statement in insert_statements:
-            values_list = re.findall(r"\((.*?)\)", statement)
-            for values_str in values_list:
+        for batch in self._checkpointed("shops", iter_file_rows(file_path, "shops")):
+            existing = _get_existing("Company", [f"{row[10]} - {row[0]}" for row in batch if row[10]])
+            for parts in batch:
                 try:
-                    parts = self._safe_split(values_str)
                     old_id = parts[0]
-                    name = self._clean_value(parts[10])
+                    name = parts[10]
 
                     if not name:
                         continue
 
                     company_name = f"{name} - {old_id}"
-                    if frappe.db.exists("Company", company_name):
+                    if company_name in existing:
                         self.shop_id_map[old_id] = company_name
                         continue
 
@@ -122,59 +221,49 @@ class LegacyDataSeeder:
                     }
                     doc = frappe.get_doc(company_doc)
                     doc.insert(ignore_permissions=True)
+                    existing.add(doc.name)
                     self.shop_id_map[old_id] = doc.name
                     print(f"Inserted Company: {doc.name}")
 
                 except Exception as e:
-                    print(f"Error inserting company: {values_str} -> {e}")
+                    print(f"Error inserting company: {parts} -> {e}")
 
     def _map_brand_data(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        insert_statements = re.findall(r"INSERT INTO `brands` VALUES \((.*?)\);", content)
-        for statement in insert_statements:
-            values_list = re.findall(r"\((.*?)\)", statement)
-            for values_str in values_list:
-                try:
-                    parts = self._safe_split(values_str)
-                    old_id = parts[0]
-                    title = self._clean_value(parts[2])
+        for batch in self._checkpointed("brands", iter_file_rows(file_path, "brands")):
+            existing = _get_existing("Brand", [row[2] for row in batch])
+            new_brands = []
+            for parts in batch:
+                old_id = parts[0]
+                title = parts[2]
 
-                    if not title:
-                        continue
+                if not title:
+                    continue
 
-                    if frappe.db.exists("Brand", title):
-                        self.brand_id_map[old_id] = title
-                        continue
+                if title not in existing:
+                    new_brands.append(title)
+                    existing.add(title)
+                self.brand_id_map[old_id] = title
 
-                    brand_doc = {"doctype": "Brand", "brand": title}
-                    doc = frappe.get_doc(brand_doc)
-                    doc.insert(ignore_permissions=True)
-                    self.brand_id_map[old_id] = doc.name
-                    print(f"Inserted Brand: {doc.name}")
-                except Exception as e:
-                    print(f"Error inserting brand: {values_str} -> {e}")
+            try:
+                _bulk_insert("Brand", "brand", new_brands)
+                print(f"Inserted {len(new_brands)} Brands")
+            except Exception as e:
+                print(f"Error inserting brands: {new_brands} -> {e}")
 
     def _map_category_data(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        insert_statements = re.findall(r"INSERT INTO `categories` VALUES \((.*?)\);", content)
-        for statement in insert_statements:
-            values_list = re.findall(r"\((.*?)\)", statement)
-            for values_str in values_list:
+        for batch in self._checkpointed("categories", iter_file_rows(file_path, "categories")):
+            existing = _get_existing("Item Group", [row[2] for row in batch])
+            for parts in batch:
                 try:
-                    parts = self._safe_split(values_str)
                     old_id = parts[0]
-                    title = self._clean_value(parts[2])
+                    title = parts[2]
                     parent_id = parts[4]
 
                     if not title:
                         continue
 
                     item_group_name = title
-                    if frappe.db.exists("Item Group", item_group_name):
+                    if item_group_name in existing:
                         self.category_id_map[old_id] = item_group_name
                         continue
 
@@ -191,54 +280,43 @@ class LegacyDataSeeder:
 
                     doc = frappe.get_doc(item_group_doc)
                     doc.insert(ignore_permissions=True)
+                    existing.add(doc.name)
                     self.category_id_map[old_id] = doc.name
                     print(f"Inserted Item Group: {doc.name}")
                 except Exception as e:
-                    print(f"Error inserting item group: {values_str} -> {e}")
+                    print(f"Error inserting item group: {parts} -> {e}")
 
     def _map_unit_data(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        for batch in self._checkpointed("units", iter_file_rows(file_path, "units")):
+            existing = _get_existing("UOM", [row[2] for row in batch])
+            new_units = []
+            for parts in batch:
+                old_id = parts[0]
+                name = parts[2]
+
+                self.unit_id_map[old_id] = name
+                if name and name not in existing:
+                    new_units.append(name)
+                    existing.add(name)
 
-        insert_statements = re.findall(r"INSERT INTO `units` VALUES \((.*?)\);", content)
-        for statement in insert_statements:
-            values_list = re.findall(r"\((.*?)\)", statement)
-            for values_str in values_list:
-                try:
-                    parts = self._safe_split(values_str)
-                    old_id = parts[0]
-                    name = self._clean_value(parts[2])
-
-                    if not name or frappe.db.exists("UOM", name):
-                        self.unit_id_map[old_id] = name
-                        continue
-
-                    uom_doc = {"doctype": "UOM", "uom_name": name}
-                    doc = frappe.get_doc(uom_doc)
-                    doc.insert(ignore_permissions=True)
-                    self.unit_id_map[old_id] = doc.name
-                    print(f"Inserted UOM: {doc.name}")
-                except Exception as e:
-                    print(f"Error inserting UOM: {values_str} -> {e}")
+            try:
+                _bulk_insert("UOM", "uom_name", new_units)
+                print(f"Inserted {len(new_units)} UOMs")
+            except Exception as e:
+                print(f"Error inserting UOMs: {new_units} -> {e}")
 
     def _map_product_data(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        insert_statements = re.findall(r"INSERT INTO `products` VALUES \((.*?)\);", content)
-        for statement in insert_statements:
-            values_list = re.findall(r"\((.*?)\)", statement)
-            for values_str in values_list:
+        for batch in self._checkpointed("products", iter_file_rows(file_path, "products")):
+            existing = _get_existing("Item", [f"{row[2]}-{row[0]}" for row in batch])
+            for parts in batch:
                 try:
-                    parts = self._safe_split(values_str)
-
                     old_id = parts[0]
-                    title = self._clean_value(parts[2])
+                    title = parts[2]
                     category_id = parts[4]
                     brand_id = parts[6]
 
                     item_code = f"{title}-{old_id}"
-                    if frappe.db.exists("Item", item_code):
+                    if item_code in existing:
                         self.product_id_map[old_id] = item_code
                         continue
 
@@ -257,239 +335,274 @@ class LegacyDataSeeder:
 
                     doc = frappe.get_doc(item_doc)
                     doc.insert(ignore_permissions=True)
+                    existing.add(item_code)
                     self.product_id_map[old_id] = item_code
                     print(f"Inserted Item: {doc.name}")
 
                 except Exception as e:
-                    print(f"Error inserting item: {values_str} -> {e}")
+                    print(f"Error inserting item: {parts} -> {e}")
 
     def _map_stock_data(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        insert_statements = re.findall(r"INSERT INTO `stocks` VALUES \((.*?)\);", content)
-        for statement in insert_statements:
-            values_list = re.findall(r"\((.*?)\)", statement)
-            for values_str in values_list:
-                try:
-                    parts = self._safe_split(values_str)
-                    stock_id = parts[0]
-                    product_id = parts[1]
+        for parts in iter_file_rows(file_path, "stocks"):
+            stock_id = parts[0]
+            product_id = parts[1]
+
+            item_code = self.product_id_map.get(product_id)
+            if item_code:
+                self.stock_id_map[stock_id] = item_code
+
+    def _create_customers(self):
+        """Creates a Customer for every mapped user that has none, and maps emails to Customers."""
+        for emails in self._checkpointed("customers", sorted({email for email in self.user_id_map.values() if email})):
+            self._load_customers(emails)
+            missing = [email for email in emails if email not in self.customer_map]
+            if not missing:
+                continue
+
+            users = frappe.get_all(
+                "User",
+                filters={"name": ("in", missing)},
+                fields=["name", "first_name", "middle_name", "last_name", "phone"]
+            )
+            for user in users:
+                customer = frappe.new_doc("Customer")
+                customer.customer_name = " ".join(filter(None, [user.first_name, user.middle_name, user.last_name]))
+                customer.customer_type = "Individual"
+                customer.email_id = user.name
+                customer.mobile_no = user.phone
+                customer.insert(ignore_permissions=True)
+                self.customer_map[user.name] = customer.name
+                print(f"Created Customer for {user.name}")
 
-                    item_code = self.product_id_map.get(product_id)
-                    if item_code:
-                        self.stock_id_map[stock_id] = item_code
+    def _load_customers(self, emails):
+        for row in frappe.get_all("Customer", filters={"email_id": ("in", emails)}, fields=["name", "email_id"]):
+            self.customer_map.setdefault(row.email_id, row.name)
 
-                except Exception as e:
-                    print(f"Error mapping stock: {values_str} -> {e}")
+    def _get_customer(self, user_id):
+        customer_email = self.user_id_map.get(user_id)
+        return self.customer_map.get(customer_email) if customer_email else None
 
     def _map_user_address_data(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        for parts in iter_file_rows(file_path, "user_addresses"):
+            try:
+                old_id = parts[0]
+                title = parts[1]
+                user_id = parts[2]
+                address_json_str = parts[3]
 
-        insert_statements = re.findall(r"INSERT INTO `user_addresses` VALUES \((.*?)\);", content)
-        for statement in insert_statements:
-            values_list = re.findall(r"\((.*?)\)", statement)
-            for values_str in values_list:
-                try:
-                    parts = self._safe_split(values_str)
-                    old_id = parts[0]
-                    title = self._clean_value(parts[1])
-                    user_id = parts[2]
-                    address_json_str = parts[3]
+                customer_name = self._get_customer(user_id)
+                if not customer_name:
+                    continue
 
-                    customer_email = self.user_id_map.get(user_id)
-                    customer_name = frappe.db.get_value("Customer", {"email_id": customer_email}, "name") if customer_email else None
-                    if not customer_name:
-                        continue
+                address_line1 = "N/A"
+                try:
+                    address_data = json.loads(address_json_str)
+                    address_line1 = address_data.get('address') or "N/A"
+                except (json.JSONDecodeError, IndexError):
+                    pass
+
+                address_doc = {
+                    "doctype": "Address",
+                    "address_title": title or customer_name,
+                    "address_type": "Shipping",
+                    "address_line1": address_line1,
+                    "city": "Musina",
+                    "country": "South Africa",
+                    "is_primary_address": 1,
+                    "links": [{"link_doctype": "Customer", "link_name": customer_name}]
+                }
+                self.addresses_to_insert.append((old_id, address_doc))
+            except Exception as e:
+                print(f"Error parsing user_address line: {parts} -> {e}")
+
+    def _get_existing_addresses(self, customers):
+        """{(address title, address line 1, customer): address name} for the customers' addresses."""
+        existing = {}
+        rows = frappe.get_all(
+            "Address",
+            filters=[["Dynamic Link", "link_name", "in", list(set(customers))]],
+            fields=["name", "address_title", "address_line1", "`tabDynamic Link`.link_name as link_name"]
+        )
+        for row in rows:
+            existing.setdefault((row.address_title, row.address_line1, row.link_name), row.name)
+        return existing
 
-                    address_line1 = "N/A"
-                    try:
-                        address_data = json.loads(address_json_str)
-                        address_line1 = address_data.get('address') or "N/A"
-                    except (json.JSONDecodeError, IndexError):
-                        pass
-
-                    address_doc = {
-                        "doctype": "Address",
-                        "address_title": title or customer_name,
-                        "address_type": "Shipping",
-                        "address_line1": address_line1,
-                        "city": "Musina",
-                        "country": "South Africa",
-                        "is_primary_address": 1,
-                        "links": [{"link_doctype": "Customer", "link_name": customer_name}]
-                    }
-                    self.addresses_to_insert.append((old_id, address_doc))
+    def _insert_addresses(self):
+        for batch in self._checkpointed("addresses", self.addresses_to_insert):
+            existing = self._get_existing_addresses([address_doc["links"][0]["link_name"] for _, address_doc in batch])
+            for old_id, address_doc in batch:
+                key = (address_doc["address_title"], address_doc["address_line1"], address_doc["links"][0]["link_name"])
+                try:
+                    if key not in existing:
+                        doc = frappe.get_doc(address_doc)
+                        doc.insert(ignore_permissions=True)
+                        existing[key] = doc.name
+                        print(f"Inserted Address: {doc.name}")
+                    self.user_address_map[old_id] = existing[key]
                 except Exception as e:
-                    print(f"Error parsing user_address line: {values_str} -> {e}")
+                    print(f"Error inserting address: {address_doc['address_title']} -> {e}")
 
-    def _insert_addresses(self):
-        for old_id, address_doc in self.addresses_to_insert:
+    def _map_order_data(self, file_path):
+        for parts in iter_file_rows(file_path, "orders"):
             try:
-                existing_address = frappe.db.exists("Address", {
-                    "address_title": address_doc["address_title"],
-                    "address_line1": address_doc["address_line1"],
-                    "links.link_name": address_doc["links"][0]["link_name"]
-                })
-                if not existing_address:
-                    doc = frappe.get_doc(address_doc)
-                    doc.insert(ignore_permissions=True)
-                    self.user_address_map[old_id] = doc.name
-                    print(f"Inserted Address: {doc.name}")
-                else:
-                    self.user_address_map[old_id] = existing_address
+                old_id = parts[0]
+                user_id = parts[1]
+                shop_id = parts[6]
+                status = parts[9]
+                delivery_type = parts[17]
+                created_at = parts[19]
+                address_id = parts[22]
+
+                customer_name = self._get_customer(user_id)
+                company_name = self.shop_id_map.get(shop_id)
+
+                if not customer_name or not company_name:
+                    continue
+
+                workflow_state = "Draft"
+                if status == 'delivered':
+                    workflow_state = "Completed"
+                elif status == 'canceled':
+                    workflow_state = "Cancelled"
+
+                shipping_address_name = self.user_address_map.get(address_id)
+
+                order_doc = {
+                    "doctype": "Sales Order",
+                    "naming_series": "SO-",
+                    "customer": customer_name,
+                    "company": company_name,
+                    "order_type": "Sales",
+                    "transaction_date": created_at.split(' ')[0] if created_at else None,
+                    "workflow_state": workflow_state,
+                    "docstatus": 0,
+                    "items": [],
+                    "set_warehouse": "Stores - J",
+                    "shipping_address_name": shipping_address_name,
+                    "custom_delivery_type": delivery_type,
+                    "custom_legacy_order_id": old_id,
+                }
+                self.orders_map[old_id] = order_doc
             except Exception as e:
-                print(f"Error inserting address: {address_doc['address_title']} -> {e}")
-
-    def _map_order_data(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        insert_statements = re.findall(r"INSERT INTO `orders` VALUES \((.*?)\);", content)
-        for statement in insert_statements:
-            values_list = re.findall(r"\((.*?)\)", statement)
-            for values_str in values_list:
-                try:
-                    parts = self._safe_split(values_str)
-                    old_id = parts[0]
-                    user_id = parts[1]
-                    shop_id = parts[6]
-                    status = self._clean_value(parts[9])
-                    delivery_type = self._clean_value(parts[17])
-                    created_at = self._clean_value(parts[19])
-                    address_id = self._clean_value(parts[22])
-
-                    customer_email = self.user_id_map.get(user_id)
-                    customer_name = frappe.db.get_value("Customer", {"email_id": customer_email}, "name") if customer_email else None
-                    company_name = self.shop_id_map.get(shop_id)
-
-                    if not customer_name or not company_name:
-                        continue
-
-                    workflow_state = "Draft"
-                    if status == 'delivered':
-                        workflow_state = "Completed"
-                    elif status == 'canceled':
-                        workflow_state = "Cancelled"
-
-                    shipping_address_name = self.user_address_map.get(address_id)
-
-                    order_doc = {
-                        "doctype": "Sales Order",
-                        "naming_series": "SO-",
-                        "customer": customer_name,
-                        "company": company_name,
-                        "order_type": "Sales",
-                        "transaction_date": created_at.split(' ')[0] if created_at else None,
-                        "workflow_state": workflow_state,
-                        "docstatus": 0,
-                        "items": [],
-                        "set_warehouse": "Stores - J",
-                        "shipping_address_name": shipping_address_name,
-                        "custom_delivery_type": delivery_type,
-                        "custom_legacy_order_id": old_id,
-                    }
-                    self.orders_map[old_id] = order_doc
-                except Exception as e:
-                    print(f"Error parsing order line: {values_str} -> {e}")
+                print(f"Error parsing order line: {parts} -> {e}")
 
     def _map_order_details_data(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        insert_statements = re.findall(r"INSERT INTO `order_details` VALUES \((.*?)\);", content)
-        for statement in insert_statements:
-            values_list = re.findall(r"\((.*?)\)", statement)
-            for values_str in values_list:
-                try:
-                    parts = self._safe_split(values_str)
-                    order_id = parts[1]
-                    stock_id = parts[2]
-                    price = float(parts[3])
-                    quantity = int(parts[7])
-
-                    if order_id not in self.orders_map:
-                        continue
-
-                    item_code = self.stock_id_map.get(stock_id)
-                    if not item_code:
-                        continue
-
-                    item_doc = {
-                        "item_code": item_code,
-                        "qty": quantity,
-                        "rate": price,
-                    }
-                    self.orders_map[order_id]["items"].append(item_doc)
-                except Exception as e:
-                    print(f"Error parsing order_details line: {values_str} -> {e}")
+        for parts in iter_file_rows(file_path, "order_details"):
+            try:
+                order_id = parts[1]
+                stock_id = parts[2]
+                price = float(parts[3])
+                quantity = int(parts[7])
+
+                if order_id not in self.orders_map:
+                    continue
+
+                item_code = self.stock_id_map.get(stock_id)
+                if not item_code:
+                    continue
+
+                item_doc = {
+                    "item_code": item_code,
+                    "qty": quantity,
+                    "rate": price,
+                }
+                self.orders_map[order_id]["items"].append(item_doc)
+            except Exception as e:
+                print(f"Error parsing order_details line: {parts} -> {e}")
 
     def _insert_orders(self):
-        for old_id, order_data in self.orders_map.items():
-            try:
-                if not frappe.db.exists("Sales Order", {"custom_legacy_order_id": old_id}):
+        # Each batch of orders is inserted, submitted and committed together; a failing order
+        # is rolled back on its own so the rest of its batch still goes in.
+        for batch in self._checkpointed("orders", self.orders_map.items(), ORDER_BATCH_SIZE):
+            existing = _get_existing("Sales Order", [old_id for old_id, _ in batch], field="custom_legacy_order_id")
+            for old_id, order_data in batch:
+                if old_id in existing:
+                    continue
+                frappe.db.savepoint("legacy_order")
+                try:
                     doc = frappe.get_doc(order_data)
                     doc.insert(ignore_permissions=True)
                     if doc.workflow_state in ["Completed", "Cancelled"]:
                         doc.submit()
+                    self.sales_order_map[old_id] = doc.name
                     print(f"Inserted Sales Order: {doc.name}")
-            except Exception as e:
-                print(f"Error inserting Sales Order {old_id}: {e}")
-                frappe.log_error(frappe.get_traceback(), f"Seeder Error: Sales Order {old_id}")
+                except Exception as e:
+                    frappe.db.rollback(save_point="legacy_order")
+                    print(f"Error inserting Sales Order {old_id}: {e}")
+                    frappe.log_error(frappe.get_traceback(), f"Seeder Error: Sales Order {old_id}")
 
+    def _dump(self, file_name):
+        return os.path.join(self.db_path, file_name)
+
+    def _seed_addresses(self):
+        self._map_user_address_data(self._dump('user_addresses.sql'))
+        self._insert_addresses()
+
+    def _seed_orders(self):
+        self._map_order_data(self._dump('orders.sql'))
+        self._map_order_details_data(self._dump('order_details.sql'))
+        self._insert_orders()
+
+    def run_step(self, step):
+        """
+        Runs one step, continuing from its checkpoint, with the id maps of the steps it depends
+        on loaded from theirs. Returns False if the step was already done.
+        """
+        state = self.checkpoint.load(step)
+        if state["status"] == "Done":
+            return False
+
+        for dependency in SEED_STEPS[step]:
+            setattr(self, STEP_MAPS[dependency], self.checkpoint.load(dependency)["map"])
+        setattr(self, STEP_MAPS[step], state["map"])
+        self.progress[step] = state["progress"]
+        self.checkpoint.save(step, status="Running", error=None)
+        print(f"\n--- Starting step: {step} (resuming after {state['progress']} rows) ---")
+
+        handlers = {
+            "users": lambda: self._map_user_data(self._dump('users.sql')),
+            "shops": lambda: self._map_shop_data(self._dump('shops.sql')),
+            "brands": lambda: self._map_brand_data(self._dump('brands.sql')),
+            "categories": lambda: self._map_category_data(self._dump('categories.sql')),
+            "units": lambda: self._map_unit_data(self._dump('units.sql')),
+            "customers": self._create_customers,
+            "products": lambda: self._map_product_data(self._dump('products.sql')),
+            "stocks": lambda: self._map_stock_data(self._dump('stocks.sql')),
+            "addresses": self._seed_addresses,
+            "orders": self._seed_orders,
+        }
+        try:
+            handlers[step]()
+            frappe.db.commit()
+        except Exception:
+            frappe.db.rollback()
+            self.checkpoint.save(step, status="Failed", error=frappe.get_traceback())
+            raise
+
+        self.checkpoint.save(step, status="Done", progress=self.progress.get(step, 0), map=getattr(self, STEP_MAPS[step]))
+        return True
 
     def run(self):
         # The site is already connected by the `bench execute` command.
         # We just need to ensure we're running as Administrator.
         frappe.local.user = frappe.get_doc("User", "Administrator")
 
-        # Phase 1: Users and Companies (Shops)
-        print("--- Starting Phase 1: Users and Companies ---")
-        self._map_user_data(os.path.join(self.db_path, 'users.sql'))
-        self._map_shop_data(os.path.join(self.db_path, 'shops.sql'))
+        for step in SEED_STEPS:
+            self.run_step(step)
 
-        # Create Customers from Users
-        for user_email in self.user_id_map.values():
-            if user_email and not frappe.db.exists("Customer", {"email_id": user_email}):
-                user_doc = frappe.get_doc("User", user_email)
-                customer = frappe.new_doc("Customer")
-                customer.customer_name = user_doc.get_fullname()
-                customer.customer_type = "Individual"
-                customer.email_id = user_email
-                customer.mobile_no = user_doc.phone
-                customer.insert(ignore_permissions=True)
-                print(f"Created Customer for {user_email}")
-
-        frappe.db.commit()
-
-        # Phase 2: Item related meta
-        print("\n--- Starting Phase 2: Item Metadata ---")
-        self._map_brand_data(os.path.join(self.db_path, 'brands.sql'))
-        self._map_category_data(os.path.join(self.db_path, 'categories.sql'))
-        self._map_unit_data(os.path.join(self.db_path, 'units.sql'))
-        frappe.db.commit()
-
-        # Phase 3: Items and Stocks
-        print("\n--- Starting Phase 3: Items and Stocks ---")
-        self._map_product_data(os.path.join(self.db_path, 'products.sql'))
-        self._map_stock_data(os.path.join(self.db_path, 'stocks.sql'))
-        frappe.db.commit()
-
-        # Phase 4: User Addresses
-        print("\n--- Starting Phase 4: User Addresses ---")
-        self._map_user_address_data(os.path.join(self.db_path, 'user_addresses.sql'))
-        self._insert_addresses()
-        frappe.db.commit()
 
-        # Phase 5: Orders and Order Details
-        print("\n--- Starting Phase 5: Orders and Order Details ---")
-        self._map_order_data(os.path.join(self.db_path, 'orders.sql'))
-        self._map_order_details_data(os.path.join(self.db_path, 'order_details.sql'))
-        self._insert_orders()
-        frappe.db.commit()
+def get_db_path():
+    return os.path.join(get_bench_path(), "apps/rokct/rokct/paas/db")
+
 
-def run_seeder():
+def run_seeder(resume=False, parallel=True):
+    """
+    Seeds the tenant from the legacy dumps. By default the steps run as background jobs on
+    the long queue; `parallel=False` runs them one after another in this process.
+    `resume=True` continues the previous run from its checkpoints, retrying failed steps.
+
+        bench --site <site> execute rokct.paas.seed.run_seeder --kwargs "{'resume': True}"
+    """
     # This seeder is intended to run only on a specific site.
     target_site_name = "juvo.tenant.rokct.ai"
     current_site = frappe.local.site
@@ -498,13 +611,168 @@ def run_seeder():
         print(f"Skipping data import for site '{current_site}'. This seeder is intended for '{target_site_name}' only.")
         return
 
-    print(f"--- Starting data import for site '{current_site}' ---")
+    checkpoint = SeedCheckpoint()
+    if not resume:
+        checkpoint.clear()
+    else:
+        for step in SEED_STEPS:
+            if checkpoint.load(step)["status"] == "Failed":
+                checkpoint.save(step, status="Pending")
 
-    bench_path = get_bench_path()
-    db_path = os.path.join(bench_path, "apps/rokct/rokct/paas/db")
+    print(f"--- Starting data import for site '{current_site}' ---")
+    if parallel:
+        dispatched = dispatch_seed_steps(checkpoint)
+        print(f"Queued seed steps: {', '.join(dispatched) or 'none'}. Check progress with rokct.paas.seed.get_seed_status.")
+        return dispatched
 
-    seeder = LegacyDataSeeder(site_name=current_site, db_path=db_path)
+    seeder = LegacyDataSeeder(site_name=current_site, db_path=get_db_path(), checkpoint=checkpoint)
     seeder.run()
 
+
+def dispatch_seed_steps(checkpoint=None):
+    """Enqueues every step that is not done or failed and whose dependencies are done."""
+    checkpoint = checkpoint or SeedCheckpoint()
+    statuses = {step: checkpoint.load(step)["status"] for step in SEED_STEPS}
+    dispatched = []
+    for step, dependencies in SEED_STEPS.items():
+        if statuses[step] in ("Done", "Failed"):
+            continue
+        if all(statuses[dependency] == "Done" for dependency in dependencies):
+            frappe.enqueue(
+                "rokct.paas.seed.run_seed_step",
+                queue="long",
+                timeout=SEED_STEP_TIMEOUT,
+                job_id=f"legacy-seed-{frappe.local.site}-{step}",
+                deduplicate=True,
+                step=step
+            )
+            dispatched.append(step)
+    return dispatched
+
+
+def run_seed_step(step):
+    """Background job that runs one seed step and then dispatches the steps waiting on it."""
+    cache = frappe.cache()
+    # Two finishing steps can dispatch the same dependent at once; only one job may run it.
+    lock_key = cache.make_key(f"legacy_seed_step:{step}")
+    if not cache.set(lock_key, 1, nx=True, ex=SEED_STEP_TIMEOUT):
+        return
+
+    frappe.set_user("Administrator")
+    try:
+        LegacyDataSeeder(site_name=frappe.local.site, db_path=get_db_path()).run_step(step)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), f"Seeder Error: step {step}")
+        return
+    finally:
+        cache.delete(lock_key)
+    dispatch_seed_steps()
+
+
+def get_seed_status():
+    """Prints and returns the status and progress of every seed step."""
+    checkpoint = SeedCheckpoint()
+    statuses = {}
+    for step in SEED_STEPS:
+        state = checkpoint.load(step)
+        statuses[step] = {"status": state["status"], "progress": state["progress"], "mapped": len(state["map"])}
+        print(f"{step:<12} {state['status']:<8} {state['progress']:>6} rows done, {len(state['map'])} mapped")
+        if state.get("error"):
+            print(state["error"].strip().splitlines()[-1])
+    return statuses
+
+
+def _safe_split(values_str):
+    values = []
+    in_quote = False
+    current_val = ''
+    for char in values_str:
+        if char == "'":
+            in_quote = not in_quote
+            current_val += char
+        elif char == ',' and not in_quote:
+            values.append(current_val)
+            current_val = ''
+        else:
+            current_val += char
+    values.append(current_val)
+    return tuple(_clean_value(v) for v in values)
+
+
+def _clean_value(value):
+    value = value.strip()
+    if value == 'NULL':
+        return None
+    if value.startswith("'") and value.endswith("'"):
+        return value[1:-1]
+    return value
+
+
+def _legacy_rows(file_path, table):
+    """The seeder's previous parser (whole file in memory, regexes, quote toggling), for benchmarks."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    for statement in re.findall(rf"INSERT INTO `{table}` VALUES \((.*?)\);", content):
+        for values_str in re.findall(r"\((.*?)\)", statement):
+            yield _safe_split(values_str)
+
+
+def _measure(rows):
+    started = time.perf_counter()
+    count = sum(1 for _ in rows())
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        for _ in rows():
+            pass
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return count, seconds, peak
+
+
+def benchmark_dump_parsing(db_path=None):
+    """
+    Parses the dumps the seeder reads with the previous regex parser and with the streaming
+    tokenizer, and prints rows, time, peak memory and rows the two parsers disagree on.
+
+        bench --site <site> execute rokct.paas.seed.benchmark_dump_parsing
+    """
+    db_path = db_path or os.path.join(os.path.dirname(__file__), "db")
+    results = []
+    for file_name, table in SEED_DUMPS:
+        file_path = os.path.join(db_path, file_name)
+        if not os.path.exists(file_path):
+            continue
+
+        old_rows, old_seconds, old_peak = _measure(lambda: _legacy_rows(file_path, table))
+        new_rows, new_seconds, new_peak = _measure(lambda: iter_file_rows(file_path, table))
+        legacy = set(_legacy_rows(file_path, table))
+        differing = sum(1 for row in iter_file_rows(file_path, table) if row not in legacy)
+
+        result = frappe._dict(
+            table=table,
+            size_kb=round(os.path.getsize(file_path) / 1024, 1),
+            old_rows=old_rows,
+            new_rows=new_rows,
+            differing_rows=differing,
+            old_seconds=round(old_seconds, 4),
+            new_seconds=round(new_seconds, 4),
+            old_peak_kb=round(old_peak / 1024, 1),
+            new_peak_kb=round(new_peak / 1024, 1),
+        )
+        results.append(result)
+        print(
+            f"{table:<16} {result.size_kb:>8} KB  rows {old_rows:>5} -> {new_rows:<5} ({differing} differ)  "
+            f"{result.old_seconds:.3f}s -> {result.new_seconds:.3f}s  "
+            f"peak {result.old_peak_kb} KB -> {result.new_peak_kb} KB"
+        )
+
+    old_total = sum(r.old_seconds for r in results)
+    new_total = sum(r.new_seconds for r in results)
+    print(f"Total: {old_total:.3f}s -> {new_total:.3f}s ({old_total / max(new_total, 0.0001):.2f}x)")
+    return results
+
 if __name__ == "__main__":
-    run_seeder()
\ No newline at end of file
+    run_seeder()
@@ -0,0 +1,93 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Streaming reader for the rows of mysqldump INSERT statements.
+#
+# The dump is read in fixed-size chunks and rows are matched one at a time, so memory stays
+# bounded by the chunk size plus a single row regardless of how large the dump is. Quoted
+# values are unescaped the way MySQL writes them (backslash escapes and doubled quotes),
+# NULL becomes None, and every other value is returned as the literal text.
+import codecs
+import re
+
+CHUNK_SIZE = 64 * 1024
+# Kept from the end of a chunk while looking for an INSERT, so one cut in two is still found.
+HEADER_TAIL = 4096
+
+_QUOTED = r"'[^'\\]*(?:(?:\\.|'')[^'\\]*)*'"
+# A complete row: its values, the closing parenthesis and the separator after it. Requiring
+# the separator means a row cut off at the end of a chunk never matches.
+_ROW = re.compile(r"\s*\(([^'()]*(?:" + _QUOTED + r"[^'()]*)*)\)\s*([,;])", re.S)
+# A quoted value (with an optional charset introducer such as _binary) or a bare one.
+_FIELD = re.compile(r"\s*(?:_\w+\s*)?(" + _QUOTED + r")\s*|([^,']+)", re.S)
+_ESCAPE = re.compile(r"\\(.)|''", re.S)
+_UNESCAPED = {"0": "\0", "b": "\b", "n": "\n", "r": "\r", "t": "\t", "Z": "\x1a", "%": "\\%", "_": "\\_"}
+
+
+def _unescape_match(match):
+    char = match.group(1)
+    if char is None:
+        return "'"
+    return _UNESCAPED.get(char, char)
+
+
+def unescape(value):
+    """Unescapes the contents of a MySQL string literal."""
+    if "\\" not in value and "''" not in value:
+        return value
+    return _ESCAPE.sub(_unescape_match, value)
+
+
+def split_values(values):
+    """Splits the text between a row's parentheses into a tuple of values."""
+    row = []
+    for quoted, bare in _FIELD.findall(values):
+        if quoted:
+            row.append(unescape(quoted[1:-1]))
+        else:
+            bare = bare.strip()
+            row.append(None if bare.upper() == "NULL" else bare)
+    return tuple(row)
+
+
+def _get_header(table):
+    return re.compile(r"INSERT\s+INTO\s+`" + re.escape(table) + r"`\s*(?:\([^;]*?\)\s*)?VALUES", re.I)
+
+
+def iter_rows(stream, table, chunk_size=CHUNK_SIZE):
+    """Yields the rows of every `INSERT INTO <table>` statement in a binary stream as tuples."""
+    header = _get_header(table)
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    data = ""
+    pos = 0
+    in_insert = False
+    eof = False
+
+    while True:
+        if in_insert:
+            match = _ROW.match(data, pos)
+            if match:
+                pos = match.end()
+                in_insert = match.group(2) == ","
+                yield split_values(match.group(1))
+                continue
+        else:
+            match = header.search(data, pos)
+            if match:
+                pos = match.end()
+                in_insert = True
+                continue
+            pos = max(pos, len(data) - HEADER_TAIL)
+
+        if eof:
+            if in_insert:
+                raise ValueError(f"Unterminated INSERT INTO `{table}` statement at the end of the dump.")
+            return
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        data = data[pos:] + decoder.decode(chunk, final=eof)
+        pos = 0
+
+
+def iter_file_rows(file_path, table, chunk_size=CHUNK_SIZE):
+    with open(file_path, "rb") as stream:
+        yield from iter_rows(stream, table, chunk_size)
@@ -0,0 +1,147 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Query budgets for the PaaS tests.
+#
+# `query_budget` records every SQL statement run inside a block by wrapping the `sql`
+# method of the current database connection. Statements are grouped by shape (literals
+# and parameters replaced with `?`, IN lists collapsed), so a loop that runs the same
+# lookup once per row shows up as one shape repeated N times. When the block exceeds its
+# budget the test fails with a report of the most repeated shapes and the rokct call
+# sites that issued them.
+import os
+import re
+import traceback
+from collections import Counter, defaultdict
+
+import frappe
+
+# Transaction control is issued by the framework around every write and is not what a
+# budget is about.
+IGNORED_PATTERN = re.compile(r"^\s*(savepoint|release savepoint|rollback|commit|start transaction|begin)\b", re.IGNORECASE)
+STRING_PATTERN = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+PARAMETER_PATTERN = re.compile(r"%\(\w+\)s|%s")
+NUMBER_PATTERN = re.compile(r"(?<![\w`.])-?\d+(?:\.\d+)?\b")
+IN_LIST_PATTERN = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+REPORTED_SHAPES = 5
+
+_THIS_FILE = os.path.abspath(__file__)
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(_THIS_FILE)))
+_TESTS_DIR = os.path.dirname(_THIS_FILE)
+
+
+def normalize_query(query):
+    """Returns the shape of a statement: literals and parameters become `?`."""
+    shape = STRING_PATTERN.sub("?", str(query))
+    shape = PARAMETER_PATTERN.sub("?", shape)
+    shape = NUMBER_PATTERN.sub("?", shape)
+    shape = IN_LIST_PATTERN.sub("(?...)", shape)
+    return WHITESPACE_PATTERN.sub(" ", shape).strip()
+
+
+def get_call_site():
+    """
+    The innermost rokct frame outside the tests that led to the current statement, or
+    the innermost test frame if the statement came straight from a test.
+    """
+    test_frame = None
+    for frame in reversed(traceback.extract_stack()[:-1]):
+        filename = os.path.abspath(frame.filename)
+        if filename == _THIS_FILE or not filename.startswith(_APP_DIR):
+            continue
+        if filename.startswith(_TESTS_DIR):
+            test_frame = test_frame or frame
+            continue
+        return f"{os.path.relpath(filename, os.path.dirname(_APP_DIR))}:{frame.lineno} in {frame.name}"
+    if test_frame:
+        return f"{os.path.relpath(test_frame.filename, os.path.dirname(_APP_DIR))}:{test_frame.lineno} in {test_frame.name}"
+    return "<framework>"
+
+
+class QueryRecorder:
+    """Records the statements run on `frappe.db` while active."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __enter__(self):
+        self.db = frappe.local.db
+        # Keep an instance-level wrapper installed by someone else (e.g. endpoint metrics).
+        self.previous_sql = self.db.__dict__.get("sql")
+        original_sql = self.db.sql
+
+        def sql(query, *args, **kwargs):
+            if not IGNORED_PATTERN.match(str(query)):
+                self.queries.append(frappe._dict({
+                    "query": str(query),
+                    "shape": normalize_query(query),
+                    "call_site": get_call_site(),
+                }))
+            return original_sql(query, *args, **kwargs)
+
+        self.db.sql = sql
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self.previous_sql is None:
+            del self.db.sql
+        else:
+            self.db.sql = self.previous_sql
+        return False
+
+    @property
+    def count(self):
+        return len(self.queries)
+
+    def get_repeated_shapes(self, min_count=2):
+        """Returns (shape, count, Counter of call sites) for shapes run at least `min_count` times."""
+        counts = Counter(query.shape for query in self.queries)
+        call_sites = defaultdict(Counter)
+        for query in self.queries:
+            call_sites[query.shape][query.call_site] += 1
+        return [(shape, count, call_sites[shape]) for shape, count in counts.most_common() if count >= min_count]
+
+    def report(self, limit=REPORTED_SHAPES):
+        lines = [f"{self.count} queries, most repeated shapes:"]
+        for shape, count, call_sites in self.get_repeated_shapes(min_count=1)[:limit]:
+            lines.append(f"  {count}x {shape[:200]}")
+            for call_site, site_count in call_sites.most_common():
+                lines.append(f"      {site_count}x {call_site}")
+        return "\n".join(lines)
+
+
+class query_budget(QueryRecorder):
+    """
+    Fails the block if it runs more than `max_queries` statements, or any single
+    statement shape more than `max_repeats` times:
+
+        with query_budget(max_queries=20, max_repeats=2):
+            calculate_cart_totals(cart.name)
+    """
+
+    def __init__(self, max_queries=None, max_repeats=None):
+        super().__init__()
+        self.max_queries = max_queries
+        self.max_repeats = max_repeats
+
+    def __exit__(self, exc_type, exc_value, tb):
+        super().__exit__(exc_type, exc_value, tb)
+        if exc_type is not None:
+            return False
+
+        failures = []
+        if self.max_queries is not None and self.count > self.max_queries:
+            failures.append(f"ran {self.count} queries, budget is {self.max_queries}")
+        if self.max_repeats is not None:
+            for shape, count, _ in self.get_repeated_shapes(self.max_repeats + 1):
+                failures.append(f"ran one statement shape {count} times, budget is {self.max_repeats}: {shape[:200]}")
+        if failures:
+            raise AssertionError("Query budget exceeded: " + "; ".join(failures) + "\n" + self.report())
+        return False
+
+
+def count_queries(func, *args, **kwargs):
+    """Runs `func` and returns the number of statements it ran."""
+    with QueryRecorder() as recorder:
+        func(*args, **kwargs)
+    return recorder.count
@@ -4,6 +4,7 @@ import frappe
 import unittest
 import json
 from rokct.paas.api import create_order, list_orders, get_order_details, update_order_status, add_order_review, cancel_order
+from rokct.paas.tests.query_budget import query_budget
 
 class TestOrderAPI(unittest.TestCase):
     def setUp(self):
@@ -83,7 +84,8 @@ class TestOrderAPI(unittest.TestCase):
                 }
             ]
         }
-        order_dict = create_order(json.dumps(order_data))
+        with query_budget(max_queries=60, max_repeats=5):
+            order_dict = create_order(json.dumps(order_data))
         self.assertIsNotNone(order_dict)
 
         order = frappe.get_doc("Order", order_dict.get("name"))
@@ -95,7 +97,8 @@ class TestOrderAPI(unittest.TestCase):
     def test_list_orders(self):
         # Test listing orders for the current user
         frappe.set_user(self.test_user.name)
-        orders = list_orders()
+        with query_budget(max_queries=5, max_repeats=1):
+            orders = list_orders()
         self.assertIsNotNone(orders)
         self.assertIsInstance(orders, list)
 
@@ -107,7 +110,8 @@ class TestOrderAPI(unittest.TestCase):
             "shop": self.test_shop.name,
         }).insert(ignore_permissions=True)
         frappe.set_user(self.test_user.name)
-        order_details = get_order_details(order.name)
+        with query_budget(max_queries=10, max_repeats=2):
+            order_details = get_order_details(order.name)
         self.assertIsNotNone(order_details)
         self.assertEqual(order_details.get("name"), order.name)
 
@@ -4,6 +4,7 @@ import frappe
 import unittest
 import json
 from rokct.paas.api import create_order
+from rokct.paas.tests.query_budget import query_budget
 
 class TestCouponUsage(unittest.TestCase):
     def setUp(self):
@@ -73,7 +74,9 @@ class TestCouponUsage(unittest.TestCase):
             "coupon_code": self.test_coupon.code
         }
 
-        order_dict = create_order(json.dumps(order_data))
+        # The coupon lookup and the Coupon Usage insert come on top of the plain order budget.
+        with query_budget(max_queries=75, max_repeats=5):
+            order_dict = create_order(json.dumps(order_data))
         self.assertIsNotNone(order_dict)
         order_name = order_dict.get("name")
 
@@ -0,0 +1,105 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+import unittest
+from rokct.paas.api import calculate_cart_totals, order_products_calculate
+from rokct.paas.tests.query_budget import QueryRecorder, count_queries, normalize_query, query_budget
+
+class TestQueryBudget(unittest.TestCase):
+    def test_normalize_query_groups_literals_and_in_lists(self):
+        self.assertEqual(
+            normalize_query("select name from `tabItem` where name = 'A-1' and qty > 5"),
+            normalize_query("select name from `tabItem`\n where name = %s and qty > 10")
+        )
+        self.assertEqual(
+            normalize_query("select 1 from `tabItem` where name in ('a', 'b', 'c')"),
+            normalize_query("select 1 from `tabItem` where name in (%s)")
+        )
+
+    def test_budget_reports_repeated_shapes_and_call_sites(self):
+        with self.assertRaises(AssertionError) as context:
+            with query_budget(max_repeats=2):
+                for i in range(3):
+                    frappe.db.sql("select name from `tabUser` where name = %s", f"user-{i}")
+
+        message = str(context.exception)
+        self.assertIn("3 times, budget is 2", message)
+        self.assertIn("test_query_budgets.py", message)
+
+    def test_recorder_restores_the_connection(self):
+        with QueryRecorder() as recorder:
+            frappe.db.sql("select 1")
+        self.assertEqual(recorder.count, 1)
+        self.assertNotIn("sql", frappe.local.db.__dict__)
+
+
+class TestHotEndpointBudgets(unittest.TestCase):
+    def setUp(self):
+        self.test_user = frappe.get_doc({
+            "doctype": "User",
+            "email": "test_query_budget_user@example.com",
+            "first_name": "Test",
+            "last_name": "User"
+        }).insert(ignore_permissions=True)
+
+        self.test_shop = frappe.get_doc({
+            "doctype": "Company",
+            "company_name": "Test Shop for Query Budgets",
+            "abbr": "TSQB",
+            "default_currency": "USD"
+        }).insert(ignore_permissions=True)
+
+        self.items = [
+            frappe.get_doc({
+                "doctype": "Item",
+                "item_name": f"Test Budget Product {i}",
+                "item_code": f"TBP-{i}",
+                "item_group": "Products",
+                "is_stock_item": 0,
+                "standard_rate": 10 * (i + 1)
+            }).insert(ignore_permissions=True)
+            for i in range(5)
+        ]
+
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def _make_cart(self, detail_count):
+        cart = frappe.get_doc({
+            "doctype": "Cart",
+            "owner": self.test_user.name,
+            "shop": self.test_shop.name,
+            "status": "Active"
+        }).insert(ignore_permissions=True)
+        frappe.get_doc({
+            "doctype": "User Cart",
+            "user": self.test_user.name,
+            "cart": cart.name,
+            "cart_details": [
+                {"item": item.name, "quantity": 2, "price": item.standard_rate}
+                for item in self.items[:detail_count]
+            ]
+        }).insert(ignore_permissions=True)
+        return cart
+
+    def test_calculate_cart_totals_query_count_does_not_grow_with_cart(self):
+        small_cart = self._make_cart(1)
+        large_cart = self._make_cart(5)
+
+        with query_budget(max_queries=25, max_repeats=3):
+            calculate_cart_totals(large_cart.name)
+
+        self.assertEqual(count_queries(calculate_cart_totals, small_cart.name), count_queries(calculate_cart_totals, large_cart.name))
+        self.assertEqual(frappe.db.get_value("Cart", large_cart.name, "total_price"), 2 * (10 + 20 + 30 + 40 + 50))
+
+    def test_order_products_calculate_runs_one_query(self):
+        products = [{"product_id": item.name, "quantity": 3} for item in self.items]
+
+        with query_budget(max_queries=1):
+            result = order_products_calculate(products)
+
+        self.assertEqual(result["total_price"], 3 * (10 + 20 + 30 + 40 + 50))
+
+    def test_order_products_calculate_rejects_unknown_products(self):
+        with self.assertRaises(frappe.DoesNotExistError):
+            order_products_calculate([{"product_id": "does-not-exist", "quantity": 1}])
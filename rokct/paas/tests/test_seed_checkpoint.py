@@ -0,0 +1,49 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from rokct.paas.seed import SEED_STEPS, STEP_MAPS, LegacyDataSeeder, SeedCheckpoint, dispatch_seed_steps
+
+class TestSeedCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="legacy_seed_test_")
+        self.checkpoint = SeedCheckpoint(self.root)
+
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def test_every_step_has_a_map_and_known_dependencies(self):
+        self.assertEqual(set(STEP_MAPS), set(SEED_STEPS))
+        seen = set()
+        for step, dependencies in SEED_STEPS.items():
+            self.assertTrue(set(dependencies) <= seen, step)
+            seen.add(step)
+
+    @patch("rokct.paas.seed.frappe.db")
+    def test_batches_resume_after_the_last_saved_one(self, mock_db):
+        seeder = LegacyDataSeeder("test-site", self.root, checkpoint=self.checkpoint)
+        with self.assertRaises(RuntimeError):
+            for batch in seeder._checkpointed("users", range(10), size=3):
+                if batch[0] == 6:
+                    raise RuntimeError("crash")
+                for row in batch:
+                    seeder.user_id_map[str(row)] = f"user{row}@example.com"
+
+        state = self.checkpoint.load("users")
+        self.assertEqual(state["progress"], 6)
+        self.assertEqual(len(state["map"]), 6)
+
+        resumed = LegacyDataSeeder("test-site", self.root, checkpoint=self.checkpoint)
+        resumed.progress["users"] = state["progress"]
+        self.assertEqual([batch for batch in resumed._checkpointed("users", range(10), size=3)], [[6, 7, 8], [9]])
+
+    @patch("rokct.paas.seed.frappe.enqueue")
+    def test_only_steps_with_finished_dependencies_are_dispatched(self, mock_enqueue):
+        for step in ("users", "shops", "brands", "categories", "units"):
+            self.checkpoint.save(step, status="Done")
+        self.checkpoint.save("products", status="Failed")
+
+        self.assertEqual(dispatch_seed_steps(self.checkpoint), ["customers"])
+        self.assertEqual(mock_enqueue.call_args.kwargs["step"], "customers")
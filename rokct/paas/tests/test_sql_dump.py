@@ -0,0 +1,42 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import io
+import os
+import unittest
+from rokct.paas.sql_dump import iter_file_rows, iter_rows
+
+DUMP = (
+    b"-- MySQL dump\n"
+    b"CREATE TABLE `users` (\n  `id` bigint NOT NULL COMMENT 'the (old) id'\n);\n"
+    b"INSERT INTO `users` VALUES (1,'O\\'Brien','it''s','(a,b)',NULL,'back\\\\slash',''),"
+    b"(2,_binary 'bin','line\\nbreak','caf\xc3\xa9',-1.5,'NULL','\\\"q\\\"');\n"
+    b"INSERT INTO `users_old` VALUES (9,'other table');\n"
+    b"INSERT INTO `users` (`id`, `name`) VALUES (3, 'columns') ;\n"
+)
+
+EXPECTED = [
+    ("1", "O'Brien", "it's", "(a,b)", None, "back\\slash", ""),
+    ("2", "bin", "line\nbreak", "café", "-1.5", "NULL", '"q"'),
+    ("3", "columns"),
+]
+
+
+class TestSqlDump(unittest.TestCase):
+    def test_rows_are_unescaped(self):
+        self.assertEqual(list(iter_rows(io.BytesIO(DUMP), "users")), EXPECTED)
+
+    def test_rows_are_streamed_across_chunk_boundaries(self):
+        for chunk_size in (1, 2, 3, 7, 64):
+            self.assertEqual(list(iter_rows(io.BytesIO(DUMP), "users", chunk_size=chunk_size)), EXPECTED)
+
+    def test_unterminated_statement_raises(self):
+        with self.assertRaises(ValueError):
+            list(iter_rows(io.BytesIO(b"INSERT INTO `users` VALUES (1,'open"), "users"))
+
+    def test_seed_dumps_parse_to_full_rows(self):
+        file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "db", "orders.sql")
+        rows = list(iter_file_rows(file_path, "orders"))
+
+        self.assertTrue(rows)
+        self.assertEqual({len(row) for row in rows}, {len(rows[0])})
+        self.assertEqual(rows, list(iter_file_rows(file_path, "orders", chunk_size=1000)))
@@ -0,0 +1,13 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+
+def execute():
+    # The FULLTEXT index itself is created by on_doctype_update of Tender Search Index.
+    # Index tenders that were ingested before the search index existed.
+    from rokct.rokct.tenders.search import index_tenders
+    tenders = frappe.get_all("Tender", fields=["ocid", "title", "description", "status", "tender_category", "province",
+        "tender_type", "organ_of_state", "value_amount", "tender_end_date"])
+    for start in range(0, len(tenders), 500):
+        index_tenders(tenders[start:start + 500])
+    frappe.db.commit()
@@ -0,0 +1,130 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Near-duplicate detection for short texts with MinHash and locality-sensitive hashing.
+#
+# Each text is reduced to its set of character shingles and summarised by a MinHash
+# signature, whose positions agree between two texts with a probability close to the
+# Jaccard similarity of their shingle sets. Signatures are cut into bands and every band is
+# bucketed, so a lookup only compares against texts that share at least one bucket instead
+# of against every indexed text. Candidates are then confirmed with their exact similarity.
+#
+# Signatures use one-permutation hashing: every shingle is hashed once and lands in one
+# slot, instead of being hashed once per slot. Signatures only live for one index, so
+# Python's per-process string hash is good enough.
+import re
+from collections import defaultdict
+
+NUM_PERM = 128
+SHINGLE_SIZE = 3
+DEFAULT_THRESHOLD = 0.65
+# Probability that a pair exactly at the threshold shares a bucket.
+TARGET_RECALL = 0.99
+_MASK = (1 << 64) - 1
+# Larger than any slot value, so borrowed values never equal real ones.
+_BORROW_OFFSET = 1 << 64
+
+
+def normalize(text):
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", (text or "").lower()).split())
+
+
+def shingle(text, size=SHINGLE_SIZE):
+    """The set of hashed character shingles of a text."""
+    text = normalize(text)
+    if len(text) <= size:
+        return {hash(text) & _MASK} if text else set()
+    return {hash(text[i:i + size]) & _MASK for i in range(len(text) - size + 1)}
+
+
+def minhash(shingles, num_perm=NUM_PERM):
+    """
+    The one-permutation MinHash signature of a non-empty shingle set. Each slot keeps the
+    smallest hash that falls into it; empty slots borrow from the next filled slot to their
+    right, offset by the distance (rotation densification).
+    """
+    slots = [None] * num_perm
+    for h in shingles:
+        index, value = h % num_perm, h // num_perm
+        if slots[index] is None or value < slots[index]:
+            slots[index] = value
+
+    signature = list(slots)
+    borrowed, distance = None, 0
+    # Walk right to left twice, so slots near the end can borrow across the wrap-around.
+    for i in reversed(range(2 * num_perm)):
+        index = i % num_perm
+        if slots[index] is not None:
+            borrowed, distance = slots[index], 0
+        else:
+            distance += 1
+            if borrowed is not None:
+                signature[index] = borrowed + distance * _BORROW_OFFSET
+    return tuple(signature)
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def get_bands(threshold, num_perm=NUM_PERM, recall=TARGET_RECALL):
+    """
+    The (bands, rows) split with the most rows per band (the fewest false candidates) for
+    which a pair with similarity `threshold` still shares a bucket with probability `recall`.
+    """
+    best = (num_perm, 1)
+    for rows in range(2, num_perm + 1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands < recall:
+            break
+        best = (bands, rows)
+    return best
+
+
+class SimilarityIndex:
+    """
+    Finds indexed texts whose shingle sets have a Jaccard similarity of at least `threshold`
+    with a query text:
+
+        index = SimilarityIndex(0.65)
+        index.add("feature-1", "Add a dark mode")
+        index.query("Add dark mode")  # [("feature-1", 0.714)]
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, num_perm=NUM_PERM):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands, self.rows = get_bands(threshold, num_perm)
+        self.buckets = [defaultdict(list) for _ in range(self.bands)]
+        self.shingles = {}
+
+    def __len__(self):
+        return len(self.shingles)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows] for i in range(self.bands)]
+
+    def add(self, key, text):
+        shingles = shingle(text)
+        if not shingles:
+            return
+        self.shingles[key] = shingles
+        for bucket, band_key in zip(self.buckets, self._band_keys(minhash(shingles, self.num_perm))):
+            bucket[band_key].append(key)
+
+    def query(self, text):
+        """Returns [(key, similarity)] of the near duplicates of `text`, most similar first."""
+        shingles = shingle(text)
+        if not shingles:
+            return []
+        candidates = set()
+        for bucket, band_key in zip(self.buckets, self._band_keys(minhash(shingles, self.num_perm))):
+            candidates.update(bucket.get(band_key, ()))
+
+        matches = []
+        for key in candidates:
+            similarity = jaccard(shingles, self.shingles[key])
+            if similarity >= self.threshold:
+                matches.append((key, round(similarity, 3)))
+        return sorted(matches, key=lambda match: -match[1])
@@ -4,6 +4,23 @@
 import frappe
 import requests
 import json
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from frappe.utils import add_to_date, get_datetime, now, now_datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from rokct.roadmap.similarity import DEFAULT_THRESHOLD, SimilarityIndex
+
+DEFAULT_JULES_API_URL = "https://jules.googleapis.com/v1alpha/sessions"
+POLL_TIMEOUT = 15
+DEFAULT_POLL_CONCURRENCY = 8
+# A pending session is polled again after 1, 2, 4, ... minutes, at most hourly.
+POLL_INTERVAL_SECONDS = 60
+MAX_POLL_INTERVAL_SECONDS = 60 * 60
+DEFAULT_SESSION_DEADLINE_HOURS = 24
+FEATURE_TITLE_LENGTH = 140
+
+_http_session = None
 
 # --- Main Scheduled Tasks ---
 
@@ -53,35 +70,99 @@ def populate_roadmap_with_ai_ideas():
 def process_pending_ai_sessions():
     """
     (Frequent Task)
-    Polls for results from all 'Pending' AI idea sessions and processes them when ready.
+    Polls the due 'Pending' AI idea sessions concurrently and processes the finished ones.
+    A session that has no result yet is polled again after an exponentially growing
+    interval, until its deadline (`jules_session_deadline_hours`, 24 by default) passes.
     """
     jules_api_key = _get_api_key()
     if not jules_api_key:
         return
 
-    pending_sessions = frappe.get_all("AI Idea Session", filters={"status": "Pending"})
+    current_time = now_datetime()
+    sessions = frappe.get_all(
+        "AI Idea Session",
+        filters={"status": "Pending"},
+        or_filters=[["next_poll_at", "is", "not set"], ["next_poll_at", "<=", current_time]],
+        fields=["name", "session_id", "roadmap", "prompt_title", "poll_count", "creation"]
+    )
+    if not sessions:
+        return
+
+    api_url = _get_jules_api_url()
+    http = _get_http_session()
+    concurrency = max(int(frappe.conf.get("jules_poll_concurrency") or DEFAULT_POLL_CONCURRENCY), 1)
+    ideas_by_roadmap = defaultdict(list)
+    finished_by_roadmap = defaultdict(list)
+
+    # Worker threads only make the HTTP requests; they have no site context.
+    with ThreadPoolExecutor(max_workers=min(len(sessions), concurrency)) as executor:
+        futures = {
+            executor.submit(_get_jules_activities, jules_api_key, session.session_id, api_url, http): session
+            for session in sessions
+        }
+        for future in as_completed(futures):
+            session = futures[future]
+            try:
+                activities = future.result()
+            except requests.HTTPError as e:
+                status_code = e.response.status_code if e.response is not None else None
+                if status_code and status_code < 500 and status_code != 429:
+                    _fail_session(session, e)
+                else:
+                    _reschedule_session(session, current_time, e)
+                continue
+            except Exception as e:
+                _reschedule_session(session, current_time, e)
+                continue
 
-    for session_doc in pending_sessions:
-        session = frappe.get_doc("AI Idea Session", session_doc.name)
+            latest_response = _get_latest_agent_message(activities) if activities else None
+            if not latest_response:
+                _reschedule_session(session, current_time)
+                continue
+
+            ideas = _parse_ideas_from_response(latest_response)
+            for idea in ideas:
+                idea['type'] = "Bug" if "bug" in (session.prompt_title or "").lower() else "Feature"
+            ideas_by_roadmap[session.roadmap].extend(ideas)
+            finished_by_roadmap[session.roadmap].append(session)
+    frappe.db.commit()
+
+    for roadmap_name, finished in finished_by_roadmap.items():
         try:
-            activities = _get_jules_activities(jules_api_key, session.session_id)
-            if activities:
-                latest_response = _get_latest_agent_message(activities)
-                if latest_response:
-                    ideas = _parse_ideas_from_response(latest_response)
-                    if ideas:
-                        for idea in ideas:
-                            idea['type'] = "Bug" if "bug" in session.prompt_title.lower() else "Feature"
-                        _save_ideas_to_roadmap(session.roadmap, ideas)
-
-                    session.status = "Completed"
-                    session.save(ignore_permissions=True)
-                    frappe.db.commit()
+            _save_ideas_to_roadmap(roadmap_name, ideas_by_roadmap[roadmap_name])
+            for session in finished:
+                frappe.db.set_value("AI Idea Session", session.name, {"status": "Completed", "last_error": None})
+            frappe.db.commit()
         except Exception as e:
-            session.status = "Error"
-            session.save(ignore_permissions=True)
+            frappe.db.rollback()
+            for session in finished:
+                _fail_session(session, e)
             frappe.db.commit()
-            frappe.log_error(f"Failed to process AI session {session.session_id}: {e}", "Jules Idea Processing")
+
+
+def _get_poll_interval(poll_count):
+    return min(POLL_INTERVAL_SECONDS * 2 ** (poll_count or 0), MAX_POLL_INTERVAL_SECONDS)
+
+
+def _reschedule_session(session, current_time, error=None):
+    """Backs off a session that has no result yet, or fails it once its deadline has passed."""
+    deadline_hours = float(frappe.conf.get("jules_session_deadline_hours") or DEFAULT_SESSION_DEADLINE_HOURS)
+    deadline = add_to_date(get_datetime(session.creation), hours=deadline_hours)
+    if current_time >= deadline:
+        _fail_session(session, error or f"No result within {deadline_hours:g} hours.")
+        return
+
+    next_poll_at = min(add_to_date(current_time, seconds=_get_poll_interval(session.poll_count)), deadline)
+    frappe.db.set_value("AI Idea Session", session.name, {
+        "poll_count": (session.poll_count or 0) + 1,
+        "next_poll_at": next_poll_at,
+        "last_error": str(error) if error else None,
+    }, update_modified=False)
+
+
+def _fail_session(session, error):
+    frappe.db.set_value("AI Idea Session", session.name, {"status": "Error", "last_error": str(error)})
+    frappe.log_error(f"Failed to process AI session {session.session_id}: {error}", "Jules Idea Processing")
 
 
 # --- Helper Functions ---
@@ -94,19 +175,87 @@ def _get_api_key():
         return frappe.get_doc("Jules Settings").get_password("jules_api_key")
     return None
 
-def _save_ideas_to_roadmap(roadmap_name, ideas):
-    """Saves a list of generated ideas to a specified Roadmap document."""
-    roadmap_doc = frappe.get_doc("Roadmap", roadmap_name)
+def _get_duplicate_threshold():
+    """Similarity above which a new idea counts as a duplicate; 0 turns the check off."""
+    threshold = frappe.conf.get("roadmap_duplicate_threshold")
+    return DEFAULT_THRESHOLD if threshold is None else float(threshold)
+
+def _get_idea_text(title, explanation):
+    return f"{title or ''} {explanation or ''}"
+
+def _merge_duplicate_ideas(roadmap_name, ideas):
+    """
+    Returns the ideas to insert and {feature name: count} of the existing features of the
+    roadmap that other ideas nearly duplicate. Near duplicates within `ideas` are folded
+    into the first of them.
+    """
+    threshold = _get_duplicate_threshold()
+    if threshold <= 0:
+        return ideas, {}
+
+    index = SimilarityIndex(threshold)
+    features = frappe.get_all(
+        "Roadmap Feature",
+        filters={"parent": roadmap_name, "parenttype": "Roadmap"},
+        fields=["name", "feature", "explanation"]
+    )
+    for feature in features:
+        index.add(feature.name, _get_idea_text(feature.feature, feature.explanation))
+
+    new_ideas = []
+    merged = defaultdict(int)
     for idea in ideas:
-        feature_doc = frappe.new_doc("Roadmap Feature")
-        feature_doc.feature = idea.get("title")
-        feature_doc.explanation = idea.get("explanation")
-        feature_doc.status = "Ideas"
-        feature_doc.is_ai_generated = 1
-        feature_doc.type = idea.get("type", "Feature")
-        roadmap_doc.append("features", feature_doc)
-    roadmap_doc.save(ignore_permissions=True)
-    frappe.db.commit()
+        text = _get_idea_text(idea["title"], idea.get("explanation"))
+        matches = index.query(text)
+        if not matches:
+            idea["suggestion_count"] = 1
+            # New ideas are keyed by position, existing features by name.
+            index.add(len(new_ideas), text)
+            new_ideas.append(idea)
+        elif isinstance(matches[0][0], int):
+            new_ideas[matches[0][0]]["suggestion_count"] += 1
+        else:
+            merged[matches[0][0]] += 1
+    return new_ideas, merged
+
+def _save_ideas_to_roadmap(roadmap_name, ideas):
+    """
+    Appends generated ideas to a Roadmap's features in one insert. Ideas that nearly
+    duplicate an existing feature are merged into it instead. Returns the number inserted.
+    """
+    ideas = [idea for idea in ideas if idea.get("title")]
+    if not ideas:
+        return 0
+
+    ideas, merged = _merge_duplicate_ideas(roadmap_name, ideas)
+    for feature_name, count in merged.items():
+        frappe.db.sql(
+            "update `tabRoadmap Feature` set suggestion_count = ifnull(suggestion_count, 1) + %s where name=%s",
+            (count, feature_name)
+        )
+
+    timestamp = now()
+    if ideas:
+        last_idx = frappe.db.sql(
+            "select ifnull(max(idx), 0) from `tabRoadmap Feature` where parent=%s and parenttype='Roadmap' and parentfield='features'",
+            roadmap_name
+        )[0][0]
+        user = frappe.session.user
+        fields = [
+            "name", "parent", "parenttype", "parentfield", "idx", "owner", "modified_by", "creation", "modified",
+            "status", "type", "is_ai_generated", "feature", "explanation", "ai_status", "suggestion_count",
+        ]
+        values = [
+            (
+                frappe.generate_hash(length=10), roadmap_name, "Roadmap", "features", last_idx + i, user, user, timestamp, timestamp,
+                "Ideas", idea.get("type", "Feature"), 1, str(idea["title"])[:FEATURE_TITLE_LENGTH], idea.get("explanation"), "Pending",
+                idea.get("suggestion_count", 1),
+            )
+            for i, idea in enumerate(ideas, 1)
+        ]
+        frappe.db.bulk_insert("Roadmap Feature", fields, values)
+    frappe.db.set_value("Roadmap", roadmap_name, "modified", timestamp, update_modified=False)
+    return len(ideas)
 
 def _get_prompts():
     """Returns a list of prompts from Roadmap Settings."""
@@ -124,7 +273,7 @@ def _parse_ideas_from_response(response_text):
 def _create_jules_session(api_key, source_repo, title, prompt):
     """Creates a new Jules session using the configured API URL."""
     settings = frappe.get_doc("Roadmap Settings")
-    api_url = settings.jules_api_url or "https://jules.googleapis.com/v1alpha/sessions"
+    api_url = settings.jules_api_url or DEFAULT_JULES_API_URL
 
     headers = {"Content-Type": "application/json", "X-Goog-Api-Key": api_key}
     data = {"prompt": prompt, "sourceContext": {"source": source_repo, "githubRepoContext": {"startingBranch": "main"}}, "title": title, "requirePlanApproval": True}
@@ -132,13 +281,33 @@ def _create_jules_session(api_key, source_repo, title, prompt):
     response.raise_for_status()
     return response.json().get("name")
 
-def _get_jules_activities(api_key, session_id):
-    """Fetches activities for a given Jules session."""
+def _get_jules_api_url():
     settings = frappe.get_doc("Roadmap Settings")
-    api_url = (settings.jules_api_url or "https://jules.googleapis.com/v1alpha/sessions").strip('/')
+    return (settings.jules_api_url or DEFAULT_JULES_API_URL).strip('/')
+
+def _get_http_session():
+    """A process-wide session, so polls reuse connections instead of opening one each."""
+    global _http_session
+    if _http_session is None:
+        pool_size = max(int(frappe.conf.get("jules_poll_concurrency") or DEFAULT_POLL_CONCURRENCY), 1)
+        session = requests.Session()
+        retry = Retry(total=2, backoff_factor=0.25, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _http_session = session
+    return _http_session
+
+def _get_jules_activities(api_key, session_id, api_url=None, http=None):
+    """
+    Fetches activities for a given Jules session. Safe to call from worker threads when
+    `api_url` and `http` are passed.
+    """
+    api_url = api_url or _get_jules_api_url()
+    http = http or _get_http_session()
 
     headers = {"X-Goog-Api-Key": api_key}
-    response = requests.get(f"{api_url}/{session_id}/activities", headers=headers, timeout=15)
+    response = http.get(f"{api_url}/{session_id}/activities", headers=headers, timeout=POLL_TIMEOUT)
     response.raise_for_status()
     activities = response.json().get("activities", [])
     return activities if len(activities) > 1 else None
@@ -161,25 +161,10 @@ def get_weather(location: str):
     if not location:
         frappe.throw("Location is a required parameter.")
 
-    # Check for special cases to use default location, mimicking Laravel logic
-    weather_settings = frappe.get_doc("Weather Settings")
-    default_location = weather_settings.default_location or "messina,za"
-
-    # Simple check for coordinates (e.g., "-25.2,31.4") or "messina" related strings
-    if "," in location or "messina" in location.lower() or "nancefield" in location.lower():
-        location = default_location
-
-    cache_key = f"weather_{location.lower().replace(' ', '_')}"
-    cached_data = frappe.cache().get_value(cache_key)
-
-    if cached_data:
-        return cached_data
-
+    # Normalization, caching and de-duplication of upstream calls live in the weather module.
     try:
         from .weather import get_weather_data
-        weather_data = get_weather_data(location)
-        frappe.cache().set_value(cache_key, weather_data, expires_in_sec=43200)  # Cache for 12 hours
-        return weather_data
+        return get_weather_data(location)
     except Exception as e:
         frappe.log_error(frappe.get_traceback(), "Weather API Error")
         frappe.throw(f"An error occurred while fetching weather data: {e}")
@@ -51,3 +51,28 @@ def get_new_subscriptions_chart_data():
         ]
     }
 
+
+
+def get_provisioning_step_latency_chart_data():
+    """
+    Returns p50/p90/p99 durations per provisioning step over the last 30 days
+    for the "Provisioning Step Latency" chart.
+    """
+    if frappe.conf.get("app_role") != "control_panel":
+        return {
+            "labels": [],
+            "datasets": []
+        }
+
+    from .provisioning_state import _get_step_percentiles
+    percentiles = _get_step_percentiles(30)
+    steps = sorted(percentiles)
+
+    return {
+        "labels": steps,
+        "datasets": [
+            {"name": "p50 (s)", "values": [percentiles[step]["p50"] for step in steps]},
+            {"name": "p90 (s)", "values": [percentiles[step]["p90"] for step in steps]},
+            {"name": "p99 (s)", "values": [percentiles[step]["p99"] for step in steps]}
+        ]
+    }
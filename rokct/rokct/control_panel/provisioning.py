@@ -2,6 +2,7 @@
 # For license information, please see license.txt
 # This file will contain APIs related to tenant provisioning.
 import frappe
+import json
 from frappe.utils import validate_email_address
 
 def _validate_provisioning_input(plan, email, password, first_name, last_name, company_name, currency, country, industry):
@@ -24,8 +25,9 @@ def _validate_provisioning_input(plan, email, password, first_name, last_name, c
     if frappe.db.exists("User", {"email": email}):
         frappe.throw("A user with this email address already exists.", title="Email Already Registered")
 
-    # Check if a customer with this email already exists
-    if frappe.db.exists("Customer", {"customer_primary_email": email}):
+    # Check if a customer with this email already exists (a customer whose provisioning failed may sign up again)
+    existing_customer = frappe.db.get_value("Customer", {"customer_primary_email": email})
+    if existing_customer and not _get_failed_subscription(existing_customer, email):
         frappe.throw("A customer account with this email address already exists.", title="Email Already Registered")
 
     # Check if the subscription plan exists
@@ -41,6 +43,28 @@ def _validate_provisioning_input(plan, email, password, first_name, last_name, c
         frappe.throw("First name, last name, company name, country, and industry must be non-empty strings.", title="Invalid Input")
 
 
+def _get_failed_subscription(customer_id, email):
+    """
+    Returns the customer's 'Setup Failed' subscription if the customer has no other
+    subscription that is still in use and `email` is the one the customer signed up with,
+    otherwise None. Anyone else signing up with the same company name must not take over
+    the failed site.
+    """
+    failed_subscription = frappe.db.get_value("Company Subscription", {"customer": customer_id, "status": "Setup Failed"})
+    if not failed_subscription:
+        return None
+    if frappe.db.exists("Company Subscription", {"customer": customer_id, "status": ["not in", ["Dropped", "Setup Failed"]]}):
+        return None
+
+    signup_emails = {frappe.db.get_value("Customer", customer_id, "customer_primary_email")}
+    payload = frappe.get_doc("Company Subscription", failed_subscription).get_password("provisioning_payload", raise_exception=False)
+    if payload:
+        signup_emails.add(json.loads(payload).get("email"))
+    if not email or email.strip().lower() not in {e.strip().lower() for e in signup_emails if e}:
+        return None
+    return failed_subscription
+
+
 @frappe.whitelist()
 def provision_new_tenant(plan, email, password, first_name, last_name, company_name, currency, country, industry):
     """
@@ -55,9 +79,32 @@ def provision_new_tenant(plan, email, password, first_name, last_name, company_n
     # 1. Validate all inputs
     _validate_provisioning_input(plan, email, password, first_name, last_name, company_name, currency, country, industry)
 
+    user_details = {
+        "email": email,
+        "password": password,
+        "first_name": first_name,
+        "last_name": last_name,
+        "company_name": company_name,
+        "currency": currency,
+        "country": country,
+        "verification_token": frappe.generate_hash(length=48)
+    }
+
     # 2. Prevent trial abuse and check for existing subscriptions
     customer_id = frappe.db.get_value("Customer", {"customer_name": company_name})
     if customer_id:
+        # A signup whose provisioning failed is resumed rather than blocked by its own subscription.
+        failed_subscription = _get_failed_subscription(customer_id, email)
+        if failed_subscription:
+            from .provisioning_state import resume_provisioning
+            subscription = frappe.get_doc("Company Subscription", failed_subscription)
+            resume_provisioning(subscription, user_details)
+            return {
+                "status": "success",
+                "message": f"Site {subscription.site_name} is being set up. You will receive an email shortly.",
+                "site_name": subscription.site_name
+            }
+
         # Check if the new plan is a trial plan
         new_plan = frappe.get_doc("Subscription Plan", plan)
         new_plan.reload() # Ensure custom fields are loaded
@@ -127,8 +174,6 @@ def provision_new_tenant(plan, email, password, first_name, last_name, company_n
         frappe.throw(f"Failed to create subscription record: {e}")
 
     # 5. Enqueue a background job to create the site
-    verification_token = frappe.generate_hash(length=48)
-
     frappe.enqueue(
         "rokct.rokct.control_panel.tasks.create_tenant_site_job",
         queue="long",
@@ -136,16 +181,7 @@ def provision_new_tenant(plan, email, password, first_name, last_name, company_n
         job_name=f"provision-site-{site_name}",
         subscription_id=subscription.name,
         site_name=site_name,
-        user_details={
-            "email": email,
-            "password": password,
-            "first_name": first_name,
-            "last_name": last_name,
-            "company_name": company_name,
-            "currency": currency,
-            "country": country,
-            "verification_token": verification_token
-        }
+        user_details=user_details
     )
 
     return {
@@ -0,0 +1,204 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Persisted provisioning state machine.
+#
+# Each provisioning step is recorded as a row in the `provisioning_steps` table of the
+# Company Subscription, with its status, attempts, duration and output. A retry skips
+# every step that has already completed and resumes from the first one that has not.
+import frappe
+import json
+import time
+from frappe.utils import now_datetime, flt
+from frappe.utils.password import remove_encrypted_password
+
+MAX_STEP_OUTPUT_LENGTH = 10000
+DONE_STATUSES = ("Completed", "Skipped")
+
+
+def get_site_setup_steps(apps):
+    """The ordered steps that turn a site name into an installed tenant site."""
+    return ["new_site", "apps_txt"] + [f"install_app:{app}" for app in apps] + ["set_config"]
+
+
+class ProvisioningState:
+    """
+    Runs provisioning steps and records them on a Company Subscription.
+    Without a subscription (e.g. warm pool or template builds) steps simply run.
+    """
+
+    def __init__(self, subscription=None, logs=None):
+        self.subscription = subscription
+        self.logs = logs if logs is not None else []
+
+    def _get_row(self, step):
+        for row in self.subscription.get("provisioning_steps"):
+            if row.step == step:
+                return row
+        return self.subscription.append("provisioning_steps", {"step": step, "status": "Pending", "attempts": 0})
+
+    def _save(self, row):
+        self.subscription.provisioning_step = f"{row.step}: {row.status}"
+        self.subscription.save(ignore_permissions=True)
+        frappe.db.commit()
+
+    def is_done(self, step):
+        if not self.subscription:
+            return False
+        return any(row.step == step and row.status in DONE_STATUSES for row in self.subscription.get("provisioning_steps"))
+
+    def has_unfinished_attempt(self, step):
+        """True if `step` has been started before but did not complete, e.g. it failed or its worker died."""
+        if not self.subscription:
+            return False
+        return any(
+            row.step == step and row.attempts and row.status not in DONE_STATUSES
+            for row in self.subscription.get("provisioning_steps")
+        )
+
+    def run(self, step, fn, *args, **kwargs):
+        """
+        Runs `fn` as `step` unless the step has already completed. Failures are recorded
+        with the step's output and re-raised to the caller.
+        """
+        if not self.subscription:
+            return fn(*args, **kwargs)
+
+        if self.is_done(step):
+            self.logs.append(f"RESUME: Step '{step}' already completed. Skipping.")
+            return None
+
+        row = self._get_row(step)
+        row.status = "Running"
+        row.started_on = now_datetime()
+        row.attempts = (row.attempts or 0) + 1
+        self._save(row)
+
+        log_start = len(self.logs)
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self.logs.append(f"STDOUT: {getattr(e, 'stdout', 'N/A')}\nSTDERR: {getattr(e, 'stderr', 'N/A')}\nERROR: {e}")
+            self._finish(row, "Failed", started, log_start)
+            raise
+
+        self._finish(row, "Completed", started, log_start)
+        return result
+
+    def skip(self, step, reason):
+        if not self.subscription or self.is_done(step):
+            return
+        row = self._get_row(step)
+        row.status = "Skipped"
+        row.finished_on = now_datetime()
+        row.duration_seconds = 0
+        row.output = reason
+        self._save(row)
+
+    def _finish(self, row, status, started, log_start):
+        row.status = status
+        row.finished_on = now_datetime()
+        row.duration_seconds = flt(time.monotonic() - started, 3)
+        row.output = "\n".join(str(line) for line in self.logs[log_start:])[-MAX_STEP_OUTPUT_LENGTH:]
+        self._save(row)
+
+
+def store_provisioning_payload(subscription, user_details):
+    """Keeps the signup details (encrypted) so a failed provisioning can be retried later."""
+    if subscription.get_password("provisioning_payload", raise_exception=False):
+        return
+    subscription.provisioning_payload = json.dumps(user_details)
+    subscription.save(ignore_permissions=True)
+    frappe.db.commit()
+
+
+def clear_provisioning_payload(subscription_name):
+    remove_encrypted_password("Company Subscription", subscription_name, "provisioning_payload")
+    frappe.db.commit()
+
+
+@frappe.whitelist()
+def retry_provisioning(subscription_id):
+    """
+    Re-runs provisioning for a subscription, resuming from its first incomplete step.
+    """
+    frappe.only_for("System Manager")
+
+    subscription = frappe.get_doc("Company Subscription", subscription_id)
+    payload = subscription.get_password("provisioning_payload", raise_exception=False)
+    if not payload:
+        frappe.throw(f"No provisioning details are stored for {subscription_id}. It may have already completed.", title="Cannot Retry")
+
+    resume_provisioning(subscription, json.loads(payload))
+    return {"status": "success", "message": f"Provisioning for {subscription.site_name} has been resumed."}
+
+
+def resume_provisioning(subscription, user_details):
+    """
+    Enqueues provisioning for an existing subscription with `user_details`, which replace
+    the stored signup details. Used by `retry_provisioning` and when a customer whose
+    provisioning failed signs up again.
+    """
+    if subscription.status == "Dropped":
+        # The site is gone, so every recorded step has to run again.
+        subscription.set("provisioning_steps", [])
+
+    subscription.status = "Provisioning"
+    subscription.provisioning_payload = json.dumps(user_details)
+    subscription.save(ignore_permissions=True)
+    frappe.db.commit()
+
+    frappe.enqueue(
+        "rokct.rokct.control_panel.tasks.create_tenant_site_job",
+        queue="long",
+        timeout=1500,
+        job_name=f"provision-site-{subscription.site_name}",
+        subscription_id=subscription.name,
+        site_name=subscription.site_name,
+        user_details=user_details
+    )
+
+
+@frappe.whitelist()
+def get_provisioning_step_latency(days=30):
+    """
+    Returns p50/p90/p99 durations per provisioning step over the last `days` days.
+    """
+    frappe.only_for("System Manager")
+    return _get_step_percentiles(days)
+
+
+def _percentile(sorted_values, percentile):
+    if not sorted_values:
+        return 0
+    index = min(int(round(percentile / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def _get_step_percentiles(days):
+    from frappe.utils import add_days, nowdate
+
+    rows = frappe.get_all(
+        "Provisioning Step",
+        filters={
+            "parenttype": "Company Subscription",
+            "status": "Completed",
+            "finished_on": (">=", add_days(nowdate(), -int(days)))
+        },
+        fields=["step", "duration_seconds"],
+        order_by="duration_seconds asc"
+    )
+
+    durations = {}
+    for row in rows:
+        durations.setdefault(row.step, []).append(flt(row.duration_seconds))
+
+    return {
+        step: {
+            "count": len(values),
+            "p50": _percentile(values, 50),
+            "p90": _percentile(values, 90),
+            "p99": _percentile(values, 99),
+        }
+        for step, values in durations.items()
+    }
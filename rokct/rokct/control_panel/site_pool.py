@@ -0,0 +1,253 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Warm pool of pre-provisioned tenant sites.
+#
+# A pooled site has already been through `bench new-site`, every `install-app`
+# and `set-config app_role tenant`. Provisioning a new subscription then only
+# needs to move the pooled site directory to the tenant's site name and run
+# `initial_setup`, instead of waiting minutes for a cold install.
+import frappe
+import os
+import hashlib
+import time
+from frappe.utils import now_datetime, flt
+
+COMMON_APPS = ["frappe", "erpnext", "payments", "swagger", "rokct"]
+POOL_SITE_PREFIX = "pool-"
+
+
+def get_plan_apps(plan_name):
+    """
+    Returns the ordered list of apps that a site on the given plan must have installed.
+    `rokct` is always installed last so its hooks can rely on every other app being present.
+    """
+    plan_apps = frappe.get_all(
+        "Subscription Plan Module",
+        filters={"parent": plan_name, "parenttype": "Subscription Plan"},
+        pluck="module",
+        order_by="idx asc"
+    )
+    return _resolve_apps(plan_apps)
+
+
+def _resolve_apps(plan_apps):
+    final_apps = list(dict.fromkeys(COMMON_APPS + plan_apps))
+    final_apps.remove("rokct")
+    final_apps.append("rokct")
+    return final_apps
+
+
+def get_app_set_key(apps):
+    """A short, stable fingerprint for an ordered list of apps."""
+    return hashlib.sha1("\n".join(apps).encode()).hexdigest()[:12]
+
+
+def _get_pool_settings():
+    settings = frappe.get_cached_doc("Subscription Settings")
+    return frappe._dict({
+        "enabled": bool(settings.get("enable_warm_site_pool")),
+        "pool_size": max(int(settings.get("warm_pool_size") or 0), 0),
+        "max_concurrent_builds": max(int(settings.get("warm_pool_max_concurrent_builds") or 1), 1),
+    })
+
+
+def is_pool_enabled():
+    return _get_pool_settings().enabled
+
+
+def _get_all_app_sets():
+    """
+    Returns {app_set_key: apps} for every distinct app set across all Subscription Plans,
+    using a single query for the plan modules.
+    """
+    plans = frappe.get_all("Subscription Plan", pluck="name")
+    modules_by_plan = {}
+    for row in frappe.get_all(
+        "Subscription Plan Module",
+        filters={"parenttype": "Subscription Plan"},
+        fields=["parent", "module"],
+        order_by="idx asc"
+    ):
+        modules_by_plan.setdefault(row.parent, []).append(row.module)
+
+    app_sets = {}
+    for plan in plans:
+        apps = _resolve_apps(modules_by_plan.get(plan, []))
+        app_sets[get_app_set_key(apps)] = apps
+    return app_sets
+
+
+def refill_warm_pool():
+    """
+    Scheduled job that tops up the pool so every app set has `warm_pool_size`
+    sites that are either ready or already building.
+    New builds are enqueued on the long queue, capped by `warm_pool_max_concurrent_builds`.
+    """
+    settings = _get_pool_settings()
+    if not settings.enabled or not settings.pool_size:
+        return
+
+    tenant_domain = frappe.conf.get("tenant_domain")
+    if not frappe.conf.get("bench_path") or not tenant_domain:
+        frappe.log_error("`bench_path` or `tenant_domain` not set in site_config.json. Cannot refill the warm site pool.", "Warm Site Pool")
+        return
+
+    counts = {}
+    building = 0
+    for row in frappe.get_all(
+        "Pooled Tenant Site",
+        filters={"status": ["in", ["Building", "Ready"]]},
+        fields=["app_set", "status", "count(name) as count"],
+        group_by="app_set, status"
+    ):
+        counts[row.app_set] = counts.get(row.app_set, 0) + row.count
+        if row.status == "Building":
+            building += row.count
+
+    build_slots = settings.max_concurrent_builds - building
+    for app_set, apps in _get_all_app_sets().items():
+        missing = settings.pool_size - counts.get(app_set, 0)
+        while missing > 0 and build_slots > 0:
+            site_name = f"{POOL_SITE_PREFIX}{frappe.generate_hash(length=10)}.{tenant_domain}"
+            entry = frappe.get_doc({
+                "doctype": "Pooled Tenant Site",
+                "site_name": site_name,
+                "app_set": app_set,
+                "apps": "\n".join(apps),
+                "status": "Building",
+                "build_started_on": now_datetime(),
+            }).insert(ignore_permissions=True)
+            frappe.db.commit()
+
+            frappe.enqueue(
+                "rokct.rokct.control_panel.site_pool.build_pooled_site",
+                queue="long",
+                timeout=1500,
+                job_name=f"build-pooled-site-{site_name}",
+                pool_entry=entry.name
+            )
+            missing -= 1
+            build_slots -= 1
+
+
+def build_pooled_site(pool_entry):
+    """
+    Creates a pooled site and installs its app set, recording how long the build took.
+    A failed build is marked Failed and whatever it created is dropped.
+    """
+    from .tasks import _create_and_install_site, _drop_partial_site
+
+    entry = frappe.get_doc("Pooled Tenant Site", pool_entry)
+    bench_path = frappe.conf.get("bench_path")
+    started = time.monotonic()
+    logs = []
+
+    try:
+        if not bench_path:
+            raise frappe.ValidationError("`bench_path` not set in control plane site_config.json")
+
+        _create_and_install_site(entry.site_name, entry.apps.split("\n"), bench_path, logs)
+
+        entry.status = "Ready"
+        entry.ready_on = now_datetime()
+        entry.build_seconds = flt(time.monotonic() - started, 2)
+        entry.save(ignore_permissions=True)
+        frappe.db.commit()
+
+    except Exception as e:
+        frappe.db.rollback()
+        error = f"\n--- FATAL ERROR ---\nSTDOUT: {getattr(e, 'stdout', 'N/A')}\nSTDERR: {getattr(e, 'stderr', 'N/A')}\nTRACEBACK: {frappe.get_traceback()}"
+        if bench_path:
+            try:
+                _drop_partial_site(entry.site_name, bench_path, logs)
+            except Exception as drop_error:
+                logs.append(f"WARNING: Could not drop the partially built site. Reason: {getattr(drop_error, 'stderr', None) or drop_error}")
+
+        entry.reload()
+        entry.status = "Failed"
+        entry.build_seconds = flt(time.monotonic() - started, 2)
+        entry.error = "\n".join(logs) + error
+        entry.save(ignore_permissions=True)
+        frappe.db.commit()
+        frappe.log_error(entry.error, f"Warm Site Pool: Build Failed for {entry.site_name}")
+
+
+def claim_pooled_site(subscription_name, site_name, apps):
+    """
+    Assigns a ready pooled site with a matching app set to the subscription by moving
+    its site directory to `site_name`. Returns the pooled site name, or None when the
+    pool is empty, so the caller can fall back to a cold install.
+    """
+    bench_path = frappe.conf.get("bench_path")
+    started = time.monotonic()
+    app_set = get_app_set_key(apps)
+
+    sites_dir = os.path.join(bench_path, "sites")
+    target_path = os.path.join(sites_dir, site_name)
+    if os.path.exists(target_path):
+        # Nothing wrong with the pooled sites; this tenant just cannot take one. Leave them Ready.
+        return None
+
+    pool_entry = frappe.db.get_value(
+        "Pooled Tenant Site",
+        {"app_set": app_set, "status": "Ready"},
+        "name",
+        order_by="ready_on asc",
+        for_update=True
+    )
+    if not pool_entry:
+        return None
+
+    entry = frappe.get_doc("Pooled Tenant Site", pool_entry)
+    source_path = os.path.join(sites_dir, entry.site_name)
+
+    if not os.path.isdir(source_path):
+        entry.status = "Failed"
+        entry.error = f"Could not assign pooled site: '{source_path}' is missing."
+        entry.save(ignore_permissions=True)
+        frappe.db.commit()
+        return None
+
+    os.rename(source_path, target_path)
+
+    entry.status = "Assigned"
+    entry.assigned_to = subscription_name
+    entry.assigned_site_name = site_name
+    entry.assigned_on = now_datetime()
+    entry.assignment_seconds = flt(time.monotonic() - started, 2)
+    entry.save(ignore_permissions=True)
+    frappe.db.commit()
+
+    # Top the pool back up straight away rather than waiting for the next scheduler tick.
+    frappe.enqueue("rokct.rokct.control_panel.site_pool.refill_warm_pool", queue="short")
+    return entry.name
+
+
+@frappe.whitelist()
+def get_warm_pool_metrics():
+    """
+    Returns pool occupancy and time-to-ready metrics for each app set.
+    """
+    frappe.only_for("System Manager")
+
+    metrics = {}
+    for row in frappe.get_all(
+        "Pooled Tenant Site",
+        fields=[
+            "app_set", "status", "count(name) as count",
+            "avg(build_seconds) as avg_build_seconds", "max(build_seconds) as max_build_seconds",
+            "avg(assignment_seconds) as avg_assignment_seconds"
+        ],
+        group_by="app_set, status"
+    ):
+        metrics.setdefault(row.app_set, {})[row.status] = {
+            "count": row.count,
+            "avg_build_seconds": flt(row.avg_build_seconds, 2),
+            "max_build_seconds": flt(row.max_build_seconds, 2),
+            "avg_assignment_seconds": flt(row.avg_assignment_seconds, 2),
+        }
+
+    return {
+        "enabled": is_pool_enabled(),
+        "app_sets": metrics
+    }
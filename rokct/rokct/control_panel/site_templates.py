@@ -0,0 +1,302 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Template-snapshot site creation.
+#
+# Instead of running one `install-app` per app for every tenant, a template site is
+# built once per app set, snapshotted (database dump plus public/private files) and
+# stored under `<bench>/site_templates/<app_set>/<fingerprint>/`. New sites are then
+# created by restoring that snapshot with `bench new-site --source-sql`.
+#
+# The fingerprint covers the installed revision of every app in the set, including any
+# uncommitted changes, so a template built before `update_rokct_app` (or any other app
+# update) is never used afterwards.
+#
+# Every site keeps its own `encryption_key`, so the snapshot must not contain values
+# encrypted with the template's key. They are deleted from the template site before it is
+# dumped, and each restored site keeps the fresh key `bench new-site` generated.
+import frappe
+import os
+import json
+import shutil
+import hashlib
+import subprocess
+import time
+from frappe.utils import now_datetime, flt, get_datetime
+
+TEMPLATES_DIR = "site_templates"
+MANIFEST_FILE = "manifest.json"
+# Bumped when the snapshot format changes; templates with another version are rebuilt.
+TEMPLATE_VERSION = 2
+TEMPLATE_SITE_PREFIX = "template-"
+
+
+def is_template_mode_enabled():
+    return frappe.db.get_single_value("Subscription Settings", "provisioning_mode") == "Template Snapshot"
+
+
+def _git(app_path, *args):
+    return subprocess.check_output(["git", *args], cwd=app_path, stderr=subprocess.DEVNULL)
+
+
+def _get_app_revision(bench_path, app):
+    """
+    Returns the installed revision of an app: the git HEAD commit when the app is a git
+    checkout, plus a hash of any uncommitted changes, otherwise a hash of its
+    `__init__.py` and `patches.txt`.
+    """
+    app_path = os.path.join(bench_path, "apps", app)
+    try:
+        head = _git(app_path, "rev-parse", "HEAD").decode().strip()
+        changes = hashlib.sha1(_git(app_path, "diff", "HEAD", "--binary"))
+        for path in _git(app_path, "ls-files", "--others", "--exclude-standard", "-z").split(b"\0"):
+            if path and os.path.isfile(os.path.join(app_path, path.decode())):
+                changes.update(path)
+                with open(os.path.join(app_path, path.decode()), "rb") as f:
+                    changes.update(f.read())
+        if changes.hexdigest() == hashlib.sha1().hexdigest():
+            return head
+        return f"{head}+dirty.{changes.hexdigest()[:12]}"
+    except (subprocess.CalledProcessError, FileNotFoundError, NotADirectoryError):
+        pass
+
+    digest = hashlib.sha1()
+    for filename in (os.path.join(app, "__init__.py"), os.path.join(app, "patches.txt")):
+        path = os.path.join(app_path, filename)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return digest.hexdigest()
+
+
+def get_apps_fingerprint(bench_path, apps):
+    """
+    Returns (fingerprint, revisions) for an ordered app set. The fingerprint changes
+    whenever any app in the set is updated.
+    """
+    revisions = {app: _get_app_revision(bench_path, app) for app in apps}
+    payload = "\n".join(f"{app}@{revisions[app]}" for app in apps)
+    return hashlib.sha1(payload.encode()).hexdigest()[:16], revisions
+
+
+def _get_template_dir(bench_path, app_set, fingerprint=None):
+    path = os.path.join(bench_path, TEMPLATES_DIR, app_set)
+    return os.path.join(path, fingerprint) if fingerprint else path
+
+
+def get_current_template(bench_path, apps):
+    """
+    Returns the manifest of a template that matches the current revision of every app
+    in the set, or None if there is no template or it is stale.
+    """
+    from .site_pool import get_app_set_key
+
+    fingerprint, _ = get_apps_fingerprint(bench_path, apps)
+    manifest_path = os.path.join(_get_template_dir(bench_path, get_app_set_key(apps), fingerprint), MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    if manifest.get("fingerprint") != fingerprint or manifest.get("apps") != apps:
+        return None
+    # Older templates may hold values encrypted with the template's key.
+    if manifest.get("version") != TEMPLATE_VERSION:
+        return None
+    return manifest
+
+
+def create_site_from_template(site_name, apps, bench_path, logs):
+    """
+    Creates `site_name` by restoring the current template snapshot for its app set.
+    Returns False without side effects when template mode is off or no fresh template
+    exists, so the caller can fall back to installing apps one by one.
+    """
+    if not is_template_mode_enabled():
+        return False
+
+    manifest = get_current_template(bench_path, apps)
+    if not manifest:
+        logs.append("\nNo up-to-date site template for this plan's apps. Falling back to a full install.")
+        return False
+
+    template_dir = manifest["path"]
+    logs.append(f"\nStep 1: Restoring site template {manifest['fingerprint']} into '{site_name}'...")
+
+    command = [
+        "bench", "new-site", site_name,
+        "--db-name", site_name.replace(".", "_"),
+        "--admin-password", frappe.generate_hash(length=16),
+        "--source-sql", os.path.join(template_dir, manifest["database"]),
+    ]
+    db_root_password = frappe.conf.get("db_root_password")
+    if db_root_password:
+        command.extend(["--mariadb-root-password", db_root_password])
+
+    process = subprocess.run(command, cwd=bench_path, capture_output=True, text=True, timeout=300)
+    logs.append(f"--- 'bench new-site --source-sql' STDOUT ---\n{process.stdout or 'No standard output.'}")
+    logs.append(f"--- 'bench new-site --source-sql' STDERR ---\n{process.stderr or 'No standard error.'}")
+    process.check_returncode()
+
+    site_path = os.path.join(bench_path, "sites", site_name)
+    for archive in manifest.get("files", []):
+        shutil.unpack_archive(os.path.join(template_dir, archive), site_path)
+
+    with open(os.path.join(site_path, "apps.txt"), "w") as f:
+        f.write("\n".join(apps))
+
+    # The snapshot carries the template site's Administrator password, so reset it.
+    subprocess.run(["bench", "--site", site_name, "set-admin-password", frappe.generate_hash(length=16)], cwd=bench_path, check=True, capture_output=True, text=True)
+    subprocess.run(["bench", "--site", site_name, "set-config", "app_role", "tenant"], cwd=bench_path, check=True, capture_output=True, text=True)
+    logs.append(f"SUCCESS: Site '{site_name}' restored from template with apps: {', '.join(apps)}.")
+    return True
+
+
+def build_site_template(app_set, apps):
+    """
+    Builds a fresh template site for an app set, snapshots it and removes the site.
+    Older template versions for the same app set are deleted once the new one is ready.
+    """
+    from .tasks import _create_and_install_site
+
+    bench_path = frappe.conf.get("bench_path")
+    tenant_domain = frappe.conf.get("tenant_domain")
+    if not bench_path or not tenant_domain:
+        frappe.log_error("`bench_path` or `tenant_domain` not set in site_config.json. Cannot build site template.", "Site Template Build Failed")
+        return
+
+    fingerprint, revisions = get_apps_fingerprint(bench_path, apps)
+    template_dir = _get_template_dir(bench_path, app_set, fingerprint)
+    if os.path.exists(os.path.join(template_dir, MANIFEST_FILE)):
+        return
+
+    site_name = f"{TEMPLATE_SITE_PREFIX}{app_set}.{tenant_domain}"
+    site_path = os.path.join(bench_path, "sites", site_name)
+    staging_dir = f"{template_dir}.tmp"
+    logs = []
+    started = time.monotonic()
+
+    try:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.makedirs(staging_dir)
+
+        _create_and_install_site(site_name, apps, bench_path, logs, use_template=False)
+
+        # Restored sites keep their own encryption key, so nothing encrypted may be snapshotted.
+        subprocess.run(
+            ["bench", "--site", site_name, "execute", "rokct.rokct.control_panel.site_templates.remove_encrypted_values"],
+            cwd=bench_path, check=True, capture_output=True, text=True, timeout=300
+        )
+
+        subprocess.run(
+            ["bench", "--site", site_name, "backup", "--backup-path", staging_dir, "--compress"],
+            cwd=bench_path, check=True, capture_output=True, text=True, timeout=600
+        )
+        database = next(f for f in os.listdir(staging_dir) if f.endswith("-database.sql.gz"))
+        os.rename(os.path.join(staging_dir, database), os.path.join(staging_dir, "database.sql.gz"))
+        for f in os.listdir(staging_dir):
+            if f != "database.sql.gz":
+                os.remove(os.path.join(staging_dir, f))
+
+        files = []
+        for folder in ("public", "private"):
+            if os.path.isdir(os.path.join(site_path, folder, "files")):
+                shutil.make_archive(os.path.join(staging_dir, f"{folder}-files"), "gztar", site_path, os.path.join(folder, "files"))
+                files.append(f"{folder}-files.tar.gz")
+
+        manifest = {
+            "version": TEMPLATE_VERSION,
+            "app_set": app_set,
+            "apps": apps,
+            "fingerprint": fingerprint,
+            "revisions": revisions,
+            "database": "database.sql.gz",
+            "files": files,
+            "path": template_dir,
+            "created": str(now_datetime()),
+            "build_seconds": flt(time.monotonic() - started, 2),
+        }
+        with open(os.path.join(staging_dir, MANIFEST_FILE), "w") as f:
+            json.dump(manifest, f, indent=1)
+
+        os.rename(staging_dir, template_dir)
+        remove_older_templates(bench_path, app_set, manifest)
+
+    except Exception as e:
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        error_message = "\n".join(logs) + f"\nSTDOUT: {getattr(e, 'stdout', 'N/A')}\nSTDERR: {getattr(e, 'stderr', 'N/A')}\nTRACEBACK: {frappe.get_traceback()}"
+        frappe.log_error(error_message, f"Site Template Build Failed for {app_set}")
+
+    finally:
+        if os.path.exists(site_path):
+            command = ["bench", "drop-site", site_name, "--force", "--no-backup"]
+            db_root_password = frappe.conf.get("db_root_password")
+            if db_root_password:
+                command.extend(["--mariadb-root-password", db_root_password])
+            subprocess.run(command, cwd=bench_path, capture_output=True, text=True, timeout=180)
+
+
+def remove_encrypted_values():
+    """
+    Runs on a template site before it is snapshotted. Deletes every value encrypted with the
+    template's key, since no restored site can decrypt them. Returns the number removed.
+    """
+    frappe.db.sql("DELETE FROM `__Auth` WHERE encrypted = 1")
+    removed = frappe.db._cursor.rowcount
+    frappe.db.commit()
+    return removed
+
+
+def remove_older_templates(bench_path, app_set, manifest):
+    """
+    Deletes the completed templates of an app set that were built before `manifest`.
+    Staging directories and newer templates belong to other builds and are left alone.
+    """
+    built = get_datetime(manifest["created"])
+    for entry in os.listdir(_get_template_dir(bench_path, app_set)):
+        if entry == manifest["fingerprint"] or entry.endswith(".tmp"):
+            continue
+        path = _get_template_dir(bench_path, app_set, entry)
+        try:
+            with open(os.path.join(path, MANIFEST_FILE)) as f:
+                created = json.load(f).get("created")
+        except (OSError, ValueError):
+            continue
+        if created and get_datetime(created) < built:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def refresh_stale_templates():
+    """
+    Enqueues a template build for every app set whose template is missing or was built
+    against an older revision of one of its apps. Called by the updater after app updates.
+    """
+    from .site_pool import _get_all_app_sets
+
+    bench_path = frappe.conf.get("bench_path")
+    if not bench_path or not is_template_mode_enabled():
+        return []
+
+    stale = []
+    for app_set, apps in _get_all_app_sets().items():
+        if get_current_template(bench_path, apps):
+            continue
+        stale.append(app_set)
+        frappe.enqueue(
+            "rokct.rokct.control_panel.site_templates.build_site_template",
+            queue="long",
+            timeout=3000,
+            job_id=f"build-site-template-{app_set}",
+            deduplicate=True,
+            app_set=app_set,
+            apps=apps
+        )
+    return stale
+
+
+@frappe.whitelist()
+def rebuild_site_templates():
+    """Manually triggers a build of every stale site template."""
+    frappe.only_for("System Manager")
+    stale = refresh_stale_templates()
+    return {"status": "success", "enqueued": stale}
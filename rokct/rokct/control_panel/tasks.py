@@ -10,6 +10,11 @@ import time
 from datetime import datetime, timedelta
 from frappe.utils import nowdate, add_days, getdate, add_months, add_years, now_datetime, get_datetime
 from .paystack_controller import PaystackController
+from .site_pool import get_plan_apps, claim_pooled_site, is_pool_enabled
+from .site_templates import create_site_from_template
+from .provisioning_state import ProvisioningState, get_site_setup_steps, store_provisioning_payload, clear_provisioning_payload
+
+FAILED_PROVISION_RETRY_DAYS = 3
 
 def _log_and_notify(site_name, log_messages, success, subject_prefix):
     status = "SUCCESS" if success else "FAILURE"
@@ -41,10 +46,12 @@ def create_tenant_site_job(subscription_id, site_name, user_details, synchronous
     Creates the tenant site, installs apps, and sets initial config.
     If `synchronous` is True, it will not enqueue the final setup job,
     allowing the caller to run it directly for debugging.
+    Each step is recorded on the subscription, so a retry resumes from the failed step.
     """
     logs = [f"--- Starting Site Creation for {site_name} at {now_datetime()} ---"]
     success = False
     subscription = frappe.get_doc("Company Subscription", subscription_id)
+    state = ProvisioningState(subscription, logs)
 
     try:
         bench_path = frappe.conf.get("bench_path")
@@ -52,47 +59,22 @@ def create_tenant_site_job(subscription_id, site_name, user_details, synchronous
             raise frappe.ValidationError("`bench_path` not set in control plane site_config.json")
         logs.append(f"Using bench path: {bench_path}")
 
-        admin_password = frappe.generate_hash(length=16)
-        db_root_password = frappe.conf.get("db_root_password")
-
-        logs.append(f"\nStep 1: Preparing 'bench new-site' command for '{site_name}'...")
-        command = ["bench", "new-site", site_name, "--db-name", site_name.replace(".", "_"), "--admin-password", admin_password]
-        if db_root_password:
-            logs.append("Found db_root_password. Adding to command.")
-            command.extend(["--mariadb-root-password", db_root_password])
+        store_provisioning_payload(subscription, user_details)
+        final_apps = get_plan_apps(subscription.plan)
 
-        process = subprocess.run(command, cwd=bench_path, capture_output=True, text=True, timeout=300)
-        logs.append(f"--- 'bench new-site' STDOUT ---\n{process.stdout or 'No standard output.'}")
-        logs.append(f"--- 'bench new-site' STDERR ---\n{process.stderr or 'No standard error.'}")
-        process.check_returncode()
-        logs.append(f"SUCCESS: Site '{site_name}' created.")
+        pooled_site = None
+        if is_pool_enabled() and not state.is_done("new_site"):
+            pooled_site = claim_pooled_site(subscription.name, site_name, final_apps)
 
-        plan = frappe.get_doc("Subscription Plan", subscription.plan)
-        if not plan:
-            raise frappe.ValidationError(f"FATAL: Subscription Plan '{subscription.plan}' not found.")
-
-        plan_modules = plan.get("modules") or []
-        plan_apps = [d.module for d in plan_modules]
-        common_apps = ["frappe", "erpnext", "payments", "swagger", "rokct"]
-        final_apps = list(dict.fromkeys(common_apps + plan_apps))
-        if "rokct" in final_apps:
-            final_apps.remove("rokct")
-            final_apps.append("rokct")
-
-        apps_txt_path = os.path.join(bench_path, "sites", site_name, "apps.txt")
-        with open(apps_txt_path, "w") as f:
-            f.write("\n".join(final_apps))
-        logs.append(f"SUCCESS: Created site-specific apps.txt.")
-
-        logs.append("\nStep 2: Installing apps...")
-        for app in final_apps:
-            logs.append(f"  - Installing '{app}'...")
-            subprocess.run(["bench", "--site", site_name, "install-app", app], cwd=bench_path, check=True, capture_output=True, text=True)
-            logs.append(f"  - SUCCESS: Installed '{app}'.")
-
-        logs.append("\nStep 3: Setting app_role...")
-        subprocess.run(["bench", "--site", site_name, "set-config", "app_role", "tenant"], cwd=bench_path, check=True, capture_output=True, text=True)
-        logs.append("SUCCESS: app_role set to 'tenant'.")
+        if pooled_site:
+            logs.append(f"\nStep 1: Assigned pre-provisioned site '{pooled_site}' from the warm pool as '{site_name}'.")
+            logs.append("SKIPPED: 'bench new-site', app installs and app_role were completed when the pooled site was built.")
+            for step in get_site_setup_steps(final_apps):
+                state.skip(step, f"Assigned pooled site {pooled_site}.")
+        else:
+            if is_pool_enabled():
+                logs.append("\nNo ready site in the warm pool for this plan's apps. Falling back to a full install.")
+            _create_and_install_site(site_name, final_apps, bench_path, logs, state=state)
 
         subscription.status = "Provisioning"
         subscription.save(ignore_permissions=True)
@@ -109,13 +91,148 @@ def create_tenant_site_job(subscription_id, site_name, user_details, synchronous
     except (subprocess.CalledProcessError, subprocess.TimeoutExpired, Exception) as e:
         error_message = f"STDOUT: {getattr(e, 'stdout', 'N/A')}\nSTDERR: {getattr(e, 'stderr', 'N/A')}\nTRACEBACK: {frappe.get_traceback()}"
         logs.append(f"\n--- FATAL ERROR ---\n{error_message}")
-        frappe.delete_doc("Company Subscription", subscription.name, ignore_permissions=True, force=True)
+        frappe.db.rollback()
+        frappe.db.set_value("Company Subscription", subscription.name, "status", "Setup Failed")
         frappe.db.commit()
-        logs.append(f"CLEANUP: Deleted failed subscription record {subscription.name}.")
+        logs.append(f"Subscription {subscription.name} set to 'Setup Failed'. Completed steps are kept; use `retry_provisioning` to resume.")
 
     finally:
         _log_and_notify(site_name, logs, success, "Site Creation")
 
+def _create_and_install_site(site_name, final_apps, bench_path, logs, use_template=True, state=None):
+    """
+    Runs `bench new-site`, installs every app in `final_apps` and marks the site as a tenant.
+    When template provisioning is enabled and a fresh snapshot exists for the app set,
+    the site is restored from the snapshot instead.
+    Steps already completed in `state` are skipped.
+    """
+    state = state or ProvisioningState(logs=logs)
+
+    if state.has_unfinished_attempt("new_site"):
+        # A previous `bench new-site` may have left its directory and database behind,
+        # which would make every retry fail with "site already exists".
+        _drop_partial_site(site_name, bench_path, logs)
+
+    restored = state.run("new_site", _create_site, site_name, final_apps, bench_path, logs, use_template)
+    if restored:
+        for step in get_site_setup_steps(final_apps):
+            state.skip(step, "Restored from site template.")
+        return
+
+    state.run("apps_txt", _write_apps_txt, site_name, final_apps, bench_path, logs)
+
+    logs.append("\nStep 2: Installing apps...")
+    for app in final_apps:
+        state.run(f"install_app:{app}", _install_app, site_name, app, bench_path, logs)
+
+    state.run("set_config", _set_tenant_app_role, site_name, bench_path, logs)
+
+def _create_site(site_name, final_apps, bench_path, logs, use_template):
+    """Creates the site. Returns True if it was restored from a template with every app installed."""
+    if use_template and create_site_from_template(site_name, final_apps, bench_path, logs):
+        return True
+
+    admin_password = frappe.generate_hash(length=16)
+    db_root_password = frappe.conf.get("db_root_password")
+
+    logs.append(f"\nStep 1: Preparing 'bench new-site' command for '{site_name}'...")
+    command = ["bench", "new-site", site_name, "--db-name", site_name.replace(".", "_"), "--admin-password", admin_password]
+    if db_root_password:
+        logs.append("Found db_root_password. Adding to command.")
+        command.extend(["--mariadb-root-password", db_root_password])
+
+    process = subprocess.run(command, cwd=bench_path, capture_output=True, text=True, timeout=300)
+    logs.append(f"--- 'bench new-site' STDOUT ---\n{process.stdout or 'No standard output.'}")
+    logs.append(f"--- 'bench new-site' STDERR ---\n{process.stderr or 'No standard error.'}")
+    process.check_returncode()
+    logs.append(f"SUCCESS: Site '{site_name}' created.")
+    return False
+
+def _drop_partial_site(site_name, bench_path, logs):
+    """
+    Drops the directory and database left behind by a site build that failed part way,
+    so the site name can be built again. Does nothing if the site directory does not exist.
+    """
+    if not os.path.exists(os.path.join(bench_path, "sites", site_name)):
+        return
+
+    logs.append(f"Dropping partially created site '{site_name}'...")
+    command = ["bench", "drop-site", site_name, "--force", "--no-backup"]
+    db_root_password = frappe.conf.get("db_root_password")
+    if db_root_password:
+        command.extend(["--mariadb-root-password", db_root_password])
+    process = subprocess.run(command, cwd=bench_path, capture_output=True, text=True, timeout=180)
+    logs.append(f"--- 'bench drop-site' STDERR ---\n{process.stderr or 'No standard error.'}")
+    process.check_returncode()
+    logs.append(f"SUCCESS: Dropped partially created site '{site_name}'.")
+
+def _write_apps_txt(site_name, final_apps, bench_path, logs):
+    apps_txt_path = os.path.join(bench_path, "sites", site_name, "apps.txt")
+    with open(apps_txt_path, "w") as f:
+        f.write("\n".join(final_apps))
+    logs.append(f"SUCCESS: Created site-specific apps.txt.")
+
+def _install_app(site_name, app, bench_path, logs):
+    logs.append(f"  - Installing '{app}'...")
+    subprocess.run(["bench", "--site", site_name, "install-app", app], cwd=bench_path, check=True, capture_output=True, text=True)
+    logs.append(f"  - SUCCESS: Installed '{app}'.")
+
+def _set_tenant_app_role(site_name, bench_path, logs):
+    logs.append("\nStep 3: Setting app_role...")
+    subprocess.run(["bench", "--site", site_name, "set-config", "app_role", "tenant"], cwd=bench_path, check=True, capture_output=True, text=True)
+    logs.append("SUCCESS: app_role set to 'tenant'.")
+
+def _run_initial_setup(subscription, site_name, user_details, bench_path, log_and_print):
+    """Runs `initial_setup` on the tenant site. Raises if the tenant did not report success."""
+    api_secret = subscription.get_password("api_secret")
+    login_redirect_url = (subscription.custom_login_redirect_url or frappe.db.get_single_value("Subscription Settings", "marketing_site_login_url") or frappe.db.get_single_value("Subscription Settings", "default_login_redirect_url"))
+
+    expected_keys = [
+        "email", "password", "first_name", "last_name", "company_name",
+        "currency", "country", "verification_token"
+    ]
+    kwargs = {k: v for k, v in user_details.items() if k in expected_keys}
+    kwargs.update({
+        "api_secret": api_secret,
+        "control_plane_url": frappe.utils.get_url(),
+        "login_redirect_url": login_redirect_url
+    })
+
+    command = [
+        "bench", "--site", site_name, "execute",
+        "rokct.rokct.tenant.api.initial_setup",
+        "--kwargs", json.dumps(kwargs)
+    ]
+    log_and_print(f"Executing command: {' '.join(command[:-1])} <kwargs>")
+
+    process = subprocess.run(command, cwd=bench_path, capture_output=True, text=True, check=True, timeout=180)
+    log_and_print(f"--- 'bench execute' STDOUT ---\n{process.stdout or 'No standard output.'}")
+    log_and_print(f"--- 'bench execute' STDERR ---\n{process.stderr or 'No standard error.'}")
+
+    response_json = json.loads(process.stdout) if process.stdout else {}
+    status = response_json.get("status") if isinstance(response_json, dict) else None
+
+    if status == "success":
+        log_and_print("SUCCESS: Tenant setup function executed successfully.")
+    elif status == "warning":
+        log_and_print(f"NOTE: Tenant setup function returned a warning: {response_json.get('message')}. This is expected on retry.")
+    else:
+        message = response_json.get('message') if isinstance(response_json, dict) else str(response_json)
+        raise frappe.ValidationError(f"Tenant setup function failed with message: {message}")
+
+def _send_welcome_email(site_name, user_details, log_and_print):
+    scheme = frappe.conf.get("tenant_site_scheme", "http")
+    verification_url = f"{scheme}://{site_name}/api/method/rokct.tenant.api.verify_my_email?token={user_details['verification_token']}"
+    email_context = {
+        "first_name": user_details["first_name"],
+        "company_name": user_details["company_name"],
+        "verification_url": verification_url
+    }
+
+    log_and_print(f"Attempting to send welcome email to {user_details['email']}...")
+    frappe.sendmail(recipients=[user_details["email"]], template="New User Welcome", args=email_context, now=True)
+    log_and_print("SUCCESS: Welcome email sent.")
+
 def complete_tenant_setup(subscription_id, site_name, user_details):
     logs = []
     def log_and_print(message):
@@ -123,7 +240,6 @@ def complete_tenant_setup(subscription_id, site_name, user_details):
         logs.append(str(message))
 
     log_and_print(f"--- Starting Final Tenant Setup for {site_name} at {now_datetime()} ---")
-    success = False
     max_retries = 5
     retry_delay = 30
 
@@ -135,76 +251,34 @@ def complete_tenant_setup(subscription_id, site_name, user_details):
                 raise frappe.ValidationError("`bench_path` not set in control plane site_config.json")
 
             subscription = frappe.get_doc("Company Subscription", subscription_id)
-            api_secret = subscription.get_password("api_secret")
-            login_redirect_url = (subscription.custom_login_redirect_url or frappe.db.get_single_value("Subscription Settings", "marketing_site_login_url") or frappe.db.get_single_value("Subscription Settings", "default_login_redirect_url"))
-
-            expected_keys = [
-                "email", "password", "first_name", "last_name", "company_name",
-                "currency", "country", "verification_token"
-            ]
-            kwargs = {k: v for k, v in user_details.items() if k in expected_keys}
-            kwargs.update({
-                "api_secret": api_secret,
-                "control_plane_url": frappe.utils.get_url(),
-                "login_redirect_url": login_redirect_url
-            })
-
-            command = [
-                "bench", "--site", site_name, "execute",
-                "rokct.rokct.tenant.api.initial_setup",
-                "--kwargs", json.dumps(kwargs)
-            ]
-            log_and_print(f"Executing command: {' '.join(command)}")
-
-            process = subprocess.run(command, cwd=bench_path, capture_output=True, text=True, check=True, timeout=180)
-            log_and_print(f"--- 'bench execute' STDOUT ---\n{process.stdout or 'No standard output.'}")
-            log_and_print(f"--- 'bench execute' STDERR ---\n{process.stderr or 'No standard error.'}")
-
-            response_json = json.loads(process.stdout) if process.stdout else {}
-            status = response_json.get("status")
+            state = ProvisioningState(subscription, logs)
+            state.run("initial_setup", _run_initial_setup, subscription, site_name, user_details, bench_path, log_and_print)
+
+            plan = frappe.get_doc("Subscription Plan", subscription.plan)
+            if plan.cost == 0:
+                subscription.status = "Free"
+            elif getattr(plan, "trial_period_days", 0) > 0:
+                subscription.status = "Trialing"
+            else:
+                subscription.status = "Active"
+            subscription.save(ignore_permissions=True)
+            frappe.db.commit()
+            log_and_print(f"Subscription status updated to '{subscription.status}'.")
 
-            if status in ["success", "warning"]:
-                if status == "success":
-                    log_and_print("SUCCESS: Tenant setup function executed successfully.")
-                else:
-                    log_and_print(f"NOTE: Tenant setup function returned a warning: {response_json.get('message')}. This is expected on retry.")
+            try:
+                state.run("welcome_email", _send_welcome_email, site_name, user_details, log_and_print)
+            except Exception as e:
+                log_and_print(f"WARNING: Could not send welcome email. Reason: {e}")
 
-                plan = frappe.get_doc("Subscription Plan", subscription.plan)
-                if plan.cost == 0:
-                    subscription.status = "Free"
-                elif getattr(plan, "trial_period_days", 0) > 0:
-                    subscription.status = "Trialing"
-                else:
-                    subscription.status = "Active"
-                subscription.save(ignore_permissions=True)
-                frappe.db.commit()
-                log_and_print(f"Subscription status updated to '{subscription.status}'.")
-
-                scheme = frappe.conf.get("tenant_site_scheme", "http")
-                verification_url = f"{scheme}://{site_name}/api/method/rokct.tenant.api.verify_my_email?token={user_details['verification_token']}"
-                email_context = {
-                    "first_name": user_details["first_name"],
-                    "company_name": user_details["company_name"],
-                    "verification_url": verification_url
-                }
-
-                try:
-                    log_and_print(f"Attempting to send welcome email to {user_details['email']}...")
-                    frappe.sendmail(recipients=[user_details["email"]], template="New User Welcome", args=email_context, now=True)
-                    log_and_print("SUCCESS: Welcome email sent.")
-                except Exception as e:
-                    log_and_print(f"WARNING: Could not send welcome email. Reason: {e}")
-
-                success = True
-                return
-            else:
-                message = response_json.get('message') if isinstance(response_json, dict) else str(response_json)
-                log_and_print(f"WARNING: Tenant setup function failed with message: {message}")
+            clear_provisioning_payload(subscription.name)
+            return
 
         except subprocess.CalledProcessError as e:
             log_and_print(f"CRITICAL: The 'bench execute' command failed.")
             log_and_print(f"STDOUT: {e.stdout}")
             log_and_print(f"STDERR: {e.stderr}")
+        except frappe.ValidationError as e:
+            log_and_print(f"WARNING: {e}")
         except Exception as e:
             log_and_print(f"CRITICAL: An unexpected error occurred. Reason: {e}")
             log_and_print(f"TRACEBACK: {frappe.get_traceback()}")
@@ -635,9 +709,10 @@ def cleanup_failed_provisions():
     """
     frappe.log("--- Running Cleanup for Failed Provisions ---", "Provisioning Cleanup")
 
+    # Failed provisions are kept for a few days so they can be resumed with `retry_provisioning`.
     failed_subscriptions = frappe.get_all(
         "Company Subscription",
-        filters={"status": "Setup Failed"},
+        filters={"status": "Setup Failed", "modified": ("<", add_days(nowdate(), -FAILED_PROVISION_RETRY_DAYS))},
         fields=["name", "site_name"]
     )
 
@@ -18,25 +18,32 @@ def run_swagger_generation_on_control_site():
 	"""
 	if frappe.get_conf().get("app_role") == "control_panel":
 		frappe.enqueue(
-			"rokct.swagger.swagger_generator.generate_swagger_json",
+			"rokct.swagger.swagger_generator.build_swagger_json",
 			queue="long",
 			job_name="swagger_generation"
 		)
 		frappe.log_info("Swagger Generation Enqueued", "Swagger generation was enqueued by a hook on the control site.")
 
 @frappe.whitelist()
-def enqueue_swagger_generation():
+def enqueue_swagger_generation(force=False):
 	"""
 	Enqueues the swagger generation job. This is called by the button in the UI.
+	Generation is incremental unless `force` is set.
 	"""
 	# Check for control panel role again as a security measure
 	if frappe.get_conf().get("app_role") != "control_panel":
 		frappe.throw(frappe._("Swagger generation can only be triggered from the control site."), title="Not Permitted")
 
+	force = frappe.utils.cint(force)
+	if force:
+		# A forced run rebuilds every module, so it is limited to administrators.
+		frappe.only_for("System Manager")
+
 	frappe.enqueue(
-		"rokct.swagger.swagger_generator.generate_swagger_json",
+		"rokct.swagger.swagger_generator.build_swagger_json",
 		queue="long",
-		job_name="swagger_generation"
+		job_name="swagger_generation",
+		force=force
 	)
 	return frappe._("Swagger generation has been successfully enqueued. It will be processed in the background.")
 
@@ -3,8 +3,13 @@
 
 # import frappe
 from frappe.model.document import Document
+from rokct.rokct.tenders.search import index_tenders, remove_from_index
 
 
 class Tender(Document):
-	pass
+	def on_update(self):
+		# Bulk ingestion indexes tenders itself; this covers edits made from the desk.
+		index_tenders([self.as_dict()])
 
+	def on_trash(self):
+		remove_from_index([self.name])
@@ -0,0 +1,17 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class TenderSearchIndex(Document):
+	pass
+
+
+def on_doctype_update():
+	# Keyword search in rokct.rokct.tenders.search relies on a FULLTEXT index on search_text.
+	# Runs on every sync, including fresh installs, so it has to be idempotent.
+	if frappe.db.sql("SHOW INDEX FROM `tabTender Search Index` WHERE Key_name = 'search_text_fulltext'"):
+		return
+	frappe.db.sql_ddl("ALTER TABLE `tabTender Search Index` ADD FULLTEXT INDEX search_text_fulltext (search_text)")
@@ -6,5 +6,7 @@ from frappe.model.document import Document
 
 
 class WeatherSettings(Document):
-	pass
+	def on_update(self):
+		from rokct.rokct.weather import clear_settings_cache
+		clear_settings_cache()
 
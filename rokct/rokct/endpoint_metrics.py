@@ -0,0 +1,197 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Per-endpoint latency and SQL instrumentation for whitelisted methods.
+#
+# A configurable fraction of method calls is sampled. For a sampled call the database
+# `sql` method of the request's connection is wrapped to count queries and their time,
+# and after the response the wall time, query count, query time and response size are
+# added to histograms in a Redis hash for the current window, in one pipelined round
+# trip. Windows expire after RETENTION_SECONDS, so the histograms roll.
+import random
+import time
+
+import frappe
+
+DEFAULT_SAMPLE_RATE = 0.1
+WINDOW_SECONDS = 5 * 60
+RETENTION_SECONDS = 24 * 60 * 60
+METHOD_PREFIXES = ("/api/method/", "/api/v1/method/")
+# Upper bounds of the histogram buckets; the last bucket is unbounded.
+BUCKETS = {
+    "wall_ms": [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000],
+    "queries": [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000],
+    "query_ms": [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000],
+    "bytes": [512, 2048, 8192, 32768, 131072, 524288, 2097152, 8388608],
+}
+
+
+def get_sample_rate():
+    return float(frappe.conf.get("endpoint_metrics_sample_rate", DEFAULT_SAMPLE_RATE))
+
+
+def _get_method(request):
+    path = request.path
+    for prefix in METHOD_PREFIXES:
+        if path.startswith(prefix):
+            return path[len(prefix):].strip("/")
+    return None
+
+
+def before_request():
+    sample_rate = get_sample_rate()
+    if sample_rate <= 0 or random.random() >= sample_rate:
+        return
+
+    request = getattr(frappe.local, "request", None)
+    method = request and _get_method(request)
+    if not method:
+        return
+
+    metrics = frappe._dict({
+        "method": method,
+        "sample_rate": sample_rate,
+        "started": time.perf_counter(),
+        "queries": 0,
+        "query_seconds": 0.0,
+    })
+    frappe.local.endpoint_metrics = metrics
+
+    db = frappe.local.db
+    original_sql = db.sql
+
+    def sql(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return original_sql(*args, **kwargs)
+        finally:
+            metrics.queries += 1
+            metrics.query_seconds += time.perf_counter() - started
+
+    sql.endpoint_metrics = True
+    db.sql = sql
+
+
+def _get_response_size(response):
+    if response is None or getattr(response, "direct_passthrough", False):
+        return 0
+    try:
+        return response.calculate_content_length() or 0
+    except Exception:
+        return 0
+
+
+def _bucket(name, value):
+    for upper_bound in BUCKETS[name]:
+        if value <= upper_bound:
+            return str(upper_bound)
+    return "inf"
+
+
+def _window_key(window_start):
+    return frappe.cache().make_key(f"endpoint_metrics::{window_start}")
+
+
+def after_request(response=None, request=None):
+    metrics = getattr(frappe.local, "endpoint_metrics", None)
+    if not metrics:
+        return
+    frappe.local.endpoint_metrics = None
+
+    db = getattr(frappe.local, "db", None)
+    if db is not None and getattr(db.__dict__.get("sql"), "endpoint_metrics", False):
+        del db.sql
+
+    values = {
+        "wall_ms": (time.perf_counter() - metrics.started) * 1000,
+        "queries": metrics.queries,
+        "query_ms": metrics.query_seconds * 1000,
+        "bytes": _get_response_size(response),
+    }
+    window_start = int(time.time()) // WINDOW_SECONDS * WINDOW_SECONDS
+    key = _window_key(window_start)
+    method = metrics.method
+
+    try:
+        pipe = frappe.cache().pipeline(transaction=False)
+        pipe.hincrby(key, f"{method}|count", 1)
+        # Each sample stands for 1 / sample_rate calls.
+        pipe.hincrbyfloat(key, f"{method}|calls", 1 / metrics.sample_rate)
+        for name, value in values.items():
+            pipe.hincrbyfloat(key, f"{method}|{name}", value)
+            pipe.hincrby(key, f"{method}|{name}|{_bucket(name, value)}", 1)
+        pipe.expire(key, RETENTION_SECONDS + WINDOW_SECONDS)
+        pipe.execute()
+    except Exception:
+        # Instrumentation must never fail the request it measures.
+        pass
+
+
+def _percentile(histogram, name, count, percentile):
+    """Upper bound of the bucket holding the `percentile` sample; None for the unbounded bucket."""
+    target = count * percentile
+    seen = 0
+    for upper_bound in [*BUCKETS[name], "inf"]:
+        seen += histogram.get(f"{name}|{upper_bound}", 0)
+        if seen >= target:
+            return None if upper_bound == "inf" else upper_bound
+    return None
+
+
+def get_endpoint_stats(minutes=60):
+    """Aggregates the windows of the last `minutes` into per-method stats."""
+    now = int(time.time())
+    first_window = (now - int(minutes) * 60) // WINDOW_SECONDS * WINDOW_SECONDS
+    windows = range(first_window, now + 1, WINDOW_SECONDS)
+
+    pipe = frappe.cache().pipeline(transaction=False)
+    for window_start in windows:
+        pipe.hgetall(_window_key(window_start))
+
+    totals = {}
+    for window in pipe.execute():
+        for field, value in window.items():
+            method, _, metric = (field.decode() if isinstance(field, bytes) else field).partition("|")
+            method_totals = totals.setdefault(method, {})
+            method_totals[metric] = method_totals.get(metric, 0) + float(value)
+
+    stats = []
+    for method, method_totals in totals.items():
+        count = method_totals.get("count", 0)
+        if not count:
+            continue
+        stats.append({
+            "method": method,
+            "samples": int(count),
+            "calls": round(method_totals.get("calls", 0)),
+            "avg_wall_ms": round(method_totals.get("wall_ms", 0) / count, 1),
+            "p50_wall_ms": _percentile(method_totals, "wall_ms", count, 0.5),
+            "p95_wall_ms": _percentile(method_totals, "wall_ms", count, 0.95),
+            "avg_queries": round(method_totals.get("queries", 0) / count, 1),
+            "p95_queries": _percentile(method_totals, "queries", count, 0.95),
+            "avg_query_ms": round(method_totals.get("query_ms", 0) / count, 1),
+            "avg_bytes": round(method_totals.get("bytes", 0) / count),
+        })
+    return stats
+
+
+def _sort_value(row, key):
+    # The unbounded bucket sorts above every bounded one.
+    return float("inf") if row[key] is None else row[key]
+
+
+@frappe.whitelist()
+def get_endpoint_metrics(minutes=60, limit=20):
+    """
+    Returns the slowest (by p95 wall time) and chattiest (by average query count)
+    whitelisted methods sampled in the last `minutes`.
+    """
+    frappe.only_for("System Manager")
+    limit = int(limit)
+    stats = get_endpoint_stats(minutes)
+
+    return {
+        "sample_rate": get_sample_rate(),
+        "window_seconds": WINDOW_SECONDS,
+        "slowest": sorted(stats, key=lambda row: (_sort_value(row, "p95_wall_ms"), row["avg_wall_ms"]), reverse=True)[:limit],
+        "chattiest": sorted(stats, key=lambda row: row["avg_queries"], reverse=True)[:limit],
+    }
@@ -0,0 +1,56 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Stores build artifacts in the site's file store without loading them into memory.
+#
+# The artifact is copied into the files directory in fixed-size chunks, hashing it on the
+# way, and a File record is created for the copied file. The File gets the content hash
+# and size up front, so Frappe does not read the artifact back to compute them.
+import hashlib
+import os
+
+import frappe
+
+CHUNK_SIZE = 1024 * 1024
+
+
+def copy_with_hash(source_path, target_path):
+    """Copies a file in chunks and returns its MD5 hex digest and size."""
+    digest = hashlib.md5()
+    size = 0
+    tmp_path = f"{target_path}.part"
+    with open(source_path, "rb") as source, open(tmp_path, "wb") as target:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            target.write(chunk)
+            size += len(chunk)
+    os.replace(tmp_path, target_path)
+    return digest.hexdigest(), size
+
+
+def store_artifact(source_path, file_name, attached_to_doctype, attached_to_name, is_private=0):
+    """Copies `source_path` into the file store as `file_name` and returns its File."""
+    target_path = frappe.utils.get_files_path(file_name, is_private=is_private)
+    if os.path.exists(target_path):
+        stem, extension = os.path.splitext(file_name)
+        file_name = f"{stem}-{frappe.generate_hash(length=6)}{extension}"
+        target_path = frappe.utils.get_files_path(file_name, is_private=is_private)
+
+    content_hash, file_size = copy_with_hash(source_path, target_path)
+    file_doc = frappe.get_doc({
+        "doctype": "File",
+        "file_name": file_name,
+        "file_url": f"{'/private' if is_private else ''}/files/{file_name}",
+        "attached_to_doctype": attached_to_doctype,
+        "attached_to_name": attached_to_name,
+        "is_private": is_private,
+        "file_size": file_size,
+        "content_hash": content_hash,
+    })
+    # Every build gets its own File, even when the artifact is byte-identical to an earlier one.
+    file_doc.flags.ignore_duplicate_entry_error = True
+    try:
+        file_doc.insert(ignore_permissions=True)
+    except Exception:
+        os.remove(target_path)
+        raise
+    return file_doc
@@ -0,0 +1,173 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Streaming build logs for Flutter app builds.
+#
+# Every line of a build goes to an append-only log file under the site's private files.
+# New lines are published to the form in batches over realtime, and the `build_log`
+# field of the Flutter App Configuration only holds a bounded tail, written every
+# TAIL_UPDATE_SECONDS, so the cost of a log line no longer grows with the log.
+import os
+import subprocess
+import time
+from collections import deque
+
+import frappe
+
+LOG_DIR = ("private", "flutter_builds", "logs")
+PUBLISH_INTERVAL_SECONDS = 0.5
+TAIL_UPDATE_SECONDS = 10
+TAIL_LINES = 200
+# Lines longer than this are cut in realtime messages and the tail; the file keeps them whole.
+MAX_LINE_CHARS = 2000
+MAX_READ_BYTES = 256 * 1024
+REALTIME_EVENT = "flutter_build_log"
+
+_active_logs = {}
+
+
+def get_log_path(app_config_name):
+    log_dir = frappe.get_site_path(*LOG_DIR)
+    os.makedirs(log_dir, exist_ok=True)
+    return os.path.join(log_dir, f"{frappe.scrub(app_config_name)}.log")
+
+
+def _clip(line):
+    return line if len(line) <= MAX_LINE_CHARS else line[:MAX_LINE_CHARS] + " ..."
+
+
+class BuildLog:
+    """The log of one build. Use `open_build_log` so `log_message` finds it."""
+
+    def __init__(self, app_config_name):
+        self.app_config_name = app_config_name
+        self.path = get_log_path(app_config_name)
+        self.file = open(self.path, "w", encoding="utf-8", buffering=1)
+        self.offset = 0
+        self.tail = deque(maxlen=TAIL_LINES)
+        self.pending = []
+        self.pending_start = 0
+        self.last_published = 0
+        self.last_tail_update = time.monotonic()
+        self.tail_dirty = False
+
+    def write(self, message):
+        for line in str(message).splitlines() or [""]:
+            self._write_line(line)
+
+    def _write_line(self, line):
+        if not self.pending:
+            self.pending_start = self.offset
+        data = line + "\n"
+        self.file.write(data)
+        self.offset += len(data.encode("utf-8"))
+        self.tail.append(_clip(line))
+        self.pending.append(_clip(line))
+        self.tail_dirty = True
+
+        now = time.monotonic()
+        if now - self.last_published >= PUBLISH_INTERVAL_SECONDS:
+            self.publish()
+        if now - self.last_tail_update >= TAIL_UPDATE_SECONDS:
+            self.update_tail()
+
+    def publish(self):
+        if not self.pending:
+            return
+        frappe.publish_realtime(
+            REALTIME_EVENT,
+            message={
+                "app_config_name": self.app_config_name,
+                "start": self.pending_start,
+                "end": self.offset,
+                "lines": self.pending,
+            },
+            doctype="Flutter App Configuration",
+            docname=self.app_config_name,
+            after_commit=False
+        )
+        self.pending = []
+        self.last_published = time.monotonic()
+
+    def update_tail(self):
+        self.last_tail_update = time.monotonic()
+        if not self.tail_dirty:
+            return
+        frappe.db.set_value(
+            "Flutter App Configuration", self.app_config_name, "build_log", "\n".join(self.tail), update_modified=False
+        )
+        frappe.db.commit()
+        self.tail_dirty = False
+
+    def run(self, command, cwd, env):
+        """
+        Runs `command`, streaming its combined stdout and stderr into the log line by line.
+        Raises `subprocess.CalledProcessError` if it exits with a non-zero status.
+        """
+        process = subprocess.Popen(
+            command, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+            text=True, bufsize=1, errors="replace"
+        )
+        with process.stdout:
+            for line in process.stdout:
+                self._write_line(line.rstrip("\n"))
+        returncode = process.wait()
+        self.publish()
+        if returncode:
+            raise subprocess.CalledProcessError(returncode, command)
+
+    def close(self):
+        self.publish()
+        self.update_tail()
+        self.file.close()
+
+
+def open_build_log(app_config_name):
+    """Starts a fresh log for a build, replacing the previous build's log."""
+    close_build_log(app_config_name)
+    build_log = BuildLog(app_config_name)
+    _active_logs[app_config_name] = build_log
+    return build_log
+
+
+def close_build_log(app_config_name):
+    build_log = _active_logs.pop(app_config_name, None)
+    if build_log:
+        build_log.close()
+
+
+def get_active_build_log(app_config_name):
+    return _active_logs.get(app_config_name)
+
+
+@frappe.whitelist()
+def get_build_log(app_config_name, offset=0):
+    """
+    Returns up to MAX_READ_BYTES of the build log from byte `offset`, with the offset to
+    continue from. The form calls this on load and when it misses a realtime batch;
+    `restarted` tells it that a new build replaced the log it was reading.
+    """
+    frappe.get_doc("Flutter App Configuration", app_config_name).check_permission("read")
+
+    path = get_log_path(app_config_name)
+    offset = int(offset)
+    if not os.path.exists(path):
+        return {"text": "", "start": 0, "offset": 0, "size": 0, "restarted": offset > 0}
+
+    size = os.path.getsize(path)
+    restarted = offset > size
+    if restarted:
+        offset = 0
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read(MAX_READ_BYTES)
+
+    # Only return whole lines, so the next read starts at a line boundary.
+    if offset + len(data) < size and b"\n" in data:
+        data = data[:data.rindex(b"\n") + 1]
+    return {
+        "text": data.decode("utf-8", errors="replace"),
+        "start": offset,
+        "offset": offset + len(data),
+        "size": size,
+        "restarted": restarted,
+    }
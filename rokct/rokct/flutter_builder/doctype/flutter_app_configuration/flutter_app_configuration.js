@@ -8,6 +8,8 @@ frappe.ui.form.on('Flutter App Configuration', {
             return;
         }
 
+        frm.trigger('setup_build_log');
+
         // Add a custom button to the form's header
         frm.add_custom_button(__('Generate Build'), function() {
             frappe.show_alert({
@@ -21,8 +23,15 @@ frappe.ui.form.on('Flutter App Configuration', {
                     app_config_name: frm.doc.name
                 },
                 callback: function(r) {
+                    let build = r.message || {};
+                    let message = build.deduplicated
+                        ? __('A build of this configuration is already {0}.', [__(build.status).toLowerCase()])
+                        : __('Build has been queued.');
+                    if (build.estimated_finish) {
+                        message += ' ' + __('Estimated to finish at {0}.', [frappe.datetime.str_to_user(build.estimated_finish)]);
+                    }
                     frappe.show_alert({
-                        message: __('Build job has been started in the background.'),
+                        message: message,
                         indicator: 'green'
                     });
                     frm.reload_doc();
@@ -57,6 +66,81 @@ frappe.ui.form.on('Flutter App Configuration', {
         });
     },
 
+    setup_build_log: function(frm) {
+        // Shows the full log of the latest build and tails it while a build is running.
+        let $wrapper = frm.get_field('build_log_stream').$wrapper;
+        $wrapper.html('<pre class="flutter-build-log" style="max-height: 400px; overflow-y: auto; white-space: pre-wrap; font-size: 12px;"></pre>');
+        frm.build_log = { offset: 0, $pre: $wrapper.find('pre').hide() };
+        frm.events.fetch_build_log(frm);
+
+        if (!frm.build_log_listener) {
+            frm.build_log_listener = function(data) {
+                if (data.app_config_name !== frm.doc.name || !frm.build_log) {
+                    return;
+                }
+                if (data.start === 0 && frm.build_log.offset > 0) {
+                    // A new build restarted the log.
+                    frm.build_log.offset = 0;
+                    frm.build_log.$pre.text('');
+                }
+                if (data.start === frm.build_log.offset) {
+                    frm.events.append_build_log(frm, data.lines.join('\n') + '\n', data.end);
+                } else if (data.start > frm.build_log.offset) {
+                    // A batch was missed; catch up from the file.
+                    frm.events.fetch_build_log(frm);
+                }
+            };
+            frappe.realtime.on('flutter_build_log', frm.build_log_listener);
+        }
+    },
+
+    fetch_build_log: function(frm) {
+        let build_log = frm.build_log;
+        if (build_log.fetching) {
+            return;
+        }
+        build_log.fetching = true;
+        frappe.call({
+            method: 'rokct.rokct.flutter_builder.build_log.get_build_log',
+            args: {
+                app_config_name: frm.doc.name,
+                offset: build_log.offset
+            },
+            callback: function(r) {
+                build_log.fetching = false;
+                if (!r.message) {
+                    return;
+                }
+                if (r.message.restarted) {
+                    build_log.offset = 0;
+                    build_log.$pre.text('');
+                }
+                if (r.message.start === build_log.offset) {
+                    frm.events.append_build_log(frm, r.message.text, r.message.offset);
+                }
+                if (build_log.offset < r.message.size) {
+                    // More to read, or realtime batches arrived while this request was in flight.
+                    frm.events.fetch_build_log(frm);
+                }
+            },
+            error: function() {
+                build_log.fetching = false;
+            }
+        });
+    },
+
+    append_build_log: function(frm, text, offset) {
+        let $pre = frm.build_log.$pre;
+        let pre = $pre.get(0);
+        let at_bottom = pre.scrollHeight - pre.scrollTop - pre.clientHeight < 20;
+        pre.appendChild(document.createTextNode(text));
+        frm.build_log.offset = offset;
+        $pre.toggle(frm.build_log.offset > 0);
+        if (at_bottom) {
+            pre.scrollTop = pre.scrollHeight;
+        }
+    },
+
     source_project: function(frm) {
         frm.trigger('update_build_target_options');
         frm.trigger('fetch_base_version');
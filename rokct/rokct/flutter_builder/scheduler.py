@@ -0,0 +1,294 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Build scheduler for Flutter app builds.
+#
+# Every requested build is a Flutter Build record. Queued builds are dispatched to the long
+# queue in priority order, at most `flutter_build_concurrency` at a time per build target
+# (an int for every target, or a dict of target to int; 1 by default). Requesting a build
+# for a configuration that is already queued or running returns that build instead of
+# queueing a second one. ETAs are estimated from the durations of recent successful builds.
+#
+# Dispatch runs when a build is requested, when one finishes, and on every scheduler tick,
+# which also fails builds whose worker died.
+import hashlib
+import heapq
+import json
+import time
+
+import frappe
+from frappe.utils import add_to_date, get_datetime, now_datetime, time_diff_in_seconds
+
+BUILD = "Flutter Build"
+ACTIVE_STATUSES = ("Queued", "Running")
+BUILD_TIMEOUT = 2 * 60 * 60
+DEFAULT_CONCURRENCY = 1
+DEFAULT_BUILD_SECONDS = 20 * 60
+ETA_SAMPLE_SIZE = 10
+DISPATCH_LOCK_SECONDS = 30
+DISPATCH_LOCK_WAIT_SECONDS = 10
+# Fields that do not change what gets built.
+UNHASHED_FIELDS = {
+    "name", "owner", "creation", "modified", "modified_by", "docstatus", "idx",
+    "build_status", "build_log", "apk_download_link", "base_version",
+}
+
+
+def get_concurrency(build_target):
+    concurrency = frappe.conf.get("flutter_build_concurrency") or DEFAULT_CONCURRENCY
+    if isinstance(concurrency, dict):
+        concurrency = concurrency.get(build_target) or DEFAULT_CONCURRENCY
+    return max(int(concurrency), 1)
+
+
+def get_config_hash(app_config):
+    """Hash of everything that affects the build output of a configuration."""
+    values = {k: v for k, v in app_config.as_dict().items() if k not in UNHASHED_FIELDS}
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def get_average_duration(build_target, source_project=None):
+    """Median duration of the recent successful builds of a target, in seconds."""
+    filters = {"status": "Success", "build_target": build_target, "duration": (">", 0)}
+    # Prefer builds of the same project, then any project of the target.
+    for extra_filters in ([{"source_project": source_project}] if source_project else []) + [{}]:
+        durations = sorted(row.duration for row in frappe.get_all(
+            BUILD,
+            filters={**filters, **extra_filters},
+            fields=["duration"],
+            order_by="finished_on desc",
+            limit=ETA_SAMPLE_SIZE
+        ))
+        if durations:
+            return durations[len(durations) // 2]
+    return DEFAULT_BUILD_SECONDS
+
+
+def _queue_order(build):
+    return (-(build.priority or 0), get_datetime(build.creation))
+
+
+def estimate_queue(build_target):
+    """
+    Returns {build name: (estimated start, estimated finish)} for the active builds of a
+    target, by replaying the queue over its build slots.
+    """
+    now = now_datetime()
+    builds = frappe.get_all(
+        BUILD,
+        filters={"build_target": build_target, "status": ("in", ACTIVE_STATUSES)},
+        fields=["name", "status", "priority", "creation", "source_project", "started_on", "dispatched_on"]
+    )
+    durations = {}
+
+    def duration(build):
+        if build.source_project not in durations:
+            durations[build.source_project] = get_average_duration(build_target, build.source_project)
+        return durations[build.source_project]
+
+    estimates = {}
+    slots = []
+    for build in builds:
+        if build.status == "Running":
+            started = get_datetime(build.started_on or build.dispatched_on or now)
+            finish = max(add_to_date(started, seconds=duration(build)), now)
+            estimates[build.name] = (started, finish)
+            slots.append(finish)
+
+    # Idle slots are free now.
+    slots.extend([now] * max(get_concurrency(build_target) - len(slots), 0))
+    heapq.heapify(slots)
+    for build in sorted((b for b in builds if b.status == "Queued"), key=_queue_order):
+        start = heapq.heappop(slots)
+        finish = add_to_date(start, seconds=duration(build))
+        estimates[build.name] = (start, finish)
+        heapq.heappush(slots, finish)
+    return estimates
+
+
+def update_estimates(build_target):
+    for name, (start, finish) in estimate_queue(build_target).items():
+        frappe.db.set_value(BUILD, name, {"estimated_start": start, "estimated_finish": finish}, update_modified=False)
+
+
+def request_build(app_config_name, priority=0):
+    """
+    Queues a build of a configuration, or returns the queued or running build of the same
+    configuration with unchanged settings. A repeated request with a higher priority raises the queued build's priority.
+    """
+    app_config = frappe.get_doc("Flutter App Configuration", app_config_name)
+    config_hash = get_config_hash(app_config)
+    priority = int(priority or 0)
+
+    existing = frappe.db.get_value(
+        BUILD,
+        # The hash leaves out the name, so a copy of a configuration must still get its own build.
+        {"app_config": app_config.name, "config_hash": config_hash, "status": ("in", ACTIVE_STATUSES)},
+        ["name", "status", "priority"],
+        as_dict=True
+    )
+    if existing:
+        if existing.status == "Queued" and priority > (existing.priority or 0):
+            frappe.db.set_value(BUILD, existing.name, "priority", priority)
+            update_estimates(app_config.build_target)
+            frappe.db.commit()
+        return get_build_status(existing.name, deduplicated=True)
+
+    build = frappe.get_doc({
+        "doctype": BUILD,
+        "app_config": app_config.name,
+        "build_target": app_config.build_target,
+        "source_project": app_config.source_project,
+        "priority": priority,
+        "status": "Queued",
+        "config_hash": config_hash,
+        "requested_by": frappe.session.user,
+    }).insert(ignore_permissions=True)
+    frappe.db.commit()
+
+    dispatch_builds()
+    return get_build_status(build.name)
+
+
+def get_build_status(build_name, deduplicated=False):
+    build = frappe.db.get_value(
+        BUILD, build_name,
+        ["name", "status", "priority", "estimated_start", "estimated_finish", "artifact_url"],
+        as_dict=True
+    )
+    build.deduplicated = deduplicated
+    return build
+
+
+def _acquire_dispatch_lock():
+    cache = frappe.cache()
+    lock_key = cache.make_key("flutter_build_dispatch_lock")
+    deadline = time.monotonic() + DISPATCH_LOCK_WAIT_SECONDS
+    while True:
+        if cache.set(lock_key, 1, nx=True, ex=DISPATCH_LOCK_SECONDS):
+            return lock_key
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(0.2)
+
+
+def dispatch_builds():
+    """
+    Starts queued builds in priority order while their target has free slots. Returns the
+    names of the dispatched builds.
+    """
+    lock_key = _acquire_dispatch_lock()
+    if not lock_key:
+        # Another dispatcher is running; it or the next scheduler tick picks up new builds.
+        return []
+
+    dispatched = []
+    try:
+        queued = frappe.get_all(
+            BUILD,
+            filters={"status": "Queued"},
+            fields=["name", "build_target", "priority", "creation"]
+        )
+        running = {}
+        for row in frappe.get_all(BUILD, filters={"status": "Running"}, fields=["build_target", "count(name) as count"], group_by="build_target"):
+            running[row.build_target] = row.count
+
+        for build in sorted(queued, key=_queue_order):
+            if running.get(build.build_target, 0) >= get_concurrency(build.build_target):
+                continue
+            frappe.db.set_value(BUILD, build.name, {"status": "Running", "dispatched_on": now_datetime()})
+            frappe.db.commit()
+            try:
+                frappe.enqueue(
+                    "rokct.rokct.flutter_builder.scheduler.run_build",
+                    queue="long",
+                    timeout=BUILD_TIMEOUT,
+                    job_id=f"flutter-build-{build.name}",
+                    deduplicate=True,
+                    build_name=build.name
+                )
+            except Exception:
+                frappe.db.set_value(BUILD, build.name, {"status": "Queued", "dispatched_on": None})
+                frappe.db.commit()
+                raise
+            running[build.build_target] = running.get(build.build_target, 0) + 1
+            dispatched.append(build.name)
+
+        for build_target in {build.build_target for build in queued} | set(running):
+            update_estimates(build_target)
+        frappe.db.commit()
+    finally:
+        frappe.cache().delete(lock_key)
+    return dispatched
+
+
+def run_build(build_name):
+    """Background job that runs one dispatched build and then dispatches the next ones."""
+    # Imported here because the tasks module imports this one.
+    from .tasks import _generate_flutter_app
+
+    build = frappe.get_doc(BUILD, build_name)
+    if build.status != "Running":
+        return
+
+    build.db_set("started_on", now_datetime())
+    frappe.db.commit()
+    started = time.monotonic()
+    try:
+        _generate_flutter_app(build.app_config, build_name=build.name)
+        build_status, artifact_url = frappe.db.get_value(
+            "Flutter App Configuration", build.app_config, ["build_status", "apk_download_link"]
+        )
+        build.db_set({
+            "status": "Success" if build_status == "Success" else "Failed",
+            "artifact_url": artifact_url if build_status == "Success" else None,
+            "finished_on": now_datetime(),
+            "duration": round(time.monotonic() - started, 1),
+        })
+    except Exception:
+        frappe.db.rollback()
+        build.db_set({"status": "Failed", "finished_on": now_datetime(), "error": frappe.get_traceback()})
+    frappe.db.commit()
+    dispatch_builds()
+
+
+def recover_stale_builds():
+    """
+    Scheduled job that fails builds still marked Running after the job timeout (their
+    worker died) and dispatches queued builds.
+    """
+    cutoff = add_to_date(now_datetime(), seconds=-(BUILD_TIMEOUT + 10 * 60))
+    for build in frappe.get_all(BUILD, filters={"status": "Running", "dispatched_on": ("<", cutoff)}, pluck="name"):
+        frappe.db.set_value(BUILD, build, {
+            "status": "Failed",
+            "finished_on": now_datetime(),
+            "error": "The build did not finish within the job timeout.",
+        })
+    frappe.db.commit()
+
+    if frappe.db.exists(BUILD, {"status": "Queued"}):
+        dispatch_builds()
+
+
+@frappe.whitelist()
+def get_build_queue(build_target=None):
+    """Returns the queued and running builds with their estimated start and finish times."""
+    frappe.only_for("System Manager")
+    filters = {"status": ("in", ACTIVE_STATUSES)}
+    if build_target:
+        filters["build_target"] = build_target
+    builds = frappe.get_all(
+        BUILD,
+        filters=filters,
+        fields=["name", "app_config", "build_target", "status", "priority", "creation", "started_on", "dispatched_on"]
+    )
+
+    estimates = {}
+    for target in {build.build_target for build in builds}:
+        estimates.update(estimate_queue(target))
+
+    now = now_datetime()
+    for build in builds:
+        build.estimated_start, build.estimated_finish = estimates.get(build.name, (None, None))
+        if build.estimated_finish:
+            build.eta_seconds = max(int(time_diff_in_seconds(build.estimated_finish, now)), 0)
+    return sorted(builds, key=lambda b: (b.status != "Running", _queue_order(b)))
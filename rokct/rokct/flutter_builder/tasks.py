@@ -5,19 +5,37 @@ import os
 import shutil
 import json
 import subprocess
-import tempfile
 import re
 import yaml
+from .build_log import open_build_log, close_build_log, get_active_build_log
+from .workspace import BuildWorkspace, evict_workspaces, get_gradle_home, get_workspace_key, hash_bytes
+from .artifact_store import store_artifact
+from .scheduler import request_build
 
 def log_message(message, app_config_name):
     """Helper function to append messages to the build log."""
-    app_config = frappe.get_doc("Flutter App Configuration", app_config_name)
-    current_log = app_config.build_log or ""
-    new_log = current_log + str(message) + "\n"
-    app_config.db_set("build_log", new_log)
-    frappe.db.commit()
+    build_log = get_active_build_log(app_config_name)
+    if build_log:
+        build_log.write(message)
     frappe.logger().info(f"Build Log ({app_config_name}): {message}")
 
+def get_build_env(settings):
+    """Environment for Flutter commands, with the pub and Gradle caches shared between builds."""
+    env = os.environ.copy()
+    flutter_path = settings.flutter_sdk_path
+    env['PATH'] = f"{flutter_path}/bin:{env['PATH']}"
+    env['PUB_CACHE'] = "/opt/pub-cache"
+    env['GRADLE_USER_HOME'] = get_gradle_home()
+    return env
+
+def run_build_command(command, cwd, env, app_config_name):
+    """Runs a build step, streaming its output into the build log."""
+    build_log = get_active_build_log(app_config_name)
+    if build_log:
+        build_log.run(command, cwd, env)
+    else:
+        subprocess.run(command, cwd=cwd, check=True, env=env)
+
 def get_original_package_name(temp_dir):
     """Reads the original package name from the android/app/build.gradle file."""
     build_gradle_path = os.path.join(temp_dir, 'android/app/build.gradle')
@@ -56,7 +74,11 @@ def rename_android_package_structure(temp_dir, old_package_name, new_package_nam
 
     os.makedirs(new_path, exist_ok=True)
     for item in os.listdir(old_path):
-        shutil.move(os.path.join(old_path, item), os.path.join(new_path, item))
+        # A reused workspace still holds the previous build's copy.
+        target = os.path.join(new_path, item)
+        if os.path.isdir(target) and not os.path.islink(target):
+            shutil.rmtree(target)
+        shutil.move(os.path.join(old_path, item), target)
 
     try:
         os.removedirs(old_path)
@@ -324,7 +346,7 @@ def place_google_services_json(temp_dir, app_config):
     except Exception as e:
         log_message(f"Error placing google-services.json: {e}", app_config.name)
 
-def generate_app_icons(temp_dir, app_config, settings):
+def generate_app_icons(temp_dir, app_config, settings, workspace=None):
     if not app_config.app_icon:
         log_message("No app icon uploaded, skipping icon generation.", app_config.name)
         return
@@ -363,27 +385,33 @@ def generate_app_icons(temp_dir, app_config, settings):
             yaml.dump(pubspec_data, f, default_flow_style=False)
         log_message("Configured flutter_launcher_icons in pubspec.yaml", app_config.name)
 
-        # 3. Run flutter pub get and the icon generator
-        env = os.environ.copy()
-        flutter_path = settings.flutter_sdk_path
-        env['PATH'] = f"{flutter_path}/bin:{env['PATH']}"
-        env['PUB_CACHE'] = "/opt/pub-cache"
+        # 3. Run flutter pub get and the icon generator, unless a reused workspace already
+        # holds icons generated from the same image and configuration.
+        input_hash = hash_bytes(icon_content, json.dumps(pubspec_data['flutter_icons'], sort_keys=True), pubspec_data['dev_dependencies']['flutter_launcher_icons'])
+        if workspace and workspace.is_step_current("launcher_icons", input_hash):
+            log_message("App icon is unchanged since the last build, skipping icon generation.", app_config.name)
+            return
+
+        env = get_build_env(settings)
+
+        def run_icon_generator():
+            log_message("Running 'flutter pub get'...", app_config.name)
+            run_build_command(["flutter", "pub", "get"], temp_dir, env, app_config.name)
 
-        log_message("Running 'flutter pub get'...", app_config.name)
-        result = subprocess.run(["flutter", "pub", "get"], cwd=temp_dir, check=True, capture_output=True, text=True, env=env)
-        log_message(result.stdout, app_config.name)
+            log_message("Running icon generator...", app_config.name)
+            run_build_command(["flutter", "pub", "run", "flutter_launcher_icons:main"], temp_dir, env, app_config.name)
 
-        log_message("Running icon generator...", app_config.name)
-        result = subprocess.run(["flutter", "pub", "run", "flutter_launcher_icons:main"], cwd=temp_dir, check=True, capture_output=True, text=True, env=env)
-        log_message(result.stdout, app_config.name)
+        if workspace:
+            workspace.run_step("launcher_icons", input_hash, run_icon_generator)
+        else:
+            run_icon_generator()
 
         log_message("Icon generation complete.", app_config.name)
     except Exception as e:
+        # The command output is already in the log, streamed as it ran.
         log_message(f"Error generating icons: {e}", app_config.name)
-        if hasattr(e, 'stderr'):
-            log_message(e.stderr, app_config.name)
 
-def update_splash_screen(temp_dir, app_config, settings):
+def update_splash_screen(temp_dir, app_config, settings, workspace=None):
     """Updates the native splash screen configuration."""
     splash_config_path = os.path.join(temp_dir, 'flutter_native_splash.yaml')
     if not os.path.exists(splash_config_path):
@@ -407,15 +435,29 @@ def update_splash_screen(temp_dir, app_config, settings):
     with open(splash_config_path, 'w') as f:
         yaml.dump(splash_data, f, default_flow_style=False)
 
-    # Run the splash screen generator
-    env = os.environ.copy()
-    flutter_path = settings.flutter_sdk_path
-    env['PATH'] = f"{flutter_path}/bin:{env['PATH']}"
-    env['PUB_CACHE'] = "/opt/pub-cache"
+    # Run the splash screen generator, unless a reused workspace already holds a splash
+    # screen generated from the same configuration and image.
+    splash_image = splash_data['flutter_native_splash'].get('image')
+    splash_image_path = os.path.join(temp_dir, splash_image) if splash_image else None
+    image_content = b""
+    if splash_image_path and os.path.exists(splash_image_path):
+        with open(splash_image_path, 'rb') as f:
+            image_content = f.read()
+    input_hash = hash_bytes(json.dumps(splash_data, sort_keys=True, default=str), image_content)
+    if workspace and workspace.is_step_current("native_splash", input_hash):
+        log_message("Splash screen is unchanged since the last build, skipping splash generation.", app_config.name)
+        return
 
-    log_message("Running splash screen generator...", app_config.name)
-    result = subprocess.run(["flutter", "pub", "run", "flutter_native_splash:create"], cwd=temp_dir, check=True, capture_output=True, text=True, env=env)
-    log_message(result.stdout, app_config.name)
+    env = get_build_env(settings)
+
+    def run_splash_generator():
+        log_message("Running splash screen generator...", app_config.name)
+        run_build_command(["flutter", "pub", "run", "flutter_native_splash:create"], temp_dir, env, app_config.name)
+
+    if workspace:
+        workspace.run_step("native_splash", input_hash, run_splash_generator)
+    else:
+        run_splash_generator()
     log_message("Splash screen update complete.", app_config.name)
 
 
@@ -443,33 +485,99 @@ def get_project_version(source_project):
 
 
 @frappe.whitelist()
-def generate_flutter_app(app_config_name):
+def generate_flutter_app(app_config_name, priority=0):
     """
     This whitelisted function is called from the client-side script.
-    Its only job is to enqueue the actual build task to run in the background
-    on a dedicated queue.
+    Its only job is to hand the build to the build scheduler, which queues it and
+    runs it in the background when a slot for its build target is free.
     """
-    frappe.enqueue(
-        'rokct.rokct.flutter_builder.tasks._generate_flutter_app',
-        queue='long',
-        timeout=7200, # 2 hours timeout for the build
-        app_config_name=app_config_name
+    frappe.get_doc("Flutter App Configuration", app_config_name).check_permission("write")
+    return request_build(app_config_name, priority)
+
+def get_build_command(build_target):
+    if build_target == 'Android APK':
+        return ["flutter", "build", "apk", "--release"]
+    elif build_target == 'Android AAB':
+        return ["flutter", "build", "appbundle", "--release"]
+    elif build_target == 'Windows EXE':
+        return ["flutter", "build", "windows", "--release"]
+    raise Exception(f"Invalid build target: {build_target}")
+
+def get_artifact_path(temp_dir, build_target):
+    """Returns the path and file extension of the artifact a build target produces."""
+    if build_target == 'Android APK':
+        return os.path.join(temp_dir, 'build/app/outputs/flutter-apk/app-release.apk'), "apk"
+    elif build_target == 'Android AAB':
+        return os.path.join(temp_dir, 'build/app/outputs/bundle/release/app-release.aab'), "aab"
+    elif build_target == 'Windows EXE':
+        exe_name = get_windows_exe_name(temp_dir)
+        return os.path.join(temp_dir, f"build/windows/runner/Release/{exe_name}.exe"), "exe"
+    raise Exception(f"Invalid build target: {build_target}")
+
+def prepare_and_build(workspace, app_config, settings):
+    """
+    Applies the app configuration to a synced workspace and runs the release build.
+    Returns the artifact path and extension.
+    """
+    temp_dir = workspace.path
+    build_command = get_build_command(app_config.build_target)
+
+    # Get original package name before modifying files
+    original_package_name = get_original_package_name(temp_dir)
+    rename_android_package_structure(temp_dir, original_package_name, app_config.package_name, app_config.name)
+
+    modify_project_files(temp_dir, app_config)
+    handle_custom_font(temp_dir, app_config)
+
+    # Handle asset replacements
+    replace_image_asset(temp_dir, app_config, 'brand_logo', 'assets/images/logo.png')
+    replace_image_asset(temp_dir, app_config, 'login_bg_image', 'assets/images/loginBg.png')
+
+    place_google_services_json(temp_dir, app_config)
+    generate_app_icons(temp_dir, app_config, settings, workspace)
+    update_splash_screen(temp_dir, app_config, settings, workspace)
+
+    restored = workspace.finalize()
+    log_message(f"{restored} regenerated files are unchanged since the last build.", app_config.name)
+
+    log_message(f"Running build command: {' '.join(build_command)}...", app_config.name)
+    run_build_command(build_command, temp_dir, get_build_env(settings), app_config.name)
+    log_message("Flutter build command finished.", app_config.name)
+
+    artifact_path, artifact_extension = get_artifact_path(temp_dir, app_config.build_target)
+    if not os.path.exists(artifact_path):
+        raise Exception(f"Build succeeded but artifact file not found at expected location: {artifact_path}")
+
+    log_message(f"Artifact found at: {artifact_path}", app_config.name)
+    return artifact_path, artifact_extension
+
+def save_build_artifact(app_config, artifact_path, artifact_extension, build_name=None):
+    """Attaches the build artifact to the configuration and returns its File."""
+    suffix = f"-{build_name}" if build_name else ""
+    file_doc = store_artifact(
+        artifact_path,
+        f"{app_config.name.replace(' ', '_')}-{frappe.utils.now_datetime().strftime('%Y-%m-%d')}{suffix}.{artifact_extension}",
+        "Flutter App Configuration",
+        app_config.name
     )
-    return {"status": "enqueued"}
 
-def _generate_flutter_app(app_config_name):
+    log_message(f"Saved artifact to Frappe file: {file_doc.name}", app_config.name)
+    return file_doc
+
+def _generate_flutter_app(app_config_name, build_name=None):
     """
     This is the actual worker function that performs the build.
-    It is not whitelisted and is intended to be called only by the queue.
+    It is not whitelisted and is intended to be called only by the build scheduler.
     """
     app_config = frappe.get_doc("Flutter App Configuration", app_config_name)
     settings = frappe.get_doc("Flutter Build Settings")
-    temp_dir = tempfile.mkdtemp(prefix="flutter_build_")
+    workspace_key = None
 
     try:
         app_config.db_set("build_status", "In Progress")
         app_config.db_set("build_log", "") # Clear previous logs
         frappe.db.commit()
+        open_build_log(app_config.name)
 
         log_message("Starting build for " + app_config.name, app_config.name)
 
@@ -488,89 +596,27 @@ def _generate_flutter_app(app_config_name):
 
         log_message(f"Source directory: {source_dir}", app_config.name)
 
-        for item in os.listdir(source_dir):
-            s = os.path.join(source_dir, item)
-            d = os.path.join(temp_dir, item)
-            if os.path.isdir(s):
-                shutil.copytree(s, d, symlinks=True)
+        # Builds of the same project, version and package name share a workspace and its caches.
+        workspace_key = get_workspace_key(source_project, get_project_version(source_project), app_config.package_name)
+        with BuildWorkspace(source_dir, workspace_key) as workspace:
+            if workspace.is_new:
+                log_message(f"Creating build workspace: {workspace.path}", app_config.name)
             else:
-                shutil.copy2(s, d)
-        log_message(f"Copied project to temporary directory: {temp_dir}", app_config.name)
-
-        # Get original package name before modifying files
-        original_package_name = get_original_package_name(temp_dir)
-        rename_android_package_structure(temp_dir, original_package_name, app_config.package_name, app_config.name)
-
-        modify_project_files(temp_dir, app_config)
-        handle_custom_font(temp_dir, app_config)
-
-        # Handle asset replacements
-        replace_image_asset(temp_dir, app_config, 'brand_logo', 'assets/images/logo.png')
-        replace_image_asset(temp_dir, app_config, 'login_bg_image', 'assets/images/loginBg.png')
-
-        place_google_services_json(temp_dir, app_config)
-        generate_app_icons(temp_dir, app_config, settings)
-        update_splash_screen(temp_dir, app_config, settings)
-
-        # Determine build command
-        build_target = app_config.build_target
-        build_command = []
-        if build_target == 'Android APK':
-            build_command = ["flutter", "build", "apk", "--release"]
-        elif build_target == 'Android AAB':
-            build_command = ["flutter", "build", "appbundle", "--release"]
-        elif build_target == 'Windows EXE':
-            build_command = ["flutter", "build", "windows", "--release"]
-        else:
-            raise Exception(f"Invalid build target: {build_target}")
-
-        log_message(f"Running build command: {' '.join(build_command)}...", app_config.name)
-        env = os.environ.copy()
-        flutter_path = settings.flutter_sdk_path
-        env['PATH'] = f"{flutter_path}/bin:{env['PATH']}"
-        env['PUB_CACHE'] = "/opt/pub-cache"
-
-        build_result = subprocess.run(build_command, cwd=temp_dir, check=True, capture_output=True, text=True, env=env)
-        log_message(build_result.stdout, app_config.name)
-        log_message("Flutter build command finished.", app_config.name)
-
-        # Find and save the artifact
-        artifact_path = ""
-        artifact_extension = ""
-        if build_target == 'Android APK':
-            artifact_path = os.path.join(temp_dir, 'build/app/outputs/flutter-apk/app-release.apk')
-            artifact_extension = "apk"
-        elif build_target == 'Android AAB':
-            artifact_path = os.path.join(temp_dir, 'build/app/outputs/bundle/release/app-release.aab')
-            artifact_extension = "aab"
-        elif build_target == 'Windows EXE':
-            exe_name = get_windows_exe_name(temp_dir)
-            artifact_path = os.path.join(temp_dir, f"build/windows/runner/Release/{exe_name}.exe")
-            artifact_extension = "exe"
-
-        if not os.path.exists(artifact_path):
-             raise Exception(f"Build succeeded but artifact file not found at expected location: {artifact_path}")
-
-        log_message(f"Artifact found at: {artifact_path}", app_config.name)
-
-        with open(artifact_path, 'rb') as f:
-            artifact_content = f.read()
-
-        file_doc = frappe.new_doc("File", {
-            "file_name": f"{app_config.name.replace(' ', '_')}-{frappe.utils.now_datetime().strftime('%Y-%m-%d')}.{artifact_extension}",
-            "attached_to_doctype": "Flutter App Configuration",
-            "attached_to_name": app_config.name,
-            "content": artifact_content,
-            "is_private": 0
-        })
-        file_doc.save(ignore_permissions=True)
-
-        log_message(f"Saved artifact to Frappe file: {file_doc.name}", app_config.name)
+                log_message(f"Reusing build workspace: {workspace.path}", app_config.name)
+            sync_stats = workspace.sync()
+            log_message(
+                f"Synced workspace: {sync_stats.copied} files updated, {sync_stats.unchanged} unchanged, {sync_stats.removed} removed.",
+                app_config.name
+            )
+
+            artifact_path, artifact_extension = prepare_and_build(workspace, app_config, settings)
+            file_doc = save_build_artifact(app_config, artifact_path, artifact_extension, build_name)
 
         app_config.db_set("apk_download_link", file_doc.file_url)
         app_config.db_set("build_status", "Success")
         log_message("Build finished successfully!", app_config.name)
         frappe.db.commit()
+        close_build_log(app_config.name)
         frappe.publish_realtime(
             "flutter_build_complete",
             message={"status": "Success", "app_config_name": app_config.name},
@@ -583,6 +629,7 @@ def _generate_flutter_app(app_config_name):
         log_message(frappe.get_traceback(), app_config.name)
         app_config.db_set("build_status", "Failed")
         frappe.db.commit()
+        close_build_log(app_config.name)
         frappe.log_error(frappe.get_traceback(), "Flutter App Build Failed")
         frappe.publish_realtime(
             "flutter_build_complete",
@@ -590,7 +637,10 @@ def _generate_flutter_app(app_config_name):
             user=app_config.owner
         )
     finally:
-        if os.path.exists(temp_dir):
-            shutil.rmtree(temp_dir)
-            print(f"Cleaned up temporary directory: {temp_dir}")
-
+        close_build_log(app_config.name)
+        try:
+            evicted = evict_workspaces(keep=workspace_key)
+            if evicted:
+                print(f"Evicted build workspaces over quota: {', '.join(evicted)}")
+        except Exception:
+            frappe.log_error(frappe.get_traceback(), "Flutter Workspace Eviction Failed")
@@ -8,18 +8,15 @@ def prevent_uninstall_if_build_active():
     It prevents the app from being uninstalled if there are active builds.
     """
     active_builds = frappe.get_all(
-        "RQ Job",
-        filters={
-            "status": ["in", ["queued", "started"]],
-            "method": "rokct.rokct.flutter_builder.tasks._generate_flutter_app"
-        },
+        "Flutter Build",
+        filters={"status": ["in", ["Queued", "Running"]]},
         limit=1
     )
 
     if active_builds:
         frappe.throw(
             "Cannot uninstall the Rokct app while one or more app builds are in progress. "
-            "Please wait for the builds to complete or cancel them from the 'RQ Job' list."
+            "Please wait for the builds to complete or cancel them from the 'Flutter Build' list."
         )
 
     print("No active builds found. Proceeding with uninstallation.")
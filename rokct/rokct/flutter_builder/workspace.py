@@ -0,0 +1,350 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Persistent, incremental build workspaces for Flutter app builds.
+#
+# Each (source project, version, package name) gets its own workspace that is kept between
+# builds, together with its `build/`, `.dart_tool/` and `.gradle/` caches. Before a build the
+# workspace is synced from the source project by content hash: only files whose content
+# differs are rewritten, and files that the previous build created but that are no longer
+# produced are removed. Files that end up with the same content as after the previous build
+# get their previous mtime back, so Flutter and Gradle treat them as unchanged.
+#
+# Generator steps (launcher icons, native splash) record a hash of their inputs and the
+# files they wrote. While the inputs and those files are unchanged the step is skipped.
+#
+# Workspaces are evicted least recently used first once they exceed the disk quota.
+import fcntl
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+import frappe
+
+WORKSPACE_DIR = ("private", "flutter_builds", "workspaces")
+GRADLE_HOME_DIR = ("private", "flutter_builds", "gradle")
+MANIFEST_FILE = ".rokct_workspace.json"
+LOCK_FILE = ".rokct_workspace.lock"
+MANIFEST_VERSION = 1
+DEFAULT_QUOTA_GB = 20
+# Tool caches and build outputs: kept between builds, never synced from the source.
+CACHE_DIRS = {".dart_tool", "build", ".gradle", "Pods", ".symlinks", ".git", ".idea"}
+BOOKKEEPING_FILES = {MANIFEST_FILE, LOCK_FILE}
+# Rewritten by every `pub get` or build, some with timestamps; never synced or tracked.
+GENERATED_FILES = {
+    ".flutter-plugins", ".flutter-plugins-dependencies", ".packages", "local.properties",
+    "Generated.xcconfig", "flutter_export_environment.sh",
+}
+
+
+def get_workspace_root():
+    return frappe.conf.get("flutter_workspace_root") or frappe.get_site_path(*WORKSPACE_DIR)
+
+
+def get_gradle_home():
+    """A Gradle user home shared by all workspaces, so dependencies are downloaded once."""
+    return frappe.conf.get("flutter_gradle_home") or frappe.get_site_path(*GRADLE_HOME_DIR)
+
+
+def get_quota_bytes():
+    quota_gb = frappe.conf.get("flutter_workspace_quota_gb")
+    return float(DEFAULT_QUOTA_GB if quota_gb is None else quota_gb) * 1024 ** 3
+
+
+def get_workspace_key(source_project, version, package_name):
+    parts = [source_project or "", str(version or ""), package_name or ""]
+    readable = re.sub(r"[^A-Za-z0-9._-]+", "_", "-".join(parts)).strip("_")[:80]
+    digest = hashlib.sha1("\0".join(parts).encode()).hexdigest()[:8]
+    return f"{readable}-{digest}"
+
+
+def hash_bytes(*chunks):
+    digest = hashlib.sha1()
+    for chunk in chunks:
+        digest.update(chunk if isinstance(chunk, bytes) else str(chunk).encode())
+    return digest.hexdigest()
+
+
+def _hash_path(path):
+    if os.path.islink(path):
+        return "link:" + os.readlink(path)
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def scan(root):
+    """Returns {relative path: (size, mtime_ns)} for the files under `root`, skipping caches."""
+    files = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        # Symlinked directories are synced as links, not walked.
+        linked_dirs = [d for d in dirnames if d not in CACHE_DIRS and os.path.islink(os.path.join(dirpath, d))]
+        dirnames[:] = [d for d in dirnames if d not in CACHE_DIRS and d not in linked_dirs]
+        for name in filenames + linked_dirs:
+            if name in GENERATED_FILES:
+                continue
+            path = os.path.join(dirpath, name)
+            rel = os.path.relpath(path, root)
+            if rel in BOOKKEEPING_FILES:
+                continue
+            st = os.lstat(path)
+            files[rel] = (st.st_size, st.st_mtime_ns)
+    return files
+
+
+def get_tree_size(root):
+    total = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        for name in filenames:
+            try:
+                total += os.lstat(os.path.join(dirpath, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _remove(path):
+    if os.path.islink(path) or os.path.isfile(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
+
+
+def _copy(source, target):
+    _remove(target)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    if os.path.islink(source):
+        os.symlink(os.readlink(source), target)
+    else:
+        # A fresh mtime, so tools that compare timestamps see the change.
+        shutil.copyfile(source, target)
+        shutil.copymode(source, target)
+
+
+class BuildWorkspace:
+    """
+    A locked, persistent workspace for one build:
+
+        with BuildWorkspace(source_dir, key) as workspace:
+            workspace.sync()
+            ... modify files, run steps ...
+            workspace.finalize()
+            ... flutter build ...
+    """
+
+    def __init__(self, source_dir, key):
+        self.source_dir = source_dir
+        self.key = key
+        self.path = os.path.join(get_workspace_root(), key)
+        self.manifest_path = os.path.join(self.path, MANIFEST_FILE)
+        self.used_steps = set()
+        self.source_hashes = {}
+        self.before = {}
+
+    def __enter__(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.lock_file = open(os.path.join(self.path, LOCK_FILE), "a+")
+        # Blocks while another build uses this workspace.
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+        self.manifest = self._load_manifest()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        try:
+            self.manifest["last_used"] = time.time()
+            self.manifest["size"] = get_tree_size(self.path)
+            self._save_manifest()
+        finally:
+            fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+            self.lock_file.close()
+        return False
+
+    @property
+    def is_new(self):
+        return not self.manifest["files"]
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                return manifest
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return {"version": MANIFEST_VERSION, "source": {}, "files": {}, "steps": {}, "last_used": 0, "size": 0}
+
+    def _save_manifest(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def _hash(self, root, rel, stat, cache):
+        """Hash of a file, reusing `cache` ({rel: [size, mtime_ns, hash]}) when its stat is unchanged."""
+        entry = cache.get(rel)
+        if entry and entry[0] == stat[0] and entry[1] == stat[1]:
+            return entry[2]
+        return _hash_path(os.path.join(root, rel))
+
+    def _validate_steps(self, current):
+        """Drops step records whose outputs were changed since, or whose source files changed."""
+        files = self.manifest["files"]
+        for name, step in list(self.manifest["steps"].items()):
+            valid = all(
+                rel in current and self._hash(self.path, rel, current[rel], files) == output_hash
+                and self.source_hashes.get(rel) == step["base"].get(rel)
+                for rel, output_hash in step["outputs"].items()
+            )
+            if not valid:
+                del self.manifest["steps"][name]
+
+    def _step_outputs(self):
+        return {rel for step in self.manifest["steps"].values() for rel in step["outputs"]}
+
+    def sync(self):
+        """Makes the workspace match the source project. Returns sync stats."""
+        source = scan(self.source_dir)
+        source_cache = self.manifest["source"]
+        self.source_hashes = {rel: self._hash(self.source_dir, rel, stat, source_cache) for rel, stat in source.items()}
+        self.manifest["source"] = {rel: [*source[rel], h] for rel, h in self.source_hashes.items()}
+
+        current = scan(self.path)
+        self._validate_steps(current)
+        owned = self._step_outputs()
+        files = self.manifest["files"]
+
+        stats = frappe._dict(copied=0, unchanged=0, removed=0)
+        for rel, source_hash in self.source_hashes.items():
+            if rel in owned:
+                continue
+            if rel in current and self._hash(self.path, rel, current[rel], files) == source_hash:
+                stats.unchanged += 1
+                continue
+            _copy(os.path.join(self.source_dir, rel), os.path.join(self.path, rel))
+            stats.copied += 1
+
+        # Files the previous build created that are not in the source; recreated below if still needed.
+        for rel in files:
+            if rel not in self.source_hashes and rel not in owned and rel in current:
+                _remove(os.path.join(self.path, rel))
+                stats.removed += 1
+
+        self.before = scan(self.path)
+        return stats
+
+    def restore_step_outputs(self, name):
+        """Puts the files a step wrote back to their source versions, and forgets the step."""
+        step = self.manifest["steps"].pop(name, None)
+        if not step:
+            return
+        for rel in step["outputs"]:
+            target = os.path.join(self.path, rel)
+            if rel in self.source_hashes:
+                _copy(os.path.join(self.source_dir, rel), target)
+            elif os.path.lexists(target):
+                _remove(target)
+
+    def is_step_current(self, name, input_hash):
+        """Whether step `name` already ran with these inputs and its outputs are intact."""
+        step = self.manifest["steps"].get(name)
+        if step and step["input"] == input_hash:
+            self.used_steps.add(name)
+            return True
+        return False
+
+    def run_step(self, name, input_hash, func):
+        """Runs `func` as step `name`, recording the files it writes."""
+        self.restore_step_outputs(name)
+        before = scan(self.path)
+        self.used_steps.add(name)
+        func()
+        after = scan(self.path)
+        outputs = {
+            rel: _hash_path(os.path.join(self.path, rel))
+            for rel, stat in after.items() if before.get(rel) != stat
+        }
+        self.manifest["steps"][name] = {
+            "input": input_hash,
+            "outputs": outputs,
+            "base": {rel: self.source_hashes.get(rel) for rel in outputs},
+        }
+
+    def finalize(self):
+        """
+        Records the prepared sources before the build runs. Steps that were not used this
+        time are undone, and files whose content matches the previous build get its mtime back.
+        Returns the number of files whose mtime was restored.
+        """
+        for name in list(self.manifest["steps"]):
+            if name not in self.used_steps:
+                self.restore_step_outputs(name)
+
+        after = scan(self.path)
+        previous = self.manifest["files"]
+        managed = set(self.source_hashes) | self._step_outputs() | {
+            rel for rel, stat in after.items() if self.before.get(rel) != stat
+        }
+
+        restored = 0
+        files = {}
+        for rel in managed:
+            if rel not in after:
+                continue
+            size, mtime_ns = after[rel]
+            file_hash = self._hash(self.path, rel, after[rel], previous)
+            entry = previous.get(rel)
+            path = os.path.join(self.path, rel)
+            if entry and entry[2] == file_hash and entry[1] != mtime_ns and not os.path.islink(path):
+                os.utime(path, ns=(mtime_ns, entry[1]))
+                mtime_ns = entry[1]
+                restored += 1
+            files[rel] = [size, mtime_ns, file_hash]
+
+        self.manifest["files"] = files
+        self._save_manifest()
+        return restored
+
+
+def evict_workspaces(keep=None):
+    """
+    Removes least recently used workspaces until the total size fits the quota. Workspaces
+    in use by a build are skipped. Returns the keys of the removed workspaces.
+    """
+    root = get_workspace_root()
+    if not os.path.isdir(root):
+        return []
+
+    workspaces = []
+    for key in os.listdir(root):
+        path = os.path.join(root, key)
+        if not os.path.isdir(path):
+            continue
+        try:
+            with open(os.path.join(path, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+            workspaces.append((manifest.get("last_used") or 0, manifest.get("size") or 0, key))
+        except (FileNotFoundError, json.JSONDecodeError):
+            workspaces.append((os.path.getmtime(path), get_tree_size(path), key))
+
+    total = sum(size for _, size, _ in workspaces)
+    quota = get_quota_bytes()
+    evicted = []
+    for _, size, key in sorted(workspaces):
+        if total <= quota:
+            break
+        if key == keep:
+            continue
+        path = os.path.join(root, key)
+        with open(os.path.join(path, LOCK_FILE), "a+") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        evicted.append(key)
+    return evicted
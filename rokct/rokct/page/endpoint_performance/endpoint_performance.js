@@ -0,0 +1,85 @@
+frappe.pages["endpoint-performance"].on_page_load = function (wrapper) {
+    const page = frappe.ui.make_app_page({
+        parent: wrapper,
+        title: __("Endpoint Performance"),
+        single_column: true,
+    });
+
+    const minutes = page.add_field({
+        fieldname: "minutes",
+        label: __("Period"),
+        fieldtype: "Select",
+        options: [
+            { value: "15", label: __("Last 15 minutes") },
+            { value: "60", label: __("Last hour") },
+            { value: "360", label: __("Last 6 hours") },
+            { value: "1440", label: __("Last 24 hours") },
+        ],
+        default: "60",
+        change: () => refresh(),
+    });
+    page.set_primary_action(__("Refresh"), () => refresh(), "refresh");
+
+    const $body = $(`<div class="endpoint-performance"></div>`).appendTo(page.main);
+
+    const columns = [
+        ["method", __("Method")],
+        ["calls", __("Est. Calls")],
+        ["avg_wall_ms", __("Avg ms")],
+        ["p50_wall_ms", __("p50 ms")],
+        ["p95_wall_ms", __("p95 ms")],
+        ["avg_queries", __("Avg Queries")],
+        ["p95_queries", __("p95 Queries")],
+        ["avg_query_ms", __("Avg Query ms")],
+        ["avg_bytes", __("Avg Size")],
+    ];
+
+    const format = (key, value) => {
+        if (value === null || value === undefined) {
+            // The unbounded histogram bucket.
+            return key === "method" ? "" : "&gt; max";
+        }
+        if (key === "avg_bytes") {
+            return value >= 1048576 ? `${(value / 1048576).toFixed(1)} MB`
+                : value >= 1024 ? `${(value / 1024).toFixed(1)} KB` : `${value} B`;
+        }
+        return frappe.utils.escape_html(String(value));
+    };
+
+    const render_table = (title, rows) => {
+        const header = columns.map(([, label]) => `<th>${label}</th>`).join("");
+        const body = rows.length
+            ? rows.map((row) => `<tr>${columns.map(([key]) => `<td>${format(key, row[key])}</td>`).join("")}</tr>`).join("")
+            : `<tr><td colspan="${columns.length}" class="text-muted">${__("No samples in this period.")}</td></tr>`;
+        return `
+            <h5 class="mt-4">${title}</h5>
+            <div class="table-responsive">
+                <table class="table table-bordered table-sm">
+                    <thead><tr>${header}</tr></thead>
+                    <tbody>${body}</tbody>
+                </table>
+            </div>`;
+    };
+
+    const refresh = () => {
+        frappe.call({
+            method: "rokct.rokct.endpoint_metrics.get_endpoint_metrics",
+            args: { minutes: minutes.get_value() || 60, limit: 20 },
+            callback: (r) => {
+                const data = r.message || {};
+                $body.html(`
+                    <p class="text-muted mt-3">
+                        ${__("Sampling {0}% of method calls in {1} minute windows.", [
+                            Math.round((data.sample_rate || 0) * 1000) / 10,
+                            (data.window_seconds || 0) / 60,
+                        ])}
+                    </p>
+                    ${render_table(__("Slowest Endpoints (p95 wall time)"), data.slowest || [])}
+                    ${render_table(__("Chattiest Endpoints (average queries)"), data.chattiest || [])}
+                `);
+            },
+        });
+    };
+
+    refresh();
+};
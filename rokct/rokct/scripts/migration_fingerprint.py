@@ -0,0 +1,125 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Migration fingerprints let the updater skip sites where `bench migrate` would be a no-op.
+#
+# A site's fingerprint records, for every app installed on it, a hash of the app
+# revision, its patches.txt, its doctype JSON and its fixtures/custom fields. It is written to
+# `sites/<site>/migration_fingerprint.json` after a successful migrate. When the
+# fingerprint of the code on disk matches, nothing the migrate would apply has changed.
+import os
+import json
+import hashlib
+import subprocess
+
+FINGERPRINT_FILE = "migration_fingerprint.json"
+COMPONENTS = ("version", "patches", "doctypes", "fixtures")
+# JSON outside doctype folders that `bench migrate` syncs into the database.
+SYNCED_JSON_DIRS = {"fixtures", "custom_field", "custom_fields"}
+
+
+def _hash_files(paths):
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        digest.update(path.encode())
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _get_app_version(app_path):
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=app_path, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (subprocess.CalledProcessError, FileNotFoundError, NotADirectoryError):
+        return None
+
+
+def get_app_fingerprint(bench_path, app):
+    """Returns the component hashes for one app as it currently exists on disk."""
+    app_path = os.path.join(bench_path, "apps", app)
+    module_path = os.path.join(app_path, app)
+
+    doctype_files = []
+    fixture_files = []
+    for root, dirs, files in os.walk(module_path):
+        dirs[:] = [d for d in dirs if d not in ("node_modules", "__pycache__", "public")]
+        parts = root.split(os.sep)
+        for filename in files:
+            if not filename.endswith(".json"):
+                continue
+            if len(parts) >= 2 and parts[-2] == "doctype" and filename == f"{parts[-1]}.json":
+                doctype_files.append(os.path.join(root, filename))
+            elif SYNCED_JSON_DIRS.intersection(parts):
+                fixture_files.append(os.path.join(root, filename))
+
+    patches_path = os.path.join(module_path, "patches.txt")
+    doctype_hash = _hash_files(doctype_files)
+    return {
+        "version": _get_app_version(app_path) or doctype_hash,
+        "patches": _hash_files([patches_path]) if os.path.exists(patches_path) else None,
+        "doctypes": doctype_hash,
+        "fixtures": _hash_files(fixture_files),
+    }
+
+
+def get_site_apps(bench_path, site):
+    for path in (os.path.join(bench_path, "sites", site, "apps.txt"), os.path.join(bench_path, "sites", "apps.txt")):
+        if os.path.exists(path):
+            with open(path) as f:
+                return [line.strip() for line in f if line.strip()]
+    return []
+
+
+class FingerprintCache:
+    """Computes each app's fingerprint at most once per updater run."""
+
+    def __init__(self, bench_path):
+        self.bench_path = bench_path
+        self._apps = {}
+
+    def get_target(self, site):
+        target = {}
+        for app in get_site_apps(self.bench_path, site):
+            if app not in self._apps:
+                self._apps[app] = get_app_fingerprint(self.bench_path, app)
+            target[app] = self._apps[app]
+        return target
+
+
+def load_site_fingerprint(bench_path, site):
+    try:
+        with open(os.path.join(bench_path, "sites", site, FINGERPRINT_FILE)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def save_site_fingerprint(bench_path, site, fingerprint):
+    path = os.path.join(bench_path, "sites", site, FINGERPRINT_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(fingerprint, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def explain_changes(stored, target):
+    """
+    Returns a list of human-readable reasons why `target` differs from `stored`.
+    An empty list means the site is up to date.
+    """
+    if not stored:
+        return ["no fingerprint recorded (site has never been migrated by the updater)"]
+
+    changes = []
+    for app, components in target.items():
+        if app not in stored:
+            changes.append(f"{app}: newly installed")
+            continue
+        for component in COMPONENTS:
+            if stored[app].get(component) != components.get(component):
+                changes.append(f"{app}: {component} changed")
+    for app in stored:
+        if app not in target:
+            changes.append(f"{app}: removed")
+    return changes
@@ -6,17 +6,41 @@ import re
 import subprocess
 import logging
 import json
+import time
+import fcntl
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from frappe.utils import get_sites, now, get_weekday
 from packaging.version import parse as parse_version
+from rokct.rokct.scripts.migration_fingerprint import (
+    FingerprintCache, load_site_fingerprint, save_site_fingerprint, explain_changes
+)
 
 # Setup logging
 log_dir = os.path.join(frappe.conf.get("bench_path", os.getcwd()), "logs")
 log_file = os.path.join(log_dir, "updater.log")
 logging.basicConfig(filename=log_file, level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-def run_updates():
+# Lower numbers are migrated first. Sites without a subscription (e.g. warm pool sites) go last.
+MIGRATION_PRIORITY = {
+    "Active": 0,
+    "Grace Period": 0,
+    "Past Due": 1,
+    "Trialing": 1,
+    "Free": 2,
+    "Downgraded": 2,
+    "Provisioning": 3,
+}
+DEFAULT_MIGRATION_PRIORITY = 4
+NO_SUBSCRIPTION_PRIORITY = 5
+
+DEFAULT_MIGRATION_CONCURRENCY = 2
+DEFAULT_MIGRATION_TIMEOUT = 3600  # seconds per site
+
+def run_updates(force=False):
     """
     The main entry point for the new, Python-based updater script.
+    Pass `force=True` to migrate every eligible site even if its fingerprint is up to date.
     """
     logging.info("--- Starting ROKCT Updater Script ---")
 
@@ -27,6 +51,12 @@ def run_updates():
 
     update_rokct_app(bench_path)
 
+    if frappe.conf.get("app_role") == "control_panel":
+        from rokct.rokct.control_panel.site_templates import refresh_stale_templates
+        stale_templates = refresh_stale_templates()
+        if stale_templates:
+            logging.info(f"Enqueued site template rebuilds for app sets: {', '.join(stale_templates)}")
+
     if get_weekday() == "Sunday":
         migrate_control_panel_site(bench_path)
 
@@ -35,75 +65,230 @@ def run_updates():
 
     notify_pending_approvals(sites_pending_approval)
 
-    logging.info(f"Sites to migrate: {', '.join(sites_to_migrate)}")
+    summary = migrate_sites(bench_path, sites_to_migrate, force=frappe.utils.cint(force))
 
-    migrated_sites = []
-    failed_sites = []
-    locked_sites = []
+    notify_migration_summary(summary["migrated"], summary["failed"], summary["locked"], summary["durations"], summary["up_to_date"])
+
+    logging.info("--- ROKCT Updater Script Finished ---")
+
+def migrate_sites(bench_path, sites, force=False):
+    """
+    Migrates `sites` (already in priority order) with a bounded number of concurrent
+    `bench migrate` processes. Each site is guarded by a kernel-level lock and a timeout.
+
+    Progress is written to `logs/updater_progress.json` after every site. If the previous
+    run did not finish, sites it already migrated to the same target fingerprint are
+    skipped so the run resumes; a site migrated to older code is migrated again.
+    Sites whose migration fingerprint already matches the code on disk are skipped
+    unless `force` is set.
+    """
+    concurrency = max(int(frappe.conf.get("updater_migration_concurrency") or DEFAULT_MIGRATION_CONCURRENCY), 1)
+    timeout = int(frappe.conf.get("updater_migration_timeout") or DEFAULT_MIGRATION_TIMEOUT)
 
     locks_dir = os.path.join(bench_path, "locks")
     os.makedirs(locks_dir, exist_ok=True)
 
-    for site in sites_to_migrate:
-        lock_path = os.path.join(locks_dir, f"{site}.lock")
-        if os.path.exists(lock_path):
-            locked_sites.append(site)
-            logging.warning(f"Site {site} is locked. Skipping migration.")
-            continue
+    progress_path = os.path.join(bench_path, "logs", "updater_progress.json")
+    progress = _load_progress(progress_path)
+    if progress.get("finished", True):
+        progress = {"started": now(), "finished": False, "sites": {}}
+    else:
+        logging.info(f"Resuming unfinished migration run started at {progress.get('started')}.")
+
+    fingerprints = FingerprintCache(bench_path)
+    targets = {site: fingerprints.get_target(site) for site in sites}
+
+    def migrated_to_target(site):
+        entry = progress["sites"].get(site, {})
+        return entry.get("status") == "migrated" and entry.get("fingerprint") == targets[site]
+
+    already_migrated = [site for site in sites if migrated_to_target(site)]
+    pending = [site for site in sites if site not in already_migrated]
+    up_to_date = []
+    if not force:
+        up_to_date = [site for site in pending if not explain_changes(load_site_fingerprint(bench_path, site), targets[site])]
+        pending = [site for site in pending if site not in up_to_date]
+        if up_to_date:
+            logging.info(f"Skipping sites whose migration fingerprint is up to date: {', '.join(up_to_date)}")
+    logging.info(f"Sites to migrate: {', '.join(pending)} (concurrency={concurrency}, timeout={timeout}s)")
+    if already_migrated:
+        logging.info(f"Skipping sites already migrated in this run: {', '.join(already_migrated)}")
+
+    # A crashed run may have stopped before clearing the approval of sites it had migrated.
+    for site in already_migrated:
+        _clear_migration_approval(site)
+
+    migrated_sites = list(already_migrated)
+    failed_sites = []
+    locked_sites = []
 
-        try:
-            with open(lock_path, "w") as f:
-                f.write(now())
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = {executor.submit(_migrate_site, bench_path, locks_dir, site, timeout, targets[site]): site for site in pending}
+        # Database writes stay on this thread; the workers only run subprocesses.
+        for future in as_completed(futures):
+            site = futures[future]
+            result = future.result()
+            progress["sites"][site] = result
+            _save_progress(progress_path, progress)
+
+            if result["status"] == "migrated":
+                migrated_sites.append(site)
+                _clear_migration_approval(site)
+                logging.info(f"Migrated site {site} in {result['duration']}s.")
+            elif result["status"] == "locked":
+                locked_sites.append(site)
+                logging.warning(f"Site {site} is locked. Skipping migration.")
+            else:
+                failed_sites.append({"site": site, "error": result["error"]})
+                logging.error(result["error"])
+
+    progress["finished"] = True
+    progress["ended"] = now()
+    _save_progress(progress_path, progress)
+
+    return {
+        "migrated": migrated_sites,
+        "failed": failed_sites,
+        "locked": locked_sites,
+        "up_to_date": up_to_date,
+        "durations": {site: data.get("duration") for site, data in progress["sites"].items()},
+    }
+
+def _clear_migration_approval(site):
+    """Approval covers one migration, so it is reset as soon as the site has migrated."""
+    frappe.db.set_value("Company Subscription", {"site_name": site, "migration_approved": 1}, "migration_approved", 0)
+    frappe.db.commit()
+
+def _migrate_site(bench_path, locks_dir, site, timeout, fingerprint):
+    """Runs `bench migrate` for one site. Safe to call from a worker thread."""
+    started = time.monotonic()
+    try:
+        with site_lock(os.path.join(locks_dir, f"{site}.lock")) as acquired:
+            if not acquired:
+                return {"status": "locked", "duration": 0}
 
-            logging.info(f"Running migration for site: {site}")
             subprocess.run(
                 ["bench", "--site", site, "migrate"],
-                cwd=bench_path, check=True, capture_output=True, text=True
+                cwd=bench_path, check=True, capture_output=True, text=True, timeout=timeout
             )
-            migrated_sites.append(site)
+            try:
+                save_site_fingerprint(bench_path, site, fingerprint)
+            except OSError as e:
+                logging.warning(f"Migrated site {site} but could not save its migration fingerprint: {e}")
+            return {"status": "migrated", "duration": round(time.monotonic() - started, 2), "fingerprint": fingerprint}
+
+    except subprocess.TimeoutExpired:
+        error = f"Migration timed out for site {site} after {timeout}s."
+    except subprocess.CalledProcessError as e:
+        error = f"Migration failed for site {site}:\n{e.stderr}"
+    except Exception as e:
+        error = f"Migration failed for site {site}: {e}"
+    return {"status": "failed", "error": error, "duration": round(time.monotonic() - started, 2)}
 
-            subscription_name = frappe.db.get_value("Company Subscription", {"site_name": site}, "name")
-            if subscription_name:
-                frappe.db.set_value("Company Subscription", subscription_name, "migration_approved", 0)
-                frappe.db.commit()
+@contextmanager
+def site_lock(lock_path):
+    """
+    Holds an exclusive `flock` on `lock_path` for the duration of the block and yields
+    whether it was acquired. The kernel releases the lock if the process dies, so a
+    crashed run never leaves a stale lock behind.
+    """
+    with open(lock_path, "a+") as lock_file:
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
 
-        except subprocess.CalledProcessError as e:
-            error_log = f"Migration failed for site {site}:\n{e.stderr}"
-            failed_sites.append({"site": site, "error": error_log})
-            logging.error(error_log)
+        try:
+            lock_file.seek(0)
+            lock_file.truncate()
+            lock_file.write(now())
+            lock_file.flush()
+            yield True
         finally:
-            if os.path.exists(lock_path):
-                os.remove(lock_path)
-
-    notify_migration_summary(migrated_sites, failed_sites, locked_sites)
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
 
-    logging.info("--- ROKCT Updater Script Finished ---")
+def _load_progress(progress_path):
+    try:
+        with open(progress_path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _save_progress(progress_path, progress):
+    os.makedirs(os.path.dirname(progress_path), exist_ok=True)
+    tmp_path = f"{progress_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(progress, f, indent=1)
+    os.replace(tmp_path, progress_path)
 
 def get_sites_to_migrate(sites):
+    """
+    Splits `sites` into those to migrate now (sorted by priority) and PaaS sites still
+    awaiting approval. Subscriptions are loaded with a single query; if it fails, no site
+    is migrated, since unapproved PaaS sites could not be told apart.
+    """
     sites_to_migrate = []
     sites_pending_approval = []
 
+    subscriptions = {}
+    try:
+        for sub in frappe.get_all(
+            "Company Subscription",
+            filters={"site_name": ("in", sites)},
+            fields=["site_name", "status", "paas_plan", "migration_approved"]
+        ):
+            subscriptions[sub.site_name] = sub
+    except Exception as e:
+        logging.error(f"Error getting subscriptions for sites, skipping all site migrations: {e}")
+        return [], []
+
     for site in sites:
         if site == frappe.local.site:
             continue
-        try:
-            subscription_name = frappe.db.get_value("Company Subscription", {"site_name": site}, "name")
-            if subscription_name:
-                subscription = frappe.get_doc("Company Subscription", subscription_name)
-                if subscription.paas_plan:
-                    if subscription.migration_approved:
-                        sites_to_migrate.append(site)
-                    else:
-                        sites_pending_approval.append(site)
-                else:
-                    sites_to_migrate.append(site)
-            else:
-                sites_to_migrate.append(site)
-        except Exception as e:
-            logging.error(f"Error getting subscription for site {site}: {e}")
+        subscription = subscriptions.get(site)
+        if subscription and subscription.paas_plan and not subscription.migration_approved:
+            sites_pending_approval.append(site)
+        else:
+            sites_to_migrate.append(site)
 
+    def priority(site):
+        subscription = subscriptions.get(site)
+        if not subscription:
+            return NO_SUBSCRIPTION_PRIORITY
+        return MIGRATION_PRIORITY.get(subscription.status, DEFAULT_MIGRATION_PRIORITY)
+
+    sites_to_migrate.sort(key=priority)
     return sites_to_migrate, sites_pending_approval
 
+def explain_migrations():
+    """
+    Lists, for every eligible site, what changed since its last successful migrate.
+    Nothing is pulled or migrated. Run with:
+    `bench --site <control panel> execute rokct.rokct.scripts.updater.explain_migrations`
+    """
+    bench_path = frappe.conf.get("bench_path")
+    if not bench_path or not os.path.isdir(bench_path):
+        print(f"`bench_path` ({bench_path}) not set or invalid in site_config.json.")
+        return {}
+
+    sites_to_migrate, sites_pending_approval = get_sites_to_migrate(get_sites())
+    fingerprints = FingerprintCache(bench_path)
+
+    plan = {}
+    for site in sites_to_migrate:
+        plan[site] = explain_changes(load_site_fingerprint(bench_path, site), fingerprints.get_target(site))
+        if plan[site]:
+            print(f"{site}: will migrate")
+            for change in plan[site]:
+                print(f"  - {change}")
+        else:
+            print(f"{site}: up to date, will skip")
+    for site in sites_pending_approval:
+        print(f"{site}: awaiting migration approval")
+
+    return plan
+
 def update_rokct_app(bench_path):
     try:
         app_path = frappe.get_app_path("rokct")
@@ -265,9 +450,15 @@ def notify_pending_approvals(sites_pending_approval):
     except Exception as e:
         logging.error(f"Failed to send pending approval notification: {e}")
 
-def notify_migration_summary(migrated, failed, locked):
+def notify_migration_summary(migrated, failed, locked, durations=None, up_to_date=None):
     if not migrated and not failed and not locked:
         return
+    durations = durations or {}
+
+    def with_duration(site):
+        duration = durations.get(site)
+        return f"- {site} ({duration}s)" if duration is not None else f"- {site}"
+
     try:
         admin_email = frappe.db.get_value("User", "Administrator", "email")
         if not admin_email:
@@ -275,11 +466,15 @@ def notify_migration_summary(migrated, failed, locked):
             return
         message = "Migration script run summary:\n\n"
         if migrated:
-            message += f"Successfully migrated sites:\n" + "\n".join([f"- {site}" for site in migrated]) + "\n\n"
+            message += f"Successfully migrated sites:\n" + "\n".join([with_duration(site) for site in migrated]) + "\n\n"
         if failed:
-            message += f"Failed sites:\n" + "\n".join([f"- {f['site']}: {f['error']}" for f in failed]) + "\n\n"
+            message += f"Failed sites:\n" + "\n".join([f"{with_duration(f['site'])}: {f['error']}" for f in failed]) + "\n\n"
         if locked:
             message += f"Locked sites (skipped):\n" + "\n".join([f"- {site}" for site in locked]) + "\n\n"
+        if up_to_date:
+            message += f"Up-to-date sites (no migration needed): {len(up_to_date)}\n\n"
+        if durations:
+            message += f"Total migration time: {round(sum(d or 0 for d in durations.values()), 2)}s across {len(durations)} sites.\n"
         frappe.sendmail(
             recipients=[admin_email],
             subject="Daily Migration Summary",
@@ -293,29 +488,26 @@ def notify_migration_summary(migrated, failed, locked):
 def migrate_control_panel_site(bench_path):
     site = frappe.local.site
     locks_dir = os.path.join(bench_path, "locks")
+    os.makedirs(locks_dir, exist_ok=True)
     lock_path = os.path.join(locks_dir, "control_panel.lock")
-    if os.path.exists(lock_path):
-        logging.warning("Control panel migration already running. Skipping.")
-        return
-    try:
-        with open(lock_path, "w") as f:
-            f.write(now())
-        logging.info(f"Migrating control panel site: {site}")
-        subprocess.run(["bench", "--site", site, "migrate"], cwd=bench_path, check=True)
-    except subprocess.CalledProcessError as e:
-        error_message = f"Control panel migration failed:\n{e.stderr}"
-        logging.error(error_message)
+    with site_lock(lock_path) as acquired:
+        if not acquired:
+            logging.warning("Control panel migration already running. Skipping.")
+            return
         try:
-            admin_email = frappe.db.get_value("User", "Administrator", "email")
-            if admin_email:
-                frappe.sendmail(
-                    recipients=[admin_email],
-                    subject="CRITICAL: Control Panel Migration Failed",
-                    message=f"The migration for the control panel site {site} failed.\n\nError:\n{e.stderr}",
-                    now=True
-                )
-        except Exception as mail_e:
-            logging.error(f"Failed to send critical failure notification for control panel migration: {mail_e}")
-    finally:
-        if os.path.exists(lock_path):
-            os.remove(lock_path)
\ No newline at end of file
+            logging.info(f"Migrating control panel site: {site}")
+            subprocess.run(["bench", "--site", site, "migrate"], cwd=bench_path, check=True, capture_output=True, text=True)
+        except subprocess.CalledProcessError as e:
+            error_message = f"Control panel migration failed:\n{e.stderr}"
+            logging.error(error_message)
+            try:
+                admin_email = frappe.db.get_value("User", "Administrator", "email")
+                if admin_email:
+                    frappe.sendmail(
+                        recipients=[admin_email],
+                        subject="CRITICAL: Control Panel Migration Failed",
+                        message=f"The migration for the control panel site {site} failed.\n\nError:\n{e.stderr}",
+                        now=True
+                    )
+            except Exception as mail_e:
+                logging.error(f"Failed to send critical failure notification for control panel migration: {mail_e}")
@@ -0,0 +1,2 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
@@ -0,0 +1,105 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Saved-search alerts: one batch pass over newly ingested tenders after each sync.
+# Each saved search remembers how far it has been alerted, so no tender is skipped or sent twice.
+import frappe
+from frappe.utils import flt, get_datetime, now_datetime
+from .search import INDEX_DOCTYPE, FILTER_FIELDS, tokenize
+
+SAVED_SEARCH = "Tender Saved Search"
+MAX_TENDERS_PER_ALERT = 50
+
+
+def _matches_keywords(query_tokens, tender_tokens):
+    # Keywords match as prefixes, the same as the boolean-mode search in `search_tenders`.
+    for query_token in query_tokens:
+        if query_token in tender_tokens:
+            continue
+        if not any(token.startswith(query_token) for token in tender_tokens):
+            return False
+    return True
+
+
+def matches(saved_search, tender, tender_tokens):
+    for field in FILTER_FIELDS:
+        if saved_search.get(field) and saved_search.get(field) != tender.get(field):
+            return False
+    if saved_search.min_value and flt(tender.value_amount) < flt(saved_search.min_value):
+        return False
+    if saved_search.max_value and flt(tender.value_amount) > flt(saved_search.max_value):
+        return False
+    return _matches_keywords(saved_search.query_tokens, tender_tokens)
+
+
+def run_saved_search_alerts():
+    """
+    Matches every enabled saved search against the tenders first indexed since its last alert
+    and sends each user one email listing their new matches. Each saved search keeps its own
+    `last_alerted_on` watermark, so tenders indexed by an interrupted sync are alerted by the
+    next run instead of being missed. Returns the alert counts.
+    """
+    upto = now_datetime()
+    saved_searches = frappe.get_all(
+        SAVED_SEARCH,
+        filters={"enabled": 1},
+        fields=["name", "search_name", "user", "query", "min_value", "max_value", "last_alerted_on", "creation", *FILTER_FIELDS]
+    )
+    if not saved_searches:
+        return {"tenders": 0, "users": 0}
+
+    for saved_search in saved_searches:
+        # A new saved search only alerts on tenders indexed after it was created.
+        saved_search.since = get_datetime(saved_search.last_alerted_on or saved_search.creation)
+        saved_search.query_tokens = tokenize(saved_search.query)
+
+    tenders = frappe.get_all(
+        INDEX_DOCTYPE,
+        filters=[
+            ["first_indexed_on", ">", min(saved_search.since for saved_search in saved_searches)],
+            ["first_indexed_on", "<=", upto],
+        ],
+        fields=["tender", "title", "search_text", "tender_end_date", "value_amount", "first_indexed_on", *FILTER_FIELDS],
+        order_by="tender_end_date asc"
+    )
+
+    matches_by_user = {}
+    match_counts = {}
+    for tender in tenders:
+        tender_tokens = set(tokenize(tender.search_text))
+        first_indexed_on = get_datetime(tender.first_indexed_on)
+        for saved_search in saved_searches:
+            if first_indexed_on > saved_search.since and matches(saved_search, tender, tender_tokens):
+                user_matches = matches_by_user.setdefault(saved_search.user, {})
+                user_matches.setdefault(tender.tender, (tender, []))[1].append(saved_search.search_name)
+                match_counts[saved_search.name] = match_counts.get(saved_search.name, 0) + 1
+
+    for user, user_matches in matches_by_user.items():
+        _send_alert(user, list(user_matches.values()))
+
+    # The queued emails and the watermarks are committed together, so a failed run is retried in full.
+    frappe.db.set_value(
+        SAVED_SEARCH, {"name": ("in", [saved_search.name for saved_search in saved_searches])},
+        "last_alerted_on", upto, update_modified=False
+    )
+    timestamp = now_datetime()
+    for name, count in match_counts.items():
+        frappe.db.set_value(SAVED_SEARCH, name, {"last_matched_on": timestamp, "last_match_count": count}, update_modified=False)
+    frappe.db.commit()
+
+    return {"tenders": len(tenders), "users": len(matches_by_user)}
+
+
+def _send_alert(user, tender_matches):
+    rows = "".join(
+        f"<li><a href='{frappe.utils.get_url_to_form('Tender', tender.tender)}'>{frappe.utils.escape_html(tender.title or tender.tender)}</a>"
+        f" &mdash; closes {tender.tender_end_date or 'n/a'} ({', '.join(frappe.utils.escape_html(name) for name in search_names)})</li>"
+        for tender, search_names in tender_matches[:MAX_TENDERS_PER_ALERT]
+    )
+    more = len(tender_matches) - MAX_TENDERS_PER_ALERT
+    footer = f"<p>and {more} more.</p>" if more > 0 else ""
+
+    frappe.sendmail(
+        recipients=[user],
+        subject=f"{len(tender_matches)} new tenders match your saved searches",
+        message=f"<p>New tenders matching your saved searches:</p><ul>{rows}</ul>{footer}"
+    )
@@ -0,0 +1,77 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# HTTP client for the eTenders OCDS releases API.
+import frappe
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_PAGE_SIZE = 100  # As per API recommendation
+DEFAULT_FETCH_CONCURRENCY = 4
+REQUEST_TIMEOUT = 60
+
+
+def get_ingestion_settings():
+    return frappe._dict({
+        "api_url": frappe.conf.get("etenders_api_url"),
+        "page_size": int(frappe.conf.get("etenders_page_size") or DEFAULT_PAGE_SIZE),
+        "concurrency": max(int(frappe.conf.get("etenders_fetch_concurrency") or DEFAULT_FETCH_CONCURRENCY), 1),
+    })
+
+
+def create_session(pool_size=DEFAULT_FETCH_CONCURRENCY):
+    """
+    Returns a requests session whose connection pool is large enough for `pool_size`
+    concurrent page fetches, with retries on transient gateway errors.
+    """
+    session = requests.Session()
+    retry = Retry(total=3, backoff_factor=1, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_page(session, api_url, params, page_number):
+    """Fetches a single page of releases. Raises `requests.RequestException` on failure."""
+    response = session.get(api_url, params={**params, "PageNumber": page_number}, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    return response.json().get("releases", [])
+
+
+def iter_release_pages(session, api_url, params, concurrency=DEFAULT_FETCH_CONCURRENCY, start_page=1):
+    """
+    Yields `(page_number, releases)` in page order, keeping up to `concurrency` page
+    requests in flight. The total page count is unknown, so fetching stops at the
+    first empty or short page and any pages requested beyond it are discarded.
+    """
+    page_size = int(params.get("PageSize") or DEFAULT_PAGE_SIZE)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        in_flight = {}
+        next_page = start_page
+        current = start_page
+
+        def submit_until_full():
+            nonlocal next_page
+            while len(in_flight) < concurrency:
+                in_flight[next_page] = executor.submit(fetch_page, session, api_url, params, next_page)
+                next_page += 1
+
+        submit_until_full()
+        try:
+            while True:
+                releases = in_flight.pop(current).result()
+                if not releases:
+                    return
+
+                yield current, releases
+
+                if len(releases) < page_size:
+                    return
+                current += 1
+                submit_until_full()
+        finally:
+            for future in in_flight.values():
+                future.cancel()
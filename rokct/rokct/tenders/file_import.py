@@ -0,0 +1,184 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Streaming importer for offline OCDS release package dumps.
+#
+# The file is read in fixed-size chunks and only the `releases` array is decoded, one
+# release at a time, so memory stays bounded by the chunk size plus a single release
+# regardless of how large the dump is.
+import codecs
+import frappe
+import gzip
+import json
+import os
+import resource
+import time
+from .ingest import upsert_releases
+from .lookups import LinkResolver, format_lookup_stats
+
+DEFAULT_BATCH_SIZE = 500
+CHUNK_SIZE = 1024 * 1024
+WHITESPACE = " \t\r\n"
+
+
+class _ChunkBuffer:
+    """A text window over a binary stream that discards consumed input on every refill."""
+
+    def __init__(self, stream, chunk_size):
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.data = ""
+        self.pos = 0
+
+    def fill(self):
+        chunk = self.stream.read(self.chunk_size)
+        if not chunk:
+            return False
+        self.data = self.data[self.pos:] + self.decoder.decode(chunk)
+        self.pos = 0
+        return True
+
+    def next_char(self):
+        """Returns the next character without consuming it, or None at end of input."""
+        while self.pos >= len(self.data):
+            if not self.fill():
+                return None
+        return self.data[self.pos]
+
+    def skip(self, chars):
+        while (char := self.next_char()) is not None and char in chars:
+            self.pos += 1
+        return char
+
+
+def _seek_releases(buffer):
+    """
+    Advances `buffer` to just after the opening bracket of the releases array. The input may
+    be a release package (`{"releases": [...]}`) or a bare array of releases.
+    """
+    char = buffer.skip(WHITESPACE)
+    if char == "[":
+        buffer.pos += 1
+        return
+    if char != "{":
+        raise ValueError("Expected an OCDS release package object or an array of releases.")
+    buffer.pos += 1
+
+    depth = 1
+    in_string = escape = False
+    string_chars = []
+    last_key = None
+    while (char := buffer.next_char()) is not None:
+        buffer.pos += 1
+        if in_string:
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+                last_key = "".join(string_chars) if depth == 1 else None
+                continue
+            if depth == 1:
+                string_chars.append(char)
+            continue
+
+        if char == '"':
+            in_string = True
+            string_chars = []
+        elif char == ":" and depth == 1 and last_key == "releases":
+            if buffer.skip(WHITESPACE) != "[":
+                raise ValueError("`releases` is not an array.")
+            buffer.pos += 1
+            return
+        elif char in "{[":
+            depth += 1
+        elif char in "}]":
+            depth -= 1
+            if depth == 0:
+                break
+        if char not in WHITESPACE:
+            last_key = None
+
+    raise ValueError("No `releases` array found in the file.")
+
+
+def iter_releases(stream, chunk_size=CHUNK_SIZE):
+    """Yields releases one at a time from a binary stream of OCDS JSON."""
+    buffer = _ChunkBuffer(stream, chunk_size)
+    decoder = json.JSONDecoder()
+    _seek_releases(buffer)
+
+    while True:
+        char = buffer.skip(WHITESPACE + ",")
+        if char is None:
+            raise ValueError("Unexpected end of file inside the releases array.")
+        if char == "]":
+            return
+
+        try:
+            release, end = decoder.raw_decode(buffer.data, buffer.pos)
+        except json.JSONDecodeError:
+            # The release is cut off at the end of the buffer.
+            if not buffer.fill():
+                raise
+            continue
+
+        buffer.pos = end
+        yield release
+
+
+def _get_peak_memory_mb():
+    # ru_maxrss is reported in kilobytes on Linux.
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def import_release_file(file_path, batch_size=DEFAULT_BATCH_SIZE, chunk_size=CHUNK_SIZE):
+    """
+    Imports an OCDS release package file (optionally gzipped) into Tender through the same
+    normalize, link-resolve and bulk-upsert path as the daily sync, committing per batch.
+
+    From a shell:
+        bench --site <site> execute rokct.rokct.tenders.file_import.import_release_file --kwargs "{'file_path': '/path/to/releases.json.gz'}"
+    """
+    batch_size = int(batch_size)
+    total_bytes = os.path.getsize(file_path)
+    resolver = LinkResolver()
+    stats = frappe._dict({"releases": 0, "upserted": 0, "skipped": 0, "batches": 0})
+    started = time.monotonic()
+
+    def flush_batch(batch):
+        upserted, skipped = upsert_releases(batch, resolver)
+        frappe.db.commit()
+        stats.upserted += upserted
+        stats.skipped += skipped
+        stats.batches += 1
+
+        elapsed = time.monotonic() - started
+        progress = raw.tell() / total_bytes * 100 if total_bytes else 100
+        print(
+            f"[{progress:5.1f}%] {stats.releases} releases read, {stats.upserted} upserted "
+            f"({stats.releases / elapsed if elapsed else 0:.0f}/s, peak memory {_get_peak_memory_mb()} MB)"
+        )
+
+    with open(file_path, "rb") as raw:
+        stream = gzip.GzipFile(fileobj=raw) if file_path.endswith(".gz") else raw
+        batch = []
+        for release in iter_releases(stream, chunk_size):
+            batch.append(release)
+            stats.releases += 1
+            if len(batch) >= batch_size:
+                flush_batch(batch)
+                batch = []
+        if batch:
+            flush_batch(batch)
+
+    stats.seconds = round(time.monotonic() - started, 2)
+    stats.peak_memory_mb = _get_peak_memory_mb()
+    stats.lookups = resolver.get_stats()
+    print(
+        f"Imported {stats.upserted} tenders from {stats.releases} releases in {stats.seconds}s. "
+        f"Peak memory: {stats.peak_memory_mb} MB."
+    )
+    print(f"Link lookups: {format_lookup_stats(stats.lookups)}")
+    return stats
@@ -0,0 +1,200 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Normalizes OCDS releases into Tender rows and upserts them in bulk.
+import frappe
+import time
+from frappe.utils import get_datetime, now
+from .client import create_session, iter_release_pages
+from .lookups import MAX_NAME_LENGTH, LinkResolver
+from .search import index_tenders
+
+# Columns written by the bulk upsert, in statement order. `name` is the ocid (autoname field:ocid).
+TENDER_COLUMNS = [
+    "ocid", "title", "status", "publisher_name", "published_date", "tender_start_date",
+    "tender_end_date", "value_amount", "value_currency", "description", "tender_category",
+    "organ_of_state", "tender_type", "province", "esubmission",
+]
+# Data columns are varchar(MAX_NAME_LENGTH). The bulk upsert bypasses Frappe's length checks,
+# so longer values are clipped here instead of failing (or being truncated in) the whole page.
+DATA_COLUMNS = ("title", "status", "publisher_name", "value_currency")
+
+
+def _format_datetime_str(value):
+    """
+    Formats an OCDS date string as 'YYYY-MM-DD HH:MM:SS' for database insertion,
+    stripping any timezone info. Missing dates stay empty instead of defaulting to now.
+    """
+    if not value:
+        return None
+    return get_datetime(value).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def find_buyer_region(release):
+    """Returns the address region of the party that is the release's buyer, if any."""
+    buyer_name = (release.get("buyer") or {}).get("name")
+    if not buyer_name:
+        return None
+
+    for party in release.get("parties") or []:
+        if party.get("name") == buyer_name:
+            return (party.get("address") or {}).get("region")
+    return None
+
+
+def normalize_release(release, resolve_link):
+    """
+    Maps an OCDS release onto a Tender row dict, or returns None if it has no tender.
+    `resolve_link(doctype, value)` returns the linked document name for a raw value.
+    """
+    tender_data = release.get("tender") or {}
+    if not tender_data or not release.get("ocid"):
+        return None
+
+    tender_period = tender_data.get("tenderPeriod") or {}
+    value = tender_data.get("value") or {}
+
+    return {
+        "ocid": release.get("ocid"),
+        "title": tender_data.get("title"),
+        "status": tender_data.get("status"),
+        "publisher_name": (release.get("publisher") or {}).get("name"),
+        "published_date": _format_datetime_str(release.get("date")),
+        "tender_start_date": _format_datetime_str(tender_period.get("startDate")),
+        "tender_end_date": _format_datetime_str(tender_period.get("endDate")),
+        "value_amount": value.get("amount"),
+        "value_currency": value.get("currency"),
+        "description": tender_data.get("description"),
+        "tender_category": resolve_link("Tender Category", tender_data.get("mainProcurementCategory")),
+        "organ_of_state": resolve_link("Organ of State", (tender_data.get("procuringEntity") or {}).get("name")),
+        "tender_type": resolve_link("Tender Type", tender_data.get("procurementMethod")),
+        "province": resolve_link("Province", find_buyer_region(release)),
+        "esubmission": 1 if "electronicSubmission" in (tender_data.get("submissionMethod") or []) else 0,
+    }
+
+
+def _clip_row(row):
+    row = dict(row)
+    for column in DATA_COLUMNS:
+        if isinstance(row.get(column), str) and len(row[column]) > MAX_NAME_LENGTH:
+            row[column] = row[column][:MAX_NAME_LENGTH].rstrip()
+    return row
+
+
+def _write_tenders(rows):
+    timestamp = now()
+    user = frappe.session.user if getattr(frappe.local, "session", None) else "Administrator"
+    columns = ["name", *TENDER_COLUMNS, "creation", "modified", "owner", "modified_by", "docstatus"]
+
+    values = []
+    for row in rows:
+        values.extend([row["ocid"], *(row.get(column) for column in TENDER_COLUMNS), timestamp, timestamp, user, user, 0])
+
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(rows))
+    updates = ", ".join(f"`{column}` = VALUES(`{column}`)" for column in [*TENDER_COLUMNS[1:], "modified", "modified_by"])
+
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tabTender` ({", ".join(f"`{column}`" for column in columns)})
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE {updates}
+        """,
+        values
+    )
+    index_tenders(rows)
+
+
+def bulk_upsert_tenders(rows):
+    """
+    Inserts or updates `rows` in a single `INSERT ... ON DUPLICATE KEY UPDATE` statement
+    keyed on the ocid, and refreshes their search index rows. Per-document validation
+    and hooks are bypassed on purpose. Returns the number of distinct tenders written.
+
+    Data columns are clipped to their length. If the batch statement still fails, the rows
+    are written one by one and those that cannot be written are logged and skipped, so one
+    bad release never blocks its page.
+    """
+    # The last occurrence of an ocid within a batch wins, as it would with sequential saves.
+    rows = list({row["ocid"]: _clip_row(row) for row in rows}.values())
+
+    # The ocid is the document name, which cannot be clipped without changing the tender.
+    for row in [row for row in rows if len(row["ocid"]) > MAX_NAME_LENGTH]:
+        frappe.log_error(f"Tender ocid is longer than {MAX_NAME_LENGTH} characters: {row['ocid']}", "Tender Upsert Skipped")
+        rows.remove(row)
+    if not rows:
+        return 0
+
+    frappe.db.savepoint("tender_batch")
+    try:
+        _write_tenders(rows)
+        return len(rows)
+    except Exception:
+        frappe.db.rollback(save_point="tender_batch")
+
+    written = 0
+    for row in rows:
+        frappe.db.savepoint("tender_row")
+        try:
+            _write_tenders([row])
+            written += 1
+        except Exception as e:
+            frappe.db.rollback(save_point="tender_row")
+            frappe.log_error(f"Failed to upsert tender {row['ocid']}: {e}", "Tender Upsert Skipped")
+    return written
+
+
+def upsert_releases(releases, resolve_link):
+    """
+    Normalizes a batch of releases and upserts them. Returns (upserted, skipped).
+    Master records queued by a `LinkResolver` are created before the tenders are written.
+    """
+    rows = []
+    skipped = 0
+    for release in releases:
+        try:
+            row = normalize_release(release, resolve_link)
+        except Exception as e:
+            frappe.log_error(f"Failed to process release {release.get('ocid')}: {e}", "Tender Release Processing Failed")
+            row = None
+        if row:
+            rows.append(row)
+        else:
+            skipped += 1
+
+    if hasattr(resolve_link, "flush"):
+        resolve_link.flush()
+    upserted = bulk_upsert_tenders(rows)
+    # Rows the upsert had to skip count as skipped, so the page still completes.
+    skipped += len({row["ocid"] for row in rows}) - upserted
+    return upserted, skipped
+
+
+def ingest_releases(api_url, params, concurrency, start_page=1, on_page=None, resolve_link=None):
+    """
+    Fetches every page for `params` concurrently and upserts each page in one statement,
+    committing after every page so memory and transaction size stay flat.
+    `on_page(page_number, upserted)` is called after each page is committed.
+    Returns ingestion statistics, including link lookup hits and misses.
+    """
+    resolve_link = resolve_link or LinkResolver()
+    stats = frappe._dict({"pages": 0, "upserted": 0, "skipped": 0, "last_page": None, "seconds": 0, "lookups": None})
+    started = time.monotonic()
+
+    session = create_session(pool_size=concurrency)
+    try:
+        for page_number, releases in iter_release_pages(session, api_url, params, concurrency, start_page):
+            upserted, skipped = upsert_releases(releases, resolve_link)
+            frappe.db.commit()
+
+            stats.pages += 1
+            stats.upserted += upserted
+            stats.skipped += skipped
+            stats.last_page = page_number
+            if on_page:
+                on_page(page_number, upserted)
+    finally:
+        session.close()
+        if isinstance(resolve_link, LinkResolver):
+            stats.lookups = resolve_link.get_stats()
+        stats.seconds = round(time.monotonic() - started, 2)
+
+    return stats
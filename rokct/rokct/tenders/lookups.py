@@ -0,0 +1,102 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Per-run lookup cache for the master tables tenders link to.
+import frappe
+from frappe.utils import now
+
+# Doctype -> the field its documents are named from (all are autonamed `field:<fieldname>`).
+LINK_FIELDS = {
+    "Tender Category": "category_name",
+    "Organ of State": "organ_name",
+    "Province": "province_name",
+    "Tender Type": "tender_type_name",
+}
+# Doctypes whose unseen values are created rather than left unlinked.
+AUTO_CREATE_DOCTYPES = ("Organ of State",)
+# Length of the `name` and Data columns. Longer values are clipped before they are created,
+# otherwise INSERT IGNORE would truncate them and the tender would link to a missing name.
+MAX_NAME_LENGTH = 140
+
+
+def normalize_key(value):
+    """Collapses whitespace and case so 'Dept of  Health ' and 'DEPT OF HEALTH' match."""
+    return " ".join(str(value).split()).casefold()
+
+
+class LinkResolver:
+    """
+    Resolves raw OCDS values to linked document names from dicts preloaded once per run.
+    Unseen Organ of State values are queued and created in one statement by `flush`,
+    which must run before the rows that reference them are written.
+    """
+
+    def __init__(self):
+        self.maps = {}
+        self.pending = {}
+        self.stats = {doctype: frappe._dict({"hits": 0, "misses": 0, "created": 0}) for doctype in LINK_FIELDS}
+        for doctype, fieldname in LINK_FIELDS.items():
+            rows = frappe.get_all(doctype, fields=["name", fieldname])
+            self.maps[doctype] = {normalize_key(row[fieldname]): row.name for row in rows if row[fieldname]}
+
+    def __call__(self, doctype, value):
+        if not value or not str(value).strip():
+            return None
+
+        key = normalize_key(value)
+        name = self.maps[doctype].get(key)
+        if name:
+            self.stats[doctype].hits += 1
+            return name
+
+        self.stats[doctype].misses += 1
+        if doctype not in AUTO_CREATE_DOCTYPES:
+            return None
+
+        name = " ".join(str(value).split())[:MAX_NAME_LENGTH].rstrip()
+        clipped_key = normalize_key(name)
+        existing = self.maps[doctype].get(clipped_key)
+        self.maps[doctype][key] = self.maps[doctype][clipped_key] = existing or name
+        if existing:
+            return existing
+        self.pending.setdefault(doctype, []).append(name)
+        return name
+
+    def flush(self):
+        """Creates all queued master records. Returns the number created."""
+        created = 0
+        for doctype, names in self.pending.items():
+            if not names:
+                continue
+            fieldname = LINK_FIELDS[doctype]
+            timestamp = now()
+            user = frappe.session.user if getattr(frappe.local, "session", None) else "Administrator"
+            values = []
+            for name in names:
+                values.extend([name, name, timestamp, timestamp, user, user, 0])
+
+            placeholders = ", ".join(["(%s, %s, %s, %s, %s, %s, %s)"] * len(names))
+            frappe.db.sql(
+                f"""
+                INSERT IGNORE INTO `tab{doctype}` (name, `{fieldname}`, creation, modified, owner, modified_by, docstatus)
+                VALUES {placeholders}
+                """,
+                values
+            )
+            # Only count rows that were inserted, not names another run created meanwhile.
+            inserted = frappe.db._cursor.rowcount
+            self.stats[doctype].created += inserted
+            created += inserted
+        self.pending = {}
+        return created
+
+    def get_stats(self):
+        return {doctype: dict(stats) for doctype, stats in self.stats.items()}
+
+
+def format_lookup_stats(stats):
+    if not stats:
+        return "none"
+    return ", ".join(
+        f"{doctype}: {counts['hits']} hits / {counts['misses']} misses / {counts['created']} created"
+        for doctype, counts in stats.items()
+    )
@@ -0,0 +1,70 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Set-based purge of expired tenders.
+import frappe
+from frappe.utils import now, now_datetime, nowdate
+from .search import remove_from_index
+
+DEFAULT_PURGE_CHUNK_SIZE = 1000
+# Columns copied into `Tender Archive` when the purge runs in archive mode.
+ARCHIVE_COLUMNS = [
+    "title", "tender_end_date", "tender_category", "organ_of_state", "province",
+    "tender_type", "value_amount", "value_currency",
+]
+
+
+def purge_expired_tenders(chunk_size=None, archive=None):
+    """
+    Deletes tenders whose closing date has passed in chunks of `chunk_size`, committing
+    after each chunk so no single transaction grows with the backlog. Per-document hooks,
+    link checks and Deleted Document records are bypassed on purpose.
+
+    With `archive` (default: the `archive_expired_tenders` site config key) each chunk is
+    copied into `Tender Archive` before it is deleted. Returns the purge counts, which are
+    also recorded on Tender Sync State.
+    """
+    chunk_size = int(chunk_size or frappe.conf.get("tender_purge_chunk_size") or DEFAULT_PURGE_CHUNK_SIZE)
+    if archive is None:
+        archive = bool(frappe.conf.get("archive_expired_tenders"))
+
+    cutoff = nowdate()
+    deleted = archived = 0
+    while True:
+        names = frappe.db.sql_list(
+            "SELECT name FROM `tabTender` WHERE tender_end_date < %s ORDER BY tender_end_date LIMIT %s",
+            (cutoff, chunk_size)
+        )
+        if not names:
+            break
+
+        if archive:
+            archived += _archive_tenders(names)
+        frappe.db.delete("Tender", {"name": ("in", names)})
+        remove_from_index(names)
+        frappe.db.commit()
+        deleted += len(names)
+
+    frappe.db.set_single_value("Tender Sync State", {
+        "last_purge_on": now_datetime(),
+        "last_purge_deleted": deleted,
+        "last_purge_archived": archived,
+    })
+    frappe.db.commit()
+    return {"deleted": deleted, "archived": archived}
+
+
+def _archive_tenders(names):
+    timestamp = now()
+    user = frappe.session.user if getattr(frappe.local, "session", None) else "Administrator"
+    columns = ", ".join(f"`{column}`" for column in ARCHIVE_COLUMNS)
+
+    frappe.db.sql(
+        f"""
+        INSERT IGNORE INTO `tabTender Archive` (name, ocid, {columns}, creation, modified, owner, modified_by, docstatus)
+        SELECT name, ocid, {columns}, %(timestamp)s, %(timestamp)s, %(user)s, %(user)s, 0
+        FROM `tabTender` WHERE name IN %(names)s
+        """,
+        {"timestamp": timestamp, "user": user, "names": tuple(names)}
+    )
+    # INSERT IGNORE skips tenders that were already archived, so count the rows actually written.
+    return frappe.db._cursor.rowcount
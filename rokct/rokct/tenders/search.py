@@ -0,0 +1,171 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Faceted tender search over `Tender Search Index`.
+#
+# Every tender upsert also upserts its index row, so the index never needs a rebuild.
+# Keyword search uses the FULLTEXT index on `search_text` (created by on_doctype_update of
+# Tender Search Index); facet counts share the same filters.
+import frappe
+import json
+import re
+from frappe.utils import cint, flt, now, now_datetime, strip_html_tags
+
+INDEX_DOCTYPE = "Tender Search Index"
+FACETS = ("tender_category", "province", "tender_type")
+FILTER_FIELDS = ("tender_category", "province", "tender_type", "organ_of_state")
+INDEX_COLUMNS = [
+    "title", "search_text", "status", "tender_category", "province", "tender_type",
+    "organ_of_state", "value_amount", "tender_end_date",
+]
+SORT_ORDERS = {
+    "closing_date": "tender_end_date IS NULL, tender_end_date ASC",
+    "closing_date_desc": "tender_end_date DESC",
+    "value": "value_amount DESC",
+}
+MAX_PAGE_LENGTH = 100
+
+
+def get_search_text(row):
+    parts = [row.get("title"), strip_html_tags(row.get("description") or ""), row.get("organ_of_state")]
+    return " ".join(" ".join(str(part).split()) for part in parts if part)
+
+
+def tokenize(text):
+    return re.findall(r"\w+", (text or "").casefold())
+
+
+def index_tenders(rows):
+    """
+    Upserts the search index rows for `rows` (Tender field dicts) in one statement.
+    `first_indexed_on` is only set when a tender is indexed for the first time.
+    """
+    rows = list({row["ocid"]: row for row in rows}.values())
+    if not rows:
+        return
+
+    timestamp = now()
+    user = frappe.session.user if getattr(frappe.local, "session", None) else "Administrator"
+    columns = ["name", "tender", *INDEX_COLUMNS, "first_indexed_on", "creation", "modified", "owner", "modified_by", "docstatus"]
+
+    values = []
+    for row in rows:
+        index_row = {**row, "search_text": get_search_text(row)}
+        values.extend([
+            row["ocid"], row["ocid"], *(index_row.get(column) for column in INDEX_COLUMNS),
+            timestamp, timestamp, timestamp, user, user, 0
+        ])
+
+    placeholders = ", ".join(["(" + ", ".join(["%s"] * len(columns)) + ")"] * len(rows))
+    updates = ", ".join(f"`{column}` = VALUES(`{column}`)" for column in [*INDEX_COLUMNS, "modified", "modified_by"])
+
+    frappe.db.sql(
+        f"""
+        INSERT INTO `tab{INDEX_DOCTYPE}` ({", ".join(f"`{column}`" for column in columns)})
+        VALUES {placeholders}
+        ON DUPLICATE KEY UPDATE {updates}
+        """,
+        values
+    )
+
+
+def remove_from_index(names):
+    if names:
+        frappe.db.delete(INDEX_DOCTYPE, {"name": ("in", list(names))})
+
+
+def _to_boolean_query(query):
+    """Turns free text into a boolean-mode query where every word is a required prefix."""
+    return " ".join(f"+{token}*" for token in tokenize(query))
+
+
+def _build_conditions(query, filters, include_closed):
+    conditions = []
+    values = {}
+
+    boolean_query = _to_boolean_query(query)
+    if boolean_query:
+        conditions.append("MATCH(search_text) AGAINST (%(query)s IN BOOLEAN MODE)")
+        values["query"] = boolean_query
+
+    for field in FILTER_FIELDS:
+        if filters.get(field):
+            conditions.append(f"`{field}` = %({field})s")
+            values[field] = filters[field]
+
+    if filters.get("min_value") not in (None, ""):
+        conditions.append("value_amount >= %(min_value)s")
+        values["min_value"] = flt(filters["min_value"])
+    if filters.get("max_value") not in (None, ""):
+        conditions.append("value_amount <= %(max_value)s")
+        values["max_value"] = flt(filters["max_value"])
+    if filters.get("closing_from"):
+        conditions.append("tender_end_date >= %(closing_from)s")
+        values["closing_from"] = filters["closing_from"]
+    if filters.get("closing_to"):
+        conditions.append("tender_end_date <= %(closing_to)s")
+        values["closing_to"] = filters["closing_to"]
+    if not include_closed:
+        conditions.append("(tender_end_date IS NULL OR tender_end_date >= %(now)s)")
+        values["now"] = now_datetime()
+
+    return " AND ".join(conditions) or "1=1", values
+
+
+@frappe.whitelist()
+def search_tenders(query=None, filters=None, sort="closing_date", page=1, page_length=20, include_closed=0):
+    """
+    Searches tenders by keywords and filters, returning one page of results plus facet
+    counts per category, province and tender type for the whole result set.
+
+    `filters` accepts tender_category, province, tender_type, organ_of_state, min_value,
+    max_value, closing_from and closing_to. `sort` is one of closing_date (soonest first),
+    closing_date_desc, value or relevance.
+    """
+    if not frappe.has_permission("Tender", "read"):
+        frappe.throw("Not permitted to search tenders.", frappe.PermissionError)
+
+    if isinstance(filters, str):
+        filters = json.loads(filters)
+    filters = filters or {}
+    page = max(cint(page), 1)
+    page_length = min(max(cint(page_length), 1), MAX_PAGE_LENGTH)
+
+    where, values = _build_conditions(query, filters, cint(include_closed))
+    order_by = SORT_ORDERS.get(sort, SORT_ORDERS["closing_date"])
+    relevance = "0"
+    if sort == "relevance" and "query" in values:
+        relevance = "MATCH(search_text) AGAINST (%(query)s IN BOOLEAN MODE)"
+        order_by = "relevance DESC"
+
+    total = frappe.db.sql(f"SELECT COUNT(*) FROM `tab{INDEX_DOCTYPE}` WHERE {where}", values)[0][0]
+    results = frappe.db.sql(
+        f"""
+        SELECT tender AS name, title, status, tender_category, province, tender_type, organ_of_state,
+            value_amount, tender_end_date, {relevance} AS relevance
+        FROM `tab{INDEX_DOCTYPE}`
+        WHERE {where}
+        ORDER BY {order_by}
+        LIMIT %(limit)s OFFSET %(offset)s
+        """,
+        {**values, "limit": page_length, "offset": (page - 1) * page_length},
+        as_dict=True
+    )
+    for result in results:
+        result.pop("relevance", None)
+
+    facets = {}
+    for facet in FACETS:
+        rows = frappe.db.sql(
+            f"""
+            SELECT `{facet}` AS value, COUNT(*) AS count
+            FROM `tab{INDEX_DOCTYPE}`
+            WHERE {where} AND `{facet}` IS NOT NULL
+            GROUP BY `{facet}`
+            ORDER BY count DESC
+            """,
+            values,
+            as_dict=True
+        )
+        facets[facet] = {row.value: row.count for row in rows}
+
+    return {"total": total, "page": page, "page_length": page_length, "results": results, "facets": facets}
@@ -0,0 +1,188 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# Checkpointed daily tender sync and windowed historical backfill.
+#
+# Every page is upserted by ocid, so re-running a window or a page is harmless. Checkpoints
+# therefore only need to be "at least once": the last committed page is recorded after
+# each page commit, and an interrupted run resumes from the page after it.
+import frappe
+from frappe.utils import add_days, getdate, now_datetime, nowdate
+from .client import get_ingestion_settings
+from .alerts import run_saved_search_alerts
+from .ingest import ingest_releases
+
+SYNC_STATE = "Tender Sync State"
+BACKFILL_WINDOW = "Tender Backfill Window"
+DEFAULT_BACKFILL_WINDOW_DAYS = 7
+
+
+def _get_params(date_from, date_to, page_size):
+    return {
+        "dateFrom": getdate(date_from).strftime('%Y-%m-%d'),
+        "dateTo": getdate(date_to).strftime('%Y-%m-%d'),
+        "PageSize": page_size
+    }
+
+
+def sync_tenders():
+    """
+    Syncs tenders from the last successful `dateTo` up to today. If the previous run was
+    interrupted, its window is resumed from the page after the last committed one first.
+    Newly ingested tenders are then matched against saved searches.
+    Returns the ingestion stats, or None if the API is not configured.
+    """
+    settings = get_ingestion_settings()
+    if not settings.api_url:
+        frappe.log_error("`etenders_api_url` not set in site_config.json. Skipping tender fetch.", "Tender API Fetch Failed")
+        return None
+
+    state = frappe.get_single(SYNC_STATE)
+    if state.window_from and state.window_to:
+        date_from, date_to = state.window_from, state.window_to
+        start_page = (state.last_page or 0) + 1
+        print(f"Resuming interrupted tender sync for {date_from} to {date_to} from page {start_page}.")
+    else:
+        date_from = state.last_synced_to or add_days(nowdate(), -1)
+        date_to = nowdate()
+        start_page = 1
+
+    state.update({
+        "window_from": date_from,
+        "window_to": date_to,
+        "last_page": start_page - 1,
+        "last_run_status": "Running",
+        "last_run_on": now_datetime(),
+    })
+    state.save(ignore_permissions=True)
+    frappe.db.commit()
+
+    def checkpoint(page_number, upserted):
+        frappe.db.set_single_value(SYNC_STATE, "last_page", page_number)
+        frappe.db.commit()
+
+    try:
+        stats = ingest_releases(
+            settings.api_url, _get_params(date_from, date_to, settings.page_size), settings.concurrency,
+            start_page=start_page, on_page=checkpoint
+        )
+    except Exception:
+        frappe.db.rollback()
+        frappe.db.set_single_value(SYNC_STATE, {"last_run_status": "Failed", "last_error": frappe.get_traceback()})
+        frappe.db.commit()
+        raise
+
+    frappe.db.set_single_value(SYNC_STATE, {
+        "last_synced_to": date_to,
+        "window_from": None,
+        "window_to": None,
+        "last_page": 0,
+        "last_run_status": "Success",
+        "last_run_upserted": stats.upserted,
+        "last_error": None,
+    })
+    frappe.db.commit()
+
+    try:
+        stats.alerts = run_saved_search_alerts()
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Tender Saved Search Alerts Failed")
+    return stats
+
+
+def split_date_range(from_date, to_date, window_days=DEFAULT_BACKFILL_WINDOW_DAYS):
+    """Splits an inclusive date range into consecutive (start, end) windows of `window_days`."""
+    start, end = getdate(from_date), getdate(to_date)
+    if start > end:
+        frappe.throw("The backfill start date must be on or before the end date.")
+
+    windows = []
+    while start <= end:
+        window_end = min(getdate(add_days(start, int(window_days) - 1)), end)
+        windows.append((start, window_end))
+        start = getdate(add_days(window_end, 1))
+    return windows
+
+
+@frappe.whitelist()
+def start_tender_backfill(from_date, to_date, window_days=DEFAULT_BACKFILL_WINDOW_DAYS):
+    """
+    Backfills tenders between two dates. The range is split into windows, each run by its
+    own background job on the long queue. Completed windows are skipped, so calling this
+    again after a crash only re-runs the windows that did not finish.
+
+    From a shell:
+        bench --site <site> execute rokct.rokct.tenders.sync.start_tender_backfill --kwargs "{'from_date': '2024-01-01', 'to_date': '2024-12-31'}"
+    """
+    frappe.only_for("System Manager")
+
+    queued = []
+    skipped = 0
+    for window_start, window_end in split_date_range(from_date, to_date, window_days):
+        existing = frappe.db.get_value(
+            BACKFILL_WINDOW, {"window_start": window_start, "window_end": window_end}, ["name", "status"], as_dict=True
+        )
+        if existing and existing.status == "Completed":
+            skipped += 1
+            continue
+
+        if existing:
+            window_name = existing.name
+        else:
+            window_name = frappe.get_doc({
+                "doctype": BACKFILL_WINDOW,
+                "window_start": window_start,
+                "window_end": window_end,
+                "status": "Pending"
+            }).insert(ignore_permissions=True).name
+
+        frappe.enqueue(
+            "rokct.rokct.tenders.sync.run_backfill_window",
+            queue="long",
+            timeout=3600,
+            job_id=f"tender-backfill-{window_name}",
+            deduplicate=True,
+            window_name=window_name
+        )
+        queued.append(window_name)
+
+    frappe.db.commit()
+    return {"status": "success", "queued": queued, "already_completed": skipped}
+
+
+def run_backfill_window(window_name):
+    """Ingests one backfill window, resuming from its last committed page."""
+    settings = get_ingestion_settings()
+    if not settings.api_url:
+        frappe.log_error("`etenders_api_url` not set in site_config.json. Skipping tender backfill.", "Tender API Fetch Failed")
+        return
+
+    window = frappe.get_doc(BACKFILL_WINDOW, window_name)
+    if window.status == "Completed":
+        return
+
+    start_page = (window.last_page or 0) + 1
+    window.db_set({"status": "Running", "started_on": now_datetime(), "error": None})
+    frappe.db.commit()
+
+    upserted = window.upserted or 0
+
+    def checkpoint(page_number, page_upserted):
+        nonlocal upserted
+        upserted += page_upserted
+        frappe.db.set_value(BACKFILL_WINDOW, window_name, {"last_page": page_number, "upserted": upserted}, update_modified=False)
+        frappe.db.commit()
+
+    try:
+        ingest_releases(
+            settings.api_url, _get_params(window.window_start, window.window_end, settings.page_size), settings.concurrency,
+            start_page=start_page, on_page=checkpoint
+        )
+    except Exception:
+        frappe.db.rollback()
+        frappe.db.set_value(BACKFILL_WINDOW, window_name, {"status": "Failed", "error": frappe.get_traceback()})
+        frappe.db.commit()
+        frappe.log_error(frappe.get_traceback(), f"Tender Backfill Failed for {window_name}")
+        return
+
+    frappe.db.set_value(BACKFILL_WINDOW, window_name, {"status": "Completed", "finished_on": now_datetime()})
+    frappe.db.commit()
@@ -0,0 +1,102 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# A local stand-in for the eTenders `/api/OCDSReleases` endpoint, used by ingestion tests.
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def make_release(index, date="2025-01-15T09:00:00Z"):
+    """Builds a release with the shape of an OCDS `Release` from etenders_swagger.json."""
+    return {
+        "ocid": f"ocds-9t57fa-{index:06d}",
+        "id": str(index),
+        "date": date,
+        "tag": ["tender"],
+        "initiationType": "tender",
+        "buyer": {"id": "buyer-1", "name": "Department of Public Works"},
+        "parties": [
+            {"id": "buyer-1", "name": "Department of Public Works", "roles": ["buyer"], "address": {"region": "Gauteng"}}
+        ],
+        "publisher": {"name": "National Treasury"},
+        "tender": {
+            "id": str(index),
+            "title": f"Tender {index}",
+            "description": f"Supply and delivery for tender {index}",
+            "status": "active",
+            "mainProcurementCategory": "goods",
+            "procurementMethod": "open",
+            "procuringEntity": {"id": "buyer-1", "name": "Department of Public Works"},
+            "submissionMethod": ["electronicSubmission"],
+            "value": {"amount": 1000 + index, "currency": "ZAR"},
+            "tenderPeriod": {"startDate": "2025-01-15T09:00:00Z", "endDate": "2099-02-15T11:00:00Z"},
+        },
+    }
+
+
+class ETendersStubServer:
+    """
+    Serves `releases` as paged OCDS release packages on a local port. `latency` adds a
+    fixed delay per request, and `max_in_flight` records how many requests were served at once.
+    """
+
+    def __init__(self, releases, latency=0):
+        self.releases = releases
+        self.latency = latency
+        self.requests = 0
+        self.pages_requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                page_number = int(query.get("PageNumber", ["1"])[0])
+                page_size = int(query.get("PageSize", ["50"])[0])
+                with stub.lock:
+                    stub.requests += 1
+                    stub.pages_requested.append(page_number)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+                start = (page_number - 1) * page_size
+                body = json.dumps({
+                    "uri": self.path,
+                    "publishedDate": "2025-01-15T09:00:00Z",
+                    "publisher": {"name": "National Treasury"},
+                    "releases": stub.releases[start:start + page_size],
+                }).encode()
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/api/OCDSReleases"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
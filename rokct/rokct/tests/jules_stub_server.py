@@ -0,0 +1,77 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# A local stand-in for the Jules `sessions/<id>/activities` endpoint, used by the roadmap tests.
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+def make_finished_activities(ideas):
+    """Activities of a session whose last agent message is the ideas JSON."""
+    return [
+        {"userActivity": {"message": "Generate ideas"}},
+        {"agentActivity": {"message": json.dumps({"ideas": ideas})}},
+    ]
+
+
+class JulesStubServer:
+    """
+    Serves `sessions`, a dict of session id to activities list or HTTP status code. Unknown
+    sessions have no activities yet. `latency` adds a fixed delay per request, and
+    `max_in_flight` records how many requests were served at once.
+    """
+
+    def __init__(self, sessions=None, latency=0):
+        self.sessions = sessions or {}
+        self.latency = latency
+        self.requested = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                session_id = path[len("/v1alpha/sessions/"):-len("/activities")]
+                with stub.lock:
+                    stub.requested.append(session_id)
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    result = stub.sessions.get(session_id, [])
+                    status = result if isinstance(result, int) else 200
+                    body = json.dumps({"activities": result} if status == 200 else {"error": {"code": status}}).encode()
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1alpha/sessions"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
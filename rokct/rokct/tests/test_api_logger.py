@@ -0,0 +1,90 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import patch
+from rokct.swagger.api_logger import flush_api_error_buffer, get_fingerprint, log_api_error
+
+TRACEBACK = """Traceback (most recent call last):
+  File "/apps/rokct/rokct/api/orders.py", line {line}, in create_order
+    order.insert()
+frappe.exceptions.ValidationError: Order {order} is not valid
+"""
+
+class TestAPILogger(FrappeTestCase):
+    def setUp(self):
+        # Buffer into keys of our own, so errors buffered by the site are left alone.
+        prefix = f"test_api_error_log_{frappe.generate_hash(length=6)}"
+        self.keys = {name: f"{prefix}_{name.lower()}" for name in ("COUNTS_KEY", "SAMPLES_KEY", "LAST_SEEN_KEY")}
+        self.key_patch = patch.multiple("rokct.swagger.api_logger", **self.keys)
+        self.key_patch.start()
+        self.fingerprints = set()
+        frappe.local.form_dict = frappe._dict(cmd="rokct.api.orders.create_order")
+
+    def tearDown(self):
+        # Flushing commits, so clean up explicitly.
+        self.key_patch.stop()
+        frappe.db.rollback()
+        frappe.cache().delete(*(frappe.cache().make_key(key) for key in self.keys.values()))
+        if self.fingerprints:
+            frappe.db.delete("API Error Log", {"fingerprint": ("in", list(self.fingerprints))})
+        frappe.db.commit()
+
+    def test_fingerprint_ignores_line_numbers_and_messages(self):
+        endpoint = "rokct.api.orders.create_order"
+
+        first = get_fingerprint(endpoint, TRACEBACK.format(line=10, order="ORD-1"))
+        repeat = get_fingerprint(endpoint, TRACEBACK.format(line=12, order="ORD-2"))
+        other_endpoint = get_fingerprint("rokct.api.orders.update_order", TRACEBACK.format(line=10, order="ORD-1"))
+
+        self.assertEqual(first, repeat)
+        self.assertNotEqual(first, other_endpoint)
+
+    def test_repeats_are_counted_on_one_row(self):
+        fingerprints = self.fingerprints
+        for i in range(3):
+            try:
+                raise frappe.ValidationError(f"Order ORD-{i} is not valid")
+            except frappe.ValidationError:
+                fingerprints.add(log_api_error())
+
+        self.assertEqual(len(fingerprints), 1)
+        self.assertFalse(frappe.db.exists("API Error Log", {"fingerprint": fingerprints.copy().pop()}))
+
+        self.assertEqual(flush_api_error_buffer(), 3)
+        rows = frappe.get_all("API Error Log", filters={"fingerprint": next(iter(fingerprints))}, fields=["occurrences", "title", "user"])
+
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0].occurrences, 3)
+        self.assertEqual(rows[0].title, "Create Order API Error")
+        self.assertEqual(rows[0].user, frappe.session.user)
+
+    def test_failed_write_keeps_the_buffer(self):
+        try:
+            raise frappe.ValidationError("Order ORD-1 is not valid")
+        except frappe.ValidationError:
+            self.fingerprints.add(log_api_error())
+
+        with patch("rokct.swagger.api_logger.frappe.get_doc", side_effect=frappe.ValidationError("insert failed")):
+            with self.assertRaises(frappe.ValidationError):
+                flush_api_error_buffer()
+
+        self.assertEqual(flush_api_error_buffer(), 1)
+        self.assertEqual(flush_api_error_buffer(), 0)
+
+    def test_sample_is_retried_when_it_failed_to_build(self):
+        with patch("rokct.swagger.api_logger._build_sample", side_effect=Exception("bad request")), \
+                patch("rokct.swagger.api_logger.frappe.log_error"):
+            try:
+                raise frappe.ValidationError("Order ORD-1 is not valid")
+            except frappe.ValidationError:
+                log_api_error()
+
+        with patch.dict(frappe.local.conf, {"api_error_log_sample_rate": 0}):
+            try:
+                raise frappe.ValidationError("Order ORD-2 is not valid")
+            except frappe.ValidationError:
+                self.fingerprints.add(log_api_error())
+
+        self.assertEqual(flush_api_error_buffer(), 2)
+        self.assertEqual(frappe.db.get_value("API Error Log", {"fingerprint": next(iter(self.fingerprints))}, "title"), "Create Order API Error")
@@ -0,0 +1,38 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import patch
+from werkzeug.test import EnvironBuilder
+from werkzeug.wrappers import Request, Response
+from rokct.rokct.endpoint_metrics import after_request, before_request, get_endpoint_metrics
+
+class TestEndpointMetrics(FrappeTestCase):
+    def setUp(self):
+        self.method = f"rokct.paas.api.test_metrics_{frappe.generate_hash(length=8)}"
+        frappe.local.request = Request(EnvironBuilder(path=f"/api/method/{self.method}").get_environ())
+
+    def tearDown(self):
+        frappe.local.request = None
+        frappe.local.endpoint_metrics = None
+
+    @patch("rokct.rokct.endpoint_metrics.get_sample_rate", return_value=1)
+    def test_sampled_request_records_queries_and_size(self, mock_sample_rate):
+        before_request()
+        frappe.db.sql("SELECT 1")
+        frappe.db.sql("SELECT 2")
+        after_request(response=Response("x" * 100), request=frappe.local.request)
+
+        self.assertNotIn("sql", frappe.local.db.__dict__)
+        rows = [row for row in get_endpoint_metrics(minutes=15, limit=1000)["chattiest"] if row["method"] == self.method]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["samples"], 1)
+        self.assertEqual(rows[0]["avg_queries"], 2)
+        self.assertEqual(rows[0]["avg_bytes"], 100)
+
+    @patch("rokct.rokct.endpoint_metrics.get_sample_rate", return_value=0)
+    def test_unsampled_request_is_not_instrumented(self, mock_sample_rate):
+        before_request()
+
+        self.assertIsNone(getattr(frappe.local, "endpoint_metrics", None))
+        self.assertNotIn("sql", frappe.local.db.__dict__)
@@ -0,0 +1,64 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import sys
+import os
+import subprocess
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import patch
+from rokct.rokct.flutter_builder.build_log import close_build_log, get_build_log, get_log_path, open_build_log
+from rokct.rokct.flutter_builder.tasks import log_message, run_build_command
+
+class TestFlutterBuildLog(FrappeTestCase):
+    def setUp(self):
+        self.app_config = frappe.get_doc({
+            "doctype": "Flutter App Configuration",
+            "source_project": "customer",
+            "build_target": "Android APK",
+        }).insert(ignore_permissions=True)
+
+    def tearDown(self):
+        # Closing a log commits its tail to the configuration, so clean up explicitly.
+        close_build_log(self.app_config.name)
+        frappe.db.rollback()
+        frappe.delete_doc("Flutter App Configuration", self.app_config.name, ignore_permissions=True, force=True)
+        frappe.db.commit()
+        if os.path.exists(get_log_path(self.app_config.name)):
+            os.remove(get_log_path(self.app_config.name))
+
+    @patch("rokct.rokct.flutter_builder.build_log.frappe.publish_realtime")
+    def test_command_output_is_streamed_to_the_log(self, mock_publish):
+        open_build_log(self.app_config.name)
+        log_message("Starting build", self.app_config.name)
+        run_build_command(
+            [sys.executable, "-c", "import sys; print('compiling'); print('warning', file=sys.stderr)"],
+            os.getcwd(), os.environ.copy(), self.app_config.name
+        )
+        close_build_log(self.app_config.name)
+
+        log = get_build_log(self.app_config.name)
+        self.assertEqual(log["text"], "Starting build\ncompiling\nwarning\n")
+        self.assertEqual(log["offset"], log["size"])
+
+        published = [line for call in mock_publish.call_args_list for line in call.kwargs["message"]["lines"]]
+        self.assertEqual(published, ["Starting build", "compiling", "warning"])
+        self.assertEqual(
+            frappe.db.get_value("Flutter App Configuration", self.app_config.name, "build_log"),
+            "Starting build\ncompiling\nwarning"
+        )
+
+    @patch("rokct.rokct.flutter_builder.build_log.frappe.publish_realtime")
+    def test_failed_command_raises_and_new_build_restarts_the_log(self, mock_publish):
+        open_build_log(self.app_config.name)
+        log_message("First build output", self.app_config.name)
+        with self.assertRaises(subprocess.CalledProcessError):
+            run_build_command([sys.executable, "-c", "raise SystemExit(3)"], os.getcwd(), os.environ.copy(), self.app_config.name)
+        offset = get_build_log(self.app_config.name)["offset"]
+
+        open_build_log(self.app_config.name)
+        log_message("Second", self.app_config.name)
+        close_build_log(self.app_config.name)
+
+        log = get_build_log(self.app_config.name, offset=offset)
+        self.assertTrue(log["restarted"])
+        self.assertEqual(log["text"], "Second\n")
@@ -0,0 +1,118 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import hashlib
+import os
+import tempfile
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, get_datetime, now_datetime
+from unittest.mock import patch
+from rokct.rokct.flutter_builder.artifact_store import store_artifact
+from rokct.rokct.flutter_builder.scheduler import dispatch_builds, get_average_duration, request_build
+
+@patch("rokct.rokct.flutter_builder.scheduler.frappe.enqueue")
+class TestFlutterBuildScheduler(FrappeTestCase):
+    def setUp(self):
+        self.configs = [
+            frappe.get_doc({
+                "doctype": "Flutter App Configuration",
+                "source_project": "customer",
+                "build_target": "Android APK",
+                "package_name": f"com.example.scheduler{i}",
+            }).insert(ignore_permissions=True)
+            for i in range(3)
+        ]
+
+        # The scheduler reads every build on the site; only let it see this test's builds.
+        get_all = frappe.get_all
+        def get_test_builds(doctype, *args, **kwargs):
+            if doctype == "Flutter Build":
+                kwargs["filters"] = {**(kwargs.get("filters") or {}), "app_config": ("in", self._config_names())}
+            return get_all(doctype, *args, **kwargs)
+        patcher = patch("rokct.rokct.flutter_builder.scheduler.frappe.get_all", side_effect=get_test_builds)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        # The scheduler commits, so clean up explicitly, leaving builds of other configurations alone.
+        frappe.db.rollback()
+        frappe.db.delete("Flutter Build", {"app_config": ("in", self._config_names())})
+        for config in self.configs:
+            frappe.delete_doc("Flutter App Configuration", config.name, ignore_permissions=True, force=True)
+        frappe.db.commit()
+
+    def _config_names(self):
+        return [config.name for config in self.configs]
+
+    def _finish(self, build_name, duration=600):
+        frappe.db.set_value("Flutter Build", build_name, {
+            "status": "Success",
+            "finished_on": now_datetime(),
+            "duration": duration,
+        })
+
+    def test_same_configuration_is_deduplicated(self, mock_enqueue):
+        first = request_build(self.configs[0].name)
+        second = request_build(self.configs[0].name)
+
+        self.assertEqual(first.name, second.name)
+        self.assertTrue(second.deduplicated)
+        mock_enqueue.assert_called_once()
+
+    def test_identical_configurations_get_their_own_builds(self, mock_enqueue):
+        copy = frappe.copy_doc(self.configs[0]).insert(ignore_permissions=True)
+        self.configs.append(copy)
+
+        first = request_build(self.configs[0].name)
+        second = request_build(copy.name)
+
+        self.assertNotEqual(first.name, second.name)
+        self.assertFalse(second.deduplicated)
+        self.assertEqual(frappe.db.get_value("Flutter Build", second.name, "app_config"), copy.name)
+
+    def test_concurrency_cap_and_priority_order(self, mock_enqueue):
+        running = request_build(self.configs[0].name)
+        low = request_build(self.configs[1].name, priority=0)
+        high = request_build(self.configs[2].name, priority=5)
+
+        self.assertEqual(running.status, "Running")
+        self.assertEqual(low.status, "Queued")
+        self.assertEqual(mock_enqueue.call_count, 1)
+
+        self._finish(running.name)
+        self.assertEqual(dispatch_builds(), [high.name])
+        self.assertEqual(frappe.db.get_value("Flutter Build", low.name, "status"), "Queued")
+
+    def test_eta_follows_past_durations(self, mock_enqueue):
+        for _ in range(3):
+            past = request_build(self.configs[0].name)
+            self._finish(past.name, duration=300)
+            frappe.db.set_value("Flutter App Configuration", self.configs[0].name, "app_description", frappe.generate_hash())
+        self.assertEqual(get_average_duration("Android APK", "customer"), 300)
+
+        running = request_build(self.configs[1].name)
+        queued = request_build(self.configs[2].name)
+
+        estimated_start = get_datetime(frappe.db.get_value("Flutter Build", queued.name, "estimated_start"))
+        running_finish = get_datetime(frappe.db.get_value("Flutter Build", running.name, "estimated_finish"))
+        self.assertEqual(estimated_start, running_finish)
+        self.assertLessEqual(running_finish, add_to_date(now_datetime(), seconds=301))
+
+
+class TestArtifactStore(FrappeTestCase):
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def test_artifact_is_copied_with_hash_and_size(self):
+        content = os.urandom(3 * 1024 * 1024 + 17)
+        with tempfile.NamedTemporaryFile(suffix=".apk", delete=False) as f:
+            f.write(content)
+
+        file_doc = store_artifact(f.name, f"test-artifact-{frappe.generate_hash(length=8)}.apk", None, None)
+        os.remove(f.name)
+
+        self.assertEqual(file_doc.file_size, len(content))
+        self.assertEqual(file_doc.content_hash, hashlib.md5(content).hexdigest())
+        with open(frappe.utils.get_files_path(file_doc.file_name), "rb") as stored:
+            self.assertEqual(stored.read(), content)
+        os.remove(frappe.utils.get_files_path(file_doc.file_name))
@@ -0,0 +1,86 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import json
+import os
+import shutil
+import tempfile
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import patch
+from rokct.rokct.flutter_builder.workspace import BuildWorkspace, evict_workspaces, hash_bytes
+
+class TestFlutterWorkspace(FrappeTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="flutter_workspace_test_")
+        self.source = os.path.join(self.root, "source")
+        os.makedirs(os.path.join(self.source, "lib"))
+        os.makedirs(os.path.join(self.source, "android/res"))
+        self._write(self.source, "pubspec.yaml", "version: 1.0.0+1\n")
+        self._write(self.source, "lib/main.dart", "void main() {}\n")
+        self._write(self.source, "android/res/icon.png", "source icon")
+
+        conf = frappe._dict({"flutter_workspace_root": os.path.join(self.root, "workspaces")})
+        self.conf_patch = patch.dict(frappe.local.conf, conf)
+        self.conf_patch.start()
+
+    def tearDown(self):
+        self.conf_patch.stop()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+    def _write(self, root, rel, content):
+        with open(os.path.join(root, rel), "w") as f:
+            f.write(content)
+
+    def _read(self, root, rel):
+        with open(os.path.join(root, rel)) as f:
+            return f.read()
+
+    def _build(self, icon=None):
+        """Runs the workspace lifecycle of one build, with an optional icon generator step."""
+        with BuildWorkspace(self.source, "customer-1.0.0-com.example") as workspace:
+            sync_stats = workspace.sync()
+            self._write(workspace.path, "pubspec.yaml", "version: 1.0.0+2\n")
+            ran = False
+            if icon:
+                input_hash = hash_bytes(icon)
+                if not workspace.is_step_current("icons", input_hash):
+                    workspace.run_step("icons", input_hash, lambda: self._write(workspace.path, "android/res/icon.png", icon))
+                    ran = True
+            workspace.finalize()
+            return workspace.path, sync_stats, ran
+
+    def test_rebuild_only_touches_changed_files_and_skips_current_steps(self):
+        path, sync_stats, ran = self._build(icon="blue icon")
+        self.assertEqual(sync_stats.copied, 3)
+        self.assertTrue(ran)
+        pubspec_mtime = os.stat(os.path.join(path, "pubspec.yaml")).st_mtime_ns
+
+        path, sync_stats, ran = self._build(icon="blue icon")
+        self.assertFalse(ran)
+        self.assertEqual(sync_stats.unchanged, 1)
+        self.assertEqual(self._read(path, "android/res/icon.png"), "blue icon")
+        # Rewritten with the same content, so the build sees the previous mtime.
+        self.assertEqual(os.stat(os.path.join(path, "pubspec.yaml")).st_mtime_ns, pubspec_mtime)
+
+        path, sync_stats, ran = self._build(icon="red icon")
+        self.assertTrue(ran)
+        self.assertEqual(self._read(path, "android/res/icon.png"), "red icon")
+
+    def test_unused_step_outputs_are_restored_from_source(self):
+        self._build(icon="blue icon")
+        path, sync_stats, ran = self._build()
+
+        self.assertEqual(self._read(path, "android/res/icon.png"), "source icon")
+
+    def test_eviction_removes_least_recently_used_workspaces(self):
+        workspaces = os.path.join(self.root, "workspaces")
+        for key, last_used in (("old", 1), ("recent", 2), ("current", 3)):
+            os.makedirs(os.path.join(workspaces, key))
+            with open(os.path.join(workspaces, key, ".rokct_workspace.json"), "w") as f:
+                json.dump({"last_used": last_used, "size": 1024 ** 3}, f)
+
+        with patch.dict(frappe.local.conf, {"flutter_workspace_quota_gb": 2}):
+            evicted = evict_workspaces(keep="current")
+
+        self.assertEqual(evicted, ["old"])
+        self.assertEqual(sorted(os.listdir(workspaces)), ["current", "recent"])
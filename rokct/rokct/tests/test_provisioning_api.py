@@ -145,4 +145,84 @@ class TestProvisioningAPI(FrappeTestCase):
         self.assertEqual(response["status"], "failed")
         self.assertIn("alert", response)
         self.assertEqual(response["alert"]["title"], "Site Name Conflict")
-        self.assertIn("The generated site name 'ci.test.saas.com' is already in use by 'Conflict Inc.'.", response["alert"]["message"])
\ No newline at end of file
+        self.assertIn("The generated site name 'ci.test.saas.com' is already in use by 'Conflict Inc.'.", response["alert"]["message"])
+    @patch("rokct.rokct.control_panel.provisioning_state.frappe.db.commit")
+    @patch("rokct.rokct.control_panel.provisioning_state.frappe.enqueue")
+    def test_provision_new_tenant_resumes_failed_setup(self, mock_enqueue, mock_commit):
+        # Arrange: A previous signup for the same company failed during setup
+        customer = frappe.get_doc({
+            "doctype": "Customer",
+            "customer_name": "Retry Ltd",
+            "customer_group": "All Customer Groups",
+            "default_currency": "USD",
+            "customer_primary_email": "owner@retry.com"
+        }).insert(ignore_permissions=True)
+
+        subscription = frappe.get_doc({
+            "doctype": "Company Subscription",
+            "customer": customer.name,
+            "plan": "Test Plan",
+            "status": "Setup Failed",
+            "site_name": "retry.test.saas.com"
+        }).insert(ignore_permissions=True)
+
+        test_data = {
+            "plan": "Test Plan",
+            "email": "owner@retry.com",
+            "password": "password123",
+            "first_name": "Retry",
+            "last_name": "Owner",
+            "company_name": "Retry Ltd",
+            "currency": "USD",
+            "country": "USA",
+            "industry": "Retail"
+        }
+
+        # Act
+        response = provision_new_tenant(**test_data)
+
+        # Assert
+        self.assertEqual(response["status"], "success")
+        self.assertEqual(response["site_name"], "retry.test.saas.com")
+        self.assertEqual(mock_enqueue.call_args.kwargs["subscription_id"], subscription.name)
+        self.assertEqual(mock_enqueue.call_args.kwargs["user_details"]["email"], "owner@retry.com")
+        self.assertEqual(frappe.db.get_value("Company Subscription", subscription.name, "status"), "Provisioning")
+
+    @patch("rokct.rokct.control_panel.provisioning_state.frappe.enqueue")
+    def test_provision_new_tenant_does_not_resume_for_another_email(self, mock_enqueue):
+        # Arrange: A failed signup exists for the company, but someone else signs up with its name
+        customer = frappe.get_doc({
+            "doctype": "Customer",
+            "customer_name": "Victim Ltd",
+            "customer_group": "All Customer Groups",
+            "default_currency": "USD",
+            "customer_primary_email": "owner@victim.com"
+        }).insert(ignore_permissions=True)
+
+        frappe.get_doc({
+            "doctype": "Company Subscription",
+            "customer": customer.name,
+            "plan": "Test Plan",
+            "status": "Setup Failed",
+            "site_name": "victim.test.saas.com"
+        }).insert(ignore_permissions=True)
+
+        test_data = {
+            "plan": "Test Plan",
+            "email": "attacker@example.com",
+            "password": "password123",
+            "first_name": "Not",
+            "last_name": "Owner",
+            "company_name": "Victim Ltd",
+            "currency": "USD",
+            "country": "USA",
+            "industry": "Retail"
+        }
+
+        # Act
+        response = provision_new_tenant(**test_data)
+
+        # Assert
+        self.assertEqual(response["status"], "failed")
+        self.assertEqual(response["alert"]["title"], "Existing Subscription Found")
+        mock_enqueue.assert_not_called()
@@ -0,0 +1,86 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import MagicMock, patch
+from rokct.rokct.control_panel.provisioning_state import ProvisioningState, _get_step_percentiles
+from rokct.rokct.control_panel.tasks import _create_and_install_site
+
+class TestProvisioningState(FrappeTestCase):
+    def setUp(self):
+        if not frappe.db.exists("Subscription Plan", "State Plan"):
+            frappe.get_doc({"doctype": "Subscription Plan", "plan_name": "State Plan", "cost": 0}).insert(ignore_permissions=True)
+        if not frappe.db.exists("Customer", "State Customer"):
+            frappe.get_doc({"doctype": "Customer", "customer_name": "State Customer"}).insert(ignore_permissions=True)
+
+        self.subscription = frappe.get_doc({
+            "doctype": "Company Subscription",
+            "customer": "State Customer",
+            "plan": "State Plan",
+            "status": "Provisioning",
+            "site_name": "state.test.saas.com"
+        }).insert(ignore_permissions=True)
+
+    def tearDown(self):
+        # ProvisioningState commits after every step, so a rollback alone would leave the subscription behind.
+        frappe.db.rollback()
+        frappe.db.delete("Provisioning Step", {"parent": self.subscription.name, "parenttype": "Company Subscription"})
+        frappe.db.delete("Company Subscription", {"name": self.subscription.name})
+        frappe.db.commit()
+
+    def test_failed_step_is_recorded_and_resumed(self):
+        # Arrange
+        logs = []
+        state = ProvisioningState(self.subscription, logs)
+        new_site = MagicMock()
+        install_app = MagicMock(side_effect=[Exception("install failed"), None])
+
+        # Act: first run fails on the install step
+        state.run("new_site", new_site)
+        with self.assertRaises(Exception):
+            state.run("install_app:erpnext", install_app)
+
+        # Act: the retry resumes after the completed step
+        retry_state = ProvisioningState(frappe.get_doc("Company Subscription", self.subscription.name), logs)
+        retry_state.run("new_site", new_site)
+        retry_state.run("install_app:erpnext", install_app)
+
+        # Assert
+        new_site.assert_called_once()
+        self.assertEqual(install_app.call_count, 2)
+        rows = {row.step: row for row in frappe.get_doc("Company Subscription", self.subscription.name).provisioning_steps}
+        self.assertEqual(rows["new_site"].status, "Completed")
+        self.assertEqual(rows["install_app:erpnext"].status, "Completed")
+        self.assertEqual(rows["install_app:erpnext"].attempts, 2)
+
+    def test_skipped_steps_count_as_done(self):
+        state = ProvisioningState(self.subscription)
+        state.skip("set_config", "Assigned pooled site.")
+        self.assertTrue(state.is_done("set_config"))
+
+    def test_step_percentiles(self):
+        state = ProvisioningState(self.subscription)
+        state.run("apps_txt", lambda: None)
+        percentiles = _get_step_percentiles(30)
+        self.assertEqual(percentiles["apps_txt"]["count"], 1)
+
+    @patch("rokct.rokct.control_panel.tasks._set_tenant_app_role")
+    @patch("rokct.rokct.control_panel.tasks._install_app")
+    @patch("rokct.rokct.control_panel.tasks._write_apps_txt")
+    @patch("rokct.rokct.control_panel.tasks._drop_partial_site")
+    @patch("rokct.rokct.control_panel.tasks._create_site", side_effect=[Exception("new-site failed"), False])
+    def test_failed_new_site_is_dropped_before_retry(self, mock_create_site, mock_drop, *mocks):
+        # Act: the first attempt fails part way through `bench new-site`
+        with self.assertRaises(Exception):
+            _create_and_install_site("state.test.saas.com", ["frappe", "rokct"], "/tmp/bench", [], state=ProvisioningState(self.subscription))
+        mock_drop.assert_not_called()
+
+        # Act: the retry drops whatever the failed attempt left behind before creating the site again
+        retry_state = ProvisioningState(frappe.get_doc("Company Subscription", self.subscription.name))
+        _create_and_install_site("state.test.saas.com", ["frappe", "rokct"], "/tmp/bench", [], state=retry_state)
+
+        # Assert
+        mock_drop.assert_called_once()
+        self.assertEqual(mock_drop.call_args.args[0], "state.test.saas.com")
+        self.assertEqual(mock_create_site.call_count, 2)
+        self.assertTrue(retry_state.is_done("new_site"))
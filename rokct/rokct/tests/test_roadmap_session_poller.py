@@ -0,0 +1,112 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, get_datetime, now_datetime
+from unittest.mock import patch
+from rokct.roadmap import tasks
+from rokct.rokct.tests.jules_stub_server import JulesStubServer, make_finished_activities
+
+class TestRoadmapSessionPoller(FrappeTestCase):
+    def setUp(self):
+        self.stub = JulesStubServer(latency=0.2).__enter__()
+        self.patches = [
+            patch("rokct.roadmap.tasks._get_api_key", return_value="test-key"),
+            patch("rokct.roadmap.doctype.roadmap.roadmap._get_api_key", return_value="test-key"),
+            patch("rokct.roadmap.tasks._get_jules_api_url", return_value=self.stub.url),
+        ]
+        for p in self.patches:
+            p.start()
+        # The pooled session belongs to the process; start each test with a fresh one.
+        tasks._http_session = None
+
+        self.roadmap = frappe.get_doc({
+            "doctype": "Roadmap",
+            "title": f"Poller Test {frappe.generate_hash(length=6)}",
+            "source_repository": "sources/github/rokct/test",
+            "status": "Ideas",
+        }).insert(ignore_permissions=True)
+
+        # The poller picks up every pending session on the site; only let it see this test's
+        # sessions, so sessions of real roadmaps are not polled against the stub and failed.
+        get_all = frappe.get_all
+        def get_test_sessions(doctype, *args, **kwargs):
+            if doctype == "AI Idea Session":
+                kwargs["filters"] = {**(kwargs.get("filters") or {}), "roadmap": self.roadmap.name}
+            return get_all(doctype, *args, **kwargs)
+        self.patches.append(patch("rokct.roadmap.tasks.frappe.get_all", side_effect=get_test_sessions))
+        self.patches[-1].start()
+
+    def tearDown(self):
+        # The poller commits, so clean up explicitly.
+        frappe.db.rollback()
+        frappe.db.delete("AI Idea Session", {"roadmap": self.roadmap.name})
+        frappe.delete_doc("Roadmap", self.roadmap.name, ignore_permissions=True, force=True)
+        frappe.db.commit()
+        for p in self.patches:
+            p.stop()
+        self.stub.__exit__()
+
+    def _session(self, session_id, prompt_title="Feature ideas"):
+        return frappe.get_doc({
+            "doctype": "AI Idea Session",
+            "roadmap": self.roadmap.name,
+            "session_id": session_id,
+            "status": "Pending",
+            "prompt_title": prompt_title,
+        }).insert(ignore_permissions=True).name
+
+    def _get(self, name, field):
+        return frappe.db.get_value("AI Idea Session", name, field)
+
+    def test_sessions_are_polled_concurrently_and_ideas_saved_together(self):
+        prefix = frappe.generate_hash(length=6)
+        self.stub.sessions[f"{prefix}-a"] = make_finished_activities([{"title": "Dark mode", "explanation": "..."}])
+        self.stub.sessions[f"{prefix}-b"] = make_finished_activities([{"title": "Crash on login"}, {"title": "Slow search"}])
+        self.stub.sessions[f"{prefix}-gone"] = 404
+        finished = [self._session(f"{prefix}-a"), self._session(f"{prefix}-b", prompt_title="Bug hunt")]
+        pending = self._session(f"{prefix}-pending")
+        gone = self._session(f"{prefix}-gone")
+
+        tasks.process_pending_ai_sessions()
+
+        self.assertGreater(self.stub.max_in_flight, 1)
+        for name in finished:
+            self.assertEqual(self._get(name, "status"), "Completed")
+        self.assertEqual(self._get(gone, "status"), "Error")
+        self.assertEqual(self._get(pending, "status"), "Pending")
+        self.assertEqual(self._get(pending, "poll_count"), 1)
+
+        features = frappe.get_all(
+            "Roadmap Feature",
+            filters={"parent": self.roadmap.name},
+            fields=["feature", "type", "idx"],
+            order_by="idx asc"
+        )
+        self.assertEqual(sorted(f.feature for f in features), ["Crash on login", "Dark mode", "Slow search"])
+        self.assertEqual([f.idx for f in features], [1, 2, 3])
+        self.assertEqual({f.feature: f.type for f in features}["Crash on login"], "Bug")
+
+    def test_pending_session_backs_off(self):
+        name = self._session(f"{frappe.generate_hash(length=6)}-pending")
+
+        tasks.process_pending_ai_sessions()
+        first_poll = get_datetime(self._get(name, "next_poll_at"))
+        tasks.process_pending_ai_sessions()
+
+        self.assertEqual(len(self.stub.requested), 1)
+        self.assertGreater(first_poll, now_datetime())
+
+        frappe.db.set_value("AI Idea Session", name, "next_poll_at", add_to_date(now_datetime(), seconds=-1))
+        tasks.process_pending_ai_sessions()
+        self.assertEqual(len(self.stub.requested), 2)
+        self.assertEqual(self._get(name, "poll_count"), 2)
+
+    def test_session_past_its_deadline_fails(self):
+        name = self._session(f"{frappe.generate_hash(length=6)}-slow")
+        frappe.db.set_value("AI Idea Session", name, "creation", add_to_date(now_datetime(), hours=-25), update_modified=False)
+
+        tasks.process_pending_ai_sessions()
+
+        self.assertEqual(self._get(name, "status"), "Error")
+        self.assertIn("24 hours", self._get(name, "last_error"))
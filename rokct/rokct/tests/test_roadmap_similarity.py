@@ -0,0 +1,84 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import patch
+from rokct.roadmap import similarity
+from rokct.roadmap.similarity import SimilarityIndex, get_bands
+from rokct.roadmap.tasks import _save_ideas_to_roadmap
+
+class TestSimilarityIndex(FrappeTestCase):
+    def test_finds_near_duplicates_only(self):
+        index = SimilarityIndex(0.65)
+        index.add("dark-mode", "Add dark mode: Let users switch the dashboard to a dark colour scheme.")
+        index.add("order-search", "Add order search: Let users search the dashboard orders by customer name.")
+
+        matches = index.query("Add a dark mode: Allow users to switch the dashboard to a dark color scheme.")
+
+        self.assertEqual([key for key, _ in matches], ["dark-mode"])
+        self.assertEqual(index.query("Push notifications when a delivery is on its way"), [])
+
+    def test_lookup_only_compares_bucket_candidates(self):
+        index = SimilarityIndex(0.65)
+        for i in range(500):
+            index.add(i, f"Unrelated idea number {i} about {frappe.generate_hash(length=12)}")
+        index.add("dark-mode", "Add dark mode: Let users switch the dashboard to a dark colour scheme.")
+
+        with patch("rokct.roadmap.similarity.jaccard", wraps=similarity.jaccard) as compare:
+            matches = index.query("Add dark mode: let users switch the dashboard to a dark colour scheme")
+
+        self.assertEqual(matches[0][0], "dark-mode")
+        self.assertLess(compare.call_count, 50)
+
+    def test_bands_keep_recall_at_the_threshold(self):
+        for threshold in (0.3, 0.5, 0.65, 0.8, 0.9):
+            bands, rows = get_bands(threshold)
+            self.assertGreaterEqual(1 - (1 - threshold ** rows) ** bands, 0.99)
+
+
+class TestRoadmapDuplicateIdeas(FrappeTestCase):
+    def setUp(self):
+        with patch("rokct.roadmap.doctype.roadmap.roadmap._get_api_key", return_value=None):
+            self.roadmap = frappe.get_doc({
+                "doctype": "Roadmap",
+                "title": f"Duplicate Test {frappe.generate_hash(length=6)}",
+                "source_repository": "sources/github/rokct/test",
+                "status": "Ideas",
+                "features": [{
+                    "feature": "Add dark mode",
+                    "explanation": "Let users switch the dashboard to a dark colour scheme.",
+                    "status": "Done",
+                }],
+            }).insert(ignore_permissions=True)
+
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def _features(self):
+        return frappe.get_all(
+            "Roadmap Feature",
+            filters={"parent": self.roadmap.name},
+            fields=["feature", "suggestion_count"],
+            order_by="idx asc"
+        )
+
+    def test_near_duplicates_are_merged_instead_of_inserted(self):
+        inserted = _save_ideas_to_roadmap(self.roadmap.name, [
+            {"title": "Add a dark mode", "explanation": "Allow users to switch the dashboard to a dark color scheme."},
+            {"title": "Export orders to CSV", "explanation": "Allow shop owners to download their orders as CSV."},
+            {"title": "Export orders as CSV", "explanation": "Allow shop owners to download orders as CSV."},
+        ])
+
+        self.assertEqual(inserted, 1)
+        self.assertEqual(
+            [(f.feature, f.suggestion_count) for f in self._features()],
+            [("Add dark mode", 2), ("Export orders to CSV", 2)]
+        )
+
+    def test_threshold_is_configurable(self):
+        ideas = [{"title": "Add a dark mode", "explanation": "Allow users to switch the dashboard to a dark color scheme."}]
+        with patch.dict(frappe.local.conf, {"roadmap_duplicate_threshold": 0}):
+            inserted = _save_ideas_to_roadmap(self.roadmap.name, ideas)
+
+        self.assertEqual(inserted, 1)
+        self.assertEqual(len(self._features()), 2)
@@ -0,0 +1,128 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import patch
+from frappe.utils import now_datetime
+from rokct.rokct.control_panel.site_pool import (
+    get_app_set_key, refill_warm_pool, build_pooled_site, claim_pooled_site, COMMON_APPS
+)
+
+class TestWarmSitePool(FrappeTestCase):
+    def setUp(self):
+        frappe.conf.bench_path = "/tmp/bench"
+        frappe.conf.tenant_domain = "test.saas.com"
+
+        frappe.db.set_single_value("Subscription Settings", {
+            "enable_warm_site_pool": 1,
+            "warm_pool_size": 2,
+            "warm_pool_max_concurrent_builds": 1
+        })
+        frappe.clear_document_cache("Subscription Settings", "Subscription Settings")
+
+        if not frappe.db.exists("Subscription Plan", "Pool Plan"):
+            frappe.get_doc({"doctype": "Subscription Plan", "plan_name": "Pool Plan", "cost": 0}).insert(ignore_permissions=True)
+
+        self.apps = list(COMMON_APPS)
+        self.app_set = get_app_set_key(self.apps)
+
+    def tearDown(self):
+        frappe.db.rollback()
+        if hasattr(frappe.conf, "bench_path"):
+            del frappe.conf.bench_path
+        if hasattr(frappe.conf, "tenant_domain"):
+            del frappe.conf.tenant_domain
+
+    def _make_pool_entry(self, site_name, status="Ready"):
+        return frappe.get_doc({
+            "doctype": "Pooled Tenant Site",
+            "site_name": site_name,
+            "app_set": self.app_set,
+            "apps": "\n".join(self.apps),
+            "status": status,
+            "ready_on": now_datetime() if status == "Ready" else None
+        }).insert(ignore_permissions=True)
+
+    def test_app_set_key_depends_on_app_order(self):
+        self.assertEqual(get_app_set_key(["frappe", "rokct"]), get_app_set_key(["frappe", "rokct"]))
+        self.assertNotEqual(get_app_set_key(["frappe", "rokct"]), get_app_set_key(["rokct", "frappe"]))
+
+    @patch("rokct.rokct.control_panel.site_pool.frappe.enqueue")
+    def test_refill_respects_concurrent_build_limit(self, mock_enqueue):
+        # Act
+        refill_warm_pool()
+
+        # Assert: the pool is short by two sites, but only one build slot is available
+        mock_enqueue.assert_called_once()
+        self.assertEqual(mock_enqueue.call_args.args[0], "rokct.rokct.control_panel.site_pool.build_pooled_site")
+        self.assertEqual(frappe.db.count("Pooled Tenant Site", {"status": "Building"}), 1)
+
+    @patch("rokct.rokct.control_panel.site_pool.frappe.enqueue")
+    def test_refill_skips_full_pool(self, mock_enqueue):
+        # Arrange
+        self._make_pool_entry("pool-a.test.saas.com")
+        self._make_pool_entry("pool-b.test.saas.com")
+
+        # Act
+        refill_warm_pool()
+
+        # Assert
+        mock_enqueue.assert_not_called()
+
+    @patch("rokct.rokct.control_panel.site_pool.frappe.enqueue")
+    @patch("rokct.rokct.control_panel.site_pool.os.rename")
+    @patch("rokct.rokct.control_panel.site_pool.os.path.exists", return_value=False)
+    @patch("rokct.rokct.control_panel.site_pool.os.path.isdir", return_value=True)
+    def test_claim_moves_pooled_site_to_tenant_name(self, mock_isdir, mock_exists, mock_rename, mock_enqueue):
+        # Arrange
+        entry = self._make_pool_entry("pool-c.test.saas.com")
+
+        # Act
+        claimed = claim_pooled_site("SUB-TEST-00001", "acme.test.saas.com", self.apps)
+
+        # Assert
+        self.assertEqual(claimed, entry.name)
+        mock_rename.assert_called_once_with("/tmp/bench/sites/pool-c.test.saas.com", "/tmp/bench/sites/acme.test.saas.com")
+        entry.reload()
+        self.assertEqual(entry.status, "Assigned")
+        self.assertEqual(entry.assigned_site_name, "acme.test.saas.com")
+
+    def test_claim_returns_none_when_pool_is_empty(self):
+        self.assertIsNone(claim_pooled_site("SUB-TEST-00001", "acme.test.saas.com", ["frappe", "rokct"]))
+
+    @patch("rokct.rokct.control_panel.site_pool.os.rename")
+    @patch("rokct.rokct.control_panel.site_pool.os.path.exists", return_value=True)
+    @patch("rokct.rokct.control_panel.site_pool.os.path.isdir", return_value=True)
+    def test_claim_leaves_entry_ready_when_target_exists(self, mock_isdir, mock_exists, mock_rename):
+        # Arrange
+        entry = self._make_pool_entry("pool-d.test.saas.com")
+
+        # Act
+        claimed = claim_pooled_site("SUB-TEST-00001", "acme.test.saas.com", self.apps)
+
+        # Assert
+        self.assertIsNone(claimed)
+        mock_rename.assert_not_called()
+        entry.reload()
+        self.assertEqual(entry.status, "Ready")
+
+    @patch("rokct.rokct.control_panel.site_pool.frappe.log_error")
+    @patch("rokct.rokct.control_panel.tasks._drop_partial_site")
+    @patch("rokct.rokct.control_panel.tasks._create_and_install_site", side_effect=Exception("install failed"))
+    def test_failed_build_drops_partial_site(self, mock_install, mock_drop, mock_log_error):
+        # Arrange
+        entry = self._make_pool_entry("pool-e.test.saas.com", status="Building")
+        frappe.db.commit()
+        self.addCleanup(self._delete_pool_entry, entry.name)
+
+        # Act
+        build_pooled_site(entry.name)
+
+        # Assert
+        mock_drop.assert_called_once()
+        self.assertEqual(mock_drop.call_args.args[0], "pool-e.test.saas.com")
+        self.assertEqual(frappe.db.get_value("Pooled Tenant Site", entry.name, "status"), "Failed")
+
+    def _delete_pool_entry(self, name):
+        frappe.delete_doc("Pooled Tenant Site", name, ignore_permissions=True, force=True)
+        frappe.db.commit()
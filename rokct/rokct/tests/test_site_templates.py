@@ -0,0 +1,105 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+import os
+import json
+import shutil
+import subprocess
+import tempfile
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import patch
+from rokct.rokct.control_panel.site_pool import get_app_set_key
+from rokct.rokct.control_panel.site_templates import (
+    TEMPLATE_VERSION, get_apps_fingerprint, get_current_template, create_site_from_template, remove_older_templates
+)
+
+class TestSiteTemplates(FrappeTestCase):
+    def setUp(self):
+        self.bench_path = tempfile.mkdtemp()
+        self.apps = ["frappe", "rokct"]
+        for app in self.apps:
+            os.makedirs(os.path.join(self.bench_path, "apps", app, app))
+            with open(os.path.join(self.bench_path, "apps", app, app, "__init__.py"), "w") as f:
+                f.write('__version__ = "1.0.0"\n')
+
+    def tearDown(self):
+        shutil.rmtree(self.bench_path, ignore_errors=True)
+        frappe.db.rollback()
+
+    def _write_template(self, fingerprint=None, created="2025-10-19 10:00:00", **manifest):
+        current, revisions = get_apps_fingerprint(self.bench_path, self.apps)
+        fingerprint = fingerprint or current
+        template_dir = os.path.join(self.bench_path, "site_templates", get_app_set_key(self.apps), fingerprint)
+        os.makedirs(template_dir)
+        with open(os.path.join(template_dir, "manifest.json"), "w") as f:
+            json.dump({
+                "apps": self.apps, "fingerprint": fingerprint, "revisions": revisions, "path": template_dir,
+                "database": "database.sql.gz", "files": [], "version": TEMPLATE_VERSION, "created": created,
+                **manifest
+            }, f)
+        return fingerprint
+
+    def test_template_matches_current_app_revisions(self):
+        fingerprint = self._write_template()
+        self.assertEqual(get_current_template(self.bench_path, self.apps)["fingerprint"], fingerprint)
+
+    def test_template_is_stale_after_app_update(self):
+        # Arrange
+        self._write_template()
+
+        # Act: simulate `update_rokct_app` pulling a new version
+        with open(os.path.join(self.bench_path, "apps", "rokct", "rokct", "__init__.py"), "w") as f:
+            f.write('__version__ = "1.1.0"\n')
+
+        # Assert
+        self.assertIsNone(get_current_template(self.bench_path, self.apps))
+
+    def test_template_from_an_older_version_is_stale(self):
+        self._write_template(version=1, encryption_key="template-key")
+        self.assertIsNone(get_current_template(self.bench_path, self.apps))
+
+    def test_uncommitted_changes_change_the_fingerprint(self):
+        app_path = os.path.join(self.bench_path, "apps", "rokct")
+        for command in (["init", "-q"], ["add", "-A"], ["-c", "user.name=t", "-c", "user.email=t@t", "commit", "-qm", "init"]):
+            subprocess.run(["git", *command], cwd=app_path, check=True)
+        committed, _ = get_apps_fingerprint(self.bench_path, self.apps)
+
+        with open(os.path.join(app_path, "rokct", "__init__.py"), "a") as f:
+            f.write("# local change\n")
+        edited, _ = get_apps_fingerprint(self.bench_path, self.apps)
+        with open(os.path.join(app_path, "rokct", "hooks.py"), "w") as f:
+            f.write("app_name = 'rokct'\n")
+
+        self.assertNotEqual(committed, edited)
+        self.assertNotEqual(edited, get_apps_fingerprint(self.bench_path, self.apps)[0])
+
+    @patch("rokct.rokct.control_panel.site_templates.subprocess.run")
+    @patch("rokct.rokct.control_panel.site_templates.is_template_mode_enabled", return_value=True)
+    def test_restored_site_keeps_its_own_encryption_key(self, mock_enabled, mock_run):
+        self._write_template()
+        # `bench new-site` is mocked, so create the site folder it would have made.
+        os.makedirs(os.path.join(self.bench_path, "sites", "acme.test.saas.com"))
+
+        self.assertTrue(create_site_from_template("acme.test.saas.com", self.apps, self.bench_path, []))
+
+        commands = [c.args[0] for c in mock_run.call_args_list]
+        self.assertFalse([command for command in commands if "encryption_key" in command])
+
+    def test_only_older_completed_templates_are_removed(self):
+        app_set_dir = os.path.join(self.bench_path, "site_templates", get_app_set_key(self.apps))
+        self._write_template("old", created="2025-10-18 10:00:00")
+        self._write_template("newer", created="2025-10-20 10:00:00")
+        os.makedirs(os.path.join(app_set_dir, "building.tmp"))
+        current = self._write_template()
+
+        with open(os.path.join(app_set_dir, current, "manifest.json")) as f:
+            remove_older_templates(self.bench_path, get_app_set_key(self.apps), json.load(f))
+
+        self.assertEqual(sorted(os.listdir(app_set_dir)), sorted(["building.tmp", "newer", current]))
+
+    @patch("rokct.rokct.control_panel.site_templates.subprocess.run")
+    @patch("rokct.rokct.control_panel.site_templates.is_template_mode_enabled", return_value=True)
+    def test_falls_back_when_no_template(self, mock_enabled, mock_run):
+        logs = []
+        self.assertFalse(create_site_from_template("acme.test.saas.com", self.apps, self.bench_path, logs))
+        mock_run.assert_not_called()
@@ -0,0 +1,117 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import gzip
+import json
+import os
+import tempfile
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from rokct.swagger.swagger_generator import (
+    DEFAULT_MAX_WORKERS, build_doctype_module, extract_doctype_item, get_base_swagger, get_doctype_fingerprints,
+    get_doctype_paths, get_required_fields, get_worker_count, hash_api_file, run_jobs, write_lazy_documents,
+    _get_imported_app_files
+)
+
+class TestSwaggerGenerator(FrappeTestCase):
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def test_doctype_paths(self):
+        op_ids = {key: f"{key}_tender" for key in ("get", "list", "create", "update", "delete")}
+
+        paths = get_doctype_paths("Tender", False, {"type": "object"}, "Tender DocType", op_ids)
+        single_paths = get_doctype_paths("Weather Settings", True, {"type": "object"}, "Weather Settings DocType", op_ids)
+
+        self.assertEqual(set(paths), {"/api/v1/resource/Tender", "/api/v1/resource/Tender/{name}"})
+        self.assertEqual(set(paths["/api/v1/resource/Tender/{name}"]) - {"parameters"}, {"get", "put", "delete"})
+        self.assertEqual(set(single_paths["/api/v1/resource/Weather%20Settings"]), {"get", "put"})
+
+    def test_fingerprint_changes_with_customizations(self):
+        before = get_doctype_fingerprints()
+
+        # Adding a Custom Field alters the table, which commits, so delete it explicitly.
+        custom_field = frappe.get_doc({
+            "doctype": "Custom Field",
+            "dt": "Tender",
+            "fieldname": "swagger_fingerprint_test",
+            "label": "Swagger Fingerprint Test",
+            "fieldtype": "Data",
+        }).insert(ignore_permissions=True)
+        try:
+            after = get_doctype_fingerprints()
+        finally:
+            frappe.delete_doc("Custom Field", custom_field.name, ignore_permissions=True, force=True)
+            frappe.db.commit()
+
+        self.assertNotEqual(before["Tender"], after["Tender"])
+        self.assertEqual(before["Province"], after["Province"])
+
+    def test_parallel_build_matches_serial(self):
+        required_fields, link_enums = get_required_fields(), {}
+        items = [
+            {"hash": doctype, **extract_doctype_item(doctype, "Rokct", "rokct", {}, required_fields, link_enums)}
+            for doctype in ("Tender", "Province", "Weather Settings")
+        ]
+
+        outputs = []
+        for workers in (1, 2):
+            output_dir = tempfile.mkdtemp()
+            tasks = [
+                (build_doctype_module, {
+                    "base_swagger": get_base_swagger(), "output_dir": output_dir, "filename": f"module-{i}.json",
+                    "previous_hash": None, "items": [item],
+                })
+                for i, item in enumerate(items)
+            ]
+            results = run_jobs(tasks, workers)
+            files = {}
+            for filename in sorted(os.listdir(output_dir)):
+                with open(os.path.join(output_dir, filename)) as f:
+                    files[filename] = f.read()
+            outputs.append((results, files))
+
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual(outputs[0][0][0]["built"]["Tender"]["tag"]["name"], "Tender DocType")
+
+    def test_api_file_hash_includes_imported_app_modules(self):
+        # Arrange
+        with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+            f.write("import json\nfrom rokct.rokct.control_panel.site_pool import get_plan_apps\n")
+        self.addCleanup(os.remove, f.name)
+        site_pool_path = frappe.get_app_path("rokct", "rokct", "control_panel", "site_pool.py")
+
+        # Act
+        imported = _get_imported_app_files(f.name, ["rokct"])
+
+        # Assert: the imported app module is part of the key, the standard library is not
+        self.assertIn(site_pool_path, imported)
+        self.assertFalse(any(path.endswith("json/__init__.py") for path in imported))
+        self.assertNotEqual(hash_api_file(f.name, ["rokct"]), hash_api_file(f.name, []))
+
+    def test_worker_count_is_capped(self):
+        self.assertEqual(get_worker_count(1000), DEFAULT_MAX_WORKERS)
+        self.assertEqual(get_worker_count(2), 2)
+        self.assertLessEqual(get_worker_count(), DEFAULT_MAX_WORKERS)
+
+    def test_lazy_documents_split_paths_by_tag(self):
+        output_dir = tempfile.mkdtemp()
+        full_swagger = get_base_swagger()
+        full_swagger["tags"] = [{"name": "Tender DocType"}, {"name": "rokct - tenders"}]
+        full_swagger["paths"] = {
+            "/api/v1/resource/Tender": {"get": {"tags": ["Tender DocType"]}},
+            "/api/v1/resource/Tender/{name}": {"parameters": [{"name": "name"}], "delete": {"tags": ["Tender DocType"]}},
+            "/api/v1/method/rokct.api.tenders.search": {"post": {"tags": ["rokct - tenders"]}},
+        }
+
+        files, changed = write_lazy_documents(output_dir, full_swagger, {"module-rokct-tenders.json": ["rokct - tenders"]}, {})
+        with open(os.path.join(output_dir, "index.json")) as f:
+            index = json.load(f)
+        with gzip.open(os.path.join(output_dir, index["x-tag-fragments"]["Tender DocType"] + ".gz")) as f:
+            fragment = json.load(f)
+
+        self.assertEqual(changed, 3)
+        self.assertEqual(index["paths"], {})
+        self.assertEqual([tag["name"] for tag in index["tags"]], ["Tender DocType", "rokct - tenders"])
+        self.assertEqual(set(fragment["paths"]), {"/api/v1/resource/Tender", "/api/v1/resource/Tender/{name}"})
+        self.assertEqual(fragment["paths"]["/api/v1/resource/Tender/{name}"]["parameters"], [{"name": "name"}])
+        self.assertEqual(write_lazy_documents(output_dir, full_swagger, {"module-rokct-tenders.json": ["rokct - tenders"]}, {})[1], 0)
@@ -0,0 +1,260 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+import gzip
+import io
+import json
+import os
+import tempfile
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import patch
+from rokct.rokct.tenders.file_import import iter_releases, import_release_file
+from rokct.rokct.tenders.client import create_session, iter_release_pages
+from rokct.rokct.tenders import ingest
+from rokct.rokct.tenders.ingest import normalize_release, bulk_upsert_tenders, ingest_releases
+from rokct.rokct.tenders.lookups import MAX_NAME_LENGTH, LinkResolver
+from rokct.rokct.tenders.purge import purge_expired_tenders
+from rokct.rokct.tenders.sync import split_date_range, sync_tenders, start_tender_backfill
+from rokct.rokct.tests.etenders_stub_server import ETendersStubServer, make_release
+
+def _no_links(doctype, value):
+    return None
+
+def _delete_tenders(ocids):
+    frappe.db.delete("Tender", {"ocid": ("in", ocids)})
+    frappe.db.delete("Tender Search Index", {"tender": ("in", ocids)})
+    frappe.db.commit()
+
+class TestTenderIngestion(FrappeTestCase):
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def test_normalize_release(self):
+        row = normalize_release(make_release(1), lambda doctype, value: f"{doctype}:{value}")
+
+        self.assertEqual(row["ocid"], "ocds-9t57fa-000001")
+        self.assertEqual(row["tender_end_date"], "2099-02-15 11:00:00")
+        self.assertEqual(row["province"], "Province:Gauteng")
+        self.assertEqual(row["organ_of_state"], "Organ of State:Department of Public Works")
+        self.assertEqual(row["esubmission"], 1)
+
+    def test_normalize_release_without_dates(self):
+        release = make_release(2)
+        del release["date"]
+        release["tender"]["tenderPeriod"] = {}
+
+        row = normalize_release(release, _no_links)
+
+        self.assertIsNone(row["published_date"])
+        self.assertIsNone(row["tender_end_date"])
+
+    def test_bulk_upsert_is_idempotent(self):
+        rows = [normalize_release(make_release(i), _no_links) for i in range(900001, 900004)]
+        bulk_upsert_tenders(rows)
+
+        rows[0]["title"] = "Updated title"
+        bulk_upsert_tenders(rows + [rows[0]])
+
+        ocids = [row["ocid"] for row in rows]
+        self.assertEqual(frappe.db.count("Tender", {"ocid": ("in", ocids)}), 3)
+        self.assertEqual(frappe.db.get_value("Tender", ocids[0], "title"), "Updated title")
+
+    def test_pages_are_yielded_in_order_and_stop_at_short_page(self):
+        releases = [make_release(i) for i in range(25)]
+        with ETendersStubServer(releases) as stub:
+            session = create_session(pool_size=4)
+            pages = list(iter_release_pages(session, stub.url, {"PageSize": 10}, concurrency=4))
+
+        self.assertEqual([page for page, _ in pages], [1, 2, 3])
+        self.assertEqual(sum(len(batch) for _, batch in pages), 25)
+
+    def test_pages_are_fetched_concurrently_and_upserted_in_order(self):
+        releases = [make_release(i) for i in range(800000, 800080)]
+        ocids = [release["ocid"] for release in releases]
+        pages = []
+        with ETendersStubServer(releases, latency=0.1) as stub, \
+                patch("rokct.rokct.tenders.ingest._write_tenders", wraps=ingest._write_tenders) as write:
+            stats = ingest_releases(
+                stub.url, {"PageSize": 10}, concurrency=4, resolve_link=_no_links,
+                on_page=lambda page_number, upserted: pages.append(page_number)
+            )
+        stored = frappe.db.count("Tender", {"ocid": ("in", ocids)})
+
+        # Ingestion commits per page, so clean up explicitly.
+        _delete_tenders(ocids)
+
+        self.assertEqual(stats.upserted, 80)
+        self.assertEqual(stats.pages, 8)
+        self.assertGreater(stub.max_in_flight, 1)
+        self.assertEqual(pages, list(range(1, 9)))
+        # One upsert statement per page, and every tender stored.
+        self.assertEqual([len(call.args[0]) for call in write.call_args_list], [10] * 8)
+        self.assertEqual(stored, 80)
+
+    def test_long_values_are_clipped_and_unwritable_rows_skipped(self):
+        rows = [normalize_release(make_release(i), _no_links) for i in range(900101, 900104)]
+        rows[0]["title"] = "Supply of " + "goods " * 60
+        rows[1]["ocid"] = "ocds-" + "x" * 200
+        failing = rows[2]["ocid"]
+
+        def write_tenders(batch):
+            if any(row["ocid"] == failing for row in batch):
+                raise frappe.ValidationError("Out of range value")
+            return ingest._write_tenders(batch)
+
+        with patch("rokct.rokct.tenders.ingest.frappe.log_error") as log_error, \
+                patch("rokct.rokct.tenders.ingest._write_tenders", side_effect=write_tenders):
+            written = bulk_upsert_tenders(rows)
+
+        self.assertEqual(written, 1)
+        self.assertEqual(len(frappe.db.get_value("Tender", rows[0]["ocid"], "title")), 140)
+        self.assertFalse(frappe.db.exists("Tender", failing))
+        self.assertEqual(log_error.call_count, 2)
+
+class TestLinkResolver(FrappeTestCase):
+    def setUp(self):
+        if not frappe.db.exists("Province", "Gauteng"):
+            frappe.get_doc({"doctype": "Province", "province_name": "Gauteng"}).insert(ignore_permissions=True)
+
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def test_lookup_ignores_case_and_whitespace(self):
+        resolver = LinkResolver()
+
+        self.assertEqual(resolver("Province", "  gauteng "), "Gauteng")
+        self.assertEqual(resolver("Province", "GAUTENG"), "Gauteng")
+        self.assertIsNone(resolver("Province", "Atlantis"))
+        self.assertEqual(resolver.get_stats()["Province"], {"hits": 2, "misses": 1, "created": 0})
+
+    def test_unseen_organs_of_state_are_created_in_batch(self):
+        resolver = LinkResolver()
+
+        name = resolver("Organ of State", "Department of  Test Affairs")
+        self.assertEqual(resolver("Organ of State", "department of test affairs"), name)
+        self.assertEqual(resolver.flush(), 1)
+
+        self.assertTrue(frappe.db.exists("Organ of State", "Department of Test Affairs"))
+        self.assertEqual(resolver.get_stats()["Organ of State"]["created"], 1)
+
+    def test_long_organ_of_state_names_are_clipped_to_the_column(self):
+        resolver = LinkResolver()
+        value = "Department of " + "Very " * 40 + "Long Names"
+
+        name = resolver("Organ of State", value)
+        self.assertEqual(len(name), MAX_NAME_LENGTH)
+        self.assertEqual(resolver("Organ of State", value + " Branch"), name)
+        self.assertEqual(resolver.flush(), 1)
+        self.assertTrue(frappe.db.exists("Organ of State", name))
+
+        # A second resolver sees the existing record, so nothing new is created.
+        self.assertEqual(LinkResolver()("Organ of State", value), name)
+
+class TestTenderSync(FrappeTestCase):
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def test_split_date_range(self):
+        windows = split_date_range("2025-01-01", "2025-01-10", window_days=4)
+        self.assertEqual(
+            [(str(start), str(end)) for start, end in windows],
+            [("2025-01-01", "2025-01-04"), ("2025-01-05", "2025-01-08"), ("2025-01-09", "2025-01-10")]
+        )
+
+    def test_interrupted_sync_resumes_from_checkpoint(self):
+        releases = [make_release(i) for i in range(700000, 700025)]
+        frappe.db.set_single_value("Tender Sync State", {"window_from": "2025-01-01", "window_to": "2025-01-02", "last_page": 2})
+
+        with ETendersStubServer(releases) as stub, \
+                patch("rokct.rokct.tenders.sync.get_ingestion_settings",
+                      return_value=frappe._dict({"api_url": stub.url, "page_size": 10, "concurrency": 2})):
+            stats = sync_tenders()
+
+        state = frappe.get_single("Tender Sync State")
+        _delete_tenders([release["ocid"] for release in releases])
+
+        self.assertEqual(min(stub.pages_requested), 3)
+        self.assertEqual(stats.upserted, 5)
+        self.assertEqual(str(state.last_synced_to), "2025-01-02")
+        self.assertIsNone(state.window_from)
+
+    @patch("rokct.rokct.tenders.sync.frappe.enqueue")
+    def test_backfill_skips_completed_windows(self, mock_enqueue):
+        start_tender_backfill("2025-03-01", "2025-03-14", window_days=7)
+        first = frappe.db.get_value("Tender Backfill Window", {"window_start": "2025-03-01"}, "name")
+        frappe.db.set_value("Tender Backfill Window", first, "status", "Completed")
+        mock_enqueue.reset_mock()
+
+        result = start_tender_backfill("2025-03-01", "2025-03-14", window_days=7)
+
+        self.assertEqual(result["already_completed"], 1)
+        self.assertEqual(len(result["queued"]), 1)
+        self.assertEqual(mock_enqueue.call_count, 1)
+        self.assertEqual(frappe.db.count("Tender Backfill Window", {"window_start": ("between", ["2025-03-01", "2025-03-14"])}), 2)
+        frappe.db.delete("Tender Backfill Window", {"window_start": ("between", ["2025-03-01", "2025-03-14"])})
+        frappe.db.commit()
+
+class TestReleaseFileImport(FrappeTestCase):
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def test_releases_are_streamed_across_chunk_boundaries(self):
+        releases = [make_release(i) for i in range(20)]
+        package = {"uri": "dump", "publisher": {"name": "releases"}, "extensions": [], "releases": releases}
+
+        streamed = list(iter_releases(io.BytesIO(json.dumps(package).encode()), chunk_size=7))
+
+        self.assertEqual(streamed, releases)
+
+    def test_import_gzipped_release_package(self):
+        releases = [make_release(i) for i in range(600000, 600030)]
+        with tempfile.NamedTemporaryFile(suffix=".json.gz", delete=False) as f:
+            f.write(gzip.compress(json.dumps({"releases": releases}).encode()))
+
+        try:
+            stats = import_release_file(f.name, batch_size=8)
+        finally:
+            os.remove(f.name)
+            _delete_tenders([release["ocid"] for release in releases])
+
+        self.assertEqual(stats.releases, 30)
+        self.assertEqual(stats.upserted, 30)
+        self.assertEqual(stats.batches, 4)
+        self.assertGreater(stats.peak_memory_mb, 0)
+
+class TestExpiredTenderPurge(FrappeTestCase):
+    def setUp(self):
+        self.rows = [normalize_release(make_release(i), _no_links) for i in range(500001, 500006)]
+        for row in self.rows[:3]:
+            row["tender_end_date"] = "2020-01-01 11:00:00"
+        bulk_upsert_tenders(self.rows)
+        self.ocids = [row["ocid"] for row in self.rows]
+
+    def tearDown(self):
+        frappe.db.delete("Tender Archive", {"ocid": ("in", self.ocids)})
+        _delete_tenders(self.ocids)
+
+    def test_purge_deletes_expired_tenders_in_chunks(self):
+        result = purge_expired_tenders(chunk_size=2, archive=False)
+
+        self.assertGreaterEqual(result["deleted"], 3)
+        self.assertEqual(frappe.db.count("Tender", {"ocid": ("in", self.ocids)}), 2)
+        self.assertEqual(frappe.db.count("Tender Archive", {"ocid": ("in", self.ocids)}), 0)
+        self.assertEqual(frappe.db.get_single_value("Tender Sync State", "last_purge_deleted"), result["deleted"])
+
+    def test_archive_mode_keeps_compact_copies(self):
+        purge_expired_tenders(chunk_size=2, archive=True)
+
+        self.assertEqual(frappe.db.count("Tender Archive", {"ocid": ("in", self.ocids)}), 3)
+        self.assertEqual(frappe.db.get_value("Tender Archive", self.ocids[0], "title"), self.rows[0]["title"])
+
+    def test_already_archived_tenders_are_not_counted_again(self):
+        # Arrange: one expired tender was archived by an earlier run that failed before deleting it
+        frappe.get_doc({"doctype": "Tender Archive", "ocid": self.ocids[0], "title": self.rows[0]["title"]}).insert(ignore_permissions=True)
+
+        # Act
+        result = purge_expired_tenders(chunk_size=2, archive=True)
+
+        # Assert
+        self.assertEqual(result["archived"], result["deleted"] - 1)
+        self.assertEqual(frappe.db.get_single_value("Tender Sync State", "last_purge_archived"), result["archived"])
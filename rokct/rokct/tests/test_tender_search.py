@@ -0,0 +1,131 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import patch
+from frappe.utils import add_days, now_datetime
+from rokct.rokct.tenders.ingest import normalize_release, bulk_upsert_tenders
+from rokct.rokct.tenders.search import search_tenders
+from rokct.rokct.tenders.alerts import run_saved_search_alerts
+from rokct.rokct.tests.etenders_stub_server import make_release
+
+class TestTenderSearch(FrappeTestCase):
+    def setUp(self):
+        for province in ("Gauteng", "Limpopo"):
+            if not frappe.db.exists("Province", province):
+                frappe.get_doc({"doctype": "Province", "province_name": province}).insert(ignore_permissions=True)
+
+        self.started = now_datetime()
+        self.rows = []
+        for i, (title, province, days) in enumerate([
+            ("Road resurfacing in Polokwane", "Limpopo", 5),
+            ("Supply of school furniture", "Gauteng", 20),
+            ("Road maintenance equipment", "Gauteng", 10),
+        ]):
+            row = normalize_release(make_release(400001 + i), lambda doctype, value: None)
+            row.update({"title": title, "province": province, "tender_end_date": add_days(now_datetime(), days)})
+            self.rows.append(row)
+        bulk_upsert_tenders(self.rows)
+
+    def tearDown(self):
+        frappe.db.rollback()
+
+    def test_filters_facets_and_closing_date_sort(self):
+        result = search_tenders(filters={"province": "Gauteng"})
+        names = [row.name for row in result["results"] if row.name in {r["ocid"] for r in self.rows}]
+
+        self.assertEqual(names, [self.rows[2]["ocid"], self.rows[1]["ocid"]])
+        self.assertGreaterEqual(result["facets"]["province"]["Gauteng"], 2)
+        self.assertNotIn("Limpopo", result["facets"]["province"])
+
+    def test_closed_tenders_are_excluded_by_default(self):
+        frappe.db.set_value("Tender Search Index", self.rows[0]["ocid"], "tender_end_date", add_days(now_datetime(), -1))
+
+        names = [row.name for row in search_tenders(filters={"province": "Limpopo"}, page_length=100)["results"]]
+
+        self.assertNotIn(self.rows[0]["ocid"], names)
+
+    def test_keyword_search_matches_word_prefixes(self):
+        # InnoDB only adds rows to a FULLTEXT index on commit, so this test commits and cleans up itself.
+        frappe.db.commit()
+        try:
+            ocids = {row["ocid"] for row in self.rows}
+            result = search_tenders(query="road equip", page_length=100)
+            self.assertEqual([row.name for row in result["results"] if row.name in ocids], [self.rows[2]["ocid"]])
+
+            result = search_tenders(query="Road", sort="relevance", page_length=100)
+            self.assertEqual(
+                {row.name for row in result["results"] if row.name in ocids},
+                {self.rows[0]["ocid"], self.rows[2]["ocid"]}
+            )
+        finally:
+            for row in self.rows:
+                frappe.delete_doc("Tender", row["ocid"], ignore_permissions=True, force=True)
+            frappe.db.commit()
+
+    def test_users_without_tender_access_cannot_search(self):
+        user = frappe.get_doc({
+            "doctype": "User",
+            "email": f"tender-search-{frappe.generate_hash(length=6)}@example.com",
+            "first_name": "Website",
+            "user_type": "Website User",
+            "send_welcome_email": 0,
+        }).insert(ignore_permissions=True)
+
+        frappe.set_user(user.name)
+        try:
+            with self.assertRaises(frappe.PermissionError):
+                search_tenders(query="road")
+        finally:
+            frappe.set_user("Administrator")
+
+    @patch("rokct.rokct.tenders.alerts.frappe.sendmail")
+    def test_saved_search_alerts_match_new_tenders(self, mock_sendmail):
+        # run_saved_search_alerts commits, so this test cleans up itself.
+        saved_search = frappe.get_doc({
+            "doctype": "Tender Saved Search",
+            "search_name": "Roads in Gauteng",
+            "user": "Administrator",
+            "query": "road equip",
+            "province": "Gauteng",
+            "last_alerted_on": add_days(self.started, -1),
+        }).insert(ignore_permissions=True)
+        self.addCleanup(self._delete_alert_test_data, saved_search.name)
+
+        run_saved_search_alerts()
+
+        mock_sendmail.assert_called_once()
+        self.assertIn("Road maintenance equipment", mock_sendmail.call_args.kwargs["message"])
+        self.assertNotIn("Polokwane", mock_sendmail.call_args.kwargs["message"])
+        self.assertEqual(frappe.db.get_value("Tender Saved Search", saved_search.name, "last_match_count"), 1)
+
+        # A later run only looks at tenders indexed after the watermark, so nothing is sent twice.
+        run_saved_search_alerts()
+        mock_sendmail.assert_called_once()
+
+    @patch("rokct.rokct.tenders.alerts.frappe.sendmail")
+    def test_saved_search_alerts_catch_up_after_an_interrupted_sync(self, mock_sendmail):
+        # Arrange: the tenders were indexed by a sync that failed before alerting,
+        # and the saved search was last alerted before that sync started.
+        saved_search = frappe.get_doc({
+            "doctype": "Tender Saved Search",
+            "search_name": "Gauteng furniture",
+            "user": "Administrator",
+            "query": "furniture",
+            "last_alerted_on": add_days(self.started, -1),
+        }).insert(ignore_permissions=True)
+        self.addCleanup(self._delete_alert_test_data, saved_search.name)
+
+        # Act: the next run starts well after the interrupted one
+        run_saved_search_alerts()
+
+        # Assert
+        mock_sendmail.assert_called_once()
+        self.assertIn("Supply of school furniture", mock_sendmail.call_args.kwargs["message"])
+
+    def _delete_alert_test_data(self, saved_search):
+        frappe.db.rollback()
+        frappe.delete_doc("Tender Saved Search", saved_search, ignore_permissions=True, force=True)
+        for row in self.rows:
+            frappe.delete_doc("Tender", row["ocid"], ignore_permissions=True, force=True)
+        frappe.db.commit()
@@ -0,0 +1,111 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+import os
+import json
+import shutil
+import tempfile
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import patch, MagicMock
+from rokct.rokct.scripts.updater import site_lock, migrate_sites, get_sites_to_migrate
+from rokct.rokct.scripts.migration_fingerprint import FingerprintCache, get_app_fingerprint, explain_changes
+
+class TestFleetMigration(FrappeTestCase):
+    def setUp(self):
+        self.bench_path = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.bench_path, "apps", "rokct", "rokct"))
+        for site in ("a.test.saas.com", "b.test.saas.com"):
+            os.makedirs(os.path.join(self.bench_path, "sites", site))
+            with open(os.path.join(self.bench_path, "sites", site, "apps.txt"), "w") as f:
+                f.write("rokct")
+
+    def tearDown(self):
+        shutil.rmtree(self.bench_path, ignore_errors=True)
+        frappe.db.rollback()
+
+    def _write_progress(self, sites):
+        os.makedirs(os.path.join(self.bench_path, "logs"))
+        with open(os.path.join(self.bench_path, "logs", "updater_progress.json"), "w") as f:
+            json.dump({"started": "2025-10-19 00:00:00", "finished": False, "sites": sites}, f)
+
+    def test_site_lock_is_exclusive(self):
+        lock_path = os.path.join(self.bench_path, "site.lock")
+        with site_lock(lock_path) as first:
+            with site_lock(lock_path) as second:
+                self.assertTrue(first)
+                self.assertFalse(second)
+        with site_lock(lock_path) as again:
+            self.assertTrue(again)
+
+    @patch("rokct.rokct.scripts.updater.subprocess.run")
+    def test_migrate_sites_records_durations(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0)
+
+        summary = migrate_sites(self.bench_path, ["a.test.saas.com", "b.test.saas.com"])
+
+        self.assertCountEqual(summary["migrated"], ["a.test.saas.com", "b.test.saas.com"])
+        self.assertIn("a.test.saas.com", summary["durations"])
+        with open(os.path.join(self.bench_path, "logs", "updater_progress.json")) as f:
+            self.assertTrue(json.load(f)["finished"])
+
+    @patch("rokct.rokct.scripts.updater._clear_migration_approval")
+    @patch("rokct.rokct.scripts.updater.subprocess.run")
+    def test_unfinished_run_resumes(self, mock_run, mock_clear_approval):
+        # Arrange: a previous run crashed after migrating one site to the current code
+        self._write_progress({"a.test.saas.com": {
+            "status": "migrated", "duration": 12.0,
+            "fingerprint": FingerprintCache(self.bench_path).get_target("a.test.saas.com"),
+        }})
+        mock_run.return_value = MagicMock(returncode=0)
+
+        # Act
+        summary = migrate_sites(self.bench_path, ["a.test.saas.com", "b.test.saas.com"])
+
+        # Assert
+        mock_run.assert_called_once()
+        self.assertIn("b.test.saas.com", mock_run.call_args.args[0])
+        self.assertCountEqual(summary["migrated"], ["a.test.saas.com", "b.test.saas.com"])
+        # The crashed run may not have reset approval for the site it migrated.
+        self.assertCountEqual([c.args[0] for c in mock_clear_approval.call_args_list], ["a.test.saas.com", "b.test.saas.com"])
+
+    @patch("rokct.rokct.scripts.updater._clear_migration_approval")
+    @patch("rokct.rokct.scripts.updater.subprocess.run")
+    def test_unfinished_run_for_older_code_migrates_again(self, mock_run, mock_clear_approval):
+        # Arrange: a run that crashed days ago migrated a site to code that has since changed
+        self._write_progress({"a.test.saas.com": {"status": "migrated", "duration": 12.0, "fingerprint": {"rokct": "old"}}})
+        mock_run.return_value = MagicMock(returncode=0)
+
+        # Act
+        summary = migrate_sites(self.bench_path, ["a.test.saas.com"])
+
+        # Assert
+        mock_run.assert_called_once()
+        self.assertEqual(summary["migrated"], ["a.test.saas.com"])
+
+    @patch("rokct.rokct.scripts.updater.frappe.get_all", side_effect=Exception("connection lost"))
+    def test_no_sites_migrate_when_subscriptions_cannot_be_loaded(self, mock_get_all):
+        self.assertEqual(get_sites_to_migrate(["a.test.saas.com", "b.test.saas.com"]), ([], []))
+
+    @patch("rokct.rokct.scripts.updater.subprocess.run")
+    def test_up_to_date_sites_are_skipped(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0)
+        migrate_sites(self.bench_path, ["a.test.saas.com"])
+        mock_run.reset_mock()
+
+        summary = migrate_sites(self.bench_path, ["a.test.saas.com"])
+
+        mock_run.assert_not_called()
+        self.assertEqual(summary["up_to_date"], ["a.test.saas.com"])
+
+    def test_explain_changes_reports_doctype_changes(self):
+        doctype_dir = os.path.join(self.bench_path, "apps", "rokct", "rokct", "rokct", "doctype", "tender")
+        os.makedirs(doctype_dir)
+        with open(os.path.join(doctype_dir, "tender.json"), "w") as f:
+            f.write("{}")
+        stored = {"rokct": get_app_fingerprint(self.bench_path, "rokct")}
+
+        with open(os.path.join(doctype_dir, "tender.json"), "w") as f:
+            f.write('{"fields": []}')
+
+        changes = explain_changes(stored, {"rokct": get_app_fingerprint(self.bench_path, "rokct")})
+        self.assertIn("rokct: doctypes changed", changes)
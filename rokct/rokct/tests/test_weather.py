@@ -0,0 +1,78 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+import frappe
+import time
+from frappe.tests.utils import FrappeTestCase
+from unittest.mock import patch
+from rokct.rokct import weather
+from rokct.rokct.tests.weather_stub_server import WeatherStubServer
+
+class TestWeatherCache(FrappeTestCase):
+    def setUp(self):
+        self.stub = WeatherStubServer().__enter__()
+        settings = frappe._dict({"api_key": "test-key", "default_location": "messina,za", "base_url": self.stub.url})
+        self.settings_patch = patch("rokct.rokct.weather.get_weather_settings", return_value=settings)
+        self.settings_patch.start()
+
+    def tearDown(self):
+        self.settings_patch.stop()
+        self.stub.__exit__()
+        for query in ("polokwane,za", "-23.9,29.45"):
+            frappe.cache().delete_value(weather._cache_key(query))
+
+    def test_nearby_coordinates_share_a_bucket(self):
+        self.assertEqual(weather.normalize_location("-23.91,29.46", "messina,za"), "-23.9,29.45")
+        self.assertEqual(weather.normalize_location(" -23.893, 29.448 ", "messina,za"), "-23.9,29.45")
+        self.assertEqual(weather.normalize_location("Polokwane,  ZA", "messina,za"), "polokwane,za")
+        self.assertEqual(weather.normalize_location("Nancefield", "messina,za"), "messina,za")
+
+    def test_miss_fetches_once_then_serves_from_cache(self):
+        first = weather.get_weather_data("Polokwane, ZA")
+        second = weather.get_weather_data("polokwane,za")
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.stub.queries, ["polokwane,za"])
+
+    @patch("rokct.rokct.weather.frappe.enqueue")
+    def test_stale_entry_is_served_while_revalidating(self, mock_enqueue):
+        stale = {"data": {"current": {"temp_c": 10}}, "fetched_at": time.time() - weather.FRESH_SECONDS - 1}
+        frappe.cache().set_value(weather._cache_key("polokwane,za"), stale)
+
+        self.assertEqual(weather.get_weather_data("Polokwane,ZA"), stale["data"])
+        self.assertEqual(self.stub.queries, [])
+        self.assertEqual(mock_enqueue.call_args.kwargs["query"], "polokwane,za")
+
+    def test_concurrent_miss_waits_for_the_leader(self):
+        cache = frappe.cache()
+        lock_key = cache.make_key("weather_lock::-23.9,29.45")
+        cache.set(lock_key, 1, ex=weather.LOCK_SECONDS)
+        leader_result = {"data": {"current": {"temp_c": 30}}, "fetched_at": time.time()}
+
+        try:
+            with patch("rokct.rokct.weather._get_entry", side_effect=[None, None, leader_result]):
+                result = weather.get_weather_data("-23.91,29.46")
+        finally:
+            cache.delete(lock_key)
+
+        self.assertEqual(result, leader_result["data"])
+        self.assertEqual(self.stub.queries, [])
+
+
+class TestWeatherSettingsCache(FrappeTestCase):
+    def setUp(self):
+        settings = frappe.get_doc("Weather Settings")
+        settings.weatherapi_com_api_key = "test-key"
+        settings.save(ignore_permissions=True)
+
+    def tearDown(self):
+        frappe.db.rollback()
+        weather.clear_settings_cache()
+
+    def test_settings_are_reloaded_when_saved_in_another_process(self):
+        first = weather.get_weather_settings()
+        self.assertIs(weather.get_weather_settings(), first)
+
+        # Another process saving the settings only changes the shared version stamp.
+        frappe.cache().set_value(weather.SETTINGS_VERSION_KEY, frappe.generate_hash(length=10))
+
+        self.assertIsNot(weather.get_weather_settings(), first)
@@ -0,0 +1,53 @@
+# Copyright (c) 2025 ROKCT Holdings
+# For license information, please see license.txt
+# A local stand-in for weatherapi.com `/v1/forecast.json`, used by the weather tests.
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class WeatherStubServer:
+    """Answers every forecast request with a minimal payload and records the queries."""
+
+    def __init__(self, latency=0):
+        self.latency = latency
+        self.queries = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+                stub.queries.append(query)
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                body = json.dumps({
+                    "location": {"name": query},
+                    "current": {"temp_c": 24.0, "condition": {"text": "Sunny"}},
+                    "forecast": {"forecastday": []},
+                }).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
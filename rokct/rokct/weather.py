@@ -1,76 +1,239 @@
 # Copyright (c) 2025 ROKCT Holdings
 # For license information, please see license.txt
+# Weather forecasts from weatherapi.com, cached in Redis.
+#
+# Cache entries are keyed on a normalized query: city names are lower-cased and
+# whitespace-collapsed, and coordinates are snapped to a grid so nearby points share one
+# entry. An entry is fresh for FRESH_SECONDS, after which it is still served while a
+# background job refreshes it, until it expires after STALE_SECONDS. Concurrent misses
+# for the same query are collapsed onto one upstream request with a Redis lock.
 import frappe
+import logging
+import re
 import requests
 import time
-import logging
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+BASE_URL = "http://api.weatherapi.com/v1"
+FORECAST_DAYS = 3
+REQUEST_TIMEOUT = 15
+FRESH_SECONDS = 60 * 60
+STALE_SECONDS = 12 * 60 * 60
+LOCK_SECONDS = 20
+LOCK_POLL_INTERVAL = 0.1
+# Roughly 5.5 km at the equator.
+COORDINATE_BUCKET_DEGREES = 0.05
+DEFAULT_PREWARM_COUNT = 20
+# Prewarming refreshes entries this close to going stale, so they stay fresh until the next hourly run.
+PREWARM_MARGIN_SECONDS = 15 * 60
+MAX_TRACKED_LOCATIONS = 500
+COORDINATES_PATTERN = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+SETTINGS_VERSION_KEY = "weather_settings_version"
+
+_session = None
+_settings = {}
+
+
+def get_session():
+    """A process-wide session so upstream connections are reused between requests."""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        retry = Retry(total=2, backoff_factor=0.25, status_forcelist=[502, 503, 504], allowed_methods=["GET"])
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=10, max_retries=retry)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        _session = session
+    return _session
+
+
+def get_weather_settings():
+    """
+    Weather Settings for the current site, decrypted once per process and reused until
+    the settings are saved again.
+    """
+    site = getattr(frappe.local, "site", None)
+    version = frappe.cache().get_value(SETTINGS_VERSION_KEY)
+    cached = _settings.get(site)
+    if cached and cached.version == version:
+        return cached
+
+    weather_settings = frappe.get_doc("Weather Settings")
+    api_key = weather_settings.get_password("weatherapi_com_api_key", raise_exception=False)
+    if not api_key:
+        raise Exception("Weather API key is not set in Weather Settings")
+
+    cached = frappe._dict({
+        "api_key": api_key,
+        "default_location": weather_settings.default_location or "messina,za",
+        "base_url": frappe.conf.get("weatherapi_base_url") or BASE_URL,
+        "version": version,
+    })
+    _settings[site] = cached
+    return cached
+
+
+def clear_settings_cache():
+    """
+    Makes every process reload Weather Settings. Only a version stamp is kept in Redis;
+    the decrypted API key never leaves the process.
+    """
+    _settings.pop(getattr(frappe.local, "site", None), None)
+    frappe.cache().set_value(SETTINGS_VERSION_KEY, frappe.generate_hash(length=10))
+
+
+def normalize_location(location, default_location):
+    """
+    Returns the upstream query for `location`. Coordinates are snapped to the centre of
+    their grid bucket, and place names are lower-cased with whitespace collapsed.
+    """
+    match = COORDINATES_PATTERN.match(location)
+    if match:
+        lat, lng = (float(value) for value in match.groups())
+        if -90 <= lat <= 90 and -180 <= lng <= 180:
+            lat, lng = (
+                round(round(value / COORDINATE_BUCKET_DEGREES) * COORDINATE_BUCKET_DEGREES, 4)
+                for value in (lat, lng)
+            )
+            return f"{lat:g},{lng:g}"
+        location = default_location
+
+    # Mimics the Laravel implementation: Messina and Nancefield lookups use the default location.
+    lowered = location.lower()
+    if "messina" in lowered or "nancefield" in lowered:
+        location = default_location
+
+    parts = [" ".join(part.split()) for part in location.lower().split(",")]
+    return ",".join(part for part in parts[:2] if part) or default_location.lower()
+
+
+def fetch_forecast(query, settings=None):
+    """Fetches a forecast for a normalized query. Raises `requests.RequestException` on failure."""
+    settings = settings or get_weather_settings()
+    params = {"key": settings.api_key, "q": query, "days": FORECAST_DAYS, "alerts": "yes"}
+    response = get_session().get(f"{settings.base_url}/forecast.json", params=params, timeout=REQUEST_TIMEOUT)
+    if not response.ok:
+        logging.error(f"Weather API request for '{query}' failed with status {response.status_code}: {response.text}")
+    response.raise_for_status()
+    return response.json()
+
+
+def _cache_key(query):
+    return f"weather::{query}"
+
+
+def _get_entry(query):
+    return frappe.cache().get_value(_cache_key(query))
+
+
+def _set_entry(query, data):
+    frappe.cache().set_value(_cache_key(query), {"data": data, "fetched_at": time.time()}, expires_in_sec=STALE_SECONDS)
+
+
+def _record_request(query):
+    cache = frappe.cache()
+    cache.zincrby(cache.make_key("weather_location_hits"), 1, query)
 
-class WeatherService:
-    def __init__(self):
-        self.api_key = frappe.get_doc("Weather Settings").get_password("weatherapi_com_api_key")
-        if not self.api_key:
-            raise Exception("Weather API key is not set in Weather Settings")
-        self.base_url = "http://api.weatherapi.com/v1"
-        self.max_retries = 3
-        self.retry_delay = 1  # seconds
-        self.retryable_status_codes = [502, 503, 504]
-
-    def get_forecast(self, location):
-        # The Laravel example included location parsing logic.
-        # The weatherapi.com 'q' param is flexible, but we will mimic the logic.
-        city, country = self._parse_location(location)
-        search_query = f"{city},{country}" if country else city
-
-        return self._fetch_from_api_with_retry(search_query, 3, "yes")
-
-    def _parse_location(self, location):
-        parts = [part.strip() for part in location.lower().split(',')]
-        city = parts[0]
-        country = parts[1] if len(parts) > 1 else ''
-        return city, country
-
-    def _fetch_from_api_with_retry(self, location_query, days, alerts):
-        last_exception = None
-        for attempt in range(self.max_retries):
-            try:
-                params = {
-                    "key": self.api_key,
-                    "q": location_query,
-                    "days": days,
-                    "alerts": alerts
-                }
-                response = requests.get(f"{self.base_url}/forecast.json", params=params, timeout=15)
-                response.raise_for_status()
-                return response.json()
-
-            except requests.exceptions.HTTPError as e:
-                last_exception = e
-                if e.response.status_code in self.retryable_status_codes:
-                    if attempt < self.max_retries - 1:
-                        # Exponential backoff: 1s, 2s, 4s
-                        delay = self.retry_delay * (2 ** attempt)
-                        logging.warning(f"Weather API attempt {attempt + 1} failed with status {e.response.status_code}. Retrying in {delay}s...")
-                        time.sleep(delay)
-                        continue
-                else:
-                    # Non-retryable HTTP error
-                    logging.error(f"Weather API request failed with status {e.response.status_code}: {e.response.text}")
-                    raise e
-
-            except requests.exceptions.RequestException as e:
-                # Includes connection errors, timeouts, etc.
-                last_exception = e
-                if attempt < self.max_retries - 1:
-                    delay = self.retry_delay * (2 ** attempt)
-                    logging.warning(f"Weather API attempt {attempt + 1} failed: {e}. Retrying in {delay}s...")
-                    time.sleep(delay)
-                    continue
-
-        logging.error(f"Weather API call failed after {self.max_retries} attempts.")
-        raise last_exception
 
 def get_weather_data(location):
-    """Public function to be called by the API layer."""
-    service = WeatherService()
-    return service.get_forecast(location)
+    """
+    Public function to be called by the API layer. Serves fresh entries from the cache,
+    serves stale entries while refreshing them in the background, and collapses
+    concurrent misses for the same location onto one upstream request.
+    """
+    query = normalize_location(location, get_weather_settings().default_location)
+    _record_request(query)
+
+    entry = _get_entry(query)
+    if entry:
+        if time.time() - entry["fetched_at"] > FRESH_SECONDS:
+            frappe.enqueue(
+                "rokct.rokct.weather.refresh_location",
+                queue="short",
+                job_id=f"weather-refresh-{query}",
+                deduplicate=True,
+                query=query
+            )
+        return entry["data"]
+
+    return _fetch_single_flight(query)
+
+
+def _fetch_single_flight(query):
+    cache = frappe.cache()
+    lock_key = cache.make_key(f"weather_lock::{query}")
+
+    if cache.set(lock_key, 1, nx=True, ex=LOCK_SECONDS):
+        try:
+            data = fetch_forecast(query)
+            _set_entry(query, data)
+            return data
+        finally:
+            cache.delete(lock_key)
+
+    # Another request is already fetching this location; wait for its result.
+    deadline = time.monotonic() + LOCK_SECONDS
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = _get_entry(query)
+        if entry:
+            return entry["data"]
+        if cache.get(lock_key) is None:
+            break
+
+    # The leader failed or timed out, so fetch directly rather than fail the request.
+    data = fetch_forecast(query)
+    _set_entry(query, data)
+    return data
+
+
+def refresh_location(query):
+    """Background job that revalidates one stale entry."""
+    entry = _get_entry(query)
+    if entry and time.time() - entry["fetched_at"] <= FRESH_SECONDS:
+        return
+    try:
+        _set_entry(query, fetch_forecast(query))
+    except requests.exceptions.RequestException:
+        frappe.log_error(frappe.get_traceback(), f"Weather Refresh Failed for {query}")
+
+
+def get_top_locations(limit):
+    cache = frappe.cache()
+    return [
+        member.decode() if isinstance(member, bytes) else member
+        for member in cache.zrevrange(cache.make_key("weather_location_hits"), 0, limit - 1)
+    ]
+
+
+def prewarm_weather_cache():
+    """
+    Scheduled job that refreshes the most requested locations before they go stale, so
+    popular lookups never wait on the upstream API. Runs on every site that serves the
+    weather endpoint, since each site has its own cache and popularity ranking.
+    """
+    limit = int(frappe.conf.get("weather_prewarm_count") or DEFAULT_PREWARM_COUNT)
+    due = []
+    for query in get_top_locations(limit):
+        entry = _get_entry(query)
+        if not entry or time.time() - entry["fetched_at"] > FRESH_SECONDS - PREWARM_MARGIN_SECONDS:
+            due.append(query)
+    if not due:
+        return
+
+    settings = get_weather_settings()
+    with ThreadPoolExecutor(max_workers=min(len(due), 5)) as executor:
+        futures = {query: executor.submit(fetch_forecast, query, settings) for query in due}
+
+    for query, future in futures.items():
+        try:
+            _set_entry(query, future.result())
+        except requests.exceptions.RequestException:
+            frappe.log_error(frappe.get_traceback(), f"Weather Prewarm Failed for {query}")
 
+    # Keep the popularity ranking bounded.
+    cache = frappe.cache()
+    cache.zremrangebyrank(cache.make_key("weather_location_hits"), 0, -(MAX_TRACKED_LOCATIONS + 1))
@@ -1,60 +1,217 @@
+import hashlib
+import json
+import random
+import re
+
 import frappe
 from .responder import respondNotFound
 
-def __user(input=None):
-    # get session user if input is not provided
-    if not input:
-        input = frappe.session.user
-    res = frappe.get_all("User", or_filters={"email": input, "username": input})
+# Errors are not written to the database while the request is handled. Each occurrence
+# increments a per-fingerprint counter in Redis, and a sample of the request is kept for
+# the first occurrence in each flush window and then for `api_error_log_sample_rate` of
+# the repeats. `flush_api_error_buffer` writes them in one batch on every scheduler tick,
+# one API Error Log row per fingerprint, and only then removes what it wrote from Redis.
+COUNTS_KEY = "api_error_log_counts"
+SAMPLES_KEY = "api_error_log_samples"
+LAST_SEEN_KEY = "api_error_log_last_seen"
+DEFAULT_SAMPLE_RATE = 0.05
+# A count whose sample never arrived is written without one after this many seconds.
+UNSAMPLED_MAX_AGE = 600
+# Removes flushed occurrences from the buffer. Occurrences counted, and samples captured,
+# after the buffer was read stay for the next flush.
+ACKNOWLEDGE_SCRIPT = """
+local count = redis.call('HINCRBY', KEYS[1], ARGV[1], -tonumber(ARGV[2]))
+if count <= 0 then
+    redis.call('HDEL', KEYS[1], ARGV[1])
+    redis.call('HDEL', KEYS[3], ARGV[1])
+end
+if ARGV[3] ~= '' and redis.call('HGET', KEYS[2], ARGV[1]) == ARGV[3] then
+    redis.call('HDEL', KEYS[2], ARGV[1])
+end
+return count
+"""
+# Header values that must not end up in the log.
+REDACTED_HEADERS = {"authorization", "cookie", "x-frappe-csrf-token"}
+FRAME_PATTERN = re.compile(r'^\s*File "([^"]+)", line \d+, in (.+)$', re.MULTILINE)
+
+
+def __user():
+    # The session user is already the User name, so no lookup is needed.
+    session = getattr(frappe.local, "session", None)
+    return (session and session.user) or "Guest"
+
+
+def get_endpoint():
+    request_parameters = frappe.local.form_dict or {}
+    request = getattr(frappe.local, "request", None)
+    return request_parameters.get("cmd") or (request.path if request else "") or "unknown"
+
+
+def get_fingerprint(endpoint, traceback_text):
+    """
+    Hashes the endpoint, the exception type and the stack frames (file and function, not
+    line numbers or the exception message), so repeats of one error share a fingerprint
+    even when the message contains request-specific values.
+    """
+    frames = FRAME_PATTERN.findall(traceback_text or "")
+    last_line = (traceback_text or "").strip().splitlines()[-1:] or [""]
+    exception_type = last_line[0].split(":", 1)[0]
+    return hashlib.sha1(json.dumps([endpoint, exception_type, frames]).encode()).hexdigest()
+
 
-    if len((res)) == 0:
-        return "Guest"
+def _get_sample_rate():
+    return float(frappe.conf.get("api_error_log_sample_rate", DEFAULT_SAMPLE_RATE))
 
-    return frappe.get_doc("User", res[0].name).name
+
+def _build_sample(endpoint, traceback_text, mess):
+    request_parameters = frappe.local.form_dict
+    request = getattr(frappe.local, "request", None)
+    headers = {
+        k: ("<redacted>" if k.lower() in REDACTED_HEADERS else v)
+        for k, v in (request.headers.items() if request else [])
+    }
+    user_name = __user()
+
+    message = "User Id : {}\n\nRequest Parameters : {}\n\nHeaders : {}".format(
+        str(user_name), str(request_parameters), str(headers)
+    )
+    title = endpoint.split(".")[-1].split("/")[-1].replace("_", " ").title() + " API Error"
+
+    return {
+        "title": title,
+        "endpoint": endpoint,
+        "user": user_name,
+        "error": frappe.as_unicode(traceback_text + "\n\n" + str(mess) + "\n\n" + message),
+        "captured_on": frappe.utils.now(),
+    }
 
 
 def log_api_error(mess=""):
+    """
+    Log API error to API Error Log
+
+    This method should be called before API responds the HTTP status code. The error is
+    buffered in Redis and written by `flush_api_error_buffer`. Returns its fingerprint.
+    """
     try:
-        """
-        Log API error to Error Log
-
-        This method should be called before API responds the HTTP status code
-        """
-
-        # AI ALERT:
-        # the title and message may be swapped
-        # the better API for this is log_error(title, message), and used in many cases this way
-        # this hack tries to be smart about whats a title (single line ;-)) and fixes it
-        request_parameters = frappe.local.form_dict
-        headers = {k: v for k, v in frappe.local.request.headers.items()}
-        user_name = __user()
-
-        if len(user_name) == 0:
-            message = "Request Parameters : {}\n\nHeaders : {}".format(
-                str(request_parameters), str(headers)
-            )
-        else:
-            message = (
-                "User Id : {}\n\nRequest Parameters : {}\n\nHeaders : {}".format(
-                    str(user_name), str(request_parameters), str(headers)
-                )
-            )
+        traceback_text = frappe.get_traceback()
+        endpoint = get_endpoint()
+        fingerprint = get_fingerprint(endpoint, traceback_text)
 
-        title = (
-            request_parameters.get("cmd").split(".")[-1].replace("_", " ").title()
-            + " API Error"
-        )
+        cache = frappe.cache()
+        pipe = cache.pipeline()
+        pipe.hincrby(cache.make_key(COUNTS_KEY), fingerprint, 1)
+        pipe.hset(cache.make_key(LAST_SEEN_KEY), fingerprint, frappe.utils.now())
+        pipe.hexists(cache.make_key(SAMPLES_KEY), fingerprint)
+        count, _, has_sample = pipe.execute()
 
-        error = frappe.get_traceback() + "\n\n" + str(mess) + "\n\n" + message
-        log = frappe.get_doc(
-            dict(doctype="API Error Log", error=frappe.as_unicode(error), title=title)
-        ).insert(ignore_permissions=True)
-        frappe.db.commit()
+        # Only sampled occurrences pay for formatting the request details. The first one in a
+        # window is always sampled, checked by presence rather than `count == 1` so a sample
+        # that failed to build is retried on the next occurrence.
+        if not has_sample or random.random() < _get_sample_rate():
+            sample = _build_sample(endpoint, traceback_text, mess)
+            pipe = cache.pipeline()
+            pipe.hset(cache.make_key(SAMPLES_KEY), fingerprint, json.dumps(sample, default=str))
+            pipe.execute()
 
-        return log
+        return fingerprint
 
     except Exception:
         frappe.log_error(
             message=frappe.get_traceback(),
             title="API Error Log Error",
-        )
\ No newline at end of file
+        )
+
+
+def _decode(value):
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def flush_api_error_buffer():
+    """
+    Scheduled job that writes buffered API errors: repeats of a logged fingerprint bump
+    its row's occurrences, and new fingerprints get a row built from their sample.
+    The buffer is only reduced by what was written after the commit, so a failed write
+    leaves it for the next run. Returns the number of occurrences written.
+    """
+    cache = frappe.cache()
+    keys = [cache.make_key(key) for key in (COUNTS_KEY, SAMPLES_KEY, LAST_SEEN_KEY)]
+
+    pipe = cache.pipeline()
+    for key in keys:
+        pipe.hgetall(key)
+    counts, raw_samples, last_seen = pipe.execute()
+
+    counts = {_decode(k): int(v) for k, v in counts.items()}
+    raw_samples = {_decode(k): _decode(v) for k, v in raw_samples.items()}
+    samples = {k: json.loads(v) for k, v in raw_samples.items()}
+    last_seen = {_decode(k): _decode(v) for k, v in last_seen.items()}
+    fingerprints = set(counts) | set(samples)
+    if not fingerprints:
+        return 0
+
+    existing = {
+        row.fingerprint: row.name
+        for row in frappe.get_all(
+            "API Error Log",
+            filters={"fingerprint": ("in", list(fingerprints))},
+            fields=["name", "fingerprint"],
+            order_by="creation asc"
+        )
+    }
+
+    unsampled_before = frappe.utils.add_to_date(frappe.utils.now_datetime(), seconds=-UNSAMPLED_MAX_AGE)
+    written = 0
+    flushed = []
+    for fingerprint in sorted(fingerprints):
+        count = counts.get(fingerprint, 0)
+        sample = samples.get(fingerprint)
+        seen_at = last_seen.get(fingerprint) or frappe.utils.now()
+
+        if fingerprint in existing:
+            values = {"occurrences": count, "last_seen": seen_at, "name": existing[fingerprint], "now": frappe.utils.now()}
+            error_update = ""
+            if sample:
+                values["error"] = sample["error"]
+                error_update = ", error = %(error)s"
+            frappe.db.sql(
+                f"""
+                UPDATE `tabAPI Error Log`
+                SET occurrences = IFNULL(occurrences, 1) + %(occurrences)s, last_seen = %(last_seen)s,
+                    seen = 0, modified = %(now)s{error_update}
+                WHERE name = %(name)s
+                """,
+                values
+            )
+        elif sample or frappe.utils.get_datetime(seen_at) < unsampled_before:
+            # Without a sample (it failed to build), the row still records the occurrences.
+            sample = sample or {
+                "title": "API Error", "endpoint": None, "user": None, "captured_on": seen_at,
+                "error": "No request sample was captured for this error.",
+            }
+            frappe.get_doc({
+                "doctype": "API Error Log",
+                "title": sample["title"],
+                "endpoint": sample["endpoint"],
+                "user": sample["user"],
+                "error": sample["error"],
+                "fingerprint": fingerprint,
+                "occurrences": max(count, 1),
+                "first_seen": sample["captured_on"],
+                "last_seen": seen_at,
+            }).insert(ignore_permissions=True)
+        else:
+            # The sample is probably being captured right now; keep the count for the next flush.
+            continue
+        flushed.append(fingerprint)
+        written += count
+
+    frappe.db.commit()
+
+    if flushed:
+        pipe = cache.pipeline()
+        for fingerprint in flushed:
+            pipe.eval(ACKNOWLEDGE_SCRIPT, len(keys), *keys, fingerprint, counts.get(fingerprint, 0), raw_samples.get(fingerprint, ""))
+        pipe.execute()
+
+    return written
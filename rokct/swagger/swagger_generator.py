@@ -1,19 +1,29 @@
 # Copyright (c) 2025 ROKCT Holdings
 # For license information, please see license.txt
 import ast
+import gzip
+import hashlib
 import importlib.util
 import inspect
 import json
+import multiprocessing
 import os
 import re
 import urllib.parse
 import traceback
 import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 import frappe
 from pydantic import BaseModel
 from datetime import datetime, date
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 def find_pydantic_model_in_decorator(node):
     """Find the name of the Pydantic model used in the validate_request decorator.
 
@@ -54,7 +64,7 @@ def get_pydantic_model_schema(model_name, module):
             return model.model_json_schema()
     return None
 
-def process_function(app_name, module_name, func_name, func, swagger, module, app_rename_map):
+def process_function(app_name, module_name, func_name, func, swagger, module, app_rename_map, on_error=None):
     """Process each function to update the Swagger paths.
 
     Args:
@@ -64,6 +74,8 @@ def process_function(app_name, module_name, func_name, func, swagger, module, ap
         func (function): The function object.
         swagger (dict): The Swagger specification to be updated.
         module (module): The module where the function is defined.
+        on_error (callable): Receives error messages instead of `frappe.log_error`,
+            for callers without a database connection.
     """
     try:
         source_code = inspect.getsource(func)
@@ -158,7 +170,7 @@ def process_function(app_name, module_name, func_name, func, swagger, module, ap
         }
     except Exception as e:
         # Log any errors that occur during processing
-        frappe.log_error(
+        (on_error or frappe.log_error)(
             f"Error processing function {func_name} in module {module_name}: {str(e)}"
         )
 
@@ -177,69 +189,110 @@ def load_module_from_file(file_path):
     spec.loader.exec_module(module)
     return module
 
-def get_doctype_schema(doctype, example_doc=None):
-    """Dynamically generate a schema for a given DocType, including custom fields and child tables."""
+# Define system fields that are read-only
+READ_ONLY_FIELDS = ["name", "creation", "modified", "owner"]
+
+
+def get_required_fields():
+    """Returns the mandatory fieldnames of every DocType, read with a single query."""
+    required_fields = {}
+    for parent, fieldname in frappe.db.sql("SELECT parent, fieldname FROM `tabDocField` WHERE reqd = 1"):
+        required_fields.setdefault(parent, set()).add(fieldname)
+    return required_fields
+
+
+def extract_schema_fields(doctype, required_fields, link_enums):
+    """Copies what a schema needs from the DocType meta into plain dicts.
+
+    The result can be pickled and turned into a schema by `build_schema` in a worker
+    process that has no database connection. `link_enums` caches the enum values of
+    Link targets across DocTypes.
+    """
     meta = frappe.get_meta(doctype)
+    reqd = required_fields.get(doctype, ())
+    fields = []
+    for field in meta.fields:
+        enum = None
+        if field.fieldtype == "Link" and field.options:
+            # Add enum if the field is a Link to a small, fixed-value DocType
+            if field.options not in link_enums:
+                link_enums[field.options] = frappe.db.get_list(field.options, pluck="name") if frappe.get_meta(field.options).issingle else None
+            enum = link_enums[field.options]
+
+        fields.append({
+            "fieldname": field.fieldname,
+            "fieldtype": field.fieldtype,
+            "label": field.label,
+            "options": field.options,
+            "description": field.description,
+            "reqd": field.fieldname in reqd,
+            "enum": enum,
+        })
+    return fields
+
+
+def build_schema(fields, example_doc=None, child_fields=None):
+    """Builds the schema for a DocType from fields extracted by `extract_schema_fields`.
+
+    `child_fields` maps each child table DocType to its extracted fields. Child table
+    schemas are built without it, so tables nested in child tables are not expanded.
+    """
     schema_properties = {}
     required_fields = []
     example_values = {}
 
-    # Define system fields that are read-only
-    read_only_fields = ["name", "creation", "modified", "owner"]
-
-    for field in meta.fields:
+    for field in fields:
+        fieldname = field["fieldname"]
+        fieldtype = field["fieldtype"]
         field_schema = {}
 
         # Add field descriptions
-        if field.description:
-            field_schema["description"] = field.description
+        if field["description"]:
+            field_schema["description"] = field["description"]
 
         # Add required constraint
-        if frappe.db.get_value("DocField", {"parent": doctype, "fieldname": field.fieldname}, "reqd"):
-            required_fields.append(field.fieldname)
+        if field["reqd"]:
+            required_fields.append(fieldname)
 
         # Add read-only flag for system fields
-        if field.fieldname in read_only_fields:
+        if fieldname in READ_ONLY_FIELDS:
             field_schema["readOnly"] = True
 
         # Get the value from the example doc, if it exists
-        example_val = example_doc.get(field.fieldname) if example_doc else None
+        example_val = example_doc.get(fieldname) if example_doc and isinstance(example_doc, dict) else None
 
-        if field.fieldtype == "Table":
-            child_doctype = field.options
+        if fieldtype == "Table" and child_fields is not None:
+            child_doctype = field["options"]
             if child_doctype:
-                child_example_data = example_doc.get(field.fieldname, []) if example_doc else None
-                child_schema = get_child_table_schema(child_doctype, child_example_data)
+                child_example_data = example_doc.get(fieldname, []) if example_doc else None
+                child_schema = build_schema(child_fields[child_doctype], child_example_data)
                 field_schema.update({
                     "type": "array",
                     "items": child_schema
                 })
-                example_values[field.fieldname] = [child_schema.get("example", {})] if child_schema.get("example") else []
-        elif field.fieldtype in ["Data", "Text", "Read Only", "Link", "HTML Editor"]:
+                example_values[fieldname] = [child_schema.get("example", {})] if child_schema.get("example") else []
+        elif fieldtype in ["Data", "Text", "Read Only", "Link", "HTML Editor"]:
             field_schema["type"] = "string"
-            if field.fieldtype == "Link" and field.options:
-                # Add enum if the field is a Link to a small, fixed-value DocType
-                if frappe.get_meta(field.options).issingle:
-                     # For simplicity, we'll assume it's a fixed list
-                     field_schema["enum"] = frappe.db.get_list(field.options, pluck="name")
-            example_values[field.fieldname] = example_val.isoformat() if isinstance(example_val, (date, datetime)) else (example_val if example_val is not None else f"Example {field.label}")
-        elif field.fieldtype in ["Int", "Check"]:
+            if field["enum"] is not None:
+                field_schema["enum"] = field["enum"]
+            example_values[fieldname] = example_val.isoformat() if isinstance(example_val, (date, datetime)) else (example_val if example_val is not None else f"Example {field['label']}")
+        elif fieldtype in ["Int", "Check"]:
             field_schema["type"] = "integer"
-            example_values[field.fieldname] = example_val if example_val is not None else 0
-        elif field.fieldtype in ["Float", "Currency", "Percent"]:
+            example_values[fieldname] = example_val if example_val is not None else 0
+        elif fieldtype in ["Float", "Currency", "Percent"]:
             field_schema["type"] = "number"
-            example_values[field.fieldname] = example_val if example_val is not None else 0.0
-        elif field.fieldtype == "Date":
+            example_values[fieldname] = example_val if example_val is not None else 0.0
+        elif fieldtype == "Date":
             field_schema["type"] = "string"
             field_schema["format"] = "date"
-            example_values[field.fieldname] = example_val.isoformat() if isinstance(example_val, (date, datetime)) else "2025-09-04"
-        elif field.fieldtype == "Datetime":
+            example_values[fieldname] = example_val.isoformat() if isinstance(example_val, (date, datetime)) else "2025-09-04"
+        elif fieldtype == "Datetime":
             field_schema["type"] = "string"
             field_schema["format"] = "date-time"
-            example_values[field.fieldname] = example_val.isoformat() if isinstance(example_val, (date, datetime)) else "2025-09-04T00:00:00Z"
+            example_values[fieldname] = example_val.isoformat() if isinstance(example_val, (date, datetime)) else "2025-09-04T00:00:00Z"
         # Add other field types as needed
 
-        schema_properties[field.fieldname] = field_schema
+        schema_properties[fieldname] = field_schema
 
     schema = {
         "type": "object",
@@ -252,68 +305,21 @@ def get_doctype_schema(doctype, example_doc=None):
 
     return schema
 
-def get_child_table_schema(child_doctype, example_data=None):
-    """Dynamically generate a schema for a child DocType."""
-    child_meta = frappe.get_meta(child_doctype)
-    schema_properties = {}
-    required_fields = []
-    example_values = {}
-
-    # Define system fields that are read-only
-    read_only_fields = ["name", "creation", "modified", "owner"]
 
-    for field in child_meta.fields:
-        field_schema = {}
-
-        # Add field descriptions
-        if field.description:
-            field_schema["description"] = field.description
-
-        # Add required constraint
-        if frappe.db.get_value("DocField", {"parent": child_doctype, "fieldname": field.fieldname}, "reqd"):
-            required_fields.append(field.fieldname)
-
-        # Add read-only flag for system fields
-        if field.fieldname in read_only_fields:
-            field_schema["readOnly"] = True
-
-        # Get the value from the example data, if it exists
-        example_val = example_data.get(field.fieldname) if example_data and isinstance(example_data, dict) else None
-
-        if field.fieldtype in ["Data", "Text", "Read Only", "Link", "HTML Editor"]:
-            field_schema["type"] = "string"
-            if field.fieldtype == "Link" and field.options:
-                if frappe.get_meta(field.options).issingle:
-                     field_schema["enum"] = frappe.db.get_list(field.options, pluck="name")
-            example_values[field.fieldname] = example_val.isoformat() if isinstance(example_val, (date, datetime)) else (example_val if example_val is not None else f"Example {field.label}")
-        elif field.fieldtype in ["Int", "Check"]:
-            field_schema["type"] = "integer"
-            example_values[field.fieldname] = example_val if example_val is not None else 0
-        elif field.fieldtype in ["Float", "Currency", "Percent"]:
-            field_schema["type"] = "number"
-            example_values[field.fieldname] = example_val if example_val is not None else 0.0
-        elif field.fieldtype == "Date":
-            field_schema["type"] = "string"
-            field_schema["format"] = "date"
-            example_values[field.fieldname] = example_val.isoformat() if isinstance(example_val, (date, datetime)) else "2025-09-04"
-        elif field.fieldtype == "Datetime":
-            field_schema["type"] = "string"
-            field_schema["format"] = "date-time"
-            example_values[field.fieldname] = example_val.isoformat() if isinstance(example_val, (date, datetime)) else "2025-09-04T00:00:00Z"
-        # Add other field types as needed
-
-        schema_properties[field.fieldname] = field_schema
-
-    schema = {
-        "type": "object",
-        "properties": schema_properties,
-        "example": example_values
+def extract_child_fields(fields, required_fields, link_enums):
+    """Extracts the fields of every child table referenced by `fields`."""
+    return {
+        field["options"]: extract_schema_fields(field["options"], required_fields, link_enums)
+        for field in fields
+        if field["fieldtype"] == "Table" and field["options"]
     }
 
-    if required_fields:
-        schema["required"] = required_fields
 
-    return schema
+def get_doctype_schema(doctype, example_doc=None):
+    """Dynamically generate a schema for a given DocType, including custom fields and child tables."""
+    required_fields, link_enums = get_required_fields(), {}
+    fields = extract_schema_fields(doctype, required_fields, link_enums)
+    return build_schema(fields, example_doc, extract_child_fields(fields, required_fields, link_enums))
 
 def copy_api_files():
     """
@@ -359,141 +365,893 @@ def copy_api_files():
 
     return log_messages
 
-@frappe.whitelist(allow_guest=True)
-def generate_swagger_json():
-    """Generate Swagger JSON documentation for all API methods.
+# Bump to invalidate every cached module and doctype after changing the generator output.
+GENERATOR_CACHE_VERSION = 1
+CACHE_FILE = "swagger_generation_cache.json"
+# Files written by every run that are not per-module specs.
+INDEX_FILE = "index.json"
+FIXED_OUTPUT_FILES = {"swagger-full.json", "modules.json", INDEX_FILE}
+DEFAULT_MAX_WORKERS = 8
+# One fragment per tag is written here, relative to the output directory.
+TAG_FRAGMENT_DIR = "tags"
+HTTP_METHODS = {"get", "put", "post", "delete", "options", "head", "patch", "trace"}
+COMPRESSED_SUFFIXES = (".gz", ".br")
+BROTLI_QUALITY = 11
+# Brotli at full quality is slow on multi-megabyte specs, so large files use a faster level.
+LARGE_FILE_BROTLI_QUALITY = 9
+LARGE_FILE_BYTES = 4 * 1024 * 1024
+
+
+def get_base_swagger():
+    """Returns the skeleton shared by the full spec and every module spec."""
+    base_swagger = {
+        "openapi": "3.0.0",
+        "info": {
+            "title": "PLATFORM API",
+            "version": "v1.0.0",
+        },
+        "paths": {},
+        "components": {
+            "schemas": {
+                "Error": {
+                    "type": "object",
+                    "properties": {
+                        "exc_type": {"type": "string", "description": "The type of the exception."},
+                        "exc": {"type": "string", "description": "The stack trace of the exception."},
+                        "message": {"type": "string", "description": "A human-readable error message."},
+                    }
+                },
+                "Success": {
+                    "type": "object",
+                    "properties": {
+                        "data": {"type": "object", "description": "The data returned by the API."}
+                    }
+                }
+            },
+            "securitySchemes": {
+                "BasicAuth": {
+                    "type": "http",
+                    "scheme": "basic",
+                    "description": "Standard HTTP Basic Authentication with API Key and API Secret. Example: `Authorization: Basic <base64-encoded api_key:api_secret>`"
+                },
+                "BearerAuth": {
+                    "type": "http",
+                    "scheme": "bearer",
+                    "bearerFormat": "JWT",
+                    "description": "Bearer token authentication. Example: `Authorization: Bearer <token>`"
+                }
+            }
+        },
+        "security": [
+            {"BasicAuth": []},
+            {"BearerAuth": []}
+        ],
+        "tags": []
+    }
 
-    This function processes all Python files in the `api` directories of installed apps
-    to generate a Swagger JSON file that describes the API methods.
-    """
-    swagger_settings = frappe.get_single("Swagger Settings")
-    swagger_settings.generation_status = "In Progress"
-    swagger_settings.last_generation_time = frappe.utils.now_datetime()
-    swagger_settings.generation_log = ""  # Clear previous logs
-    swagger_settings.save(ignore_permissions=True)
-    frappe.db.commit()
+    # Define common error responses for reuse
+    base_swagger["components"]["responses"] = {
+        "UnauthorizedError": {
+            "description": "Authentication information is missing or invalid.",
+            "content": {
+                "application/json": {
+                    "schema": {"$ref": "#/components/schemas/Error"},
+                    "examples": {
+                        "Unauthorized": {
+                            "value": {
+                                "exc_type": "frappe.exceptions.AuthenticationError",
+                                "exc": "Traceback (most recent call last):...",
+                                "message": "Authentication failed"
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        "NotFoundError": {
+            "description": "The requested resource could not be found.",
+            "content": {
+                "application/json": {
+                    "schema": {"$ref": "#/components/schemas/Error"},
+                    "examples": {
+                        "Not Found": {
+                            "value": {
+                                "exc_type": "frappe.exceptions.DoesNotExistError",
+                                "exc": "Traceback (most recent call last):...",
+                                "message": "The resource was not found"
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        "BadRequestError": {
+            "description": "The request was malformed or invalid.",
+            "content": {
+                "application/json": {
+                    "schema": {"$ref": "#/components/schemas/Error"},
+                    "examples": {
+                        "Bad Request": {
+                            "value": {
+                                "exc_type": "frappe.exceptions.ValidationError",
+                                "exc": "Traceback (most recent call last):...",
+                                "message": "Mandatory field 'title' is not set."
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+    return base_swagger
+
+
+def new_module_spec(base_swagger):
+    return {
+        "openapi": "3.0.0",
+        "info": {
+            "title": "PLATFORM API",
+            "version": "v1.0.0"
+        },
+        "paths": {},
+        "tags": [],
+        "components": base_swagger["components"],
+        "security": base_swagger["security"]
+    }
 
-    skipped_items_log = []
-    app_to_modules_map = {}
 
-    try:
-        # Get settings
-        excluded_modules = {d.module.lower() for d in swagger_settings.get("excluded_modules", [])}
-        excluded_doctypes = {d.doctype for d in swagger_settings.get("excluded_doctypes", [])}
-        app_rename_map = {rule.original_name.lower(): rule.new_name for rule in swagger_settings.get("app_renaming_rules", [])}
+def build_api_module_spec(app, file_path, module_name, display_app_name, base_swagger, app_rename_map, on_error=None):
+    """Imports one API file and builds the spec for its whitelisted endpoints."""
+    module = load_module_from_file(file_path)
+    module_spec = new_module_spec(base_swagger)
 
+    tag_name = f"{display_app_name} - {module_name}"
+    description_app_name = display_app_name if display_app_name.lower().endswith(" app") else f"{display_app_name} app"
+    module_spec["tags"].append({"name": tag_name, "description": f"Endpoints for the **{module_name}** module in the **{description_app_name}**."})
 
-        # Define the output directory and ensure it exists
-        output_dir = os.path.join(frappe.get_app_path('rokct'), 'public', 'api')
-        os.makedirs(output_dir, exist_ok=True)
+    for func_name, func in inspect.getmembers(module, inspect.isfunction):
+        process_function(app, module_name, func_name, func, module_spec, module, app_rename_map, on_error)
 
-        # Clean up old JSON files before generating new ones
-        for filename in os.listdir(output_dir):
-            if filename.endswith(".json"):
-                os.remove(os.path.join(output_dir, filename))
+    return module_spec
 
-        # Initialize the Swagger specification
-        base_swagger = {
-            "openapi": "3.0.0",
-            "info": {
-                "title": "PLATFORM API",
-                "version": "v1.0.0",
-            },
-            "paths": {},
-            "components": {
-                "schemas": {
-                    "Error": {
-                        "type": "object",
-                        "properties": {
-                            "exc_type": {"type": "string", "description": "The type of the exception."},
-                            "exc": {"type": "string", "description": "The stack trace of the exception."},
-                            "message": {"type": "string", "description": "A human-readable error message."},
-                        }
-                    },
-                    "Success": {
-                        "type": "object",
-                        "properties": {
-                            "data": {"type": "object", "description": "The data returned by the API."}
-                        }
+
+def get_doctype_operation_ids(doctype, doctype_meta, app_rename_map):
+    sanitized_doctype = doctype.replace(" ", "_")
+
+    # Default operation IDs
+    op_ids = {
+        "get": f"get_api_v1_resource_{sanitized_doctype}",
+        "list": f"get_api_v1_resource_{sanitized_doctype}",
+        "create": f"post_api_v1_resource_{sanitized_doctype}",
+        "update": f"put_api_v1_resource_{sanitized_doctype}",
+        "delete": f"delete_api_v1_resource_{sanitized_doctype}",
+    }
+
+    # Custom operation IDs for 'paas' module
+    if doctype_meta.module.lower() == 'paas':
+        try:
+            # Dynamically find the app name from the module definition
+            module_def = frappe.get_doc("Module Def", doctype_meta.module)
+            app_name_for_path = app_rename_map.get(module_def.app_name, module_def.app_name)
+
+            # Construct the custom prefix for the operationId
+            prefix = f"/api/v1/method/{app_name_for_path}.{doctype_meta.module.lower()}"
+
+            # Set the custom operation IDs
+            op_ids = {
+                "get": f"{prefix}.get_{sanitized_doctype}",
+                "list": f"{prefix}.list_{sanitized_doctype}",
+                "create": f"{prefix}.create_{sanitized_doctype}",
+                "update": f"{prefix}.update_{sanitized_doctype}",
+                "delete": f"{prefix}.delete_{sanitized_doctype}",
+            }
+        except frappe.DoesNotExistError:
+            # If Module Def is not found for some reason, log it and fall back to default operation IDs
+            frappe.log_error(f"Swagger Generation: Module Def '{doctype_meta.module}' not found for DocType '{doctype}'.")
+
+    return op_ids
+
+
+def get_doctype_paths(doctype, issingle, doctype_schema, tag_name, op_ids):
+    """Returns the resource endpoints for one DocType, keyed by path."""
+    endpoint = f"/api/v1/resource/{urllib.parse.quote(doctype)}"
+
+    if issingle:
+        # Handle single DocTypes
+        return {
+            endpoint: {
+                "get": {
+                    "summary": f"Get {doctype}",
+                    "operationId": op_ids["get"],
+                    "security": [{"BasicAuth": []}, {"BearerAuth": []}],
+                    "tags": [tag_name],
+                    "responses": {
+                        "200": {
+                            "description": f"Returns the {doctype} document.",
+                            "content": {
+                                "application/json": {
+                                    "schema": {
+                                        "type": "object",
+                                        "properties": {"data": doctype_schema}
+                                    }
+                                }
+                            }
+                        },
+                        "401": {"$ref": "#/components/responses/UnauthorizedError"}
                     }
                 },
-                "securitySchemes": {
-                    "BasicAuth": {
-                        "type": "http",
-                        "scheme": "basic",
-                        "description": "Standard HTTP Basic Authentication with API Key and API Secret. Example: `Authorization: Basic <base64-encoded api_key:api_secret>`"
+                "put": {
+                    "summary": f"Update {doctype}",
+                    "operationId": op_ids["update"],
+                    "security": [{"BasicAuth": []}, {"BearerAuth": []}],
+                    "tags": [tag_name],
+                    "requestBody": {
+                        "description": f"The {doctype} document to be updated.",
+                        "required": True,
+                        "content": {
+                            "application/json": {"schema": doctype_schema}
+                        }
                     },
-                    "BearerAuth": {
-                        "type": "http",
-                        "scheme": "bearer",
-                        "bearerFormat": "JWT",
-                        "description": "Bearer token authentication. Example: `Authorization: Bearer <token>`"
+                    "responses": {
+                        "200": {
+                            "description": f"Successfully updated the {doctype} document.",
+                            "content": {
+                                "application/json": {
+                                    "schema": {"$ref": "#/components/schemas/Success"}
+                                }
+                            }
+                        },
+                        "400": {"$ref": "#/components/responses/BadRequestError"},
+                        "401": {"$ref": "#/components/responses/UnauthorizedError"}
                     }
                 }
-            },
-            "security": [
-                {"BasicAuth": []},
-                {"BearerAuth": []}
-            ],
-            "tags": []
+            }
         }
 
-        # Define common error responses for reuse
-        base_swagger["components"]["responses"] = {
-            "UnauthorizedError": {
-                "description": "Authentication information is missing or invalid.",
-                "content": {
-                    "application/json": {
-                        "schema": {"$ref": "#/components/schemas/Error"},
-                        "examples": {
-                            "Unauthorized": {
-                                "value": {
-                                    "exc_type": "frappe.exceptions.AuthenticationError",
-                                    "exc": "Traceback (most recent call last):...",
-                                    "message": "Authentication failed"
+    # Handle regular DocTypes
+    return {
+        endpoint: {
+            "get": {
+                "summary": f"List {doctype}",
+                "operationId": op_ids["list"],
+                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
+                "tags": [tag_name],
+                "parameters": [
+                    {
+                        "name": "limit_start",
+                        "in": "query",
+                        "description": "Start fetching records from this index.",
+                        "required": False,
+                        "schema": {
+                            "type": "integer",
+                            "default": 0
+                        }
+                    },
+                    {
+                        "name": "limit_page_length",
+                        "in": "query",
+                        "description": "Number of records to return in this page.",
+                        "required": False,
+                        "schema": {
+                            "type": "integer",
+                            "default": 20
+                        }
+                    },
+                    {
+                        "name": "filters",
+                        "in": "query",
+                        "description": "Filters to apply to the list of documents. Example: [[\"status\",\"=\",\"Open\"]]",
+                        "required": False,
+                        "schema": { "type": "string" }
+                    },
+                    {
+                        "name": "fields",
+                        "in": "query",
+                        "description": "Fields to retrieve. Example: [\"name\", \"subject\"]",
+                        "required": False,
+                        "schema": { "type": "string" }
+                    },
+                    {
+                        "name": "order_by",
+                        "in": "query",
+                        "description": "Field to sort the results by. Example: 'creation desc'",
+                        "required": False,
+                        "schema": { "type": "string" }
+                    }
+                ],
+                "responses": {
+                    "200": {
+                        "description": f"Returns a list of {doctype} documents.",
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "data": {
+                                            "type": "array",
+                                            "items": doctype_schema
+                                        }
+                                    }
                                 }
                             }
                         }
-                    }
+                    },
+                    "401": {"$ref": "#/components/responses/UnauthorizedError"}
                 }
             },
-            "NotFoundError": {
-                "description": "The requested resource could not be found.",
-                "content": {
-                    "application/json": {
-                        "schema": {"$ref": "#/components/schemas/Error"},
-                        "examples": {
-                            "Not Found": {
-                                "value": {
-                                    "exc_type": "frappe.exceptions.DoesNotExistError",
-                                    "exc": "Traceback (most recent call last):...",
-                                    "message": "The resource was not found"
+            "post": {
+                "summary": f"Create {doctype}",
+                "operationId": op_ids["create"],
+                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
+                "tags": [tag_name],
+                "requestBody": {
+                    "description": f"The {doctype} document to be created.",
+                    "required": True,
+                    "content": {
+                        "application/json": {
+                            "schema": doctype_schema
+                        }
+                    }
+                },
+                "responses": {
+                    "200": {
+                        "description": f"Successfully created a new {doctype} document.",
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/Success"}
+                            }
+                        }
+                    },
+                    "400": {"$ref": "#/components/responses/BadRequestError"},
+                    "401": {"$ref": "#/components/responses/UnauthorizedError"}
+                }
+            }
+        },
+        f"{endpoint}/{{name}}": {
+            "parameters": [
+                {
+                    "name": "name",
+                    "in": "path",
+                    "required": True,
+                    "schema": {
+                        "type": "string"
+                    },
+                    "description": f"The name of the {doctype} to retrieve, update, or delete."
+                }
+            ],
+            "get": {
+                "summary": f"Get {doctype} by name",
+                "operationId": op_ids["get"],
+                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
+                "tags": [tag_name],
+                "responses": {
+                    "200": {
+                        "description": f"Returns a single {doctype} document.",
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "data": doctype_schema
+                                    }
                                 }
                             }
                         }
+                    },
+                    "401": {"$ref": "#/components/responses/UnauthorizedError"},
+                    "404": {"$ref": "#/components/responses/NotFoundError"}
+                }
+            },
+            "put": {
+                "summary": f"Update {doctype}",
+                "operationId": op_ids["update"],
+                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
+                "tags": [tag_name],
+                "requestBody": {
+                    "description": "The fields of the DocType to be updated. Only send the fields you want to change.",
+                    "required": True,
+                    "content": {
+                        "application/json": {
+                            "schema": doctype_schema
+                        }
                     }
+                },
+                "responses": {
+                    "200": {
+                        "description": f"Successfully updated the {doctype} document.",
+                        "content": {
+                            "application/json": {
+                                "schema": {"$ref": "#/components/schemas/Success"}
+                            }
+                        }
+                    },
+                    "400": {"$ref": "#/components/responses/BadRequestError"},
+                    "401": {"$ref": "#/components/responses/UnauthorizedError"},
+                    "404": {"$ref": "#/components/responses/NotFoundError"}
                 }
             },
-            "BadRequestError": {
-                "description": "The request was malformed or invalid.",
-                "content": {
-                    "application/json": {
-                        "schema": {"$ref": "#/components/schemas/Error"},
-                        "examples": {
-                            "Bad Request": {
-                                "value": {
-                                    "exc_type": "frappe.exceptions.ValidationError",
-                                    "exc": "Traceback (most recent call last):...",
-                                    "message": "Mandatory field 'title' is not set."
+            "delete": {
+                "summary": f"Delete {doctype}",
+                "operationId": op_ids["delete"],
+                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
+                "tags": [tag_name],
+                "responses": {
+                    "200": {
+                        "description": f"Successfully deleted the {doctype} document.",
+                        "content": {
+                            "application/json": {
+                                "schema": {
+                                    "type": "object",
+                                    "properties": {
+                                        "message": {"type": "string", "example": "ok"}
+                                    }
                                 }
                             }
                         }
-                    }
+                    },
+                    "401": {"$ref": "#/components/responses/UnauthorizedError"},
+                    "404": {"$ref": "#/components/responses/NotFoundError"}
                 }
             }
         }
+    }
+
+
+def extract_doctype_item(doctype, module_name, display_app_name, app_rename_map, required_fields, link_enums):
+    """Reads everything needed to build the endpoints of one DocType into plain data.
+
+    This is the only part of a DocType's build that touches the database; the rest runs
+    in `build_doctype_entry`, which may be in a worker process.
+    """
+    doctype_meta = frappe.get_meta(doctype)
+    op_ids = get_doctype_operation_ids(doctype, doctype_meta, app_rename_map)
+
+    tag_name = f"{doctype} DocType"
+    description_app_name = display_app_name if display_app_name.lower().endswith(" app") else f"{display_app_name} app"
+    tag_description = f"Endpoints for the **{doctype}** DocType in the **{module_name}** module in the **{description_app_name}**."
+
+    if doctype_meta.issingle:
+        example_doc = frappe.get_doc(doctype).as_dict()
+    else:
+        try:
+            example_doc = frappe.get_list(doctype, limit=1, as_list=False)
+            example_doc = example_doc[0] if example_doc else {}
+        except Exception:
+            example_doc = {}
+
+    fields = extract_schema_fields(doctype, required_fields, link_enums)
+    return {
+        "doctype": doctype,
+        "issingle": doctype_meta.issingle,
+        "fields": fields,
+        "child_fields": extract_child_fields(fields, required_fields, link_enums),
+        "example_doc": dict(example_doc),
+        "op_ids": op_ids,
+        "tag": {"name": tag_name, "description": tag_description},
+    }
+
+
+def build_doctype_entry(item):
+    """Builds the tag and endpoints for one DocType from `extract_doctype_item` output."""
+    doctype_schema = build_schema(item["fields"], item["example_doc"], item["child_fields"])
+    return {
+        "tag": item["tag"],
+        "paths": get_doctype_paths(item["doctype"], item["issingle"], doctype_schema, item["tag"]["name"], item["op_ids"]),
+    }
+
+
+def _hash(*parts):
+    return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _hash_file(file_path):
+    with open(file_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _resolve_app_module(module, apps, relative_to=None):
+    """
+    Returns the source file of an app module such as `rokct.rokct.tenders.ingest`, or None.
+    With `relative_to` (a package directory), `module` is resolved as a relative import.
+    """
+    parts = module.split(".") if module else []
+    if relative_to:
+        base = os.path.join(relative_to, *parts)
+    elif parts and parts[0] in apps:
+        base = frappe.get_app_path(parts[0], *parts[1:])
+    else:
+        return None
+    for candidate in (f"{base}.py", os.path.join(base, "__init__.py")):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
 
 
+def _get_imported_app_files(file_path, apps):
+    """The source files of every app module `file_path` imports, directly or through other app modules."""
+    seen = set()
+    pending = [file_path]
+    while pending:
+        current = pending.pop()
+        with open(current, encoding="utf-8") as f:
+            tree = ast.parse(f.read())
+
+        modules = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                modules.extend((alias.name, None) for alias in node.names)
+            elif isinstance(node, ast.ImportFrom):
+                package_dir = None
+                if node.level:
+                    # Relative imports only resolve inside a package, never for a top-level API file.
+                    if current == file_path:
+                        continue
+                    package_dir = os.path.dirname(current)
+                    for _ in range(node.level - 1):
+                        package_dir = os.path.dirname(package_dir)
+                prefix = f"{node.module}." if node.module else ""
+                if node.module:
+                    modules.append((node.module, package_dir))
+                # `from package import module` imports a module, not a member.
+                modules.extend((f"{prefix}{alias.name}", package_dir) for alias in node.names)
+
+        for module, package_dir in modules:
+            path = _resolve_app_module(module, apps, package_dir)
+            if path and path != file_path and path not in seen:
+                seen.add(path)
+                pending.append(path)
+    return sorted(seen)
+
+
+def hash_api_file(file_path, apps):
+    """
+    Hashes an API file together with the app modules it imports. `inspect.getmembers` also
+    documents functions imported into the file, so a change to one of those modules has to
+    invalidate the cached spec as well.
+    """
+    return _hash(_hash_file(file_path), [(path, _hash_file(path)) for path in _get_imported_app_files(file_path, apps)])
+
+
+def get_doctype_fingerprints():
+    """
+    Returns a fingerprint per DocType that changes whenever its generated schema could:
+    when the DocType, its child tables, or their Custom Fields / Property Setters change.
+    """
+    modified = {name: str(value) for name, value in frappe.db.sql("SELECT name, modified FROM `tabDocType`")}
+    customized = {}
+    for table, field in (("Custom Field", "dt"), ("Property Setter", "doc_type")):
+        for doctype, value in frappe.db.sql(f"SELECT `{field}`, MAX(modified) FROM `tab{table}` GROUP BY `{field}`"):
+            customized[doctype] = max(customized.get(doctype, ""), str(value))
+
+    children = {}
+    for parent, child in frappe.db.sql(
+        "SELECT parent, options FROM `tabDocField` WHERE fieldtype = 'Table' AND parenttype = 'DocType'"
+    ):
+        children.setdefault(parent, []).append(child)
+
+    return {
+        doctype: _hash(
+            value, customized.get(doctype),
+            sorted((child, modified.get(child), customized.get(child)) for child in children.get(doctype, []))
+        )
+        for doctype, value in modified.items()
+    }
+
+
+def _get_cache_path():
+    return frappe.get_site_path("private", CACHE_FILE)
+
+
+def load_generation_cache():
+    try:
+        with open(_get_cache_path()) as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+    if cache.get("version") != GENERATOR_CACHE_VERSION:
+        cache = {}
+    return {
+        "version": GENERATOR_CACHE_VERSION,
+        "api_modules": cache.get("api_modules", {}),
+        "doctypes": cache.get("doctypes", {}),
+        "doctype_modules": cache.get("doctype_modules", {}),
+    }
+
+
+def save_generation_cache(cache):
+    path = _get_cache_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def write_compressed_variants(path, data=None):
+    """
+    Writes gzip and, when the `brotli` package is installed, brotli copies of `path` next to
+    it, for web servers that serve precompressed files (nginx `gzip_static` / `brotli_static`).
+    """
+    if data is None:
+        with open(path, "rb") as f:
+            data = f.read()
+
+    with open(f"{path}.gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli:
+        quality = BROTLI_QUALITY if len(data) < LARGE_FILE_BYTES else LARGE_FILE_BROTLI_QUALITY
+        with open(f"{path}.br", "wb") as f:
+            f.write(brotli.compress(data, quality=quality))
+
+
+def has_compressed_variants(path):
+    return os.path.exists(f"{path}.gz") and (brotli is None or os.path.exists(f"{path}.br"))
+
+
+def write_json_file(path, document, indent=4):
+    data = json.dumps(document, indent=indent).encode()
+    with open(path, "wb") as f:
+        f.write(data)
+    write_compressed_variants(path, data)
+
+
+def write_if_changed(path, data):
+    """Writes `data` and its compressed variants unless the file already holds it."""
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data and has_compressed_variants(path):
+                return False
+    except FileNotFoundError:
+        pass
+
+    with open(path, "wb") as f:
+        f.write(data)
+    write_compressed_variants(path, data)
+    return True
+
+
+def write_module_file(output_dir, filename, module_spec, reuse):
+    """Writes a module spec unless the existing file can be reused as is."""
+    module_file_path = os.path.join(output_dir, filename)
+    if reuse and os.path.exists(module_file_path):
+        if not has_compressed_variants(module_file_path):
+            write_compressed_variants(module_file_path)
+        return False
+    write_json_file(module_file_path, module_spec)
+    return True
+
+
+def get_fragment_filename(tag_name):
+    # The hash keeps tags that only differ in punctuation apart.
+    slug = re.sub(r'[^a-zA-Z0-9]+', '-', tag_name).strip('-').lower()
+    return f"{TAG_FRAGMENT_DIR}/{slug}-{hashlib.sha1(tag_name.encode()).hexdigest()[:8]}.json"
+
+
+def split_paths_by_tag(paths):
+    """
+    Splits a paths object into one paths object per tag. Path-level keys such as
+    `parameters` are copied into every fragment that has an operation on the path.
+    """
+    fragments = {}
+    for path, path_item in paths.items():
+        shared = {key: value for key, value in path_item.items() if key not in HTTP_METHODS}
+        for method, operation in path_item.items():
+            if method not in HTTP_METHODS:
+                continue
+            for tag in operation.get("tags") or ["default"]:
+                fragments.setdefault(tag, {}).setdefault(path, dict(shared))[method] = operation
+    return fragments
+
+
+def write_lazy_documents(output_dir, full_swagger, module_tags, app_map):
+    """
+    Writes the documents the Swagger UI page loads lazily: a small index with every tag
+    but no paths, and one compact fragment per tag with that tag's operations. Only
+    changed files are rewritten. Returns the written relative paths and how many changed.
+    """
+    os.makedirs(os.path.join(output_dir, TAG_FRAGMENT_DIR), exist_ok=True)
+    fragments = split_paths_by_tag(full_swagger["paths"])
+
+    tags = []
+    tag_files = {}
+    for tag in full_swagger["tags"] + [{"name": name} for name in fragments]:
+        if tag["name"] not in tag_files:
+            tag_files[tag["name"]] = get_fragment_filename(tag["name"])
+            tags.append(tag)
+
+    files = {INDEX_FILE}
+    changed = 0
+    for tag_name, filename in tag_files.items():
+        data = json.dumps({"paths": fragments.get(tag_name, {})}, separators=(",", ":")).encode()
+        changed += write_if_changed(os.path.join(output_dir, filename), data)
+        files.add(filename)
+
+    index = {
+        "openapi": full_swagger["openapi"],
+        "info": full_swagger["info"],
+        "paths": {},
+        "components": full_swagger["components"],
+        "security": full_swagger["security"],
+        "tags": tags,
+        "x-tag-fragments": tag_files,
+        "x-module-tags": module_tags,
+        "x-apps": app_map,
+        "x-total-doctypes": full_swagger.get("x-total-doctypes"),
+        "x-processed-doctypes": full_swagger.get("x-processed-doctypes"),
+    }
+    changed += write_if_changed(os.path.join(output_dir, INDEX_FILE), json.dumps(index, separators=(",", ":")).encode())
+    return files, changed
+
+
+def remove_stale_files(output_dir, keep):
+    """Deletes JSON documents, and their compressed variants, that are not in `keep`."""
+    for root, dirs, files in os.walk(output_dir):
+        for filename in files:
+            relative_path = os.path.relpath(os.path.join(root, filename), output_dir)
+            document = relative_path[:-3] if relative_path.endswith(COMPRESSED_SUFFIXES) else relative_path
+            if document.endswith(".json") and document not in keep:
+                os.remove(os.path.join(root, filename))
+
+
+def get_worker_count(workers=None):
+    """
+    Worker processes for generation: `workers`, the `swagger_generation_workers` site config
+    key, or the core count, never more than DEFAULT_MAX_WORKERS.
+    """
+    workers = frappe.utils.cint(workers or frappe.conf.get("swagger_generation_workers"))
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return min(workers, DEFAULT_MAX_WORKERS)
+
+
+def _init_worker(site, sites_path):
+    """
+    Gives each forked worker its own `frappe.local`. The worker inherits the parent's
+    database and Redis sockets, and closing them here would close them for the parent too,
+    so the references are dropped instead. The worker then starts without a database
+    connection, and a stray query fails instead of writing to the parent's socket.
+    """
+    frappe.local.db = None
+    frappe.destroy()
+    frappe.init(site=site, sites_path=sites_path)
+
+    # Forget the pooled Redis connections without disconnecting them; new ones are opened on first use.
+    frappe.cache().connection_pool.reset()
+    from frappe.utils import background_jobs
+    queue_connection = getattr(background_jobs, "_redis_queue_conn", None)
+    if queue_connection:
+        queue_connection.connection_pool.reset()
+
+
+def build_api_module(job):
+    """Worker: imports one API file, then builds and writes its module file."""
+    errors = []
+    try:
+        module_spec = build_api_module_spec(
+            job["app"], job["file_path"], job["module_name"], job["display_app_name"],
+            job["base_swagger"], job["app_rename_map"], errors.append
+        )
+        # Round-trip through JSON so cached and fresh specs serialize identically.
+        module_spec["paths"] = json.loads(json.dumps(module_spec["paths"]))
+        write_module_file(job["output_dir"], job["filename"], module_spec, reuse=False)
+    except Exception as e:
+        return {"error": f"Error loading or processing file {job['file_path']}: {str(e)}", "errors": errors}
+    return {"paths": module_spec["paths"], "tags": module_spec["tags"], "errors": errors}
+
+
+def build_doctype_module(job):
+    """Worker: builds the uncached DocTypes of one module and writes its module file.
+
+    Only the plain data in `job` is used. Returns the built entries, so the parent does
+    not receive back the cached entries it sent.
+    """
+    module_spec = new_module_spec(job["base_swagger"])
+    built, failed = {}, []
+    changed = False
+
+    for item in job["items"]:
+        entry = item.get("entry")
+        if entry is None:
+            changed = True
+            if "error" in item:
+                failed.append({"doctype": item["doctype"], "error": item["error"]})
+                continue
+            try:
+                entry = {"hash": item["hash"], **json.loads(json.dumps(build_doctype_entry(item)))}
+            except Exception as e:
+                failed.append({"doctype": item["doctype"], "error": str(e)})
+                continue
+            built[item["doctype"]] = entry
+
+        module_spec["tags"].append(entry["tag"])
+        module_spec["paths"].update(entry["paths"])
+
+    # The module file is also stale if a DocType was added, removed or excluded.
+    module_hash = _hash(job["filename"], [tag["name"] for tag in module_spec["tags"]])
+    reuse = not changed and module_hash == job["previous_hash"]
+    written = write_module_file(job["output_dir"], job["filename"], module_spec, reuse)
+    return {"built": built, "failed": failed, "module_hash": module_hash, "written": written}
+
+
+def run_jobs(tasks, workers):
+    """Runs `(function, job)` pairs and returns their results in task order.
+
+    With more than one worker the tasks run in a pool of forked processes, largest
+    first so a big module does not start last and hold up the merge.
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        return [func(job) for func, job in tasks]
+
+    context = multiprocessing.get_context("fork")
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=context,
+                             initializer=_init_worker, initargs=(frappe.local.site, frappe.local.sites_path)) as executor:
+        order = sorted(range(len(tasks)), key=lambda i: -len(tasks[i][1].get("items", ())))
+        futures = {i: executor.submit(*tasks[i]) for i in order}
+        return [futures[i].result() for i in range(len(tasks))]
+
+
+@frappe.whitelist()
+def generate_swagger_json():
+    """
+    Enqueues an incremental regeneration of the Swagger JSON. Generation forks worker
+    processes, so it runs on the long queue rather than in the web request.
+    Options are only available to server-side callers of `build_swagger_json`.
+    """
+    frappe.only_for("System Manager")
+    frappe.enqueue(
+        "rokct.swagger.swagger_generator.build_swagger_json",
+        queue="long",
+        job_id="swagger_generation",
+        deduplicate=True
+    )
+    return {"status": "queued"}
+
+
+def build_swagger_json(force=False, workers=None):
+    """Generate Swagger JSON documentation for all API methods.
+
+    This function processes all Python files in the `api` directories of installed apps
+    to generate a Swagger JSON file that describes the API methods.
+
+    Generation is incremental: API files are only re-imported when their content hash
+    changes and DocType endpoints are only rebuilt when the DocType (or its child tables
+    and customizations) was modified. Unchanged module files are left in place. Pass
+    `force` to rebuild everything.
+
+    DocType metadata is read here, then modules are built and written by `workers`
+    processes (see `get_worker_count`) and merged in a fixed order, so the output is the
+    same for any number of workers.
+    """
+    force = frappe.utils.cint(force)
+    started = time.monotonic()
+    swagger_settings = frappe.get_single("Swagger Settings")
+    swagger_settings.generation_status = "In Progress"
+    swagger_settings.last_generation_time = frappe.utils.now_datetime()
+    swagger_settings.generation_log = ""  # Clear previous logs
+    swagger_settings.save(ignore_permissions=True)
+    frappe.db.commit()
+
+    skipped_items_log = []
+    app_to_modules_map = {}
+    stats = frappe._dict({"api_modules_built": 0, "api_modules_reused": 0, "doctypes_built": 0, "doctypes_reused": 0, "files_written": 0, "fragments_written": 0, "workers": get_worker_count(workers)})
+
+    try:
+        # Get settings
+        excluded_modules = {d.module.lower() for d in swagger_settings.get("excluded_modules", [])}
+        excluded_doctypes = {d.doctype for d in swagger_settings.get("excluded_doctypes", [])}
+        app_rename_map = {rule.original_name.lower(): rule.new_name for rule in swagger_settings.get("app_renaming_rules", [])}
+
+        old_cache = {} if force else load_generation_cache()
+        cache = {"version": GENERATOR_CACHE_VERSION, "api_modules": {}, "doctypes": {}, "doctype_modules": {}}
+
+        # Define the output directory and ensure it exists
+        output_dir = os.path.join(frappe.get_app_path('rokct'), 'public', 'api')
+        os.makedirs(output_dir, exist_ok=True)
+        output_files = set(FIXED_OUTPUT_FILES)
+
+        # Initialize the Swagger specification
+        base_swagger = get_base_swagger()
+
         # Get the path to the Frappe bench directory
         frappe_bench_dir = frappe.utils.get_bench_path()
         file_paths = []
@@ -503,6 +1261,7 @@ def generate_swagger_json():
 
         # Get all DocTypes and group them by app
         all_doctypes = frappe.db.get_list("DocType", pluck="name", ignore_permissions=True)
+        fingerprints = get_doctype_fingerprints()
         failed_doctypes = []
         for doctype in all_doctypes:
             try:
@@ -545,11 +1304,13 @@ def generate_swagger_json():
         total_doctypes = len(all_doctypes)
         processed_doctypes_count = 0
 
-        # Process each Python file found to create module-specific JSONs
+        # Plan the API modules: unchanged files are reused from the cache, the rest are
+        # imported and built in worker processes.
+        api_modules = []
+        installed_apps = frappe.get_installed_apps()
         for app,file_path in file_paths:
             try:
                 if os.path.isfile(file_path) and app in str(file_path):
-                    module = load_module_from_file(file_path)
                     module_name = os.path.basename(file_path).replace(".py", "")
 
                     # Skip excluded modules
@@ -557,45 +1318,30 @@ def generate_swagger_json():
                         skipped_items_log.append(f"Skipped API Module '{module_name}': Module is in exclusion list.")
                         continue
 
-                    # Group modules by app for the dropdown
                     display_app_name = app_rename_map.get(app, app)
-                    if display_app_name not in app_to_modules_map:
-                        app_to_modules_map[display_app_name] = set()
-                    app_to_modules_map[display_app_name].add(module_name)
-
-                    module_spec = {
-                        "openapi": "3.0.0",
-                        "info": {
-                            "title": "PLATFORM API",
-                            "version": "v1.0.0"
-                        },
-                        "paths": {},
-                        "tags": [],
-                        "components": base_swagger["components"],
-                        "security": base_swagger["security"]
-                    }
-
-                    tag_name = f"{display_app_name} - {module_name}"
-                    description_app_name = display_app_name if display_app_name.lower().endswith(" app") else f"{display_app_name} app"
-                    module_spec["tags"].append({"name": tag_name, "description": f"Endpoints for the **{module_name}** module in the **{description_app_name}**."})
-
-                    for func_name, func in inspect.getmembers(module, inspect.isfunction):
-                        process_function(app, module_name, func_name, func, module_spec, module, app_rename_map)
-
                     safe_module_name = re.sub(r'[^a-zA-Z0-9\-_]', '', f"{display_app_name}-{module_name}")
-                    module_file_path = os.path.join(output_dir, f"module-{safe_module_name}.json")
-                    with open(module_file_path, "w") as module_file:
-                        json.dump(module_spec, module_file, indent=4)
-
-                    full_swagger["paths"].update(module_spec["paths"])
-                    full_swagger["tags"].extend(module_spec["tags"])
-
+                    filename = f"module-{safe_module_name}.json"
+                    content_hash = _hash(hash_api_file(file_path, installed_apps), app_rename_map)
+
+                    cached = old_cache.get("api_modules", {}).get(file_path)
+                    api_modules.append({
+                        "app": app,
+                        "file_path": file_path,
+                        "module_name": module_name,
+                        "display_app_name": display_app_name,
+                        "filename": filename,
+                        "hash": content_hash,
+                        "cached": cached if cached and cached["hash"] == content_hash and cached["file"] == filename else None,
+                    })
                 else:
                     print(f"File not found: {file_path}")
             except Exception as e:
                 frappe.log_error(f"Error loading or processing file {file_path}: {str(e)}")
 
-        # Add DocType endpoints to the full swagger spec and create module-specific DocType JSONs
+        # Plan the DocType modules: read the metadata of every DocType that must be rebuilt
+        # here, so the workers never need the database.
+        required_fields, link_enums = get_required_fields(), {}
+        doctype_modules = []
         for module_name, doctypes in app_doctypes.items():
             # Skip excluded modules
             if module_name.lower() in excluded_modules:
@@ -612,322 +1358,96 @@ def generate_swagger_json():
             except frappe.DoesNotExistError:
                 display_app_name = "unknown" # Fallback app
 
-            module_spec = {
-                "openapi": "3.0.0",
-                "info": {
-                    "title": "PLATFORM API",
-                    "version": "v1.0.0"
-                },
-                "paths": {},
-                "tags": [],
-                "components": base_swagger["components"],
-                "security": base_swagger["security"]
-            }
-
+            items = []
             for doctype in doctypes:
-                try:
-                    # Skip excluded doctypes
-                    if doctype in excluded_doctypes:
-                        skipped_items_log.append(f"Skipped DocType '{doctype}': DocType is in exclusion list.")
-                        continue
+                # Skip excluded doctypes
+                if doctype in excluded_doctypes:
+                    skipped_items_log.append(f"Skipped DocType '{doctype}': DocType is in exclusion list.")
+                    continue
 
-                    doctype_meta = frappe.get_meta(doctype)
-                    sanitized_doctype = doctype.replace(" ", "_")
-
-                    # Default operation IDs
-                    get_op_id = f"get_api_v1_resource_{sanitized_doctype}"
-                    list_op_id = f"get_api_v1_resource_{sanitized_doctype}"
-                    create_op_id = f"post_api_v1_resource_{sanitized_doctype}"
-                    update_op_id = f"put_api_v1_resource_{sanitized_doctype}"
-                    delete_op_id = f"delete_api_v1_resource_{sanitized_doctype}"
-
-                    # Custom operation IDs for 'paas' module
-                    if doctype_meta.module.lower() == 'paas':
-                        try:
-                            # Dynamically find the app name from the module definition
-                            module_def = frappe.get_doc("Module Def", doctype_meta.module)
-                            app_name_for_path = app_rename_map.get(module_def.app_name, module_def.app_name)
-
-                            # Construct the custom prefix for the operationId
-                            prefix = f"/api/v1/method/{app_name_for_path}.{doctype_meta.module.lower()}"
-
-                            # Set the custom operation IDs
-                            get_op_id = f"{prefix}.get_{sanitized_doctype}"
-                            list_op_id = f"{prefix}.list_{sanitized_doctype}"
-                            create_op_id = f"{prefix}.create_{sanitized_doctype}"
-                            update_op_id = f"{prefix}.update_{sanitized_doctype}"
-                            delete_op_id = f"{prefix}.delete_{sanitized_doctype}"
-
-                        except frappe.DoesNotExistError:
-                            # If Module Def is not found for some reason, log it and fall back to default operation IDs
-                            frappe.log_error(f"Swagger Generation: Module Def '{doctype_meta.module}' not found for DocType '{doctype}'.")
-                            pass
-
-                    tag_name = f"{doctype} DocType"
-                    description_app_name = display_app_name if display_app_name.lower().endswith(" app") else f"{display_app_name} app"
-                    tag_description = f"Endpoints for the **{doctype}** DocType in the **{module_name}** module in the **{description_app_name}**."
-                    module_spec["tags"].append({"name": tag_name, "description": tag_description})
-                    full_swagger["tags"].append({"name": tag_name, "description": tag_description})
-
-                    if doctype_meta.issingle:
-                        # Handle single DocTypes
-                        example_doc = frappe.get_doc(doctype).as_dict()
-                        doctype_schema = get_doctype_schema(doctype, example_doc)
-                        endpoint = f"/api/v1/resource/{urllib.parse.quote(doctype)}"
-
-                        # Add GET operation for single DocType
-                        module_spec["paths"][endpoint] = {
-                            "get": {
-                                "summary": f"Get {doctype}",
-                                "operationId": get_op_id,
-                                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
-                                "tags": [tag_name],
-                                "responses": {
-                                    "200": {
-                                        "description": f"Returns the {doctype} document.",
-                                        "content": {
-                                            "application/json": {
-                                                "schema": {
-                                                    "type": "object",
-                                                    "properties": {"data": doctype_schema}
-                                                }
-                                            }
-                                        }
-                                    },
-                                    "401": {"$ref": "#/components/responses/UnauthorizedError"}
-                                }
-                            },
-                            "put": {
-                                "summary": f"Update {doctype}",
-                                "operationId": update_op_id,
-                                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
-                                "tags": [tag_name],
-                                "requestBody": {
-                                    "description": f"The {doctype} document to be updated.",
-                                    "required": True,
-                                    "content": {
-                                        "application/json": {"schema": doctype_schema}
-                                    }
-                                },
-                                "responses": {
-                                    "200": {
-                                        "description": f"Successfully updated the {doctype} document.",
-                                        "content": {
-                                            "application/json": {
-                                                "schema": {"$ref": "#/components/schemas/Success"}
-                                            }
-                                        }
-                                    },
-                                    "400": {"$ref": "#/components/responses/BadRequestError"},
-                                    "401": {"$ref": "#/components/responses/UnauthorizedError"}
-                                }
-                            }
-                        }
-                    else:
-                        # Handle regular DocTypes
-                        try:
-                            example_doc = frappe.get_list(doctype, limit=1, as_list=False)
-                            example_doc = example_doc[0] if example_doc else {}
-                        except Exception:
-                            example_doc = {}
-                        doctype_schema = get_doctype_schema(doctype, example_doc)
-
-                        endpoint = f"/api/v1/resource/{urllib.parse.quote(doctype)}"
-                        module_spec["paths"][endpoint] = {
-                            "get": {
-                                "summary": f"List {doctype}",
-                                "operationId": list_op_id,
-                                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
-                                "tags": [tag_name],
-                                "parameters": [
-                                    {
-                                        "name": "limit_start",
-                                        "in": "query",
-                                        "description": "Start fetching records from this index.",
-                                        "required": False,
-                                        "schema": {
-                                            "type": "integer",
-                                            "default": 0
-                                        }
-                                    },
-                                    {
-                                        "name": "limit_page_length",
-                                        "in": "query",
-                                        "description": "Number of records to return in this page.",
-                                        "required": False,
-                                        "schema": {
-                                            "type": "integer",
-                                            "default": 20
-                                        }
-                                    },
-                                    {
-                                        "name": "filters",
-                                        "in": "query",
-                                        "description": "Filters to apply to the list of documents. Example: [[\"status\",\"=\",\"Open\"]]",
-                                        "required": False,
-                                        "schema": { "type": "string" }
-                                    },
-                                    {
-                                        "name": "fields",
-                                        "in": "query",
-                                        "description": "Fields to retrieve. Example: [\"name\", \"subject\"]",
-                                        "required": False,
-                                        "schema": { "type": "string" }
-                                    },
-                                    {
-                                        "name": "order_by",
-                                        "in": "query",
-                                        "description": "Field to sort the results by. Example: 'creation desc'",
-                                        "required": False,
-                                        "schema": { "type": "string" }
-                                    }
-                                ],
-                                "responses": {
-                                    "200": {
-                                        "description": f"Returns a list of {doctype} documents.",
-                                        "content": {
-                                            "application/json": {
-                                                "schema": {
-                                                    "type": "object",
-                                                    "properties": {
-                                                        "data": {
-                                                            "type": "array",
-                                                            "items": doctype_schema
-                                                        }
-                                                    }
-                                                }
-                                            }
-                                        }
-                                    },
-                                    "401": {"$ref": "#/components/responses/UnauthorizedError"}
-                                }
-                            },
-                            "post": {
-                                "summary": f"Create {doctype}",
-                                "operationId": create_op_id,
-                                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
-                                "tags": [tag_name],
-                                "requestBody": {
-                                    "description": f"The {doctype} document to be created.",
-                                    "required": True,
-                                    "content": {
-                                        "application/json": {
-                                            "schema": doctype_schema
-                                        }
-                                    }
-                                },
-                                "responses": {
-                                    "200": {
-                                        "description": f"Successfully created a new {doctype} document.",
-                                        "content": {
-                                            "application/json": {
-                                                "schema": {"$ref": "#/components/schemas/Success"}
-                                            }
-                                        }
-                                    },
-                                    "400": {"$ref": "#/components/responses/BadRequestError"},
-                                    "401": {"$ref": "#/components/responses/UnauthorizedError"}
-                                }
-                            }
-                        }
-                        module_spec["paths"][f"{endpoint}/{{name}}"] = {
-                            "parameters": [
-                                {
-                                    "name": "name",
-                                    "in": "path",
-                                    "required": True,
-                                    "schema": {
-                                        "type": "string"
-                                    },
-                                    "description": f"The name of the {doctype} to retrieve, update, or delete."
-                                }
-                            ],
-                            "get": {
-                                "summary": f"Get {doctype} by name",
-                                "operationId": get_op_id,
-                                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
-                                "tags": [tag_name],
-                                "responses": {
-                                    "200": {
-                                        "description": f"Returns a single {doctype} document.",
-                                        "content": {
-                                            "application/json": {
-                                                "schema": {
-                                                    "type": "object",
-                                                    "properties": {
-                                                        "data": doctype_schema
-                                                    }
-                                                }
-                                            }
-                                        }
-                                    },
-                                    "401": {"$ref": "#/components/responses/UnauthorizedError"},
-                                    "404": {"$ref": "#/components/responses/NotFoundError"}
-                                }
-                            },
-                            "put": {
-                                "summary": f"Update {doctype}",
-                                "operationId": update_op_id,
-                                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
-                                "tags": [tag_name],
-                                "requestBody": {
-                                    "description": "The fields of the DocType to be updated. Only send the fields you want to change.",
-                                    "required": True,
-                                    "content": {
-                                        "application/json": {
-                                            "schema": doctype_schema
-                                        }
-                                    }
-                                },
-                                "responses": {
-                                    "200": {
-                                        "description": f"Successfully updated the {doctype} document.",
-                                        "content": {
-                                            "application/json": {
-                                                "schema": {"$ref": "#/components/schemas/Success"}
-                                            }
-                                        }
-                                    },
-                                    "400": {"$ref": "#/components/responses/BadRequestError"},
-                                    "401": {"$ref": "#/components/responses/UnauthorizedError"},
-                                    "404": {"$ref": "#/components/responses/NotFoundError"}
-                                }
-                            },
-                            "delete": {
-                                "summary": f"Delete {doctype}",
-                                "operationId": delete_op_id,
-                                "security": [{"BasicAuth": []}, {"BearerAuth": []}],
-                                "tags": [tag_name],
-                                "responses": {
-                                    "200": {
-                                        "description": f"Successfully deleted the {doctype} document.",
-                                        "content": {
-                                            "application/json": {
-                                                "schema": {
-                                                    "type": "object",
-                                                    "properties": {
-                                                        "message": {"type": "string", "example": "ok"}
-                                                    }
-                                                }
-                                            }
-                                        }
-                                    },
-                                    "401": {"$ref": "#/components/responses/UnauthorizedError"},
-                                    "404": {"$ref": "#/components/responses/NotFoundError"}
-                                }
-                            }
-                        }
-                    processed_doctypes_count += 1
-                except Exception as e:
-                    failed_doctypes.append({"doctype": doctype, "error": str(e)})
+                doctype_hash = _hash(fingerprints.get(doctype), module_name, display_app_name, app_rename_map)
+                entry = old_cache.get("doctypes", {}).get(doctype)
+                if entry and entry["hash"] == doctype_hash:
+                    items.append({"doctype": doctype, "entry": entry})
                     continue
+                try:
+                    items.append({"hash": doctype_hash, **extract_doctype_item(doctype, module_name, display_app_name, app_rename_map, required_fields, link_enums)})
+                except Exception as e:
+                    items.append({"doctype": doctype, "error": str(e)})
 
             safe_module_name = re.sub(r'[^a-zA-Z0-9\-_]', '', module_name)
-            module_file_path = os.path.join(output_dir, f"module-{display_app_name}-{safe_module_name}.json")
-            with open(module_file_path, "w") as module_file:
-                json.dump(module_spec, module_file, indent=4)
+            doctype_modules.append({
+                "module_name": module_name,
+                "filename": f"module-{display_app_name}-{safe_module_name}.json",
+                "previous_hash": old_cache.get("doctype_modules", {}).get(module_name),
+                "items": items,
+            })
+
+        # Build everything that is not cached, in parallel, then merge in plan order so the
+        # output does not depend on which worker finished first.
+        shared = {"base_swagger": base_swagger, "app_rename_map": app_rename_map, "output_dir": output_dir}
+        tasks = [(build_api_module, {**shared, **job}) for job in api_modules if not job["cached"]]
+        tasks += [
+            (build_doctype_module, {**shared, **job}) for job in doctype_modules
+            if any("entry" not in item for item in job["items"])
+        ]
+        results = iter(run_jobs(tasks, stats.workers))
+        module_tags = {}
+
+        for job in api_modules:
+            if job["cached"]:
+                module_spec = new_module_spec(base_swagger)
+                module_spec["paths"], module_spec["tags"] = job["cached"]["paths"], job["cached"]["tags"]
+                stats.files_written += write_module_file(output_dir, job["filename"], module_spec, reuse=True)
+                stats.api_modules_reused += 1
+            else:
+                result = next(results)
+                for message in result["errors"]:
+                    frappe.log_error(message)
+                if result.get("error"):
+                    frappe.log_error(result["error"])
+                    continue
+                module_spec = result
+                stats.files_written += 1
+                stats.api_modules_built += 1
+
+            # Group modules by app for the dropdown
+            if job["display_app_name"] not in app_to_modules_map:
+                app_to_modules_map[job["display_app_name"]] = set()
+            app_to_modules_map[job["display_app_name"]].add(job["module_name"])
+
+            module_tags.setdefault(job["filename"], []).extend(tag["name"] for tag in module_spec["tags"])
+            cache["api_modules"][job["file_path"]] = {
+                "hash": job["hash"], "file": job["filename"], "paths": module_spec["paths"], "tags": module_spec["tags"]
+            }
+            output_files.add(job["filename"])
 
             full_swagger["paths"].update(module_spec["paths"])
+            full_swagger["tags"].extend(module_spec["tags"])
+
+        for job in doctype_modules:
+            if any("entry" not in item for item in job["items"]):
+                result = next(results)
+            else:
+                result = build_doctype_module({**shared, **job})
+
+            for item in job["items"]:
+                doctype = item["doctype"]
+                entry = item.get("entry") or result["built"].get(doctype)
+                if not entry:
+                    continue
+                cache["doctypes"][doctype] = entry
+                module_tags.setdefault(job["filename"], []).append(entry["tag"]["name"])
+                full_swagger["tags"].append(entry["tag"])
+                full_swagger["paths"].update(entry["paths"])
+                processed_doctypes_count += 1
+
+            failed_doctypes.extend(result["failed"])
+            stats.doctypes_built += len(result["built"])
+            stats.doctypes_reused += sum(1 for item in job["items"] if "entry" in item)
+            stats.files_written += result["written"]
+            cache["doctype_modules"][job["module_name"]] = result["module_hash"]
+            output_files.add(job["filename"])
 
         # Convert sets to sorted lists for consistent JSON output
         final_app_map = {app: sorted(list(modules)) for app, modules in app_to_modules_map.items()}
@@ -936,17 +1456,27 @@ def generate_swagger_json():
         full_swagger["x-total-doctypes"] = total_doctypes
         full_swagger["x-processed-doctypes"] = processed_doctypes_count
 
-        full_file_path = os.path.join(output_dir, "swagger-full.json")
-        with open(full_file_path, "w") as full_file:
-            json.dump(full_swagger, full_file, indent=4)
+        write_json_file(os.path.join(output_dir, "swagger-full.json"), full_swagger)
+        write_json_file(os.path.join(output_dir, "modules.json"), {"apps": final_app_map})
 
-        modules_file_path = os.path.join(output_dir, "modules.json")
-        with open(modules_file_path, "w") as modules_file:
-            json.dump({"apps": final_app_map}, modules_file, indent=4)
+        lazy_files, stats.fragments_written = write_lazy_documents(output_dir, full_swagger, module_tags, final_app_map)
+        output_files |= lazy_files
+
+        # Remove files left over from modules and tags that no longer exist or are now excluded
+        remove_stale_files(output_dir, output_files)
+
+        save_generation_cache(cache)
+        stats.seconds = round(time.monotonic() - started, 2)
 
         log_summary = f"Processed: {processed_doctypes_count}, Skipped: {len(skipped_items_log)}, Failed: {len(failed_doctypes)}, Total Found: {total_doctypes}"
+        timing_summary = (
+            f"{'Full' if force else 'Incremental'} run took {stats.seconds}s with {stats.workers} workers. "
+            f"API modules: {stats.api_modules_built} built, {stats.api_modules_reused} reused. "
+            f"DocTypes: {stats.doctypes_built} built, {stats.doctypes_reused} reused. "
+            f"Module files written: {stats.files_written}, tag fragments written: {stats.fragments_written}."
+        )
 
-        full_log = f"--- Generation Summary ---\n{log_summary}\n\n"
+        full_log = f"--- Generation Summary ---\n{log_summary}\n{timing_summary}\n\n"
 
         if skipped_items_log:
             full_log += "--- Skipped Items ---\n" + "\n".join(skipped_items_log) + "\n\n"
@@ -972,6 +1502,7 @@ def generate_swagger_json():
         frappe.msgprint(f"<b>Swagger Generation Complete</b><br><br>{log_summary.replace(', ', '<br>')}<br><br><i>Check the Generation Log for details.</i>")
         swagger_settings.save(ignore_permissions=True)
         frappe.db.commit()
+        return stats
 
     except Exception as e:
         # On failure
@@ -980,4 +1511,36 @@ def generate_swagger_json():
         swagger_settings.save(ignore_permissions=True)
         frappe.db.commit()
         frappe.log_error(f"Swagger Generation Failed: {str(e)}", "Swagger Generator")
-        raise
\ No newline at end of file
+        raise
+
+
+def _hash_output_dir(output_dir):
+    return _hash({
+        filename: _hash_file(os.path.join(output_dir, filename))
+        for filename in sorted(os.listdir(output_dir)) if filename.endswith(".json")
+    })
+
+
+def benchmark_swagger_generation(worker_counts=None):
+    """
+    Times a full generation with each worker count, checks that every run wrote identical
+    files, then times an incremental run over the unchanged tree.
+
+        bench --site <site> execute rokct.swagger.swagger_generator.benchmark_swagger_generation --kwargs "{'worker_counts': [1, 2, 4, 8]}"
+    """
+    output_dir = os.path.join(frappe.get_app_path('rokct'), 'public', 'api')
+    worker_counts = worker_counts or sorted({1, 2, 4, get_worker_count()})
+
+    runs = []
+    for workers in worker_counts:
+        stats = build_swagger_json(force=True, workers=workers)
+        runs.append({"workers": workers, "seconds": stats.seconds, "output_hash": _hash_output_dir(output_dir)})
+        print(f"Full run with {workers} workers: {stats.seconds}s ({runs[0]['seconds'] / max(stats.seconds, 0.01):.2f}x)")
+
+    identical = len({run["output_hash"] for run in runs}) == 1
+    print(f"Output identical across worker counts: {identical}")
+
+    incremental = build_swagger_json()
+    print(f"Incremental run: {incremental.seconds}s "
+          f"({incremental.api_modules_reused} API modules and {incremental.doctypes_reused} DocTypes reused)")
+    return {"full_runs": runs, "identical": identical, "incremental_seconds": incremental.seconds, "incremental": dict(incremental)}